@@ -1,14 +1,22 @@
 import json
 import logging
 import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 
 # Import the AI model for enhanced capabilities
 from ai_model import generate_explanation, generate_alternative_activities, analyze_activity_safety, personalize_recommendation
+from route_optimizer import route_optimizer
+from goal_tracker import GoalTracker
+from forecast_lookahead import LookaheadEngine
+from id_generator import new_decision_id
+from tracing import traced
+from fast_json import dumps_lossy, loads
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("agentic_core")
 
+DECISION_NAMESPACE = "decisions"  # state store namespace every worker looks decisions up in
+
 class Goal:
     """Represents a high-level traveler goal with measurable success criteria."""
     def __init__(self, name: str, description: str, priority: int = 1, success_criteria: Dict[str, Any] = None):
@@ -36,19 +44,47 @@ class AgenticCore:
     - Self-reflection
     - Proactive problem-solving
     """
-    def __init__(self):
+    def __init__(self, storage: Any = None, store: Any = None):
+        self.storage = storage  # StorageEngine that decisions are persisted to, or None
+        self.store = store  # state store sharing decisions between workers, or None
+        self.traveler_id = None  # Traveler whose trip is tracked; decisions are stored under it
         self.traveler_goals = []  # List of Goal objects
         self.current_context = {}  # Current environmental context
         self.decision_history = []  # History of decisions for self-reflection
+        self.decision_positions = {}  # decision ID -> position in decision_history
         self.confidence_threshold = 0.7  # Threshold for autonomous decisions
         self.reflection_interval = datetime.timedelta(hours=6)  # How often to reflect
         self.last_reflection = datetime.datetime.now()
+        self.goal_tracker = GoalTracker()  # Incremental goal satisfaction for the tracked trip
+        self.lookahead = LookaheadEngine(store=store)  # Forecast-based checks of upcoming outdoor activities
     
     def add_goal(self, goal: Goal) -> None:
         """Add a new traveler goal to the system."""
         self.traveler_goals.append(goal)
+        self.goal_tracker.add_goal(goal)
         logger.info(f"Added new goal: {goal.name}")
     
+    def track_itinerary(self, itinerary: Dict[str, Any]) -> None:
+        """Start tracking goal satisfaction for an itinerary's activities."""
+        # Goals may have been assigned directly to traveler_goals
+        if self.goal_tracker.goals != self.traveler_goals:
+            self.goal_tracker = GoalTracker(self.traveler_goals)
+        self.goal_tracker.track_itinerary(itinerary)
+        self.traveler_id = itinerary.get("traveler_id", self.traveler_id)
+    
+    def activity_completed(self, activity: Dict[str, Any]) -> None:
+        """Record that an activity took place."""
+        self.goal_tracker.complete_activity(activity)
+    
+    def activity_cancelled(self, activity: Dict[str, Any]) -> None:
+        """Record that an activity was dropped from the trip."""
+        self.goal_tracker.cancel_activity(activity)
+    
+    def get_goal_satisfaction(self) -> Dict[str, Any]:
+        """Current satisfaction of every goal, without rescanning the trip."""
+        return self.goal_tracker.to_dict()
+    
+    @traced()
     def update_context(self, context_data: Dict[str, Any]) -> None:
         """Update the current environmental and traveler context."""
         self.current_context.update(context_data)
@@ -78,6 +114,7 @@ class AgenticCore:
         
         return False
     
+    @traced()
     def evaluate_current_plan(self) -> Dict[str, Any]:
         """Evaluate if the current plan is still optimal given the updated context."""
         current_plan = self.current_context.get('current_plan', {})
@@ -98,6 +135,35 @@ class AgenticCore:
         # If we reach here, current plan is still valid
         return current_plan
     
+    @traced()
+    def plan_ahead(self, itinerary: Dict[str, Any], forecast: Dict[str, Any], city: str = "Dubai",
+                   now: datetime.datetime = None) -> List[Dict[str, Any]]:
+        """Propose moving upcoming outdoor activities that the forecast puts in bad weather.
+        
+        Runs against the hourly forecast, so changes can be made hours ahead
+        while bookings are still cheap to move rather than at the heat spike.
+        """
+        limits = [g.success_criteria["max_temperature"] for g in self.traveler_goals if "max_temperature" in g.success_criteria]
+        max_temp = self.current_context.get("preferences", {}).get("max_comfortable_temperature")
+        self.lookahead.max_temperature = min(limits + ([max_temp] if max_temp else []) + [38])
+        
+        self.lookahead.update_forecast(city, forecast)
+        proposals = self.lookahead.scan(itinerary, city=city, now=now)
+        
+        for proposal in proposals:
+            moved = {**proposal["activity"], "time": proposal["suggested_time"]}
+            proposal["decision_id"] = self.record_decision({
+                "original_plan": {"activities": [proposal["activity"]], "date": proposal["date"]},
+                "new_plan": {"activities": [moved] if proposal["suggested_time"] else []},
+                "swaps": [[proposal["activity"], moved]] if proposal["suggested_time"] else [],
+                "issue": "weather",
+                "proactive": True,
+                "timestamp": datetime.datetime.now().isoformat(),
+                "context": self.current_context
+            })
+        return proposals
+    
+    @traced()
     def _check_weather_compatibility(self, plan: Dict[str, Any]) -> bool:
         """Check if current weather is compatible with planned activities using AI for complex cases."""
         if 'weather' not in self.current_context:
@@ -170,6 +236,7 @@ class AgenticCore:
         
         return False
     
+    @traced()
     def _generate_alternative_plan(self, original_plan: Dict[str, Any], issue: str) -> Dict[str, Any]:
         """Generate an alternative plan based on the identified issue."""
         # Create a copy of the original plan to modify
@@ -177,6 +244,7 @@ class AgenticCore:
         new_plan['activities'] = original_plan.get('activities', []).copy()
         new_plan['is_modified'] = True
         new_plan['modification_reason'] = issue
+        swaps = []  # (old, new) activities, counted towards the goals only once the traveler approves
         
         if issue == "weather":
             # Replace outdoor activities with indoor alternatives
@@ -189,6 +257,7 @@ class AgenticCore:
                     )
                     if alternative:
                         new_plan['activities'][i] = alternative
+                        swaps.append((activity, alternative))
                         logger.info(f"Replaced outdoor activity '{activity.get('name')}' with '{alternative.get('name')}'")
         
         elif issue == "energy":
@@ -202,12 +271,27 @@ class AgenticCore:
                     )
                     if alternative:
                         new_plan['activities'][i] = alternative
+                        swaps.append((activity, alternative))
                         logger.info(f"Replaced high-energy activity '{activity.get('name')}' with '{alternative.get('name')}'")
         
-        # Record this decision for self-reflection
-        self._record_decision({
+        # Re-order the day so swapped-in activities don't add needless travel
+        if new_plan['activities']:
+            route = route_optimizer.optimize_day(new_plan['activities'])
+            new_plan['activities'] = [stop['activity'] for stop in route['stops']] + route['unscheduled']
+            new_plan['route'] = {
+                "stops": [{key: value for key, value in stop.items() if key != 'activity'} for stop in route['stops']],
+                "unscheduled": [activity.get('id', activity.get('name')) for activity in route['unscheduled']],
+                "total_travel_minutes": route['total_travel_minutes']
+            }
+        
+        new_plan['goal_satisfaction'] = self.goal_tracker.to_dict()
+        new_plan['goal_delta'] = {name: round(delta, 3) for name, delta in self.goal_tracker.swaps_delta(swaps).items()}
+        
+        # Record this decision for self-reflection; notifications refer to it by ID
+        new_plan['decision_id'] = self.record_decision({
             "original_plan": original_plan,
             "new_plan": new_plan,
+            "swaps": [list(swap) for swap in swaps],
             "issue": issue,
             "timestamp": datetime.datetime.now().isoformat(),
             "context": self.current_context
@@ -215,8 +299,11 @@ class AgenticCore:
         
         return new_plan
     
+    @traced()
     def _find_alternative_activity(self, original_activity: Dict[str, Any], constraints: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Find an alternative activity that meets the given constraints using AI."""
+        """Find an alternative activity that meets the given constraints and best preserves the goals."""
+        candidates = []
+        
         # Try to use the AI model to generate alternatives
         try:
             # Enhance constraints with current context
@@ -231,8 +318,7 @@ class AgenticCore:
             alternatives = generate_alternative_activities(enhanced_constraints)
             
             if alternatives and len(alternatives) > 0:
-                # Use the first alternative as default
-                best_alternative = alternatives[0]
+                candidates.extend(alternatives)
                 
                 # If we have multiple alternatives, use AI to personalize the selection
                 if len(alternatives) > 1:
@@ -243,18 +329,15 @@ class AgenticCore:
                     
                     personalized = personalize_recommendation(user_data, alternatives)
                     if personalized and personalized.get("recommendation"):
-                        best_alternative = personalized.get("recommendation")
-                
-                logger.info(f"AI generated alternative activity: {best_alternative.get('name', 'Unknown')}")
-                return best_alternative
+                        # The personalized pick goes first so it wins goal-delta ties
+                        candidates.insert(0, personalized.get("recommendation"))
                 
         except Exception as e:
             logger.error(f"Error using AI for alternative activity generation: {e}")
-            # Fall back to rule-based alternatives if AI fails
         
-        # Rule-based fallback alternatives
+        # Rule-based alternatives, also used as fallback if AI fails
         if constraints.get("is_outdoor") is False and original_activity.get("category") == "adventure":
-            return {
+            candidates.append({
                 "name": "Dubai Museum Cultural Tour",
                 "description": "Explore Dubai's rich cultural heritage in the air-conditioned Dubai Museum",
                 "location": "Al Fahidi Historical District",
@@ -268,10 +351,10 @@ class AgenticCore:
                     "provider": "Dubai Tourism",
                     "availability": ["10:00", "13:00", "16:00"]
                 }
-            }
+            })
 
         if constraints.get("energy_required_max", 1.0) < 0.6 and original_activity.get("energy_required", 0.5) > 0.7:
-            return {
+            candidates.append({
                 "name": "Luxury Spa Experience",
                 "description": "Relax and rejuvenate with a premium spa treatment",
                 "location": "Five Palm Jumeirah Dubai",
@@ -285,20 +368,114 @@ class AgenticCore:
                     "provider": "Five Palm Jumeirah",
                     "availability": ["11:00", "14:00", "17:00"]
                 }
-            }
-
-        return None
+            })
+        
+        # Pick the candidate that keeps goal satisfaction highest after the swap
+        best_alternative = self.goal_tracker.best_swap(original_activity, candidates)
+        if best_alternative:
+            logger.info(f"Selected alternative activity: {best_alternative.get('name', 'Unknown')} "
+                        f"(goal delta {self.goal_tracker.weighted_delta(original_activity, best_alternative):+.2f})")
+        return best_alternative
     
-    def _record_decision(self, decision_data: Dict[str, Any]) -> None:
-        """Record a decision for later self-reflection."""
+    @traced()
+    def record_decision(self, decision_data: Dict[str, Any]) -> str:
+        """Record a decision for later self-reflection, returning the ID it can be looked up by."""
+        decision_id = decision_data.setdefault("decision_id", new_decision_id())
+        self.decision_positions[decision_id] = len(self.decision_history)
         self.decision_history.append(decision_data)
+        self.save_decision(decision_id)
         
         # Check if it's time for self-reflection
         now = datetime.datetime.now()
         if now - self.last_reflection >= self.reflection_interval:
             self._perform_self_reflection()
             self.last_reflection = now
+        return decision_id
+    
+    def get_decision(self, decision_id: Union[str, int]) -> Optional[Dict[str, Any]]:
+        """A decision by its ID, or by its position in this worker's history.
+        
+        With a shared store an ID also finds decisions another worker made,
+        and the shared copy wins over this worker's, which may be stale.
+        """
+        if isinstance(decision_id, str) and self.store is not None:
+            shared = self.store.get(DECISION_NAMESPACE, decision_id)
+            if shared is not None:
+                return shared
+        position = decision_id if isinstance(decision_id, int) else self.decision_positions.get(decision_id)
+        if position is None or not -len(self.decision_history) <= position < len(self.decision_history):
+            return None
+        return self.decision_history[position]
+    
+    def resolve_decision(self, decision_id: str, accepted: bool) -> bool:
+        """Record whether the traveler accepted a decision; False if it is unknown or was already resolved.
+        
+        With a shared store the decision is resolved there in one step, so it
+        works in any worker and only the first answer counts. Accepting
+        applies the decision's swaps to the goal tracker, so goals only count
+        changes the traveler agreed to.
+        """
+        if self.store is not None and self.store.get(DECISION_NAMESPACE, decision_id) is not None:
+            def resolve(shared):
+                if shared.get("was_accepted") is not None:
+                    return shared, None
+                resolved = {**shared, "was_accepted": accepted}
+                return resolved, resolved
+            
+            decision = self.store.update(DECISION_NAMESPACE, decision_id, resolve)
+            if decision is None:
+                return False
+            position = self.decision_positions.get(decision_id)
+            if position is not None:
+                self.decision_history[position] = decision
+        else:
+            decision = self.get_decision(decision_id)
+            if decision is None or decision.get("was_accepted") is not None:
+                return False
+            decision["was_accepted"] = accepted
+        
+        if accepted:
+            for old_activity, new_activity in decision.get("swaps", []):
+                self.goal_tracker.swap_activity(old_activity, new_activity)
+        self.save_decision(decision_id, decision)
+        return True
     
+    def save_decision(self, decision_id: str, decision: Dict[str, Any] = None) -> None:
+        """Persist a decision, again after it changes, e.g. once the traveler accepts or rejects it."""
+        position = self.decision_positions.get(decision_id)
+        if decision is None:
+            if position is None:
+                return
+            decision = self.decision_history[position]
+        if self.store is not None:
+            # Only JSON-safe values are shared, as they would be read back from storage
+            self.store.put(DECISION_NAMESPACE, decision_id, loads(dumps_lossy(decision)))
+        if self.storage is not None and self.traveler_id:
+            self.storage.save_decision(self.traveler_id, {**decision, "decision_id": decision_id})
+    
+    def clear_decisions(self, traveler_id: str = None) -> None:
+        """Forget every decision, in storage too."""
+        self.traveler_id = traveler_id or self.traveler_id
+        if self.store is not None:
+            for decision_id in self.decision_positions:
+                self.store.delete(DECISION_NAMESPACE, decision_id)
+        self.decision_history.clear()
+        self.decision_positions.clear()
+        if self.storage is not None and self.traveler_id:
+            self.storage.clear_decisions(self.traveler_id)
+    
+    def restore_decisions(self, traveler_id: str) -> int:
+        """Reload a traveler's decision history after a restart, returning how many decisions came back."""
+        if self.storage is None:
+            return 0
+        self.traveler_id = traveler_id
+        self.decision_history = self.storage.load_decisions(traveler_id)
+        self.decision_positions = {
+            decision["decision_id"]: position for position, decision in enumerate(self.decision_history) if "decision_id" in decision
+        }
+        return len(self.decision_history)
+    
+    @traced()
     def _perform_self_reflection(self) -> None:
         """Analyze past decisions to improve future decision-making."""
         if len(self.decision_history) < 3:
@@ -319,13 +496,13 @@ class AgenticCore:
             logger.info("Reflection: Many energy-based changes detected. Adjusting daily activity count downward.")
             # In a real implementation, this would update planning parameters
     
-    def explain_decision(self, decision_id: int) -> str:
+    @traced()
+    def explain_decision(self, decision_id: Union[str, int]) -> str:
         """Generate a natural language explanation of a decision using the AI model."""
-        if not self.decision_history or decision_id >= len(self.decision_history):
+        decision = self.get_decision(decision_id)
+        if decision is None:
             return "No decision found with that ID."
         
-        decision = self.decision_history[decision_id]
-        
         # Add current weather context to the decision data
         decision_data = {
             **decision,
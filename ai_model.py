@@ -4,24 +4,38 @@ import logging
 from typing import Dict, List, Any, Optional
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-import openai
 from dotenv import load_dotenv
 
+from rate_limiter import quota_manager
+from tracing import traced
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ai_model")
 
-# Initialize OpenAI client with API key from environment variables
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    logger.warning("OPENAI_API_KEY not found in environment variables. AI model functionality will be limited.")
+# The OpenAI client (and the openai package) is only loaded when a model call is first made
+_client = None
+_client_loaded = False
 
-try:
-    client = openai.OpenAI(api_key=api_key) if api_key else None
-except Exception as e:
-    logger.error(f"Error initializing OpenAI client: {e}")
-    client = None
+def get_client():
+    """The OpenAI client built from OPENAI_API_KEY on first use, or None when it is unavailable."""
+    global _client, _client_loaded
+    if _client_loaded:
+        return _client
+    
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        logger.warning("OPENAI_API_KEY not found in environment variables. AI model functionality will be limited.")
+    
+    try:
+        import openai
+        _client = openai.OpenAI(api_key=api_key) if api_key else None
+    except Exception as e:
+        logger.error(f"Error initializing OpenAI client: {e}")
+        _client = None
+    _client_loaded = True
+    return _client
 
 # Fallback responses for when the API is not available
 FALLBACK_RESPONSES = {
@@ -36,6 +50,7 @@ FALLBACK_RESPONSES = {
 }
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+@traced()
 def generate_explanation(decision_data: Dict[str, Any]) -> str:
     """
     Generate a natural language explanation for an agentic decision.
@@ -46,6 +61,7 @@ def generate_explanation(decision_data: Dict[str, Any]) -> str:
     Returns:
         A natural language explanation of the decision
     """
+    client = get_client()
     if not client:
         logger.warning("OpenAI client not available. Using fallback response.")
         return FALLBACK_RESPONSES["explain_decision"]
@@ -71,7 +87,8 @@ def generate_explanation(decision_data: Dict[str, Any]) -> str:
         Your explanation should be concise, empathetic, and highlight how this decision benefits the traveler.
         """
         
-        # Call the OpenAI API
+        # Call the OpenAI API once its quota allows; QuotaExceeded falls back like any API error
+        quota_manager.acquire("openai")
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
@@ -91,6 +108,7 @@ def generate_explanation(decision_data: Dict[str, Any]) -> str:
         return FALLBACK_RESPONSES["explain_decision"]
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+@traced()
 def generate_alternative_activities(constraints: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Generate alternative activities based on constraints using AI.
@@ -101,6 +119,7 @@ def generate_alternative_activities(constraints: Dict[str, Any]) -> List[Dict[st
     Returns:
         A list of alternative activities
     """
+    client = get_client()
     if not client:
         logger.warning("OpenAI client not available. Using fallback alternatives.")
         return FALLBACK_RESPONSES["generate_alternatives"]
@@ -123,7 +142,8 @@ def generate_alternative_activities(constraints: Dict[str, Any]) -> List[Dict[st
         Format your response as a JSON array of objects with these fields: name, type, location, is_indoor, description, price_range.
         """
         
-        # Call the OpenAI API
+        # Call the OpenAI API once its quota allows; QuotaExceeded falls back like any API error
+        quota_manager.acquire("openai")
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
@@ -150,6 +170,7 @@ def generate_alternative_activities(constraints: Dict[str, Any]) -> List[Dict[st
         return FALLBACK_RESPONSES["generate_alternatives"]
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+@traced()
 def analyze_activity_safety(activity_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Analyze the safety of an activity based on current conditions using AI.
@@ -160,6 +181,7 @@ def analyze_activity_safety(activity_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         A safety assessment with risk level and recommendations
     """
+    client = get_client()
     if not client:
         logger.warning("OpenAI client not available. Using fallback safety analysis.")
         return FALLBACK_RESPONSES["analyze_safety"]
@@ -184,7 +206,8 @@ def analyze_activity_safety(activity_data: Dict[str, Any]) -> Dict[str, Any]:
         Format your response as a JSON object with these fields: is_safe (boolean), risk_level (string: 'Low', 'Medium', 'High'), reason (string), recommendation (string).
         """
         
-        # Call the OpenAI API
+        # Call the OpenAI API once its quota allows; QuotaExceeded falls back like any API error
+        quota_manager.acquire("openai")
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
@@ -207,6 +230,7 @@ def analyze_activity_safety(activity_data: Dict[str, Any]) -> Dict[str, Any]:
         return FALLBACK_RESPONSES["analyze_safety"]
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+@traced()
 def personalize_recommendation(user_data: Dict[str, Any], options: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Personalize activity recommendations based on user preferences using AI.
@@ -218,6 +242,7 @@ def personalize_recommendation(user_data: Dict[str, Any], options: List[Dict[str
     Returns:
         The best personalized recommendation with explanation
     """
+    client = get_client()
     if not client or not options:
         logger.warning("OpenAI client not available or no options provided. Using fallback recommendation.")
         return {"recommendation": options[0] if options else {}, "explanation": FALLBACK_RESPONSES["personalize_recommendation"]}
@@ -237,7 +262,8 @@ def personalize_recommendation(user_data: Dict[str, Any], options: List[Dict[str
         Format your response as a JSON object with these fields: selected_activity_index (integer), explanation (string).
         """
         
-        # Call the OpenAI API
+        # Call the OpenAI API once its quota allows; QuotaExceeded falls back like any API error
+        quota_manager.acquire("openai")
         response = client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
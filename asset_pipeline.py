@@ -0,0 +1,167 @@
+import os
+import gzip
+import hashlib
+import logging
+import mimetypes
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("asset_pipeline")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+COMPRESS_MIN_BYTES = 512  # smaller bodies are served as they are
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+FINGERPRINT_LENGTH = 10
+
+def accepted_encodings(accept_encoding: Optional[str]) -> List[str]:
+    """Codings from an Accept-Encoding header, dropping those with q=0."""
+    encodings = []
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.append(coding.strip().lower())
+    return encodings
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag, as GET revalidation uses."""
+    if not if_none_match or not etag:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+class PrecompressedBody:
+    """One response body with its gzip and brotli encodings computed up front."""
+    
+    __slots__ = ("content", "content_type", "etag", "encodings")
+    
+    def __init__(self, content: bytes, content_type: str):
+        self.content = content
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(content).hexdigest()[:20] + '"'
+        self.encodings = {}  # coding -> compressed bytes, only when smaller than the original
+        if len(content) >= COMPRESS_MIN_BYTES and content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(content, quality=11)
+            self.encodings = {coding: body for coding, body in compressed.items() if len(body) < len(content)}
+    
+    def select(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """(body, Content-Encoding) for a request, preferring brotli, then gzip, then identity."""
+        accepted = accepted_encodings(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in self.encodings and (coding in accepted or "*" in accepted):
+                return self.encodings[coding], coding
+        return self.content, None
+    
+    def headers(self, encoding: Optional[str], cache_control: str) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return headers
+    
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        return etag_matches(if_none_match, self.etag)
+
+class StaticAssets:
+    """Static files held in memory under content-hash fingerprinted URLs.
+    
+    This class handles:
+    1. Reading every file under the static directory once at startup
+    2. Naming each one css/app.<hash>.css so its URL changes whenever it does
+    3. Precompressing with gzip (and brotli when installed)
+    
+    Fingerprinted URLs can be cached forever; the plain paths still work but
+    must be revalidated.
+    """
+    
+    def __init__(self, directory: str = "static", url_prefix: str = "/static"):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self.urls = {}  # logical path -> fingerprinted URL
+        self.files = {}  # logical or fingerprinted path -> (PrecompressedBody, is_fingerprinted)
+        self._lock = threading.Lock()
+    
+    def build(self) -> int:
+        """(Re)build the asset table from disk, returning the number of files."""
+        urls, files = {}, {}
+        for root, _, names in os.walk(self.directory):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                logical = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                with open(path, "rb") as asset_file:
+                    content = asset_file.read()
+                content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                if content_type.startswith("text/") or content_type == "application/javascript":
+                    content_type += "; charset=utf-8"
+                body = PrecompressedBody(content, content_type)
+                
+                stem, extension = os.path.splitext(logical)
+                fingerprinted = f"{stem}.{body.etag[1:1 + FINGERPRINT_LENGTH]}{extension}"
+                urls[logical] = f"{self.url_prefix}/{fingerprinted}"
+                files[logical] = (body, False)
+                files[fingerprinted] = (body, True)
+        
+        with self._lock:
+            self.urls, self.files = urls, files
+        compressed = sum(len(body.encodings.get("gzip", body.content)) for body, fingerprinted in files.values() if fingerprinted)
+        original = sum(len(body.content) for body, fingerprinted in files.values() if fingerprinted)
+        logger.info(f"Built {len(urls)} static assets ({original:,} bytes, {compressed:,} gzipped)")
+        return len(urls)
+    
+    def url(self, path: str) -> str:
+        """Fingerprinted URL of a static file, or its plain URL when it is not in the table."""
+        path = path.lstrip("/")
+        return self.urls.get(path, f"{self.url_prefix}/{path}")
+    
+    def get(self, path: str) -> Optional[Tuple[PrecompressedBody, str]]:
+        """(body, Cache-Control) for a requested path, None when there is no such asset."""
+        entry = self.files.get(path.lstrip("/"))
+        if entry is None:
+            return None
+        body, fingerprinted = entry
+        return body, IMMUTABLE_CACHE_CONTROL if fingerprinted else REVALIDATE_CACHE_CONTROL
+
+class TemplateCache:
+    """Rendered pages for templates whose output depends only on a few plain values.
+    
+    Each (template, context) pair is rendered and compressed once; a page
+    showing today's date simply gets a new entry the next day, and
+    entries for other days are dropped.
+    """
+    
+    def __init__(self, environment: Any, max_variants: int = 2):
+        self.environment = environment
+        self.max_variants = max_variants
+        self.pages = {}  # template name -> {sorted context items: PrecompressedBody}
+        self._lock = threading.Lock()
+    
+    def render(self, name: str, context: Dict[str, Any] = None) -> PrecompressedBody:
+        key = tuple(sorted((context or {}).items()))
+        variants = self.pages.get(name, {})
+        page = variants.get(key)
+        if page is None:
+            html = self.environment.get_template(name).render(**(context or {}))
+            page = PrecompressedBody(html.encode("utf-8"), "text/html; charset=utf-8")
+            with self._lock:
+                variants = dict(self.pages.get(name, {}))
+                variants[key] = page
+                while len(variants) > self.max_variants:
+                    variants.pop(next(iter(variants)))
+                self.pages[name] = variants
+        return page
+    
+    def warm(self, names: List[str], context: Dict[str, Any] = None) -> None:
+        for name in names:
+            self.render(name, context)
+        logger.info(f"Rendered {len(names)} templates into the page cache")
+    
+    def clear(self) -> None:
+        with self._lock:
+            self.pages = {}
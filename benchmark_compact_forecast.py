@@ -0,0 +1,80 @@
+"""Benchmark CompactForecast against the nested-dict forecast format.
+
+Simulates 14-day hourly forecasts for 50 cities and compares resident
+memory, JSON size and serialization time, and time-window slicing.
+
+Run with: python benchmark_compact_forecast.py
+"""
+import gc
+import json
+import time
+import tracemalloc
+
+from tools.weather_tools import get_simulated_forecast_data
+from tools.compact_forecast import CompactForecast, to_epoch
+
+CITIES = [f"City {i}" for i in range(49)] + ["Dubai"]
+DAYS = 14
+REPEATS = 5
+
+def measure_memory(build):
+    """(result, bytes still allocated after building it)."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+def best_time(function):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+def main():
+    dicts = [get_simulated_forecast_data(city, DAYS) for city in CITIES]
+    hours = sum(len(day["hourly"]) for forecast in dicts for day in forecast["forecasts"])
+    print(f"{len(CITIES)} cities x {DAYS} days = {hours} hourly records\n")
+    
+    # Round-trip through JSON so the dict copies own their strings, as they would after an API call
+    payload = json.dumps(dicts)
+    dicts, dict_bytes = measure_memory(lambda: json.loads(payload))
+    compact, compact_bytes = measure_memory(lambda: [CompactForecast.from_dict(forecast) for forecast in dicts])
+    print(f"{'memory':<28} {'dict':>12} {'compact':>12} {'ratio':>8}")
+    print(f"{'resident bytes':<28} {dict_bytes:>12,} {compact_bytes:>12,} {dict_bytes / compact_bytes:>7.1f}x")
+    print(f"{'column array bytes':<28} {'':>12} {sum(f.nbytes for f in compact):>12,}\n")
+    
+    dict_json = json.dumps(dicts)
+    column_json = json.dumps([forecast.to_columns() for forecast in compact])
+    print(f"{'serialization':<28} {'dict':>12} {'compact':>12} {'ratio':>8}")
+    print(f"{'JSON bytes':<28} {len(dict_json):>12,} {len(column_json):>12,} {len(dict_json) / len(column_json):>7.1f}x")
+    
+    dict_ms = best_time(lambda: json.dumps(dicts))
+    column_ms = best_time(lambda: json.dumps([forecast.to_columns() for forecast in compact]))
+    print(f"{'json.dumps ms':<28} {dict_ms:>12.1f} {column_ms:>12.1f} {dict_ms / column_ms:>7.1f}x")
+    
+    dict_ms = best_time(lambda: json.loads(dict_json))
+    column_ms = best_time(lambda: [CompactForecast.from_columns(c) for c in json.loads(column_json)])
+    print(f"{'json.loads ms':<28} {dict_ms:>12.1f} {column_ms:>12.1f} {dict_ms / column_ms:>7.1f}x")
+    
+    pack_ms = best_time(lambda: [CompactForecast.from_dict(forecast) for forecast in dicts])
+    unpack_ms = best_time(lambda: [forecast.to_dict() for forecast in compact])
+    print(f"{'from_dict / to_dict ms':<28} {pack_ms:>12.1f} {unpack_ms:>12.1f}\n")
+    
+    # Next 24 hours from the start of day 3, for every city
+    start = dicts[0]["forecasts"][2]["hourly"][0]["time"]
+    end = dicts[0]["forecasts"][3]["hourly"][0]["time"]
+    dict_ms = best_time(lambda: [
+        [hour for day in forecast["forecasts"] for hour in day["hourly"] if start <= hour["time"] < end]
+        for forecast in dicts
+    ])
+    start_epoch, end_epoch = to_epoch(start), to_epoch(end)
+    compact_ms = best_time(lambda: [forecast.window(start_epoch, end_epoch) for forecast in compact])
+    print(f"{'24h window, all cities ms':<28} {dict_ms:>12.2f} {compact_ms:>12.2f} {dict_ms / compact_ms:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark the pre-encoded JSON response layer against FastAPI's default encoding.
+
+Builds payloads shaped like /demo/tom-priya-scenario, a planned itinerary
+and the notification feed, then compares per-request encode time and
+peak allocations for:
+  default  - jsonable_encoder + json.dumps (json.dumps alone without FastAPI)
+  orjson   - fast_json.dumps on every request
+  cached   - fast_json.EncodedCache hit for an unchanged revision
+
+Run with: python benchmark_json_responses.py
+"""
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+from context_engine import create_tom_priya_context
+from preference_system import create_tom_priya_preferences
+from itinerary_planner import ItineraryPlanner
+from fast_json import dumps, EncodedCache
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+REPEATS = 200
+NOTIFICATIONS = 50
+
+def default_encode(payload):
+    if jsonable_encoder is not None:
+        return json.dumps(jsonable_encoder(payload)).encode("utf-8")
+    return json.dumps(payload, default=str).encode("utf-8")
+
+def build_payloads():
+    itinerary = ItineraryPlanner("Dubai", "2025-07-01", 7, seed=1).plan(time_limit=0.5, traveler_id="Tom_and_Priya")
+    day = itinerary["days"][0]
+    modified = {**day, "is_modified": True, "modification_reason": "weather",
+                "activities": [{**activity, "time": "06:00-10:00"} for activity in day["activities"]]}
+    notification = {
+        "id": "notif-1", "traveler_id": "Tom_and_Priya", "timestamp": datetime.now(),
+        "type": "itinerary_change", "title": "Itinerary Update Suggested",
+        "message": "Due to extreme heat (45°C), outdoor activities have been rescheduled.",
+        "original_plan": day, "new_plan": modified, "confidence": 0.85,
+        "status": "pending", "requires_approval": False
+    }
+    scenario = {
+        "scenario": "Tom & Priya in Dubai",
+        "context": {**create_tom_priya_context(), "current_plan": day},
+        "preferences": create_tom_priya_preferences(),
+        "notification": notification,
+        "decision": {"type": "itinerary_change", "reason": "weather", "original_plan": day, "new_plan": modified,
+                     "confidence": 0.85, "timestamp": datetime.now(), "was_accepted": None},
+        "explanation": "Rescheduled the Desert Safari to early morning to avoid extreme heat."
+    }
+    feed = [{**notification, "id": f"notif-{i + 1}"} for i in range(NOTIFICATIONS)]
+    return {"tom-priya-scenario": scenario, "itinerary (7 days)": itinerary, f"notifications ({NOTIFICATIONS})": feed}
+
+def per_call_us(function):
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        function()
+    return (time.perf_counter() - started) / REPEATS * 1e6
+
+def peak_bytes(function):
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def main():
+    payloads = build_payloads()
+    cache = EncodedCache()
+    baseline = "jsonable_encoder + json.dumps" if jsonable_encoder else "json.dumps (FastAPI not installed)"
+    print(f"default = {baseline}, {REPEATS} requests each\n")
+    print(f"{'payload':<22} {'bytes':>8} {'default us':>11} {'orjson us':>10} {'cached us':>10} "
+          f"{'default peak':>13} {'orjson peak':>12} {'cached peak':>12}")
+    
+    for name, payload in payloads.items():
+        cache.get(name, 1, lambda: payload)
+        size = len(dumps(payload))
+        default_us = per_call_us(lambda: default_encode(payload))
+        orjson_us = per_call_us(lambda: dumps(payload))
+        cached_us = per_call_us(lambda: cache.get(name, 1, lambda: payload))
+        default_peak = peak_bytes(lambda: default_encode(payload))
+        orjson_peak = peak_bytes(lambda: dumps(payload))
+        cached_peak = peak_bytes(lambda: cache.get(name, 1, lambda: payload))
+        print(f"{name:<22} {size:>8,} {default_us:>11.1f} {orjson_us:>10.1f} {cached_us:>10.2f} "
+              f"{default_peak:>13,} {orjson_peak:>12,} {cached_peak:>12,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark the day-route optimizer on synthetic Dubai days with 5-50 candidate stops.
+
+Travel time is compared with visiting the same scheduled stops in order of
+opening time.
+
+Run with: python benchmark_route_optimizer.py
+"""
+import random
+import statistics
+import time
+
+from route_optimizer import RouteOptimizer, _RouteSearch, activity_window, _to_minutes
+from tools.distance_engine import estimate_travel
+
+STOP_COUNTS = [5, 10, 20, 30, 40, 50]
+DAYS_PER_SIZE = 5
+TIME_BUDGET = 0.5  # seconds
+
+# Rough bounding box around central Dubai
+LATITUDES = (25.05, 25.28)
+LONGITUDES = (55.13, 55.40)
+
+def make_day(stops: int, rng: random.Random):
+    """Random stops with short visits and wide opening windows, plus the travel matrix."""
+    coordinates = [(25.2048, 55.2708)]  # start at the hotel downtown
+    activities = []
+    for i in range(stops):
+        coordinates.append((rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES)))
+        opens = rng.choice([8, 9, 10, 12, 14])
+        closes = min(opens + rng.choice([4, 6, 8, 12]), 23)
+        activities.append({
+            "id": f"stop{i}",
+            "name": f"Stop {i}",
+            "time_window": f"{opens:02d}:00-{closes:02d}:00",
+            "duration": rng.choice([10, 15, 20, 30])
+        })
+    
+    _, durations = estimate_travel(coordinates, coordinates, "driving")
+    matrix = (durations / 60).tolist()
+    return activities, matrix
+
+def naive_travel(activities, matrix, scheduled):
+    """Travel minutes when the same stops are simply visited in order of opening time."""
+    order = sorted((activities.index(s["activity"]) + 1 for s in scheduled),
+                   key=lambda i: activities[i - 1]["time_window"])
+    search = _RouteSearch(
+        [activity_window(a, _to_minutes("08:00"), _to_minutes("23:30")) for a in activities],
+        matrix, _to_minutes("08:00"), _to_minutes("23:30"), 0
+    )
+    return search.travel(order)
+
+def main():
+    rng = random.Random(42)
+    optimizer = RouteOptimizer()
+    
+    print(f"{'stops':>5} {'ms (median)':>12} {'ms (max)':>9} {'scheduled':>10} "
+          f"{'travel min':>11} {'naive min':>10} {'saved':>6} {'converged':>10}")
+    for stops in STOP_COUNTS:
+        timings, scheduled, travel, naive, converged = [], [], [], [], 0
+        for _ in range(DAYS_PER_SIZE):
+            activities, matrix = make_day(stops, rng)
+            
+            started = time.perf_counter()
+            result = optimizer.optimize_day(activities, matrix=matrix, time_budget=TIME_BUDGET)
+            timings.append((time.perf_counter() - started) * 1000)
+            
+            scheduled.append(len(result["stops"]))
+            travel.append(result["total_travel_minutes"])
+            naive.append(naive_travel(activities, matrix, result["stops"]))
+            converged += result["converged"]
+        
+        saved = 1 - statistics.mean(travel) / statistics.mean(naive)
+        print(f"{stops:>5} {statistics.median(timings):>12.1f} {max(timings):>9.1f} "
+              f"{statistics.mean(scheduled):>10.1f} {statistics.mean(travel):>11.1f} "
+              f"{statistics.mean(naive):>10.1f} {saved:>6.0%} {converged:>7}/{DAYS_PER_SIZE}")
+
+if __name__ == "__main__":
+    main()
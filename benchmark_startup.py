@@ -0,0 +1,124 @@
+"""Benchmark cold start and first-request latency of the API.
+
+Every measurement runs in a fresh interpreter so nothing is warm:
+  1. python -X importtime: the slowest imports under the app module
+  2. cold start: wall time to import the app module, and which tool modules
+     that import loads; provider modules and the catalogs are left to first use
+  3. first request: latency of the first and second GET through FastAPI's
+     TestClient, after the startup events have run
+  4. tool registry: registering the manifest lazily vs importing every tool
+     module, and the cost of a tool's first execute_tool
+
+Run with: python benchmark_startup.py [app module, default main_v2]
+"""
+import sys
+import subprocess
+
+COLD_START_TARGET_MS = 1500
+FIRST_REQUEST_TARGET_MS = 250
+REPEATS = 3
+TOP_IMPORTS = 15
+
+COLD_START = """
+import time
+started = time.perf_counter()
+import {module}
+print((time.perf_counter() - started) * 1000)
+"""
+
+TOOL_MODULES = """
+import sys
+import {module}
+print(" ".join(sorted(name for name in sys.modules if name.startswith("tools."))))
+"""
+
+FIRST_REQUEST = """
+import time
+import {module}
+from fastapi.testclient import TestClient
+with TestClient({module}.app) as client:
+    for path in ("/local-info", "/itinerary/Tom_and_Priya"):
+        started = time.perf_counter()
+        client.get(path)
+        first = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        client.get(path)
+        print(path, first, (time.perf_counter() - started) * 1000)
+"""
+
+REGISTRY = """
+import sys
+import time
+started = time.perf_counter()
+from tools.tool_registry import tool_registry, load_all_tools
+load_all_tools(eager={eager})
+registered = (time.perf_counter() - started) * 1000
+started = time.perf_counter()
+tool_registry.execute_tool("get_transit_routes", {{"origin": "Dubai Mall", "destination": "Dubai Marina"}})
+print(registered, (time.perf_counter() - started) * 1000, len(tool_registry.tool_metadata), len(sys.modules))
+"""
+
+def run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True)
+
+def last_line(result: subprocess.CompletedProcess) -> str:
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(error)
+    return result.stdout.strip().splitlines()[-1]
+
+def slowest_imports(module: str):
+    """(cumulative us, self us, name) for the slowest imports, from -X importtime."""
+    result = run(f"import {module}", "-X", "importtime")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative), int(own), name))
+    return sorted(rows, reverse=True)[:TOP_IMPORTS], result
+
+def report_target(label: str, value: float, target: float) -> None:
+    print(f"{label:<34} {value:>9.1f} ms  (target {target} ms: {'ok' if value <= target else 'MISSED'})")
+
+def main():
+    module = sys.argv[1] if len(sys.argv) > 1 else "main_v2"
+    
+    rows, result = slowest_imports(module)
+    if result.returncode != 0:
+        print(f"import {module} failed: {result.stderr.strip().splitlines()[-1]}\n")
+    else:
+        print(f"Slowest imports under {module} (-X importtime)")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for cumulative, own, name in rows:
+            print(f"{cumulative / 1000:>14.1f} {own / 1000:>9.1f}  {name}")
+        print()
+        
+        cold = min(float(last_line(run(COLD_START.format(module=module)))) for _ in range(REPEATS))
+        report_target(f"cold start (import {module})", cold, COLD_START_TARGET_MS)
+        loaded = last_line(run(TOOL_MODULES.format(module=module))).split()
+        print(f"{'tool modules loaded at import':<34} {len(loaded):>9}  ({', '.join(name[len('tools.'):] for name in loaded)})")
+        
+        try:
+            result = run(FIRST_REQUEST.format(module=module))
+            last_line(result)
+            for line in result.stdout.splitlines():
+                if not line.startswith("/"):
+                    continue
+                path, first, second = line.split()
+                report_target(f"first GET {path}", float(first), FIRST_REQUEST_TARGET_MS)
+                print(f"{'  then':<34} {float(second):>9.1f} ms")
+        except RuntimeError as e:
+            print(f"first request skipped: {e}")
+        print()
+    
+    print(f"{'tool registry':<16} {'register ms':>12} {'first execute ms':>17} {'tools':>6} {'modules loaded':>15}")
+    for label, eager in (("manifest (lazy)", False), ("import all", True)):
+        try:
+            registered, first_call, tools, modules = last_line(run(REGISTRY.format(eager=eager))).split()
+            print(f"{label:<16} {float(registered):>12.1f} {float(first_call):>17.1f} {tools:>6} {modules:>15}")
+        except RuntimeError as e:
+            print(f"{label:<16} failed: {e}")
+
+if __name__ == "__main__":
+    main()
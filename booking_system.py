@@ -2,11 +2,86 @@ import json
 import logging
 import datetime
 import random
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+from id_generator import new_booking_id, new_reference
+from inventory_engine import InventoryEngine, activity_type_for
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("booking_system")
 
+class CancellationRule:
+    """A cancellation policy compiled into the fee ratios it implies.
+    
+    Cancelling at least `hours_limit` hours before the start costs
+    `fee_before` of the price; cancelling later costs `fee_after`.
+    """
+    def __init__(self, policy: str, hours_limit: float = 0.0,
+                 fee_before: float = 0.0, fee_after: float = 0.0):
+        self.policy = policy
+        self.hours_limit = hours_limit
+        self.fee_before = fee_before
+        self.fee_after = fee_after
+    
+    def fee(self, price: float, hours_until_start: float) -> float:
+        """Return the fee for cancelling `hours_until_start` hours ahead."""
+        if hours_until_start >= self.hours_limit:
+            return price * self.fee_before
+        return price * self.fee_after
+    
+    def to_dict(self):
+        return {
+            "policy": self.policy,
+            "hours_limit": self.hours_limit,
+            "fee_before": self.fee_before,
+            "fee_after": self.fee_after
+        }
+
+# Compiled rules keyed by policy text; the set of distinct policies is small
+_compiled_policies: Dict[str, CancellationRule] = {}
+
+def compile_cancellation_policy(policy: str) -> CancellationRule:
+    """Turn a free-text cancellation policy into a reusable CancellationRule."""
+    rule = _compiled_policies.get(policy)
+    if rule is not None:
+        return rule
+    
+    if "Free cancellation" in policy:
+        hours_limit = 24  # Default
+        if "48 hours" in policy:
+            hours_limit = 48
+        elif "24 hours" in policy:
+            hours_limit = 24
+        elif "12 hours" in policy:
+            hours_limit = 12
+        elif "2 hours" in policy:
+            hours_limit = 2
+        rule = CancellationRule(policy, hours_limit, fee_before=0.0, fee_after=1.0)
+    elif "50% refund" in policy:
+        hours_limit = 48 if "48 hours" in policy else 24
+        rule = CancellationRule(policy, hours_limit, fee_before=0.5, fee_after=1.0)
+    elif "Non-refundable" in policy:
+        rule = CancellationRule(policy, 0.0, fee_before=1.0, fee_after=1.0)
+    else:
+        # Unknown policies carry no fee, matching the previous behaviour
+        rule = CancellationRule(policy)
+    
+    _compiled_policies[policy] = rule
+    return rule
+
+def parse_booking_start(date: str, time: str) -> Optional[datetime.datetime]:
+    """Parse a booking's date and time (or time range) into its start datetime."""
+    if not date or not time:
+        return None
+    
+    # Extract start time if it's a range
+    start_time = time.split("-")[0].strip()
+    try:
+        return datetime.datetime.strptime(f"{date} {start_time}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        logger.error(f"Could not parse booking start: {date} {time}")
+        return None
+
 class BookingSystem:
     """Simulated booking system for the VoyagerVerse agentic AI.
     
@@ -14,11 +89,17 @@ class BookingSystem:
     1. Simulating booking operations for activities, restaurants, etc.
     2. Managing cancellations and rebookings
     3. Tracking booking history and status
+    
+    With a storage engine every operation is also persisted, and bookings
+    from before a restart are loaded back the first time they are asked for.
     """
     
-    def __init__(self):
+    def __init__(self, storage: Any = None):
+        self.storage = storage  # StorageEngine or None for memory only
         self.bookings = {}  # Dictionary of active bookings
         self.booking_history = []  # History of all booking operations
+        self.compiled_bookings = {}  # booking_id -> (start datetime, CancellationRule)
+        self.inventory = InventoryEngine()  # Seat inventory for activity slots
         self.providers = {  # Simulated booking providers
             "activities": ["Dubai Tourism", "GetYourGuide", "Viator", "Klook"],
             "dining": ["OpenTable", "Resy", "Direct Booking"],
@@ -26,26 +107,36 @@ class BookingSystem:
             "accommodations": ["Booking.com", "Hotels.com", "Airbnb", "Direct Booking"]
         }
     
-    def book_activity(self, activity: Dict[str, Any], date: str, time_slot: str) -> Dict[str, Any]:
+    def book_activity(self, activity: Dict[str, Any], date: str, time_slot: str,
+                      participants: int = 1) -> Dict[str, Any]:
         """Book an activity and return booking details."""
-        booking_id = f"ACT-{random.randint(10000, 99999)}"
+        booking_id = new_booking_id("ACT")
+        activity_type = activity_type_for(activity)
+        
+        # Reserve seats first so a full slot is never oversold
+        if not self.inventory.reserve(booking_id, activity_type, date, time_slot, participants):
+            return {"status": "error", "message": f"No availability for {activity['name']} on {date} at {time_slot}"}
+        
         provider = random.choice(self.providers["activities"])
         
         booking = {
             "booking_id": booking_id,
             "type": "activity",
             "activity": activity,
+            "activity_type": activity_type,
             "date": date,
             "time_slot": time_slot,
+            "participants": participants,
             "provider": provider,
             "status": "confirmed",
             "booking_time": datetime.datetime.now().isoformat(),
-            "confirmation_code": f"{provider[:3].upper()}{random.randint(100000, 999999)}",
+            "confirmation_code": new_reference(provider[:3].upper()),
             "cancellation_policy": self._generate_cancellation_policy()
         }
         
         # Store the booking
         self.bookings[booking_id] = booking
+        self._compile_booking(booking)
         
         # Record in history
         self._record_booking_operation("create", booking)
@@ -55,7 +146,7 @@ class BookingSystem:
     
     def book_dining(self, restaurant: Dict[str, Any], date: str, time: str, party_size: int) -> Dict[str, Any]:
         """Book a restaurant and return booking details."""
-        booking_id = f"DIN-{random.randint(10000, 99999)}"
+        booking_id = new_booking_id("DIN")
         provider = random.choice(self.providers["dining"])
         
         booking = {
@@ -68,12 +159,13 @@ class BookingSystem:
             "provider": provider,
             "status": "confirmed",
             "booking_time": datetime.datetime.now().isoformat(),
-            "confirmation_code": f"{provider[:3].upper()}{random.randint(100000, 999999)}",
+            "confirmation_code": new_reference(provider[:3].upper()),
             "cancellation_policy": "Free cancellation up to 2 hours before reservation"
         }
         
         # Store the booking
         self.bookings[booking_id] = booking
+        self._compile_booking(booking)
         
         # Record in history
         self._record_booking_operation("create", booking)
@@ -84,7 +176,7 @@ class BookingSystem:
     def book_transportation(self, transport_type: str, pickup_location: str, 
                            dropoff_location: str, date: str, time: str) -> Dict[str, Any]:
         """Book transportation and return booking details."""
-        booking_id = f"TRN-{random.randint(10000, 99999)}"
+        booking_id = new_booking_id("TRN")
         provider = random.choice(self.providers["transportation"])
         
         booking = {
@@ -98,12 +190,13 @@ class BookingSystem:
             "provider": provider,
             "status": "confirmed",
             "booking_time": datetime.datetime.now().isoformat(),
-            "confirmation_code": f"{provider[:3].upper()}{random.randint(100000, 999999)}",
+            "confirmation_code": new_reference(provider[:3].upper()),
             "cancellation_policy": "Free cancellation up to 1 hour before pickup"
         }
         
         # Store the booking
         self.bookings[booking_id] = booking
+        self._compile_booking(booking)
         
         # Record in history
         self._record_booking_operation("create", booking)
@@ -113,12 +206,11 @@ class BookingSystem:
     
     def cancel_booking(self, booking_id: str) -> Dict[str, Any]:
         """Cancel an existing booking."""
-        if booking_id not in self.bookings:
+        booking = self.get_booking(booking_id)
+        if booking is None:
             logger.error(f"Booking not found: {booking_id}")
             return {"status": "error", "message": "Booking not found"}
         
-        booking = self.bookings[booking_id]
-        
         # Check if already cancelled
         if booking["status"] == "cancelled":
             return {"status": "error", "message": "Booking already cancelled"}
@@ -127,6 +219,9 @@ class BookingSystem:
         booking["status"] = "cancelled"
         booking["cancellation_time"] = datetime.datetime.now().isoformat()
         
+        # Give the seats back to the pool
+        self.inventory.release(booking_id)
+        
         # Calculate cancellation fee based on policy
         cancellation_fee = self._calculate_cancellation_fee(booking)
         booking["cancellation_fee"] = cancellation_fee
@@ -139,12 +234,11 @@ class BookingSystem:
     
     def modify_booking(self, booking_id: str, modifications: Dict[str, Any]) -> Dict[str, Any]:
         """Modify an existing booking."""
-        if booking_id not in self.bookings:
+        booking = self.get_booking(booking_id)
+        if booking is None:
             logger.error(f"Booking not found: {booking_id}")
             return {"status": "error", "message": "Booking not found"}
         
-        booking = self.bookings[booking_id]
-        
         # Check if already cancelled
         if booking["status"] == "cancelled":
             return {"status": "error", "message": "Cannot modify cancelled booking"}
@@ -152,11 +246,21 @@ class BookingSystem:
         # Store original for history
         original_booking = booking.copy()
         
+        # Rescheduling an activity needs seats in the new slot
+        if booking["type"] == "activity" and ("date" in modifications or "time_slot" in modifications):
+            new_date = modifications.get("date", booking["date"])
+            new_slot = modifications.get("time_slot", booking["time_slot"])
+            if not self.inventory.move(booking_id, new_date, new_slot):
+                return {"status": "error", "message": f"No availability on {new_date} at {new_slot}"}
+        
         # Apply modifications
         for key, value in modifications.items():
             if key in booking and key not in ["booking_id", "type", "status", "booking_time"]:
                 booking[key] = value
         
+        # Re-parse the start time and policy in case either changed
+        self._compile_booking(booking)
+        
         # Update modification time
         booking["last_modified"] = datetime.datetime.now().isoformat()
         booking["modification_count"] = booking.get("modification_count", 0) + 1
@@ -169,12 +273,29 @@ class BookingSystem:
     
     def get_booking(self, booking_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a booking by ID."""
-        return self.bookings.get(booking_id)
+        booking = self.bookings.get(booking_id)
+        if booking is None and self.storage is not None:
+            booking = self.storage.load_booking(booking_id)
+            if booking is not None:
+                self._restore_booking(booking)
+        return booking
     
     def get_bookings_for_date(self, date: str) -> List[Dict[str, Any]]:
         """Get all bookings for a specific date."""
+        if self.storage is not None:
+            for booking in self.storage.bookings_for_date(date):
+                if booking["booking_id"] not in self.bookings:
+                    self._restore_booking(booking)
         return [b for b in self.bookings.values() if b.get("date") == date and b.get("status") == "confirmed"]
     
+    def _restore_booking(self, booking: Dict[str, Any]) -> None:
+        """Take back a persisted booking, holding its seats again if it is a confirmed activity."""
+        self.bookings[booking["booking_id"]] = booking
+        self._compile_booking(booking)
+        if booking["type"] == "activity" and booking["status"] == "confirmed":
+            self.inventory.reserve(booking["booking_id"], booking["activity_type"], booking["date"],
+                                   booking["time_slot"], booking["participants"])
+    
     def _generate_cancellation_policy(self) -> str:
         """Generate a random cancellation policy."""
         policies = [
@@ -185,69 +306,71 @@ class BookingSystem:
         ]
         return random.choice(policies)
     
-    def _calculate_cancellation_fee(self, booking: Dict[str, Any]) -> float:
+    def _compile_booking(self, booking: Dict[str, Any]) -> Tuple[Optional[datetime.datetime], CancellationRule]:
+        """Parse a booking's start time and policy once so fee checks are cheap."""
+        start_dt = parse_booking_start(
+            booking.get("date", ""),
+            booking.get("time", booking.get("time_slot", ""))
+        )
+        rule = compile_cancellation_policy(booking.get("cancellation_policy", ""))
+        booking["start_datetime"] = start_dt.isoformat() if start_dt else None
+        
+        compiled = (start_dt, rule)
+        self.compiled_bookings[booking["booking_id"]] = compiled
+        return compiled
+    
+    def _calculate_cancellation_fee(self, booking: Dict[str, Any],
+                                    at_time: Optional[datetime.datetime] = None) -> float:
         """Calculate cancellation fee based on policy and timing."""
-        policy = booking.get("cancellation_policy", "")
+        compiled = self.compiled_bookings.get(booking["booking_id"])
+        if compiled is None:
+            compiled = self._compile_booking(booking)
+        start_dt, rule = compiled
+        
+        # Default to no fee if we can't tell when the booking starts
+        if start_dt is None:
+            return 0.0
         
         # Default price for simulation
         price = booking.get("price", 100.0)
         
-        # Parse booking date and time
-        booking_date = booking.get("date", "")
-        booking_time = booking.get("time", booking.get("time_slot", ""))
-        
-        if not booking_date or not booking_time:
-            return 0.0
-        
-        # Try to parse the booking datetime
-        try:
-            # Extract start time if it's a range
-            if "-" in booking_time:
-                booking_time = booking_time.split("-")[0]
-            
-            booking_dt_str = f"{booking_date} {booking_time}"
-            booking_dt = datetime.datetime.strptime(booking_dt_str, "%Y-%m-%d %H:%M")
-            
-            # Calculate hours until booking
-            now = datetime.datetime.now()
-            hours_until_booking = (booking_dt - now).total_seconds() / 3600
-            
-            # Apply policy
-            if "Free cancellation" in policy:
-                # Extract hours from policy
-                hours_limit = 24  # Default
-                if "48 hours" in policy:
-                    hours_limit = 48
-                elif "24 hours" in policy:
-                    hours_limit = 24
-                elif "12 hours" in policy:
-                    hours_limit = 12
-                elif "2 hours" in policy:
-                    hours_limit = 2
-                
-                if hours_until_booking >= hours_limit:
-                    return 0.0  # Free cancellation
-                else:
-                    return price  # Full price as fee
-            
-            elif "50% refund" in policy:
-                hours_limit = 24  # Default
-                if "48 hours" in policy:
-                    hours_limit = 48
-                
-                if hours_until_booking >= hours_limit:
-                    return price * 0.5  # 50% fee
-                else:
-                    return price  # Full price as fee
-            
-            elif "Non-refundable" in policy:
-                return price  # Full price as fee
+        now = at_time or datetime.datetime.now()
+        hours_until_booking = (start_dt - now).total_seconds() / 3600
+        return rule.fee(price, hours_until_booking)
+    
+    def bulk_cancellation_quote(self, booking_ids: List[str],
+                                at_time: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+        """Quote the cancellation fee for many bookings as of a single point in time.
+        
+        Nothing is cancelled; bookings that are unknown or already cancelled are
+        listed under `skipped`.
+        """
+        at_time = at_time or datetime.datetime.now()
+        quotes = {}
+        skipped = []
+        total_fee = 0.0
+        
+        for booking_id in booking_ids:
+            booking = self.get_booking(booking_id)
+            if booking is None or booking["status"] == "cancelled":
+                skipped.append(booking_id)
+                continue
             
-        except Exception as e:
-            logger.error(f"Error calculating cancellation fee: {e}")
-        
-        # Default to no fee if we can't calculate
-        return 0.0
+            fee = self._calculate_cancellation_fee(booking, at_time)
+            quotes[booking_id] = {
+                "cancellation_fee": fee,
+                "cancellation_policy": booking.get("cancellation_policy", ""),
+                "start_datetime": booking.get("start_datetime")
+            }
+            total_fee += fee
+        
+        return {
+            "status": "success",
+            "at_time": at_time.isoformat(),
+            "quotes": quotes,
+            "total_fee": total_fee,
+            "skipped": skipped
+        }
     
     def _record_booking_operation(self, operation: str, booking: Dict[str, Any], 
                                  original_booking: Dict[str, Any] = None) -> None:
@@ -264,47 +387,17 @@ class BookingSystem:
             record["original_booking"] = original_booking
         
         self.booking_history.append(record)
+        if self.storage is not None:
+            self.storage.save_booking(booking, record)
     
     def check_availability(self, activity_type: str, date: str) -> Dict[str, List[str]]:
         """Check availability for a given activity type and date."""
-        # In a real implementation, this would query external APIs
-        # For the prototype, we'll simulate availability
-        
-        available_slots = {}
-        
-        if activity_type == "desert_safari":
-            available_slots = {
-                "morning": ["06:00-10:00", "07:00-11:00"],
-                "afternoon": ["14:00-18:00", "15:00-19:00"],
-                "evening": ["16:00-20:00"]
-            }
-        elif activity_type == "cultural_tour":
-            available_slots = {
-                "morning": ["09:00-12:00", "10:00-13:00"],
-                "afternoon": ["13:00-16:00", "14:00-17:00"],
-                "evening": ["17:00-20:00"]
-            }
-        elif activity_type == "water_activity":
-            available_slots = {
-                "morning": ["08:00-10:00", "10:00-12:00"],
-                "afternoon": ["13:00-15:00", "15:00-17:00"],
-                "evening": ["17:00-19:00"]
-            }
-        else:
-            # Generic availability for other activities
-            available_slots = {
-                "morning": ["09:00-11:00", "11:00-13:00"],
-                "afternoon": ["14:00-16:00", "16:00-18:00"],
-                "evening": ["19:00-21:00"]
-            }
-        
-        # Simulate some slots being unavailable
-        for time_of_day in available_slots:
-            if random.random() < 0.3:  # 30% chance of a time slot being unavailable
-                if len(available_slots[time_of_day]) > 1:
-                    available_slots[time_of_day].pop(random.randint(0, len(available_slots[time_of_day]) - 1))
-        
-        return available_slots
+        return self.inventory.check_availability(activity_type, date)
+    
+    def check_availability_range(self, activity_type: str, start_date: str,
+                                 end_date: str) -> Dict[str, Dict[str, List[str]]]:
+        """Check availability for every date in a range (inclusive)."""
+        return self.inventory.check_availability_range(activity_type, start_date, end_date)
 
 # Example usage for Tom & Priya scenario
 def create_tom_priya_booking_scenario():
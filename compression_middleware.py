@@ -0,0 +1,159 @@
+import os
+import gzip
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from asset_pipeline import accepted_encodings, etag_matches, brotli, COMPRESSIBLE_TYPES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("compression_middleware")
+
+COMPRESS_MIN_BYTES = 1024  # below this the headers cost more than compression saves on a cellular link
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # fast enough per request; static assets are precompressed at 11 instead
+
+# Revision counters restart with the process, so the boot ID keeps ETags from
+# before a restart from matching different content after it
+BOOT_ID = os.urandom(6).hex()
+
+def version_etag(*parts: Any, epoch: str = BOOT_ID) -> str:
+    """Weak ETag for an object identified by its kind, key and revision, e.g. ("itinerary", id, 3).
+    
+    Revisions kept in a shared state store pass the store's epoch instead of
+    the boot ID, so every worker hands out the same ETag for the same version.
+    """
+    return 'W/"' + hashlib.sha1(repr((epoch,) + parts).encode("utf-8")).hexdigest()[:20] + '"'
+
+class CompressionStats:
+    """Counters for what compression and 304s saved, exposed through /metrics/compression."""
+    
+    def __init__(self):
+        self.responses = 0
+        self.compressed = 0
+        self.not_modified = 0
+        self.bytes_in = 0  # body bytes produced by the app
+        self.bytes_out = 0  # body bytes actually sent
+        self.by_encoding = {}
+        self._lock = threading.Lock()
+    
+    def record(self, original: int, sent: int, encoding: Optional[str] = None, not_modified: bool = False) -> None:
+        with self._lock:
+            self.responses += 1
+            self.bytes_in += original
+            self.bytes_out += sent
+            if not_modified:
+                self.not_modified += 1
+            if encoding:
+                self.compressed += 1
+                self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "compressed": self.compressed,
+                "not_modified": self.not_modified,
+                "by_encoding": dict(self.by_encoding),
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "bytes_saved": self.bytes_in - self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else 1.0
+            }
+
+class CompressionMiddleware:
+    """ASGI middleware that makes JSON and HTML responses cheap for mobile clients.
+    
+    This class handles:
+    1. Answering a GET with 304 when its If-None-Match matches the response ETag
+    2. Compressing bodies above minimum_size with brotli or gzip, per Accept-Encoding
+    3. Counting bytes in and out so the savings can be reported
+    
+    Endpoints that know their object's version should still answer 304
+    themselves, before encoding anything; this layer catches the rest.
+    Bodies that are already encoded or streamed pass through unchanged.
+    """
+    
+    def __init__(self, app: Any, minimum_size: int = COMPRESS_MIN_BYTES, gzip_level: int = GZIP_LEVEL,
+                 brotli_quality: int = BROTLI_QUALITY, stats: CompressionStats = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = stats or compression_stats
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        start = None
+        chunks = []
+        streaming = False
+        
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal start, streaming
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or streaming:
+                await send(message)
+                return
+            
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                # Streaming responses are forwarded as they come
+                streaming = True
+                await send(start)
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                return
+            await self._finish(start, b"".join(chunks), scope["method"], request_headers, send)
+        
+        await self.app(scope, receive, send_wrapper)
+    
+    def _encode(self, body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        accepted = accepted_encodings(accept_encoding)
+        if brotli is not None and "br" in accepted:
+            return brotli.compress(body, quality=self.brotli_quality), "br"
+        if "gzip" in accepted:
+            return gzip.compress(body, compresslevel=self.gzip_level, mtime=0), "gzip"
+        return body, None
+    
+    async def _finish(self, start: Dict[str, Any], body: bytes, method: str, request_headers: Dict[str, str], send: Any) -> None:
+        headers = [(name.lower(), value) for name, value in start.get("headers", [])]
+        lookup = {name: value.decode("latin-1") for name, value in headers}
+        status = start["status"]
+        
+        if method in ("GET", "HEAD") and status == 200 and etag_matches(request_headers.get("if-none-match"), lookup.get(b"etag")):
+            kept = [(name, value) for name, value in headers if name in (b"etag", b"cache-control", b"vary", b"content-location", b"expires")]
+            await send({"type": "http.response.start", "status": 304, "headers": kept})
+            await send({"type": "http.response.body", "body": b""})
+            self.stats.record(len(body), 0, not_modified=True)
+            return
+        
+        encoding = None
+        if (status == 200 and len(body) >= self.minimum_size and b"content-encoding" not in lookup
+                and lookup.get(b"content-type", "").startswith(COMPRESSIBLE_TYPES)):
+            compressed, encoding = self._encode(body, request_headers.get("accept-encoding"))
+            if encoding and len(compressed) < len(body):
+                headers = [(name, value) for name, value in headers if name not in (b"content-length", b"vary", b"etag")]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                vary = lookup.get(b"vary")
+                headers.append((b"vary", (f"{vary}, Accept-Encoding" if vary else "Accept-Encoding").encode("latin-1")))
+                if b"etag" in lookup:
+                    # The compressed bytes differ from the identity ones, so the validator becomes weak
+                    headers.append((b"etag", ("W/" + lookup[b"etag"].removeprefix("W/")).encode("latin-1")))
+                self.stats.record(len(body), len(compressed), encoding)
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": compressed})
+                return
+        
+        self.stats.record(len(body), len(body), not_modified=status == 304)
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
+
+# Create a global instance of the compression counters
+compression_stats = CompressionStats()
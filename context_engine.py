@@ -28,6 +28,8 @@ class ContextEngine:
         self.location_providers = ["Google Maps", "Here Maps", "TomTom"]
         self.last_update = datetime.datetime.now()
         self.update_frequency = datetime.timedelta(minutes=30)  # Check every 30 minutes
+        self.weather_snapshot = None  # shared city snapshot the weather context points at
+        self.revision = 0  # bumped on every change, so encoded copies of the context know when to refresh
         
         # Initialize with default values
         self._initialize_default_context()
@@ -96,10 +98,31 @@ class ContextEngine:
             
             # Simulate updated weather
             self.current_context["weather"] = self._simulate_weather()
+            self.current_context.pop("weather_version", None)
+            self.weather_snapshot = None
             self.last_update = now
+            self.touch()
         
         return self.current_context["weather"]
     
+    def attach_weather(self, snapshot: Any) -> Dict[str, Any]:
+        """Point the weather context at a shared city snapshot instead of a private copy.
+        
+        The snapshot's current conditions are referenced, not copied, so every
+        traveler in the city reads the same record. Re-attaching the same
+        version is a no-op.
+        """
+        if snapshot is self.weather_snapshot:
+            return self.current_context["weather"]
+        
+        self.current_context["last_weather_check"] = self.current_context.get("weather", {})
+        self.current_context["weather"] = snapshot.current
+        self.current_context["weather_version"] = snapshot.version
+        self.weather_snapshot = snapshot
+        self.last_update = datetime.datetime.fromtimestamp(snapshot.fetched_at)
+        self.touch()
+        return snapshot.current
+    
     def _simulate_weather(self) -> Dict[str, Any]:
         """Simulate weather data for Dubai."""
         # Base on previous weather if available
@@ -182,6 +205,7 @@ class ContextEngine:
             logger.info(f"Updated traveler emotional state: {emotional_state}")
             logger.info(f"Adaptation recommendations: {adaptation_recommendations}")
         
+        self.touch()
         logger.info(f"Updated traveler state: {traveler_state}")
     
     def _simulate_traveler_state_changes(self):
@@ -214,11 +238,13 @@ class ContextEngine:
         # Update the state
         traveler_state["energy_level"] = round(new_energy, 2)
         self.current_context["traveler_state"] = traveler_state
+        self.touch()
     
     def update_location(self, location_data: Dict[str, Any] = None) -> Dict[str, Any]:
         """Update the traveler's current location."""
         if location_data:
             self.current_context["location"] = location_data
+            self.touch()
         else:
             # In a real implementation, this would use device GPS
             # For the prototype, we'll keep the existing location
@@ -238,6 +264,7 @@ class ContextEngine:
             "prayer_times": self._get_prayer_times(),
             "time_of_day": self._get_time_of_day(now)
         }
+        self.touch()
         
         return self.current_context["time_context"]
     
@@ -264,6 +291,11 @@ class ContextEngine:
         else:
             return "night"
     
+    def touch(self) -> int:
+        """Record a change to current_context, including one written to it directly."""
+        self.revision += 1
+        return self.revision
+    
     def get_current_context(self) -> Dict[str, Any]:
         """Get the current context."""
         return self.current_context
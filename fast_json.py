@@ -0,0 +1,114 @@
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Any, Callable, Hashable, Optional
+
+import orjson
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("fast_json")
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+MAX_CACHED_PAYLOADS = 512
+
+def _default(value: Any) -> Any:
+    """Types orjson does not encode natively: mappings such as CompactForecast, sets, pydantic models."""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "dict"):
+        return value.dict()
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(value: Any) -> bytes:
+    """Encode straight to UTF-8 JSON bytes; datetimes, numpy arrays and non-str keys are handled."""
+    return orjson.dumps(value, default=_default, option=JSON_OPTIONS)
+
+def _lossy_default(value: Any) -> Any:
+    try:
+        return _default(value)
+    except TypeError:
+        return str(value)
+
+def dumps_lossy(value: Any) -> bytes:
+    """Like dumps, but anything JSON cannot hold is written as its str() instead of raising."""
+    return orjson.dumps(value, default=_lossy_default, option=JSON_OPTIONS)
+
+def loads(payload: Any) -> Any:
+    return orjson.loads(payload)
+
+class EncodedCache:
+    """Encoded JSON payloads, reused while the object they encode is unchanged.
+    
+    This class handles:
+    1. Keeping the latest encoding of each key together with its version
+    2. Re-encoding only when a caller asks for a newer version
+    3. Evicting the least recently used keys beyond max_entries
+    
+    Versions are whatever the owner of the object bumps on every change,
+    e.g. a revision counter; any hashable value works.
+    """
+    
+    def __init__(self, max_entries: int = MAX_CACHED_PAYLOADS):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (version, payload)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> bytes:
+        """Payload of build() for this version, encoding it only on the first request."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        
+        payload = dumps(build())
+        self.put(key, version, payload)
+        return payload
+    
+    def put(self, key: Hashable, version: Hashable, payload: bytes) -> None:
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = (version, payload)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self.entries.pop(key, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "bytes": sum(len(payload) for _, payload in self.entries.values()),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+class Revisions:
+    """Per-key change counters used as EncodedCache versions."""
+    
+    def __init__(self):
+        self.counters = {}
+        self._lock = threading.Lock()
+    
+    def bump(self, key: Hashable) -> int:
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+            return self.counters[key]
+    
+    def get(self, key: Hashable) -> int:
+        return self.counters.get(key, 0)
+
+# Create a global instance of the encoded payload cache
+encoded_cache = EncodedCache()
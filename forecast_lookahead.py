@@ -0,0 +1,238 @@
+import logging
+import datetime
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Any, Optional, Tuple
+
+from goal_tracker import activity_key
+from route_optimizer import parse_range
+from state_store import MemoryStateStore
+from tools.compact_forecast import CompactForecast, from_epoch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("forecast_lookahead")
+
+DEFAULT_HORIZON_HOURS = 72
+DEFAULT_MAX_TEMPERATURE = 38  # °C feels-like above which outdoor slots are moved
+DEFAULT_MAX_PRECIPITATION = 60  # % chance of rain above which outdoor slots are moved
+DEFAULT_MIN_LEAD_HOURS = 2  # closer than this the booking is too late to move cheaply
+PENDING_NAMESPACE = "lookahead_pending"  # proposal key -> queued reschedule proposal
+DISMISSED_NAMESPACE = "lookahead_dismissed"  # proposal key -> True once the traveler rejected it
+
+class ForecastGrid:
+    """Hourly forecast for one city stored as aligned arrays.
+    
+    Index i is the hour starting at start + i hours, so any activity slot maps
+    to a contiguous range of indices.
+    """
+    
+    def __init__(self, city: str, forecast: Dict[str, Any]):
+        compact = CompactForecast.from_dict(forecast)
+        times = compact.times
+        
+        self.city = city
+        self.provider = compact.get("provider")
+        self.start = from_epoch(times[0]) if len(times) else None
+        size = int((times[-1] - times[0]) // 3600) + 1 if len(times) else 0
+        
+        # Gaps in the provider data stay NaN and never trigger a reschedule
+        index = (times - times[0]) // 3600 if len(times) else times
+        temperature = compact.hourly["temp"]
+        feels_like = np.where(np.isnan(compact.hourly["feels_like"]), temperature, compact.hourly["feels_like"])
+        self.temperature = np.full(size, np.nan)
+        self.feels_like = np.full(size, np.nan)
+        self.precipitation = np.full(size, np.nan)
+        self.temperature[index] = temperature
+        self.feels_like[index] = feels_like
+        self.precipitation[index] = compact.hourly["precipitation_chance"]
+    
+    def __len__(self) -> int:
+        return len(self.temperature)
+    
+    def index_of(self, moment: datetime.datetime) -> int:
+        return int((moment - self.start).total_seconds() // 3600)
+    
+    def hour_at(self, index: int) -> datetime.datetime:
+        return self.start + datetime.timedelta(hours=int(index))
+
+def proposal_key(activity: Dict[str, Any], day_date: str, time_slot: str) -> str:
+    return f"{activity_key(activity)}|{day_date}|{time_slot}"
+
+def _slot_bounds(day_date: str, time_slot: str) -> Tuple[datetime.datetime, datetime.datetime]:
+    """Start and end of a slot like "14:00-18:00" or "4:00 PM - 9:00 PM"; raises ValueError when unreadable."""
+    minutes = parse_range(time_slot)
+    if minutes is not None:
+        midnight = datetime.datetime.strptime(day_date, "%Y-%m-%d")
+        return midnight + datetime.timedelta(minutes=minutes[0]), midnight + datetime.timedelta(minutes=minutes[1])
+    # Slots running past midnight, e.g. "22:00-01:00"
+    start, end = time_slot.split("-")
+    start_dt = datetime.datetime.strptime(f"{day_date} {start.strip()}", "%Y-%m-%d %H:%M")
+    end_dt = datetime.datetime.strptime(f"{day_date} {end.strip()}", "%Y-%m-%d %H:%M")
+    if end_dt <= start_dt:
+        end_dt += datetime.timedelta(days=1)
+    return start_dt, end_dt
+
+class LookaheadEngine:
+    """Finds outdoor activities that will hit bad weather, hours before they start.
+    
+    This class handles:
+    1. Indexing each city's hourly forecast into a ForecastGrid
+    2. Checking every upcoming outdoor activity against its own slot in one pass
+    3. Queueing reschedule proposals with a comfortable slot on the same day
+    
+    Pending and rejected proposals live in the state store, so whichever
+    worker leads the scan sees answers given in any worker, and a newly
+    elected leader does not propose open reschedules again.
+    """
+    
+    def __init__(self, max_temperature: float = DEFAULT_MAX_TEMPERATURE,
+                 max_precipitation: float = DEFAULT_MAX_PRECIPITATION, store: Any = None):
+        self.max_temperature = max_temperature
+        self.max_precipitation = max_precipitation
+        self.store = store or MemoryStateStore()
+        self.grids = {}  # city -> ForecastGrid
+    
+    def update_forecast(self, city: str, forecast: Dict[str, Any]) -> ForecastGrid:
+        grid = ForecastGrid(city, forecast)
+        self.grids[city.lower()] = grid
+        logger.info(f"Indexed {len(grid)} forecast hours for {city}")
+        return grid
+    
+    def _upcoming_outdoor(self, itinerary: Dict[str, Any], now: datetime.datetime,
+                          horizon_hours: int) -> List[Tuple[Dict[str, Any], Dict[str, Any], datetime.datetime, datetime.datetime]]:
+        horizon = now + datetime.timedelta(hours=horizon_hours)
+        upcoming = []
+        for day in itinerary.get("days", []):
+            for activity in day.get("activities", []):
+                if not activity.get("is_outdoor") or not activity.get("time"):
+                    continue
+                try:
+                    start, end = _slot_bounds(day["date"], activity["time"])
+                except ValueError:
+                    logger.warning(f"Not checking {activity.get('name')}: unreadable time {activity['time']!r}")
+                    continue
+                if now <= start <= horizon:
+                    upcoming.append((day, activity, start, end))
+        return upcoming
+    
+    def _busy_hours(self, grid: ForecastGrid, day: Dict[str, Any], moving: Dict[str, Any]) -> np.ndarray:
+        """Grid hours taken by the day's other activities, so a move never lands on one of them."""
+        busy = np.zeros(len(grid), dtype=bool)
+        for activity in day.get("activities", []):
+            if activity is moving or not activity.get("time"):
+                continue
+            try:
+                start, end = _slot_bounds(day["date"], activity["time"])
+            except ValueError:
+                logger.warning(f"Ignoring unreadable time {activity['time']!r} of {activity.get('name')}")
+                continue
+            first = max(grid.index_of(start), 0)
+            last = min(int(np.ceil((end - grid.start).total_seconds() / 3600)), len(grid))
+            busy[first:last] = True
+        return busy
+    
+    def _comfortable_slot(self, grid: ForecastGrid, ok: np.ndarray, start: datetime.datetime,
+                          hours: int) -> Optional[str]:
+        """Closest same-day slot of the same length whose every hour is comfortable and free."""
+        day_start = grid.index_of(start.replace(hour=6, minute=0))
+        day_end = grid.index_of(start.replace(hour=23, minute=0))
+        first, last = max(day_start, 0), min(day_end, len(grid))
+        span = hours + (1 if start.minute else 0)  # a slot keeping its minutes reaches into one more hour
+        if last - first < span:
+            return None
+        
+        fits = sliding_window_view(ok[first:last], span).all(axis=1)
+        candidates = np.flatnonzero(fits) + first
+        if not len(candidates):
+            return None
+        
+        original = grid.index_of(start)
+        best = candidates[np.argmin(np.abs(candidates - original))]
+        new_start = grid.hour_at(best).replace(minute=start.minute)
+        new_end = new_start + datetime.timedelta(hours=hours)
+        return f"{new_start.strftime('%H:%M')}-{new_end.strftime('%H:%M')}"
+    
+    def scan(self, itinerary: Dict[str, Any], city: str = "Dubai", now: datetime.datetime = None,
+             horizon_hours: int = DEFAULT_HORIZON_HOURS,
+             min_lead_hours: float = DEFAULT_MIN_LEAD_HOURS) -> List[Dict[str, Any]]:
+        """Check every upcoming outdoor activity and queue new reschedule proposals.
+        
+        Returns only proposals that were not already pending.
+        """
+        grid = self.grids.get(city.lower())
+        now = now or datetime.datetime.now()
+        if grid is None or not len(grid):
+            logger.warning(f"No forecast indexed for {city}")
+            return []
+        
+        upcoming = self._upcoming_outdoor(itinerary, now, horizon_hours)
+        if not upcoming:
+            return []
+        
+        # One vectorized pass: every slot becomes a row of grid indices, padded to the longest slot
+        starts = np.array([grid.index_of(start) for _, _, start, _ in upcoming])
+        lengths = np.array([max(1, int(np.ceil((end - start).total_seconds() / 3600))) for _, _, start, end in upcoming])
+        offsets = np.arange(lengths.max())
+        indices = starts[:, None] + offsets[None, :]
+        in_slot = (offsets[None, :] < lengths[:, None]) & (indices >= 0) & (indices < len(grid))
+        safe = np.clip(indices, 0, len(grid) - 1)
+        
+        feels = np.where(in_slot, grid.feels_like[safe], np.nan)
+        rain = np.where(in_slot, grid.precipitation[safe], np.nan)
+        peak_feels = np.where(np.isnan(feels), -np.inf, feels).max(axis=1)
+        peak_rain = np.where(np.isnan(rain), -np.inf, rain).max(axis=1)
+        too_hot = peak_feels > self.max_temperature
+        too_wet = peak_rain > self.max_precipitation
+        flagged = np.flatnonzero(too_hot | too_wet)
+        
+        # Hours without forecast data are never suggested
+        comfortable = (grid.feels_like <= self.max_temperature) & ~(grid.precipitation > self.max_precipitation)
+        
+        proposals = []
+        for i in flagged:
+            day, activity, start, end = upcoming[i]
+            day_date = day["date"]
+            lead_hours = (start - now).total_seconds() / 3600
+            if lead_hours < min_lead_hours:
+                continue
+            
+            key = proposal_key(activity, day_date, activity["time"])
+            if self.store.get(DISMISSED_NAMESPACE, key) or self.store.get(PENDING_NAMESPACE, key) is not None:
+                continue
+            
+            proposal = {
+                "activity": activity,
+                "date": day_date,
+                "current_time": activity["time"],
+                "suggested_time": self._comfortable_slot(grid, comfortable & ~self._busy_hours(grid, day, activity),
+                                                         start, int(lengths[i])),
+                "reason": "heat" if too_hot[i] else "rain",
+                "peak_feels_like": round(float(peak_feels[i]), 1),
+                "peak_precipitation_chance": round(float(peak_rain[i]), 1),
+                "hours_until_start": round(lead_hours, 1),
+                "queued_at": now.isoformat()
+            }
+            # Another worker may have queued the same proposal meanwhile; only the first one counts
+            if self.store.put_if_absent(PENDING_NAMESPACE, key, proposal):
+                proposals.append(proposal)
+        
+        if proposals:
+            logger.info(f"Queued {len(proposals)} proactive reschedules for {city}")
+        # Soonest first: those are the ones about to become expensive to move
+        return sorted(proposals, key=lambda p: p["hours_until_start"])
+    
+    def resolve(self, proposal: Dict[str, Any], approved: bool) -> None:
+        """Drop a proposal from the queue; rejected ones are not proposed again."""
+        key = proposal_key(proposal["activity"], proposal["date"], proposal["current_time"])
+        if not approved:
+            self.store.put(DISMISSED_NAMESPACE, key, True)
+        self.store.delete(PENDING_NAMESPACE, key)
+    
+    def pending(self) -> List[Dict[str, Any]]:
+        """Proposals queued and not yet answered, by any worker."""
+        return [proposal for _, proposal in self.store.items(PENDING_NAMESPACE)]
+    
+    def clear(self) -> None:
+        """Forget every queued and rejected proposal."""
+        self.store.clear(PENDING_NAMESPACE)
+        self.store.clear(DISMISSED_NAMESPACE)
@@ -0,0 +1,258 @@
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("goal_tracker")
+
+# Keywords in an activity's category or name that give it a goal tag,
+# so "min_cultural_activities" counts everything tagged "cultural"
+CATEGORY_TAGS = {
+    "cultural": ["museum", "culture", "cultural", "heritage", "history", "mosque", "souk", "art", "film"],
+    "adventure": ["adventure", "desert", "safari", "nature", "water", "sport", "dune"],
+    "shopping": ["shopping", "mall", "souk", "market"],
+    "landmark": ["landmark", "tower", "burj", "palm"]
+}
+
+# (kind, tags, cuisines, is_outdoor, temperature) - everything a goal can count
+Features = Tuple[str, Tuple[str, ...], Tuple[str, ...], bool, Optional[float]]
+
+def activity_tags(category: str, name: str) -> List[str]:
+    """Goal tags implied by an activity's category and name."""
+    text = f"{category} {name}".lower()
+    return [tag for tag, keywords in CATEGORY_TAGS.items() if any(keyword in text for keyword in keywords)]
+
+def activity_key(activity: Dict[str, Any]) -> str:
+    """Stable identity for an activity, whichever fields it happens to carry."""
+    return activity.get("id") or activity.get("booking_reference") or f"{activity.get('name')}@{activity.get('time')}"
+
+def activity_features(activity: Dict[str, Any], temperature: float = None) -> Features:
+    """Reduce an activity to the fields goal criteria look at."""
+    category = activity.get("category", "")
+    kind = activity.get("kind")
+    if kind is None:
+        if category == "dining" or activity.get("cuisine") or activity.get("cuisines"):
+            kind = "dining"
+        elif category == "transportation":
+            kind = "transport"
+        else:
+            kind = "attraction"
+    
+    cuisines = activity.get("cuisines")
+    if cuisines is None:
+        cuisines = [c.strip().lower() for c in activity.get("cuisine", "").split(",") if c.strip()]
+    
+    tags = activity.get("tags")
+    if tags is None:
+        tags = activity_tags(category, activity.get("name", ""))
+    
+    if temperature is None:
+        temperature = activity.get("expected_temperature")
+    return kind, tuple(tags), tuple(cuisines), bool(activity.get("is_outdoor", False)), temperature
+
+class ActivityCounters:
+    """Running totals of everything goal criteria count.
+    
+    Adding or removing an activity touches only its own tags, kind and
+    cuisines, so keeping the totals current never needs a scan of the trip.
+    """
+    
+    def __init__(self, temperature_limits: List[float] = None):
+        self.tags = {}
+        self.kinds = {}
+        self.cuisines = {}  # cuisine -> activities serving it, so removals are exact
+        self.outdoor = 0
+        self.over_limit = {limit: 0 for limit in temperature_limits or []}
+    
+    def add_limit(self, limit: float) -> None:
+        self.over_limit.setdefault(limit, 0)
+    
+    def apply(self, features: Features, sign: int = 1) -> None:
+        """Add (sign=1) or remove (sign=-1) one activity."""
+        kind, tags, cuisines, is_outdoor, temperature = features
+        self.kinds[kind] = self.kinds.get(kind, 0) + sign
+        for tag in tags:
+            self.tags[tag] = self.tags.get(tag, 0) + sign
+        for cuisine in cuisines:
+            count = self.cuisines.get(cuisine, 0) + sign
+            if count:
+                self.cuisines[cuisine] = count
+            else:
+                self.cuisines.pop(cuisine, None)
+        if is_outdoor:
+            self.outdoor += sign
+            if temperature is not None:
+                for limit in self.over_limit:
+                    if temperature > limit:
+                        self.over_limit[limit] += sign
+    
+    def criterion_score(self, criterion: str, target: Any) -> Optional[float]:
+        """0-1 score for one success criterion, or None if it isn't one we count."""
+        if criterion == "max_temperature":
+            if not self.outdoor:
+                return 1.0
+            over = self.over_limit.get(target)
+            if over is None:
+                return None
+            return (self.outdoor - over) / self.outdoor
+        
+        if criterion == "min_attractions":
+            value = self.kinds.get("attraction", 0) + self.kinds.get("event", 0)
+        elif criterion == "min_unique_cuisines":
+            value = len(self.cuisines)
+        elif criterion.startswith("min_") and criterion.endswith("_activities"):
+            value = self.tags.get(criterion[4:-len("_activities")], 0)
+        else:
+            return None
+        return min(value / target, 1.0) if target else 1.0
+
+def goal_satisfaction(criteria: Dict[str, Any], counters: ActivityCounters) -> float:
+    """0-1 score of how well the counted activities meet a goal's success criteria."""
+    scores = [counters.criterion_score(criterion, target) for criterion, target in criteria.items()]
+    scores = [score for score in scores if score is not None]
+    return sum(scores) / len(scores) if scores else 1.0
+
+class GoalTracker:
+    """Keeps every goal's satisfaction current as the trip changes.
+    
+    This class handles:
+    1. Incremental counters updated on add, swap, complete and cancel
+    2. O(1) satisfaction queries that also keep Goal.satisfaction_score current
+    3. Goal-delta scoring of candidate swaps without touching the tracked trip
+    """
+    
+    def __init__(self, goals: List[Any] = None):
+        self.goals = []
+        self.counters = ActivityCounters()
+        self.activities = {}  # activity key -> (features, status)
+        self.satisfaction = {}  # goal name -> 0-1 score
+        for goal in goals or []:
+            self.add_goal(goal)
+    
+    def add_goal(self, goal: Any) -> None:
+        self.goals.append(goal)
+        if "max_temperature" in goal.success_criteria:
+            limit = goal.success_criteria["max_temperature"]
+            if limit not in self.counters.over_limit:
+                # A new limit needs its count filled in once from what is tracked
+                self.counters.add_limit(limit)
+                self.counters.over_limit[limit] = sum(
+                    1 for (_, _, _, outdoor, temperature), _ in self.activities.values()
+                    if outdoor and temperature is not None and temperature > limit
+                )
+        self._refresh()
+    
+    def _refresh(self) -> None:
+        # Cost is per goal criterion, independent of how many activities are tracked
+        for goal in self.goals:
+            score = goal_satisfaction(goal.success_criteria, self.counters)
+            self.satisfaction[goal.name] = score
+            goal.satisfaction_score = score
+    
+    def reset(self) -> None:
+        """Forget all tracked activities."""
+        self.counters = ActivityCounters(list(self.counters.over_limit))
+        self.activities = {}
+        self._refresh()
+    
+    def track_itinerary(self, itinerary: Dict[str, Any]) -> None:
+        """Start tracking every activity of an itinerary (or a single day's plan)."""
+        self.reset()
+        days = itinerary.get("days") or [itinerary]
+        for day in days:
+            for activity in day.get("activities", []):
+                self.add_activity(activity)
+    
+    def add_activity(self, activity: Dict[str, Any], temperature: float = None) -> None:
+        key = activity_key(activity)
+        if key in self.activities:
+            return
+        features = activity_features(activity, temperature)
+        self.activities[key] = (features, "planned")
+        self.counters.apply(features, 1)
+        self._refresh()
+    
+    def cancel_activity(self, activity: Dict[str, Any]) -> None:
+        """Stop counting an activity towards the goals."""
+        key = activity_key(activity)
+        entry = self.activities.get(key)
+        if entry is None:
+            return
+        if entry[1] == "completed":
+            logger.warning(f"Activity {key} is already completed and keeps counting towards goals")
+            return
+        del self.activities[key]
+        self.counters.apply(entry[0], -1)
+        self._refresh()
+    
+    def complete_activity(self, activity: Dict[str, Any]) -> None:
+        """Mark an activity as done; it keeps counting and can no longer be swapped out."""
+        key = activity_key(activity)
+        if key not in self.activities:
+            self.add_activity(activity)
+        self.activities[key] = (self.activities[key][0], "completed")
+    
+    def swap_activity(self, old_activity: Dict[str, Any], new_activity: Dict[str, Any]) -> None:
+        self.cancel_activity(old_activity)
+        self.add_activity(new_activity)
+    
+    def get_satisfaction(self, goal_name: str) -> float:
+        return self.satisfaction.get(goal_name, 0.0)
+    
+    def overall_satisfaction(self) -> float:
+        """Priority-weighted satisfaction across all goals."""
+        total_priority = sum(goal.priority for goal in self.goals)
+        if not total_priority:
+            return 1.0
+        return sum(goal.priority * self.satisfaction[goal.name] for goal in self.goals) / total_priority
+    
+    def goal_delta(self, old_activity: Optional[Dict[str, Any]], new_activity: Optional[Dict[str, Any]]) -> Dict[str, float]:
+        """Change in each goal's satisfaction if old_activity were replaced by new_activity.
+        
+        Either side may be None for a pure addition or removal. The tracked
+        trip is left exactly as it was.
+        """
+        return self.swaps_delta([(old_activity, new_activity)])
+    
+    def swaps_delta(self, swaps: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> Dict[str, float]:
+        """Change in each goal's satisfaction if every (old, new) swap were made together, as swap_activity would."""
+        changes, removed, added = [], set(), set()
+        for old_activity, new_activity in swaps:
+            old_key = activity_key(old_activity) if old_activity else None
+            old_entry = self.activities.get(old_key) if old_key not in removed else None
+            if old_entry and old_entry[1] != "completed":
+                changes.append((old_entry[0], -1))
+                removed.add(old_key)
+            new_key = activity_key(new_activity) if new_activity else None
+            if new_key and new_key not in added and (new_key not in self.activities or new_key in removed):
+                changes.append((activity_features(new_activity), 1))
+                added.add(new_key)
+        
+        for features, sign in changes:
+            self.counters.apply(features, sign)
+        try:
+            return {
+                goal.name: goal_satisfaction(goal.success_criteria, self.counters) - self.satisfaction[goal.name]
+                for goal in self.goals
+            }
+        finally:
+            for features, sign in reversed(changes):
+                self.counters.apply(features, -sign)
+    
+    def weighted_delta(self, old_activity: Optional[Dict[str, Any]], new_activity: Optional[Dict[str, Any]]) -> float:
+        """Priority-weighted sum of goal_delta."""
+        deltas = self.goal_delta(old_activity, new_activity)
+        return sum(goal.priority * deltas[goal.name] for goal in self.goals)
+    
+    def best_swap(self, old_activity: Dict[str, Any], candidates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """The candidate that best preserves the goals; earlier candidates win ties."""
+        if not candidates:
+            return None
+        return max(candidates, key=lambda candidate: self.weighted_delta(old_activity, candidate))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "goals": {name: round(score, 3) for name, score in self.satisfaction.items()},
+            "overall": round(self.overall_satisfaction(), 3),
+            "tracked_activities": len(self.activities),
+            "completed_activities": sum(1 for _, status in self.activities.values() if status == "completed")
+        }
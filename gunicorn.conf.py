@@ -0,0 +1,26 @@
+"""Gunicorn settings for running the API with several worker processes.
+
+Run with: gunicorn main_v2:app  (this file is picked up from the working directory)
+
+Every worker imports the app on its own and shares itineraries, planners,
+notifications and revision counters through the state store at
+STATE_STORE_URL, which defaults to a SQLite file here. Only the worker
+holding the background lease refreshes weather; GET /cluster shows which.
+"""
+import os
+import multiprocessing
+
+from state_store import DEFAULT_SHARED_STATE_URL
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+# Workers import the app after forking, so none of them inherits another's threads or connections
+preload_app = False
+
+# Workers only agree on state through a store they can all open; they inherit this from the master
+os.environ.setdefault("STATE_STORE_URL", DEFAULT_SHARED_STATE_URL)
@@ -0,0 +1,125 @@
+import os
+import time
+import base64
+import logging
+import itertools
+from typing import Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("id_generator")
+
+# 120-bit IDs: 48-bit millisecond timestamp | 32-bit node | 40-bit sequence.
+# 120 bits encode to exactly 24 base32 characters, so no padding is needed.
+TIMESTAMP_BITS = 48
+NODE_BITS = 32
+SEQUENCE_BITS = 40
+ID_BYTES = (TIMESTAMP_BITS + NODE_BITS + SEQUENCE_BITS) // 8
+
+_SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+_TIMESTAMP_SHIFT = NODE_BITS + SEQUENCE_BITS
+
+# Crockford base32 sorts in the same order as the numbers it encodes, so
+# encoded IDs are lexicographically sortable.
+_RFC4648_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+_CROCKFORD_ALPHABET = b"0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_FROM_CROCKFORD = bytes.maketrans(_CROCKFORD_ALPHABET, _RFC4648_ALPHABET)
+
+# Every 10-bit value as two characters, so encoding is one lookup per 10 bits
+_PAIRS = [chr(_CROCKFORD_ALPHABET[i >> 5]) + chr(_CROCKFORD_ALPHABET[i & 31]) for i in range(1024)]
+
+class IdGenerator:
+    """Monotonic, sortable ID generator for bookings and confirmation codes.
+    
+    IDs combine a millisecond timestamp, a random per-process node ID and a
+    per-process sequence number, so:
+    1. IDs from one process are strictly increasing (the clock is monotonic)
+    2. IDs from different processes never collide unless their random node IDs do
+    3. Generation needs no lock: the sequence comes from itertools.count, whose
+       increment is atomic under the GIL
+    """
+    
+    def __init__(self, node_id: Optional[int] = None):
+        self._reseed(node_id)
+    
+    def _reseed(self, node_id: Optional[int] = None) -> None:
+        """Pick a node ID and restart the clock and sequence (also run after fork)."""
+        if node_id is None:
+            node_id = int.from_bytes(os.urandom(NODE_BITS // 8), "big")
+        self.node_id = node_id & ((1 << NODE_BITS) - 1)
+        self._node_part = self.node_id << SEQUENCE_BITS
+        
+        # Anchor a monotonic clock to wall time once so IDs never go backwards
+        self._wall_ms = time.time_ns() // 1_000_000
+        self._mono_ns = time.monotonic_ns()
+        self._sequence = itertools.count()
+        
+        # (millisecond, encoded timestamp + node) - the first 16 characters only
+        # change once per millisecond. Replaced as a whole, so racing threads
+        # can at worst both recompute the same value.
+        self._prefix = (-1, "")
+    
+    def _now_ms(self) -> int:
+        return self._wall_ms + (time.monotonic_ns() - self._mono_ns) // 1_000_000
+    
+    def next_int(self) -> int:
+        """Return the next ID as a 120-bit integer."""
+        sequence = next(self._sequence) & _SEQUENCE_MASK
+        return (self._now_ms() << _TIMESTAMP_SHIFT) | self._node_part | sequence
+    
+    def next_id(self) -> str:
+        """Return the next ID as a 24-character sortable string."""
+        sequence = next(self._sequence) & _SEQUENCE_MASK
+        now_ms = self._now_ms()
+        
+        cached_ms, prefix = self._prefix
+        if now_ms != cached_ms:
+            prefix = _encode_bits((now_ms << NODE_BITS) | self.node_id, TIMESTAMP_BITS + NODE_BITS)
+            self._prefix = (now_ms, prefix)
+        
+        return (prefix + _PAIRS[sequence >> 30] + _PAIRS[(sequence >> 20) & 1023]
+                + _PAIRS[(sequence >> 10) & 1023] + _PAIRS[sequence & 1023])
+    
+    def next_code(self, length: int = 16) -> str:
+        """Return the low-order characters of a fresh ID as a short code.
+        
+        The last 16 characters cover the whole node and sequence, so codes of
+        that length are as unique as full IDs; shorter codes trade uniqueness
+        for readability.
+        """
+        return self.next_id()[-length:]
+
+def _encode_bits(value: int, bits: int) -> str:
+    """Encode `bits` bits (a multiple of 10) of `value` as Crockford base32."""
+    return "".join(_PAIRS[(value >> shift) & 1023] for shift in range(bits - 10, -1, -10))
+
+def encode_id(value: int) -> str:
+    """Encode a 120-bit ID as Crockford base32."""
+    return _encode_bits(value, ID_BYTES * 8)
+
+def decode_id(encoded: str) -> int:
+    """Decode a Crockford base32 ID back to its integer value."""
+    raw = encoded.encode("ascii").translate(_FROM_CROCKFORD)
+    return int.from_bytes(base64.b32decode(raw), "big")
+
+def id_timestamp_ms(encoded: str) -> int:
+    """Return the millisecond timestamp embedded in an ID."""
+    return decode_id(encoded) >> _TIMESTAMP_SHIFT
+
+# Create a global instance of the ID generator
+id_generator = IdGenerator()
+
+# A forked worker must not reuse the parent's node ID and sequence
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=id_generator._reseed)
+
+def new_booking_id(prefix: str) -> str:
+    """Return a new booking ID such as ACT-01JABCD...."""
+    return f"{prefix}-{id_generator.next_id()}"
+
+def new_decision_id() -> str:
+    """Return a new ID for an agent decision, such as DEC-01JABCD...."""
+    return f"DEC-{id_generator.next_id()}"
+
+def new_reference(prefix: str = "", length: int = 16) -> str:
+    """Return a new booking/confirmation reference, optionally prefixed."""
+    return f"{prefix}{id_generator.next_code(length)}"
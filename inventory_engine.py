@@ -0,0 +1,203 @@
+import logging
+import datetime
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("inventory_engine")
+
+# Bookable slots per activity type, grouped by time of day
+SLOT_TEMPLATES = {
+    "desert_safari": {
+        "morning": ["06:00-10:00", "07:00-11:00"],
+        "afternoon": ["14:00-18:00", "15:00-19:00"],
+        "evening": ["16:00-20:00"]
+    },
+    "cultural_tour": {
+        "morning": ["09:00-12:00", "10:00-13:00"],
+        "afternoon": ["13:00-16:00", "14:00-17:00"],
+        "evening": ["17:00-20:00"]
+    },
+    "water_activity": {
+        "morning": ["08:00-10:00", "10:00-12:00"],
+        "afternoon": ["13:00-15:00", "15:00-17:00"],
+        "evening": ["17:00-19:00"]
+    },
+    "general": {
+        "morning": ["09:00-11:00", "11:00-13:00"],
+        "afternoon": ["14:00-16:00", "16:00-18:00"],
+        "evening": ["19:00-21:00"]
+    }
+}
+
+# Seats per slot unless a specific (activity type, date, slot) is overridden
+DEFAULT_CAPACITY = {
+    "desert_safari": 40,
+    "cultural_tour": 25,
+    "water_activity": 12,
+    "general": 30
+}
+
+# Number of locks that inventory keys are spread across
+LOCK_STRIPES = 64
+
+SlotKey = Tuple[str, str, str]  # (activity type, date, time slot)
+
+def activity_type_for(activity: Dict[str, Any]) -> str:
+    """Map an activity dict to the inventory activity type it draws slots from."""
+    if activity.get("activity_type") in SLOT_TEMPLATES:
+        return activity["activity_type"]
+    
+    name = activity.get("name", "").lower()
+    category = activity.get("category", "").lower()
+    if "safari" in name or "desert" in name:
+        return "desert_safari"
+    if category in ["culture", "cultural"]:
+        return "cultural_tour"
+    if category == "water" or "yacht" in name or "cruise" in name:
+        return "water_activity"
+    return "general"
+
+class InventoryEngine:
+    """In-memory slot inventory for bookable activities.
+    
+    This class handles:
+    1. Per-activity-type, per-date slot capacities
+    2. Atomic reserve/release of seats tied to booking IDs
+    3. Cached availability queries, invalidated whenever a date's seats change
+    
+    Keys are spread over striped locks so bookings for different activities
+    and dates never wait on each other.
+    """
+    
+    def __init__(self, slot_templates: Dict[str, Dict[str, List[str]]] = None,
+                 default_capacity: Dict[str, int] = None):
+        self.slot_templates = slot_templates or SLOT_TEMPLATES
+        self.default_capacity = default_capacity or DEFAULT_CAPACITY
+        self.capacity_overrides = {}  # SlotKey -> capacity
+        self.reserved = {}  # SlotKey -> seats reserved
+        self.reservations = {}  # booking_id -> (SlotKey, seats)
+        self.availability_cache = {}  # (activity type, date) -> availability dict
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+    
+    def _lock_for(self, activity_type: str, date: str) -> threading.Lock:
+        return self._locks[hash((activity_type, date)) % LOCK_STRIPES]
+    
+    def _capacity(self, key: SlotKey) -> int:
+        capacity = self.capacity_overrides.get(key)
+        if capacity is None:
+            capacity = self.default_capacity.get(key[0], self.default_capacity["general"])
+        return capacity
+    
+    def set_capacity(self, activity_type: str, date: str, time_slot: str, capacity: int) -> None:
+        """Override the number of seats for one slot on one date."""
+        with self._lock_for(activity_type, date):
+            self.capacity_overrides[(activity_type, date, time_slot)] = capacity
+            self.availability_cache.pop((activity_type, date), None)
+    
+    def remaining(self, activity_type: str, date: str, time_slot: str) -> int:
+        """Seats still available for a slot."""
+        key = (activity_type, date, time_slot)
+        return self._capacity(key) - self.reserved.get(key, 0)
+    
+    def reserve(self, booking_id: str, activity_type: str, date: str,
+                time_slot: str, seats: int = 1) -> bool:
+        """Atomically reserve seats for a booking; returns False if the slot is full."""
+        key = (activity_type, date, time_slot)
+        with self._lock_for(activity_type, date):
+            if booking_id in self.reservations:
+                return True
+            
+            reserved = self.reserved.get(key, 0)
+            if reserved + seats > self._capacity(key):
+                logger.info(f"No availability for {activity_type} on {date} at {time_slot}")
+                return False
+            
+            self.reserved[key] = reserved + seats
+            self.reservations[booking_id] = (key, seats)
+            self.availability_cache.pop((activity_type, date), None)
+        return True
+    
+    def release(self, booking_id: str) -> bool:
+        """Return a booking's seats to the pool; returns False if it held none."""
+        while True:
+            reservation = self.reservations.get(booking_id)
+            if reservation is None:
+                return False
+            
+            key, seats = reservation
+            with self._lock_for(key[0], key[1]):
+                # Another thread may have released or moved it while we waited for the lock;
+                # a moved reservation may now sit under another stripe, so look again
+                current = self.reservations.get(booking_id)
+                if current is None:
+                    return False
+                if current != reservation:
+                    continue
+                del self.reservations[booking_id]
+                self.reserved[key] -= seats
+                self.availability_cache.pop((key[0], key[1]), None)
+            return True
+    
+    def move(self, booking_id: str, date: str, time_slot: str) -> bool:
+        """Move a booking's seats to another date/slot of the same activity type.
+        
+        Either the new seats are reserved and the old ones released, or
+        nothing changes and False is returned.
+        """
+        reservation = self.reservations.get(booking_id)
+        if reservation is None:
+            return False
+        
+        old_key, seats = reservation
+        new_key = (old_key[0], date, time_slot)
+        
+        # Take both stripes in a fixed order so two moves can't deadlock
+        stripes = sorted({hash(old_key[:2]) % LOCK_STRIPES, hash(new_key[:2]) % LOCK_STRIPES})
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        try:
+            if self.reservations.get(booking_id) != reservation:
+                return False
+            if new_key != old_key and self.reserved.get(new_key, 0) + seats > self._capacity(new_key):
+                return False
+            
+            self.reserved[old_key] -= seats
+            self.reserved[new_key] = self.reserved.get(new_key, 0) + seats
+            self.reservations[booking_id] = (new_key, seats)
+            self.availability_cache.pop(old_key[:2], None)
+            self.availability_cache.pop(new_key[:2], None)
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
+        return True
+    
+    def check_availability(self, activity_type: str, date: str) -> Dict[str, List[str]]:
+        """Return the slots with free seats, grouped by time of day."""
+        cache_key = (activity_type, date)
+        cached = self.availability_cache.get(cache_key)
+        if cached is not None:
+            return {time_of_day: list(slots) for time_of_day, slots in cached.items()}
+        
+        template = self.slot_templates.get(activity_type, self.slot_templates["general"])
+        with self._lock_for(activity_type, date):
+            availability = {
+                time_of_day: [slot for slot in slots if self.remaining(activity_type, date, slot) > 0]
+                for time_of_day, slots in template.items()
+            }
+            self.availability_cache[cache_key] = availability
+        
+        # Hand out copies so callers can't corrupt the cache
+        return {time_of_day: list(slots) for time_of_day, slots in availability.items()}
+    
+    def check_availability_range(self, activity_type: str, start_date: str,
+                                 end_date: str) -> Dict[str, Dict[str, List[str]]]:
+        """Return availability for every date from start_date to end_date inclusive."""
+        start = datetime.date.fromisoformat(start_date)
+        end = datetime.date.fromisoformat(end_date)
+        
+        availability = {}
+        for offset in range((end - start).days + 1):
+            date = (start + datetime.timedelta(days=offset)).isoformat()
+            availability[date] = self.check_availability(activity_type, date)
+        return availability
@@ -0,0 +1,453 @@
+import math
+import time
+import itertools
+import random
+import logging
+import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from route_optimizer import route_optimizer, _to_minutes, _to_clock
+from goal_tracker import ActivityCounters, activity_tags, goal_satisfaction
+from tools.weather_tools import get_weather_forecast_weatherapi
+from tools.mapping_tools import get_simulated_geocode
+from tools.distance_engine import distance_engine, estimate_travel
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("itinerary_planner")
+
+DEFAULT_TIME_LIMIT = 2.0  # seconds of search for a whole trip
+MAX_TIME_LIMIT = 10.0  # upper bound on any search, whatever the caller asks for
+DEFAULT_ENERGY_BUDGET = 1.8  # sum of energy_required allowed per day
+DEFAULT_HEAT_THRESHOLD = 38  # °C, outdoor activities avoid hours above this
+MAX_ACTIVITIES_PER_DAY = 5
+MAX_MEALS_PER_DAY = 2
+MEAL_WINDOWS = ["12:00-15:00", "19:00-22:30"]  # lunch and dinner; a day has at most one meal in each
+DAY_START = "08:00"
+DAY_END = "23:30"
+
+# Objective weights: goals dominate, then how good the activities are, then travel
+GOAL_WEIGHT = 10.0
+VALUE_WEIGHT = 1.0
+TRAVEL_WEIGHT = 0.01  # per minute
+
+# Defaults by kind of candidate when the provider doesn't say
+KIND_DEFAULTS = {
+    "attraction": {"duration": 120, "opening_hours": "09:00-22:00", "energy_required": 0.4},
+    "event": {"duration": 120, "opening_hours": "10:00-23:00", "energy_required": 0.3},
+    "dining": {"duration": 90, "opening_hours": "12:00-23:00", "energy_required": 0.2}
+}
+
+def _hours(text: str) -> Tuple[int, int]:
+    start, end = text.split("-")
+    return _to_minutes(start), _to_minutes(end)
+
+def candidates_from_tools(location: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    """Collect attractions, events and restaurants into one candidate pool.
+    
+    Providers that fail still return simulated data, so the pool is never empty.
+    The catalogs are imported on the first plan, so the app starts without them.
+    """
+    from tools.attraction_tools import is_outdoor_attraction
+    from tools.attraction_catalog import attraction_catalog
+    from tools.event_catalog import event_catalog
+    from tools.restaurant_catalog import restaurant_catalog
+    
+    candidates = []
+    
+    attraction_catalog.ensure(location)
+    for attraction in attraction_catalog.in_location(location):
+        category = attraction.get("category", "")
+        is_outdoor = attraction.get("is_outdoor", is_outdoor_attraction(category))
+        candidates.append({
+            "id": attraction["id"],
+            "kind": "attraction",
+            "name": attraction["name"],
+            "description": attraction.get("description", ""),
+            "category": category,
+            "location": attraction.get("address", location),
+            "latitude": attraction.get("latitude"),
+            "longitude": attraction.get("longitude"),
+            "is_outdoor": is_outdoor,
+            "rating": attraction.get("rating", 4.0),
+            "energy_required": 0.6 if is_outdoor else 0.4
+        })
+    
+    event_catalog.ensure(location, start_date, end_date)
+    for event in event_catalog.query(start_date, end_date, location=location):
+        venue = event.get("venue", {})
+        start_time = datetime.datetime.fromisoformat(event["start_time"])
+        end_time = datetime.datetime.fromisoformat(event["end_time"])
+        closes = end_time.strftime("%H:%M") if end_time.time() > start_time.time() else DAY_END
+        candidates.append({
+            "id": event["id"],
+            "kind": "event",
+            "name": event["name"],
+            "description": event.get("description", ""),
+            "category": event.get("category", ""),
+            "location": venue.get("address", location),
+            "latitude": venue.get("latitude"),
+            "longitude": venue.get("longitude"),
+            "is_outdoor": not event.get("is_indoor", True),
+            "rating": 4.5,
+            "opening_hours": f"{start_time.strftime('%H:%M')}-{closes}",
+            "first_date": start_time.date().isoformat(),
+            "last_date": end_time.date().isoformat()
+        })
+    
+    restaurant_catalog.ensure(location)
+    for restaurant in restaurant_catalog.in_location(location):
+        candidates.append({
+            "id": restaurant["id"],
+            "kind": "dining",
+            "name": restaurant["name"],
+            "description": f"{restaurant.get('cuisine', '')} dining",
+            "category": "dining",
+            "cuisines": [c.strip().lower() for c in restaurant.get("cuisine", "").split(",") if c.strip()],
+            "location": restaurant.get("address", location),
+            "latitude": restaurant.get("latitude"),
+            "longitude": restaurant.get("longitude"),
+            "is_outdoor": False,
+            "rating": restaurant.get("rating", 4.0)
+        })
+    
+    return candidates
+
+def heat_hours_from_forecast(forecast: Dict[str, Any], threshold: float) -> Dict[str, List[int]]:
+    """Hours of each date whose temperature or feels-like exceeds the threshold."""
+    heat_hours = {}
+    for day in forecast.get("forecasts", []):
+        hours = []
+        for hour in day.get("hourly", []):
+            if max(hour.get("temp", 0), hour.get("feels_like", 0)) > threshold:
+                hours.append(int(hour["time"][-5:-3]))
+        heat_hours[day["date"]] = hours
+    return heat_hours
+
+def clamp_time_limit(time_limit: Any) -> float:
+    """A search time limit between 0 and MAX_TIME_LIMIT seconds, the default when it isn't a number."""
+    try:
+        return min(max(float(time_limit), 0.0), MAX_TIME_LIMIT)
+    except (TypeError, ValueError):
+        return DEFAULT_TIME_LIMIT
+
+def _meal_window(window: Tuple[int, int], meal: int, duration: int) -> Optional[Tuple[int, int]]:
+    """The part of a restaurant's window within a meal time, if the meal fits in it."""
+    meal_start, meal_end = _hours(MEAL_WINDOWS[meal])
+    start, end = max(window[0], meal_start), min(window[1], meal_end)
+    return (start, end) if end - start >= duration else None
+
+def _open_window(opening: Tuple[int, int], blocked_hours: List[int], duration: int) -> Optional[Tuple[int, int]]:
+    """Longest stretch of the opening hours outside the blocked hours, if the visit fits."""
+    best = None
+    start = opening[0]
+    for hour in sorted(blocked_hours) + [None]:
+        end = opening[1] if hour is None else min(hour * 60, opening[1])
+        if end - start >= duration and (best is None or end - start > best[1] - best[0]):
+            best = (start, end)
+        if hour is not None:
+            start = max(start, (hour + 1) * 60)
+    return best
+
+class ItineraryPlanner:
+    """Builds multi-day itineraries from a candidate pool under constraints.
+    
+    This class handles:
+    1. Per-day windows from opening hours, event dates and forecast heat hours
+    2. Energy budgets, meal limits and travel-feasible ordering of every day
+    3. Anytime local search towards the traveler's goal success criteria
+    4. Re-planning only the days affected by a change, leaving the rest untouched
+    """
+    
+    def __init__(self, location: str, start_date: str, num_days: int, goals: List[Any] = None,
+                 candidates: List[Dict[str, Any]] = None, forecast: Dict[str, Any] = None,
+                 energy_budget: float = DEFAULT_ENERGY_BUDGET, heat_threshold: float = None,
+                 start_location: Tuple[float, float] = None, seed: int = None):
+        self.location = location
+        self.start = datetime.date.fromisoformat(start_date)
+        self.dates = [(self.start + datetime.timedelta(days=i)).isoformat() for i in range(num_days)]
+        self.goals = goals or []
+        self.energy_budgets = [energy_budget for _ in self.dates]
+        self.start_location = start_location
+        self.random = random.Random(seed)
+        
+        # A goal's temperature ceiling also keeps outdoor plans out of the heat
+        self.temperature_limits = [g.success_criteria["max_temperature"] for g in self.goals if "max_temperature" in g.success_criteria]
+        self.heat_threshold = heat_threshold or min(self.temperature_limits + [DEFAULT_HEAT_THRESHOLD])
+        
+        if candidates is None:
+            candidates = candidates_from_tools(location, self.dates[0], self.dates[-1])
+        self.candidates = {}
+        for candidate in candidates:
+            defaults = KIND_DEFAULTS.get(candidate.get("kind", "attraction"), KIND_DEFAULTS["attraction"])
+            self.candidates[candidate["id"]] = {
+                **defaults,
+                "kind": "attraction",
+                "rating": 4.0,
+                "is_outdoor": False,
+                "tags": activity_tags(candidate.get("category", ""), candidate.get("name", "")),
+                **candidate
+            }
+        self.ids = list(self.candidates)
+        
+        self._build_travel_matrix()
+        
+        if forecast is None:
+            forecast = get_weather_forecast_weatherapi(location, min(num_days, 10)).get("data", {})
+        self.set_forecast(forecast)
+        
+        self.days = [[] for _ in self.dates]  # candidate ids planned per day
+        self.evaluations = [None for _ in self.dates]  # routed schedule of each planned day
+        self._day_cache = {}  # (day index, frozenset of ids) -> day evaluation or None
+    
+    def _build_travel_matrix(self) -> None:
+        """Travel minutes between all candidates, with index 0 as the start location."""
+        coordinates = [self.start_location or (0.0, 0.0)]
+        for candidate_id in self.ids:
+            candidate = self.candidates[candidate_id]
+            if candidate.get("latitude") is None or candidate.get("longitude") is None:
+                geocode = get_simulated_geocode(candidate.get("location") or candidate["name"])
+                candidate["latitude"], candidate["longitude"] = geocode["latitude"], geocode["longitude"]
+            coordinates.append((candidate["latitude"], candidate["longitude"]))
+        
+        _, durations = estimate_travel(coordinates, coordinates, route_optimizer.mode)
+        self.matrix = (durations / 60).tolist()
+        if self.start_location is None:
+            self.matrix[0] = [0.0] * len(coordinates)
+        
+        # Prefer real provider answers for pairs the distance engine has already seen
+        locations = [None] + [self.candidates[i].get("location") for i in self.ids]
+        for a in range(1, len(locations)):
+            for b in range(a + 1, len(locations)):
+                if not (locations[a] and locations[b]):
+                    continue
+                cached = distance_engine.cached_pair(locations[a], locations[b], route_optimizer.mode)
+                if cached:
+                    self.matrix[a][b] = self.matrix[b][a] = cached[1] / 60
+        self.index = {candidate_id: i + 1 for i, candidate_id in enumerate(self.ids)}
+    
+    def set_forecast(self, forecast: Dict[str, Any]) -> None:
+        """Recompute which hours are too hot for outdoor activities on each date."""
+        self.forecast = forecast
+        self.heat_hours = heat_hours_from_forecast(forecast, self.heat_threshold)
+        self.peak_temps = {
+            day["date"]: {int(h["time"][-5:-3]): max(h.get("temp", 0), h.get("feels_like", 0)) for h in day.get("hourly", [])}
+            for day in forecast.get("forecasts", [])
+        }
+        self._windows = {}
+        self._day_cache = {}
+    
+    def window(self, candidate_id: str, day: int) -> Optional[Tuple[int, int]]:
+        """Allowed (start, end) minutes for a candidate on a day, or None if it can't go that day."""
+        key = (candidate_id, day)
+        if key not in self._windows:
+            candidate = self.candidates[candidate_id]
+            date = self.dates[day]
+            window = None
+            if candidate.get("first_date", date) <= date <= candidate.get("last_date", date):
+                opening = _hours(candidate["opening_hours"])
+                blocked = self.heat_hours.get(date, []) if candidate["is_outdoor"] else []
+                window = _open_window(opening, blocked, candidate["duration"])
+            self._windows[key] = window
+        return self._windows[key]
+    
+    def _evaluate_day(self, day: int, ids: frozenset) -> Optional[Dict[str, Any]]:
+        """Route a day's activities, each restaurant at its own meal time; None if they can't all fit."""
+        cache_key = (day, ids)
+        if cache_key in self._day_cache:
+            return self._day_cache[cache_key]
+        
+        result = None
+        candidates = [self.candidates[i] for i in ids]
+        if (len(ids) <= MAX_ACTIVITIES_PER_DAY
+                and sum(c["energy_required"] for c in candidates) <= self.energy_budgets[day] + 1e-9
+                and sum(1 for c in candidates if c["kind"] == "dining") <= MAX_MEALS_PER_DAY
+                and all(self.window(i, day) for i in ids)):
+            order = sorted(ids)
+            meals = [i for i in order if self.candidates[i]["kind"] == "dining"]
+            indices = [0] + [self.index[i] for i in order]
+            matrix = [[self.matrix[a][b] for b in indices] for a in indices]
+            # Try each way of giving the day's restaurants different meals until one routes
+            for slots in itertools.permutations(range(len(MEAL_WINDOWS)), len(meals)):
+                windows = {i: self.window(i, day) for i in order}
+                for candidate_id, meal in zip(meals, slots):
+                    windows[candidate_id] = _meal_window(windows[candidate_id], meal, self.candidates[candidate_id]["duration"])
+                if not all(windows.values()):
+                    continue
+                
+                activities = []
+                for candidate_id in order:
+                    start, end = windows[candidate_id]
+                    activities.append({
+                        "id": candidate_id,
+                        "time_window": f"{_to_clock(start)}-{_to_clock(end)}",
+                        "duration": self.candidates[candidate_id]["duration"]
+                    })
+                route = route_optimizer.optimize_day(activities, matrix=matrix, day_start=DAY_START,
+                                                     day_end=DAY_END, time_budget=0.01)
+                if not route["unscheduled"]:
+                    result = {
+                        "stops": [(stop["activity"]["id"], stop["start"], stop["end"]) for stop in route["stops"]],
+                        "travel_minutes": route["total_travel_minutes"],
+                        "value": sum(c["rating"] / 5 for c in candidates)
+                    }
+                    break
+        
+        self._day_cache[cache_key] = result
+        return result
+    
+    def _counters(self, evaluations: List[Dict[str, Any]]) -> ActivityCounters:
+        counters = ActivityCounters(self.temperature_limits)
+        for day, evaluation in enumerate(evaluations):
+            for candidate_id, start, end in evaluation["stops"]:
+                candidate = self.candidates[candidate_id]
+                temperature = None
+                if candidate["is_outdoor"]:
+                    temps = self.peak_temps.get(self.dates[day], {})
+                    hours = range(_to_minutes(start) // 60, (_to_minutes(end) - 1) // 60 + 1)
+                    temperature = max((temps.get(h, 0) for h in hours), default=0)
+                counters.apply((candidate["kind"], tuple(candidate["tags"]), tuple(candidate.get("cuisines", [])),
+                                candidate["is_outdoor"], temperature))
+        return counters
+    
+    def _score(self, evaluations: List[Dict[str, Any]]) -> Tuple[float, Dict[str, float]]:
+        counters = self._counters(evaluations)
+        satisfaction = {goal.name: goal_satisfaction(goal.success_criteria, counters) for goal in self.goals}
+        goal_score = sum(goal.priority * satisfaction[goal.name] for goal in self.goals)
+        value = sum(e["value"] for e in evaluations)
+        travel = sum(e["travel_minutes"] for e in evaluations)
+        return GOAL_WEIGHT * goal_score + VALUE_WEIGHT * value - TRAVEL_WEIGHT * travel, satisfaction
+    
+    def _propose(self, days: List[List[str]], mutable: List[int]) -> Optional[Dict[int, List[str]]]:
+        """A random neighbouring plan, as {day index: new ids} for the days it changes."""
+        used = {i for day in days for i in day}
+        unused = [i for i in self.ids if i not in used]
+        day = self.random.choice(mutable)
+        move = self.random.random()
+        
+        if move < 0.4 and unused:
+            return {day: days[day] + [self.random.choice(unused)]}
+        if move < 0.55 and days[day]:
+            removed = self.random.choice(days[day])
+            return {day: [i for i in days[day] if i != removed]}
+        if move < 0.85 and days[day] and unused:
+            removed = self.random.choice(days[day])
+            return {day: [i for i in days[day] if i != removed] + [self.random.choice(unused)]}
+        if len(mutable) > 1 and days[day]:
+            other = self.random.choice([d for d in mutable if d != day])
+            moved = self.random.choice(days[day])
+            return {day: [i for i in days[day] if i != moved], other: days[other] + [moved]}
+        return None
+    
+    def _search(self, mutable: List[int], time_limit: float) -> Dict[str, Any]:
+        """Anytime simulated annealing over the mutable days; returns stats of the best plan."""
+        time_limit = clamp_time_limit(time_limit)
+        started = time.perf_counter()
+        deadline = started + time_limit
+        
+        days = [list(day) for day in self.days]
+        evaluations = [self._evaluate_day(d, frozenset(ids)) if d in mutable else self.evaluations[d]
+                       for d, ids in enumerate(days)]
+        score, _ = self._score(evaluations)
+        best_days, best_evaluations, best_score = [list(day) for day in days], list(evaluations), score
+        
+        iterations = 0
+        while time.perf_counter() < deadline:
+            iterations += 1
+            change = self._propose(days, mutable)
+            if not change:
+                continue
+            
+            new_evaluations = list(evaluations)
+            feasible = True
+            for day, ids in change.items():
+                new_evaluations[day] = self._evaluate_day(day, frozenset(ids))
+                feasible = feasible and new_evaluations[day] is not None
+            if not feasible:
+                continue
+            
+            new_score, _ = self._score(new_evaluations)
+            temperature = max(1.0 - (time.perf_counter() - started) / time_limit, 1e-3)
+            if new_score >= score or self.random.random() < math.exp((new_score - score) / temperature):
+                for day, ids in change.items():
+                    days[day] = ids
+                evaluations, score = new_evaluations, new_score
+                if score > best_score:
+                    best_days, best_evaluations, best_score = [list(day) for day in days], list(evaluations), score
+        
+        self.days = best_days
+        self.evaluations = best_evaluations
+        return {
+            "score": round(best_score, 3),
+            "iterations": iterations,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "time_limit": time_limit
+        }
+    
+    def plan(self, time_limit: float = DEFAULT_TIME_LIMIT, traveler_id: str = None) -> Dict[str, Any]:
+        """Plan every day of the trip from scratch."""
+        self.days = [[] for _ in self.dates]
+        self.evaluations = [self._evaluate_day(d, frozenset()) for d in range(len(self.dates))]
+        stats = self._search(list(range(len(self.dates))), time_limit)
+        logger.info(f"Planned {len(self.dates)} days in {stats['iterations']} iterations, score {stats['score']}")
+        return self.itinerary(traveler_id, stats)
+    
+    def replan(self, day_numbers: List[int], time_limit: float = DEFAULT_TIME_LIMIT / 2,
+               forecast: Dict[str, Any] = None, energy_budget: float = None,
+               traveler_id: str = None) -> Dict[str, Any]:
+        """Re-plan only the given days (1-based), optionally with a new forecast or energy budget.
+        
+        Other days keep their schedule exactly as it was, even if the new
+        forecast would have ruled it out, and nothing they use is reassigned.
+        A new energy budget applies to the re-planned days only.
+        """
+        if forecast is not None:
+            self.set_forecast(forecast)
+        
+        mutable = [n - 1 for n in day_numbers if 1 <= n <= len(self.dates)]
+        for day in mutable:
+            if energy_budget is not None and energy_budget != self.energy_budgets[day]:
+                self.energy_budgets[day] = energy_budget
+                self._day_cache = {key: value for key, value in self._day_cache.items() if key[0] != day}
+            # Keep what still fits so the search starts from the current plan
+            if self._evaluate_day(day, frozenset(self.days[day])) is None:
+                self.days[day] = []
+        stats = self._search(mutable, time_limit) if mutable else {"score": None, "iterations": 0}
+        logger.info(f"Re-planned days {day_numbers} in {stats['iterations']} iterations")
+        return self.itinerary(traveler_id, stats)
+    
+    def itinerary(self, traveler_id: str = None, stats: Dict[str, Any] = None) -> Dict[str, Any]:
+        """The current plan in the same shape as the app's other itineraries."""
+        _, satisfaction = self._score(self.evaluations)
+        
+        days = []
+        for day, evaluation in enumerate(self.evaluations):
+            activities = []
+            for candidate_id, start, end in evaluation["stops"]:
+                candidate = self.candidates[candidate_id]
+                activities.append({
+                    "id": candidate_id,
+                    "name": candidate["name"],
+                    "time": f"{start}-{end}",
+                    "location": candidate.get("location", self.location),
+                    "description": candidate.get("description", ""),
+                    "category": candidate.get("category", candidate["kind"]),
+                    "is_outdoor": candidate["is_outdoor"],
+                    "energy_required": candidate["energy_required"],
+                    "booking_reference": None
+                })
+            days.append({
+                "day_number": day + 1,
+                "date": self.dates[day],
+                "activities": activities,
+                "travel_minutes": evaluation["travel_minutes"],
+                "energy_used": round(sum(a["energy_required"] for a in activities), 2)
+            })
+        
+        return {
+            "traveler_id": traveler_id,
+            "start_date": self.dates[0],
+            "end_date": self.dates[-1],
+            "days": days,
+            "goal_satisfaction": {name: round(score, 3) for name, score in satisfaction.items()},
+            "planner": stats or {}
+        }
@@ -2,35 +2,47 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
+from deep_translator import GoogleTranslator
 import uvicorn
 import logging
+import re
 import json
 import random
+import copy
 import os
+import contextvars
+import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Callable, Optional
 
 # Import our agentic components
 from agentic_core import AgenticCore, Goal, create_tom_priya_scenario
 from context_engine import ContextEngine, create_tom_priya_context
 from preference_system import PreferenceSystem, create_tom_priya_preferences
 from booking_system import BookingSystem, create_tom_priya_booking_scenario
+from route_optimizer import route_optimizer
+from goal_tracker import activity_key
+from itinerary_planner import ItineraryPlanner, DEFAULT_TIME_LIMIT, clamp_time_limit
+from id_generator import new_decision_id
+from fast_json import dumps, encoded_cache
+from state_store import (state_store, SharedMapping, SharedRevisions, LeaderElection, TravelerLocks, VersionConflict,
+                         DEFAULT_SHARED_STATE_URL)
+from storage_engine import storage_engine
+from rate_limiter import quota_manager, request_scope
+from tracing import tracer, traced, TracingMiddleware
+from asset_pipeline import StaticAssets, TemplateCache, etag_matches
+from compression_middleware import CompressionMiddleware, compression_stats, version_etag
 
-# Import our tool modules
-from tools.tool_registry import ToolRegistry
-from tools.weather_tools import *
-from tools.mapping_tools import *
-from tools.booking_tools import *
-from tools.attraction_tools import *
-from tools.dining_tools import *
-from tools.transportation_tools import *
-from tools.events_tools import *
-from tools.local_info_tools import *
+# Import the tools used directly at startup; the catalogs, local info and every other tool
+# module are imported on first use, by the registry or inside the code that needs them
+from tools.tool_registry import tool_registry, load_all_tools
+from tools.weather_tools import get_weather_forecast_weatherapi
+from tools.weather_snapshots import weather_snapshots
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -48,29 +60,123 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure static files and templates
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Compress JSON and HTML for mobile clients and answer revalidations with 304
+app.add_middleware(CompressionMiddleware)
+
+# Time every request as the root span of a trace; added last so it also covers compression
+app.add_middleware(TracingMiddleware)
+
+# Configure static files and templates; both are built into memory at startup
+static_assets = StaticAssets(directory="static", url_prefix="/static")
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["static_url"] = static_assets.url
+page_cache = TemplateCache(templates.env)
+
+# Pages rendered without any context, and pages that only show the traveler name and today's date
+STATIC_PAGES = [
+    "home_v2.html", "conversation_demo.html", "tool_calling_demo.html", "conversation_ui.html",
+    "simple_chat_demo.html", "agent_calling_ui.html", "simple_agent_ui.html"
+]
+TRAVELER_PAGES = ["dashboard.html", "mobile_app.html", "user_mobile_app.html", "mobile_app_fallback.html", "demo_mobile.html"]
 
-# Initialize our agentic components
-agentic_core = AgenticCore()
+# Initialize our agentic components; decisions, preferences and bookings are persisted in the background,
+# and decisions are shared through the state store so any worker can resolve them
+agentic_core = AgenticCore(storage=storage_engine, store=state_store)
 context_engine = ContextEngine()
-preference_system = PreferenceSystem()
-booking_system = BookingSystem()
+preference_system = PreferenceSystem(storage=storage_engine)
+booking_system = BookingSystem(storage=storage_engine)
+
+# Register every tool from the manifest without importing its module
+load_all_tools()
+
+# Itineraries, planners and notifications live in the state store so every worker sees the same ones;
+# values read from a shared store are copies, so changes are written back with save_itinerary().
+# After a restart an itinerary is loaded from durable storage the first time it is asked for.
+itineraries = SharedMapping(state_store, "itineraries", loader=storage_engine.load_itinerary)
+
+# Planner behind each planned itinerary, kept for incremental re-planning
+itinerary_planners = SharedMapping(state_store, "itinerary_planners")
+
+# Store active notifications by ID, in the order they were created
+notifications = SharedMapping(state_store, "notifications")
+
+# Change counters for itineraries and notifications, so their encoded JSON is reused until they change
+revisions = SharedRevisions(state_store)
+
+# Only the worker holding this lease refreshes weather in the background
+background_leader = LeaderElection(state_store, name="background")
 
-# Initialize the tool registry
-tool_registry = ToolRegistry()
+# Itinerary changes wait for each other per traveler within a worker; versioned writes catch other workers
+traveler_locks = TravelerLocks()
+MAX_UPDATE_ATTEMPTS = 3
 
-# Store active itineraries
-itineraries = {}
+# Seconds a chat reply may spend queued for provider and traveler quotas in total
+CHAT_QUOTA_TIMEOUT = 5.0
+
+# How often the background leader adapts today's plans and looks ahead through the forecast
+WEATHER_UPDATE_INTERVAL = float(os.getenv("WEATHER_UPDATE_INTERVAL", "900"))
+weather_updates_task = None
+
+def json_response(payload: bytes, status_code: int = 200, etag: str = None) -> Response:
+    """Send already-encoded JSON, skipping FastAPI's jsonable_encoder and json.dumps pass."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"} if etag else None
+    return Response(content=payload, status_code=status_code, media_type="application/json", headers=headers)
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """An empty 304 when the client already holds this version, decided before anything is encoded."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
+
+def itinerary_payload(traveler_id: str) -> bytes:
+    """Encoded itinerary, re-encoded only after its revision is bumped."""
+    key = ("itinerary", traveler_id)
+    return encoded_cache.get(key, revisions.get(key), lambda: itineraries[traveler_id])
+
+def itinerary_etag(traveler_id: str) -> str:
+    return version_etag("itinerary", traveler_id, revisions.get(("itinerary", traveler_id)), epoch=state_store.epoch)
+
+def save_itinerary(traveler_id: str, itinerary: Dict[str, Any], expected: int = None) -> bool:
+    """Share an itinerary with every worker, bumping its version, and queue it for storage.
+    
+    With expected, the write only happens if the itinerary is still at that
+    version; False means someone else changed it first.
+    """
+    if revisions.put(itineraries, traveler_id, itinerary, ("itinerary", traveler_id), expected) is None:
+        return False
+    storage_engine.save_itinerary(traveler_id, itinerary)
+    return True
+
+async def update_itinerary(traveler_id: str, change: Callable[[Dict[str, Any]], bool]) -> Optional[Dict[str, Any]]:
+    """Apply change() to a copy of the traveler's itinerary and save it unless another change got there first.
+    
+    change returns False when there is nothing to do. A lost race re-reads the
+    newer version and applies change() again, up to MAX_UPDATE_ATTEMPTS times.
+    Returns the saved itinerary, or None when there is none or nothing changed.
+    """
+    async with traveler_locks.lock(traveler_id):
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            version = revisions.get(("itinerary", traveler_id))
+            current = itineraries.get(traveler_id)
+            if current is None:
+                return None
+            itinerary = copy.deepcopy(current)
+            if not change(itinerary):
+                return None
+            if save_itinerary(traveler_id, itinerary, expected=version):
+                return itinerary
+            logger.info(f"Itinerary of {traveler_id} changed during an update, retrying")
+    raise VersionConflict(f"Itinerary of {traveler_id} kept changing; gave up after {MAX_UPDATE_ATTEMPTS} attempts")
 
-# Store active notifications
-notifications = []
+def next_notification_id() -> str:
+    """Notification IDs come from a store counter, so two workers never hand out the same one."""
+    return f"notif-{state_store.incr('notification_seq')}"
 
 # Model for incoming chat messages
 class ChatMessage(BaseModel):
     message: str
     language: str = "en-US"
+    traveler_id: str = "Tom_and_Priya"
 
 # Model for itinerary operations
 class ItineraryRequest(BaseModel):
@@ -79,6 +185,16 @@ class ItineraryRequest(BaseModel):
     end_date: str
     preferences: Dict[str, Any] = {}
 
+# Model for re-planning some days of an itinerary
+class ReplanRequest(BaseModel):
+    day_numbers: List[int]
+    energy_budget: Optional[float] = None
+    refresh_forecast: bool = True
+
+# Model for answering a notification
+class NotificationAnswer(BaseModel):
+    approved: bool
+
 # Model for activity feedback
 class ActivityFeedback(BaseModel):
     activity_id: str
@@ -130,6 +246,8 @@ def initialize_tom_priya_scenario():
     # Set up their 7-day itinerary
     start_date = datetime.now().date()
     itineraries["Tom_and_Priya"] = create_sample_itinerary("Tom_and_Priya", start_date)
+    revisions.bump(("itinerary", "Tom_and_Priya"))
+    agentic_core.track_itinerary(itineraries["Tom_and_Priya"])
     
     # Set up extreme heat context for demo
     # Update weather for extreme heat
@@ -296,10 +414,16 @@ def create_sample_itinerary(traveler_id: str, start_date: datetime.date) -> Dict
             num_activities = random.randint(2, 3)
             day_activities = random.sample([a for a in activities if a["id"] not in ["act6", "act7"]], num_activities)
         
+        # Visit the day's activities in the order that needs the least travel
+        route = route_optimizer.optimize_day(day_activities)
+        day_activities = [stop["activity"] for stop in route["stops"]] + route["unscheduled"]
+        
         day = {
             "day_number": i + 1,
             "date": day_date.isoformat(),
-            "activities": day_activities
+            "activities": day_activities,
+            "travel_minutes": route["total_travel_minutes"],
+            "conflicts": [activity["id"] for activity in route["unscheduled"]]
         }
         
         itinerary["days"].append(day)
@@ -307,32 +431,12 @@ def create_sample_itinerary(traveler_id: str, start_date: datetime.date) -> Dict
     return itinerary
 
 # Process weather updates and trigger adaptations if needed
-async def process_weather_updates(background_tasks: BackgroundTasks):
-    # Try to get real weather data using our weather tools
-    try:
-        weather_result = get_current_weather("Dubai", provider="weatherapi")
-        if weather_result["status"] == "success":
-            weather_data = weather_result["data"]
-            weather = {
-                "temperature": weather_data["temperature"],
-                "conditions": weather_data["conditions"],
-                "humidity": weather_data["humidity"],
-                "precipitation_chance": weather_data["precipitation_chance"],
-                "uv_index": weather_data["uv_index"],
-                "wind_speed": weather_data["wind_speed"]
-            }
-            # Update context with real weather data
-            context_engine.current_context["weather"] = weather
-            logger.info(f"Updated weather using real API: {weather['temperature']}°C, {weather['conditions']}")
-        else:
-            # Fall back to simulated data
-            weather = context_engine.update_weather(force_update=True)
-            logger.info(f"Updated weather using simulation: {weather['temperature']}°C, {weather['conditions']}")
-    except Exception as e:
-        logger.error(f"Error getting real weather data: {e}")
-        # Fall back to simulated data
-        weather = context_engine.update_weather(force_update=True)
-        logger.info(f"Updated weather using simulation: {weather['temperature']}°C, {weather['conditions']}")
+async def process_weather_updates(background_tasks: BackgroundTasks = None):
+    # Every traveler in the city reads the same refreshed snapshot; refreshing and the AI calls below block,
+    # so they run in the threadpool
+    snapshot = await run_in_threadpool(weather_snapshots.get, "Dubai")
+    weather = context_engine.attach_weather(snapshot)
+    logger.info(f"Using weather snapshot v{snapshot.version} ({snapshot.provider}): {weather['temperature']}°C, {weather['conditions']}")
     
     # Check if we need to adapt any itineraries
     for traveler_id, itinerary in itineraries.items():
@@ -345,15 +449,17 @@ async def process_weather_updates(background_tasks: BackgroundTasks):
             
             # Update context with current plan
             context_engine.current_context["current_plan"] = today_plan
+            context_engine.touch()
             
             # Let the agentic core evaluate if changes are needed
-            new_plan = agentic_core.evaluate_current_plan()
+            new_plan = await run_in_threadpool(agentic_core.evaluate_current_plan)
             
             if new_plan.get("is_modified", False):
                 # Plan was modified, create a notification
-                notification_id = f"notif-{len(notifications)+1}"
-                explanation = agentic_core.explain_decision(len(agentic_core.decision_history) - 1)
-                confidence = agentic_core.get_confidence_score(agentic_core.decision_history[-1])
+                notification_id = next_notification_id()
+                decision_id = new_plan["decision_id"]
+                explanation = await run_in_threadpool(agentic_core.explain_decision, decision_id)
+                confidence = agentic_core.get_confidence_score(agentic_core.get_decision(decision_id))
                 
                 notification = {
                     "id": notification_id,
@@ -364,57 +470,133 @@ async def process_weather_updates(background_tasks: BackgroundTasks):
                     "message": explanation,
                     "original_plan": today_plan,
                     "new_plan": new_plan,
+                    "decision_id": decision_id,
                     "confidence": confidence,
                     "status": "pending",
                     "requires_approval": confidence < agentic_core.confidence_threshold
                 }
                 
-                notifications.append(notification)
+                notifications[notification_id] = notification
+                revisions.bump("notifications")
                 logger.info(f"Created notification {notification_id} for {traveler_id}")
                 
                 # If confidence is high enough, automatically apply the change
                 if confidence >= agentic_core.confidence_threshold:
                     # Auto-approve high-confidence changes
                     await handle_notification_response(notification_id, True)
+    
+    # Look ahead through the hourly forecast so outdoor plans move while bookings are still cheap
+    forecast_data = snapshot.forecast
+    for traveler_id, itinerary in itineraries.items():
+        proposals = agentic_core.plan_ahead(itinerary, forecast_data, city="Dubai")
+        
+        for proposal in proposals:
+            activity = proposal["activity"]
+            if proposal["suggested_time"]:
+                message = (f"{activity['name']} on {proposal['date']} at {proposal['current_time']} is forecast to feel like "
+                           f"{proposal['peak_feels_like']}°C. Moving it to {proposal['suggested_time']} avoids the worst of it.")
+            else:
+                message = (f"{activity['name']} on {proposal['date']} at {proposal['current_time']} is forecast to feel like "
+                           f"{proposal['peak_feels_like']}°C and there is no cooler slot that day. Consider an indoor alternative.")
+            
+            notification_id = next_notification_id()
+            notifications[notification_id] = {
+                "id": notification_id,
+                "traveler_id": traveler_id,
+                "timestamp": datetime.now().isoformat(),
+                "type": "proactive_reschedule",
+                "title": "Upcoming Activity Forecast Alert",
+                "message": message,
+                "proposal": proposal,
+                "decision_id": proposal["decision_id"],
+                "status": "pending",
+                "requires_approval": True
+            }
+            revisions.bump("notifications")
+            logger.info(f"Created proactive notification {notification_id} for {traveler_id}")
 
 # Handle notification responses
-async def handle_notification_response(notification_id: str, approved: bool):
-    # Find the notification
-    notification = next((n for n in notifications if n["id"] == notification_id), None)
+async def handle_notification_response(notification_id: str, approved: bool) -> bool:
+    """Apply the traveler's answer to a notification; False when it is unknown or was already answered.
     
+    Only the first answer to a notification counts, in whichever worker it
+    arrives. The itinerary change then goes through update_itinerary, so it
+    cannot overwrite a change made meanwhile. The notification is only marked
+    answered once that change is saved; when it gives up with VersionConflict
+    the claim is released, so the traveler can answer again.
+    """
+    notification = notifications.get(notification_id)
     if not notification:
         logger.error(f"Notification {notification_id} not found")
-        return
+        return False
+    
+    # Claim the answer; a second approval of the same notification stops here
+    if not state_store.put_if_absent("notification_answers", notification_id, approved):
+        logger.info(f"Notification {notification_id} was already answered")
+        return False
     
-    # Update notification status
-    notification["status"] = "approved" if approved else "rejected"
-    notification["response_time"] = datetime.now().isoformat()
+    traveler_id = notification["traveler_id"]
+    try:
+        await apply_notification_answer(notification, approved)
+    except VersionConflict:
+        state_store.delete("notification_answers", notification_id)
+        logger.warning(f"Answer to notification {notification_id} not applied; the itinerary kept changing")
+        raise
+    
+    async with traveler_locks.lock(traveler_id):
+        # Update notification status
+        notification = notifications[notification_id]
+        notification["status"] = "approved" if approved else "rejected"
+        notification["response_time"] = datetime.now().isoformat()
+        notifications[notification_id] = notification
+        revisions.bump("notifications")
+        
+        # Record the traveler's answer on the decision the notification was raised for
+        if notification.get("decision_id"):
+            agentic_core.resolve_decision(notification["decision_id"], approved)
+    
+    if notification.get("type") == "proactive_reschedule":
+        agentic_core.lookahead.resolve(notification["proposal"], approved)
+    return True
+
+async def apply_notification_answer(notification: Dict[str, Any], approved: bool) -> None:
+    """Make the itinerary change an approved notification suggested; raises VersionConflict when it cannot be saved."""
+    traveler_id = notification["traveler_id"]
+    if notification.get("type") == "proactive_reschedule":
+        proposal = notification["proposal"]
+        if not (approved and proposal["suggested_time"]):
+            return
+        
+        def move_activity(itinerary: Dict[str, Any]) -> bool:
+            day = next((d for d in itinerary["days"] if d["date"] == proposal["date"]), None)
+            for activity in (day or {}).get("activities", []):
+                if activity.get("name") == proposal["activity"]["name"] and activity.get("time") == proposal["current_time"]:
+                    activity["time"] = proposal["suggested_time"]
+                    day["is_modified"] = True
+                    day["modification_reason"] = proposal["reason"]
+                    return True
+            return False
+        
+        if await update_itinerary(traveler_id, move_activity):
+            logger.info(f"Moved {proposal['activity']['name']} to {proposal['suggested_time']} on {proposal['date']}")
+        return
     
     if approved:
-        # Apply the changes to the itinerary
-        traveler_id = notification["traveler_id"]
-        itinerary = itineraries.get(traveler_id)
+        # Apply the changes to the day the plan was made for
+        new_plan = notification["new_plan"]
+        plan_date = new_plan.get("date") or datetime.now().date().isoformat()
         
-        if itinerary:
-            # Find the day to update
-            today = datetime.now().date().isoformat()
-            today_index = next((i for i, day in enumerate(itinerary["days"]) if day["date"] == today), None)
-            
-            if today_index is not None:
-                # Update the activities
-                itinerary["days"][today_index]["activities"] = notification["new_plan"]["activities"]
-                itinerary["days"][today_index]["is_modified"] = True
-                itinerary["days"][today_index]["modification_reason"] = notification["new_plan"]["modification_reason"]
-                
-                logger.info(f"Updated itinerary for {traveler_id} based on notification {notification_id}")
-                
-                # Record the decision acceptance in the agentic core
-                if len(agentic_core.decision_history) > 0:
-                    agentic_core.decision_history[-1]["was_accepted"] = True
-    else:
-        # Record the decision rejection in the agentic core
-        if len(agentic_core.decision_history) > 0:
-            agentic_core.decision_history[-1]["was_accepted"] = False
+        def apply_new_plan(itinerary: Dict[str, Any]) -> bool:
+            day = next((d for d in itinerary["days"] if d["date"] == plan_date), None)
+            if day is None:
+                return False
+            day["activities"] = new_plan["activities"]
+            day["is_modified"] = True
+            day["modification_reason"] = new_plan["modification_reason"]
+            return True
+        
+        if await update_itinerary(traveler_id, apply_new_plan):
+            logger.info(f"Updated itinerary for {traveler_id} based on notification {notification['id']}")
 
 # API Endpoints
 
@@ -428,15 +610,18 @@ async def chat(msg: ChatMessage):
     # Update preferences from natural language
     preference_system.update_from_natural_language(message)
     
-    # Generate a response based on the message
-    english_reply = generate_chat_response(message)
+    # Generate a response based on the message; tool and model calls are charged to the traveler and
+    # may queue for their quotas until the deadline, so they run in a thread instead of on the event loop
+    with request_scope(msg.traveler_id, timeout=CHAT_QUOTA_TIMEOUT):
+        english_reply = await run_in_threadpool(contextvars.copy_context().run, generate_chat_response, message)
     
     # Translate reply to user-selected language
     target_lang = language.split("-")[0]  # e.g., 'hi' from 'hi-IN'
     
     try:
         if target_lang != "en":
-            translated_reply = GoogleTranslator(source='auto', target=target_lang).translate(english_reply)
+            with tracer.span("chat.translate", target=target_lang):
+                translated_reply = GoogleTranslator(source='auto', target=target_lang).translate(english_reply)
         else:
             translated_reply = english_reply
     except Exception as e:
@@ -445,6 +630,7 @@ async def chat(msg: ChatMessage):
 
     return {"reply": translated_reply}
 
+@traced("chat.generate_chat_response")
 def generate_chat_response(message: str) -> str:
     """Generate a response to a chat message."""
     # Get current context
@@ -455,42 +641,47 @@ def generate_chat_response(message: str) -> str:
 
     # Basic keyword-based response for demo with tool integration
     if "weather" in message.lower():
-        try:
-            # Try to use the weather tools
-            weather_result = get_current_weather("Dubai", provider="weatherapi")
-            if weather_result["status"] == "success":
-                weather_data = weather_result["data"]
-                temp = weather_data["temperature"]
-                conditions = weather_data["conditions"]
-                humidity = weather_data["humidity"]
-                return f"The current weather in Dubai is {temp}°C and {conditions} with {humidity}% humidity."
-            else:
-                # Fall back to simulated data
-                temp = current_context.get("weather", {}).get("temperature", 35)
-                conditions = current_context.get("weather", {}).get("conditions", "sunny")
-                return f"The current weather in Dubai is {temp}°C and {conditions}."
-        except Exception as e:
-            logger.error(f"Error using weather tools: {e}")
-            # Fall back to simulated data
-            temp = current_context.get("weather", {}).get("temperature", 35)
-            conditions = current_context.get("weather", {}).get("conditions", "sunny")
-            return f"The current weather in Dubai is {temp}°C and {conditions}."
+        weather = (weather_snapshots.cached("Dubai") or weather_snapshots.get("Dubai")).current
+        return f"The current weather in Dubai is {weather['temperature']}°C and {weather['conditions']} with {weather['humidity']}% humidity."
 
     elif "restaurant" in message.lower() or "food" in message.lower() or "eat" in message.lower():
         try:
-            # Try to use the dining tools
-            cuisine = None
-            for pref in current_preferences.get("cuisine_preferences", []):
-                if pref in message.lower():
-                    cuisine = pref
-                    break
-
-            restaurants_result = search_restaurants("Dubai", cuisine=cuisine)
-            if restaurants_result["status"] == "success":
-                restaurants = restaurants_result["data"]["restaurants"][:3]  # Get top 3
+            # Pull cuisine, party size, time and "near the hotel" out of the message and ask the catalog once
+            from tools.restaurant_catalog import restaurant_catalog, find_restaurants
+            lowered = message.lower()
+            restaurant_catalog.ensure("Dubai")
+            cuisines = restaurant_catalog.cuisines_in(message)
+            if not cuisines:
+                cuisines = [pref.lower() for pref in current_preferences.get("cuisine_preferences", []) if pref.lower() in lowered]
+            party = re.search(r"\b(\d+)\s*(?:people|persons|guests|of us)\b", lowered)
+            slot = re.search(r"\b(\d{1,2}):(\d{2})\b", lowered)
+            near = None
+            if "near" in lowered:
+                coordinates = current_context.get("location", {}).get("coordinates", {})
+                near = (coordinates["lat"], coordinates["lng"]) if coordinates else None
+            
+            restaurants_result = find_restaurants(
+                "Dubai",
+                cuisine=cuisines[0] if cuisines else None,
+                near=near,
+                radius_km=5.0,
+                date=datetime.now().date().isoformat() if slot else None,
+                time=f"{int(slot.group(1)):02d}:{slot.group(2)}" if slot else None,
+                party_size=int(party.group(1)) if party else 2,
+                limit=3
+            )
+            if restaurants_result["status"] == "success" and restaurants_result["data"]["restaurants"]:
+                restaurants = restaurants_result["data"]["restaurants"]
                 response = "Here are some restaurant recommendations for you:\n"
                 for restaurant in restaurants:
-                    response += f"- {restaurant['name']} ({restaurant['cuisine']}): {restaurant['price_range']} - {restaurant['rating']}/5 stars\n"
+                    response += f"- {restaurant['name']} ({restaurant['cuisine']}): {restaurant['price_range']} - {restaurant['rating']}/5 stars"
+                    availability = restaurant.get("availability")
+                    if availability:
+                        if availability.get("available"):
+                            response += f" - table free at {availability['time']}"
+                        elif availability.get("alternative_times"):
+                            response += f" - full then, try {', '.join(availability['alternative_times'])}"
+                    response += "\n"
                 return response
             else:
                 return "I couldn't find any restaurants matching your preferences at the moment."
@@ -500,18 +691,12 @@ def generate_chat_response(message: str) -> str:
 
     elif "attraction" in message.lower() or "visit" in message.lower() or "see" in message.lower():
         try:
-            # Try to use the attraction tools
-            category = None
-            if "museum" in message.lower():
-                category = "museums"
-            elif "beach" in message.lower():
-                category = "beaches"
-            elif "mall" in message.lower() or "shop" in message.lower():
-                category = "shopping"
-
-            attractions_result = search_attractions("Dubai", category=category)
-            if attractions_result["status"] == "success":
-                attractions = attractions_result["data"]["attractions"][:3]  # Get top 3
+            # Rank the local catalog against the whole message instead of mapping it to one category
+            from tools.attraction_catalog import find_attractions
+            indoor = True if "indoor" in message.lower() else False if "outdoor" in message.lower() else None
+            attractions_result = find_attractions("Dubai", query=message, indoor=indoor, limit=3)
+            if attractions_result["status"] == "success" and attractions_result["data"]["attractions"]:
+                attractions = attractions_result["data"]["attractions"]
                 response = "Here are some attractions you might enjoy in Dubai:\n"
                 for attraction in attractions:
                     response += f"- {attraction['name']}: {attraction['rating']}/5 stars - {attraction['description'][:100]}...\n"
@@ -525,7 +710,10 @@ def generate_chat_response(message: str) -> str:
     elif "event" in message.lower() or "happening" in message.lower() or "festival" in message.lower():
         try:
             # Try to use the events tools
-            events_result = search_events("Dubai")
+            from tools.event_catalog import find_events
+            indoor = True if "indoor" in message.lower() else False if "outdoor" in message.lower() else None
+            events_result = find_events("Dubai", start_time=datetime.now().isoformat(timespec="minutes"),
+                                        end_time=(datetime.now() + timedelta(days=30)).date().isoformat(), indoor=indoor)
             if events_result["status"] == "success":
                 events = events_result["data"]["events"][:3]  # Get top 3
                 response = "Here are some upcoming events in Dubai:\n"
@@ -547,7 +735,7 @@ def generate_chat_response(message: str) -> str:
                 pickup = "Dubai Mall"
                 dropoff = "Burj Al Arab"
 
-                ride_result = get_ride_estimate(pickup, dropoff)
+                ride_result = tool_registry.execute_tool("get_ride_estimate", {"pickup_location": pickup, "dropoff_location": dropoff})
                 if ride_result["status"] == "success":
                     ride_data = ride_result["data"]
                     return f"A ride from {pickup} to {dropoff} would cost approximately {ride_data['estimate']} and take about {int(ride_data['duration']/60)} minutes."
@@ -555,7 +743,7 @@ def generate_chat_response(message: str) -> str:
                     return "I couldn't get a ride estimate at the moment."
             else:
                 # Get transit routes
-                transit_result = get_transit_routes("Dubai Mall", "Dubai Marina")
+                transit_result = tool_registry.execute_tool("get_transit_routes", {"origin": "Dubai Mall", "destination": "Dubai Marina"})
                 if transit_result["status"] == "success":
                     routes = transit_result["data"]["routes"][:2]  # Get top 2
                     response = "Here are some public transportation options in Dubai:\n"
@@ -571,6 +759,7 @@ def generate_chat_response(message: str) -> str:
     elif "custom" in message.lower() or "culture" in message.lower() or "local" in message.lower():
         try:
             # Try to use the local info tools
+            from tools.local_info_tools import local_info_bundle, get_local_customs, get_emergency_info
             topic = None
             if "dress" in message.lower() or "wear" in message.lower() or "clothing" in message.lower():
                 customs = get_local_customs()
@@ -586,13 +775,10 @@ def generate_chat_response(message: str) -> str:
                         response += f"- {num['service']}: {num['number']}\n"
                     return response
             else:
-                cultural_info = get_cultural_info()
-                if cultural_info["status"] == "success":
-                    # Pick a random cultural topic
-                    topics = list(cultural_info["data"].keys())
-                    topic = random.choice(topics)
-                    info = cultural_info["data"][topic]
-                    return f"{info['title']}:\n{info['content']}"
+                # Pick a random cultural topic
+                topic = random.choice(local_info_bundle.topics("cultural"))
+                info = local_info_bundle.lookup("cultural", topic)[topic]
+                return f"{info['title']}:\n{info['content']}"
         except Exception as e:
             logger.error(f"Error using local info tools: {e}")
             return "I can provide information about local customs, culture, and practical information for your stay in Dubai."
@@ -628,138 +814,109 @@ def generate_chat_response(message: str) -> str:
         # Default response
         return "I'm your VoyagerVerse agentic AI assistant for Dubai. I can help with weather updates, itinerary information, restaurant recommendations, attraction suggestions, transportation options, local customs, and personalized recommendations based on your preferences and current conditions."
 
+def traveler_page_context() -> Dict[str, str]:
+    return {"traveler_name": "Tom & Priya", "current_date": datetime.now().strftime("%A, %B %d, %Y")}
+
+def page_response(request: Request, name: str, context: Dict[str, Any] = None) -> Response:
+    """A cached, precompressed page; a matching If-None-Match gets an empty 304."""
+    page = page_cache.render(name, context)
+    if page.not_modified(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=page.headers(None, "no-cache"))
+    body, encoding = page.select(request.headers.get("accept-encoding"))
+    return Response(content=body, media_type=page.content_type, headers=page.headers(encoding, "no-cache"))
+
+@app.get("/static/{path:path}")
+async def static_file(path: str, request: Request):
+    """Static files from memory; fingerprinted URLs are cached by clients for a year."""
+    asset = static_assets.get(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    body, cache_control = asset
+    if body.not_modified(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=body.headers(None, cache_control))
+    content, encoding = body.select(request.headers.get("accept-encoding"))
+    return Response(content=content, media_type=body.content_type, headers=body.headers(encoding, cache_control))
+
+@app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
-    return templates.TemplateResponse("home_v2.html", {"request": request})
+    return page_response(request, "home_v2.html")
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request):
     """Serve the dashboard UI for Tom & Priya."""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
+    return page_response(request, "dashboard.html", traveler_page_context())
 
 @app.get("/mobile", response_class=HTMLResponse)
 async def mobile_app(request: Request):
     """Serve the mobile app UI"""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
-    return templates.TemplateResponse("mobile_app.html", {
-        "request": request,
-        "traveler_name": "Tom & Priya",
-        "current_date": datetime.now().strftime("%A, %B %d, %Y")
-    })
+    return page_response(request, "mobile_app.html", traveler_page_context())
 
 @app.get("/user-mobile", response_class=HTMLResponse)
 async def user_mobile_app(request: Request):
     """Serve the user-focused mobile app UI for Tom & Priya"""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
-    return templates.TemplateResponse("user_mobile_app.html", {
-        "request": request,
-        "traveler_name": "Tom & Priya",
-        "current_date": datetime.now().strftime("%A, %B %d, %Y")
-    })
+    return page_response(request, "user_mobile_app.html", traveler_page_context())
 
 @app.get("/fallback-mobile", response_class=HTMLResponse)
 async def fallback_mobile_app(request: Request):
     """Serve the fallback mobile app UI with option to decline rescheduling"""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
-    return templates.TemplateResponse("mobile_app_fallback.html", {
-        "request": request,
-        "traveler_name": "Tom & Priya",
-        "current_date": datetime.now().strftime("%A, %B %d, %Y")
-    })
+    return page_response(request, "mobile_app_fallback.html", traveler_page_context())
 
 @app.get("/demo", response_class=HTMLResponse)
 async def demo_mobile_app(request: Request):
     """Serve the simplified demo mobile app UI"""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
-    return templates.TemplateResponse("demo_mobile.html", {
-        "request": request,
-        "traveler_name": "Tom & Priya",
-        "current_date": datetime.now().strftime("%A, %B %d, %Y")
-    })
+    return page_response(request, "demo_mobile.html", traveler_page_context())
 
 @app.get("/conversation-demo", response_class=HTMLResponse)
 async def conversation_demo(request: Request):
     """Serve the conversational demo interface that showcases natural language interaction"""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
-    return templates.TemplateResponse("conversation_demo.html", {
-        "request": request
-    })
+    return page_response(request, "conversation_demo.html")
 
 @app.get("/agent-calling-demo", response_class=HTMLResponse)
 async def agent_calling_demo(request: Request):
     """Serve the agent calling demo interface that showcases the agentic AI process"""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
-    return templates.TemplateResponse("tool_calling_demo.html", {
-        "request": request
-    })
+    return page_response(request, "tool_calling_demo.html")
 
 @app.get("/conversation-ui", response_class=HTMLResponse)
 async def conversation_ui(request: Request):
     """Serve the conversational UI that demonstrates natural language interaction"""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
-    return templates.TemplateResponse("conversation_ui.html", {
-        "request": request
-    })
+    return page_response(request, "conversation_ui.html")
 
 @app.get("/simple-chat", response_class=HTMLResponse)
 async def simple_chat_demo(request: Request):
     """Serve the simplified chat demo that works reliably for the presentation"""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
-    return templates.TemplateResponse("simple_chat_demo.html", {
-        "request": request
-    })
+    return page_response(request, "simple_chat_demo.html")
 
 @app.get("/agent-calling", response_class=HTMLResponse)
 async def agent_calling_ui(request: Request):
     """Serve the agent calling UI that shows the behind-the-scenes process"""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
-    return templates.TemplateResponse("agent_calling_ui.html", {
-        "request": request
-    })
+    return page_response(request, "agent_calling_ui.html")
 
 @app.get("/simple-agent", response_class=HTMLResponse)
 async def simple_agent_ui(request: Request):
     """Serve the simplified agent UI that shows the behind-the-scenes process without animations"""
     # Initialize Tom & Priya scenario data
     initialize_tom_priya_scenario()
-    return templates.TemplateResponse("simple_agent_ui.html", {
-        "request": request
-    })
-    
-    # Get current weather
-    weather_data = {}
-    try:
-        weather_result = get_current_weather("Dubai", provider="weatherapi")
-        if weather_result["status"] == "success":
-            weather_data = weather_result["data"]
-        else:
-            weather_data = context_engine.get_current_context().get("weather", {})
-    except Exception as e:
-        logger.error(f"Error getting weather data: {e}")
-        weather_data = context_engine.get_current_context().get("weather", {})
-    
-    # Get itinerary data
-    traveler_id = "Tom_and_Priya"
-    itinerary_data = {}
-    if traveler_id in itineraries:
-        itinerary_data = itineraries[traveler_id]
-    
-    return templates.TemplateResponse("dashboard.html", {
-        "request": request,
-        "weather": weather_data,
-        "itinerary": itinerary_data,
-        "traveler_name": "Tom & Priya",
-        "current_date": datetime.now().strftime("%A, %B %d, %Y")
-    })
+    return page_response(request, "simple_agent_ui.html")
 
 @app.get("/interactive", response_class=HTMLResponse)
 async def interactive_demo(request: Request):
@@ -809,28 +966,237 @@ async def interactive_demo(request: Request):
 
 @app.get("/weather")
 async def get_weather():
-    """Get the current weather conditions."""
+    """Get the current weather conditions, from the shared snapshot; a stale one is refreshed in the background."""
+    snapshot = weather_snapshots.cached("Dubai")
+    if snapshot is None:
+        snapshot = await run_in_threadpool(weather_snapshots.get, "Dubai")
+    return snapshot.current
+
+@app.get("/local-info")
+async def local_info_index(request: Request):
+    """Sections, topics and version of the local info bundle, so clients know when to re-sync."""
+    from tools.local_info_tools import local_info_bundle
+    language = local_info_bundle.language(request.headers.get("accept-language"))
+    return {
+        "version": local_info_bundle.version,
+        "language": language,
+        "languages": local_info_bundle.languages,
+        "sections": {section: list(local_info_bundle.topics(section, language)) for section in local_info_bundle.sections(language)}
+    }
+
+@app.get("/local-info/{section}")
+async def local_info(section: str, request: Request, topic: Optional[str] = None, language: Optional[str] = None):
+    """Pre-encoded local info; a matching If-None-Match gets an empty 304."""
+    from tools.local_info_tools import local_info_bundle
+    language = local_info_bundle.language(language or request.headers.get("accept-language"))
     try:
-        # Try to get real weather data
-        weather_result = get_current_weather("Dubai", provider="weatherapi")
-        if weather_result["status"] == "success":
-            return weather_result["data"]
-        else:
-            # Fall back to simulated data
-            return context_engine.get_current_context().get("weather", {})
-    except Exception as e:
-        logger.error(f"Error getting weather data: {e}")
-        return context_engine.get_current_context().get("weather", {})
+        payload, etag = local_info_bundle.encoded(section, topic, language)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown local info section '{section}'")
+    
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=0, must-revalidate", "Content-Language": language, "Vary": "Accept-Language"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
 
-def initialize_tom_priya_scenario():
-    """Initialize the Tom & Priya scenario with sample data."""
+@app.post("/itinerary/plan")
+async def plan_itinerary(request: ItineraryRequest):
+    """Build a multi-day itinerary around the traveler's goals, the forecast and opening hours."""
+    start = datetime.fromisoformat(request.start_date).date()
+    end = datetime.fromisoformat(request.end_date).date()
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    
+    time_limit = clamp_time_limit(request.preferences.get("time_limit", DEFAULT_TIME_LIMIT))
+    
+    def build_plan():
+        # Provider calls and the search both block, so they run off the event loop
+        planner = ItineraryPlanner(
+            location=request.preferences.get("location", "Dubai"),
+            start_date=start.isoformat(),
+            num_days=(end - start).days + 1,
+            goals=agentic_core.traveler_goals,
+            energy_budget=request.preferences.get("energy_budget", 1.8),
+            heat_threshold=request.preferences.get("max_comfortable_temperature")
+        )
+        return planner, planner.plan(time_limit=time_limit, traveler_id=request.traveler_name)
+    
+    planner, itinerary = await run_in_threadpool(contextvars.copy_context().run, build_plan)
+    
+    save_itinerary(request.traveler_name, itinerary)
+    itinerary_planners[request.traveler_name] = planner
+    agentic_core.track_itinerary(itinerary)
+    return json_response(itinerary_payload(request.traveler_name), etag=itinerary_etag(request.traveler_name))
+
+@app.post("/itinerary/{traveler_id}/replan")
+async def replan_itinerary(traveler_id: str, request: ReplanRequest):
+    """Re-plan only the given days of a planned itinerary, leaving the others untouched.
+    
+    Fails with 409 when the itinerary changed while re-planning, e.g. an
+    approved notification moved an activity in another worker.
+    """
+    async with traveler_locks.lock(traveler_id):
+        version = revisions.get(("itinerary", traveler_id))
+        planner = itinerary_planners.get(traveler_id)
+        if planner is None:
+            raise HTTPException(status_code=404, detail=f"No planned itinerary for {traveler_id}")
+        
+        def build_replan():
+            forecast = None
+            if request.refresh_forecast:
+                forecast = get_weather_forecast_weatherapi(planner.location, min(len(planner.dates), 10)).get("data")
+            return planner.replan(request.day_numbers, forecast=forecast,
+                                  energy_budget=request.energy_budget, traveler_id=traveler_id)
+        
+        itinerary = await run_in_threadpool(contextvars.copy_context().run, build_replan)
+        if not save_itinerary(traveler_id, itinerary, expected=version):
+            raise HTTPException(status_code=409, detail=f"Itinerary of {traveler_id} changed while re-planning; try again")
+        itinerary_planners[traveler_id] = planner
+    agentic_core.track_itinerary(itinerary)
+    return json_response(itinerary_payload(traveler_id), etag=itinerary_etag(traveler_id))
+
+@app.get("/itinerary/{traveler_id}")
+async def get_itinerary(traveler_id: str, request: Request):
+    """The traveler's current itinerary, encoded once per revision."""
+    if traveler_id not in itineraries:
+        raise HTTPException(status_code=404, detail=f"No itinerary for {traveler_id}")
+    etag = itinerary_etag(traveler_id)
+    return not_modified(request, etag) or json_response(itinerary_payload(traveler_id), etag=etag)
+
+async def change_activity(traveler_id: str, activity_id: str, change: Callable[[Dict[str, Any], List[Dict[str, Any]]], None]) -> Dict[str, Any]:
+    """Apply change(activity, day activities) to one activity of an itinerary, returning the activity as it was."""
+    found = {}
+    
+    def apply(itinerary: Dict[str, Any]) -> bool:
+        for day in itinerary["days"]:
+            for activity in day["activities"]:
+                if activity_key(activity) == activity_id:
+                    found["activity"] = copy.deepcopy(activity)
+                    change(activity, day["activities"])
+                    return True
+        return False
+    
+    try:
+        saved = await update_itinerary(traveler_id, apply)
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if saved is None:
+        raise HTTPException(status_code=404, detail=f"No activity {activity_id} in the itinerary of {traveler_id}")
+    return found["activity"]
+
+@app.post("/itinerary/{traveler_id}/activities/{activity_id}/complete")
+async def complete_activity(traveler_id: str, activity_id: str):
+    """Mark an activity as done; it keeps counting towards the goals and is no longer swapped out."""
+    activity = await change_activity(traveler_id, activity_id, lambda activity, _: activity.update(status="completed"))
+    agentic_core.activity_completed(activity)
+    return json_response(itinerary_payload(traveler_id), etag=itinerary_etag(traveler_id))
+
+@app.post("/itinerary/{traveler_id}/activities/{activity_id}/cancel")
+async def cancel_activity(traveler_id: str, activity_id: str):
+    """Drop an activity from the itinerary and stop counting it towards the goals; completed ones stay."""
+    def drop(activity: Dict[str, Any], activities: List[Dict[str, Any]]) -> None:
+        if activity.get("status") == "completed":
+            raise HTTPException(status_code=409, detail=f"Activity {activity_id} is already completed")
+        activities.remove(activity)
+    
+    activity = await change_activity(traveler_id, activity_id, drop)
+    agentic_core.activity_cancelled(activity)
+    return json_response(itinerary_payload(traveler_id), etag=itinerary_etag(traveler_id))
+
+@app.get("/notifications")
+async def get_notifications(request: Request, traveler_id: Optional[str] = None):
+    """Notifications, optionally for one traveler, encoded once per change to any notification."""
+    revision = revisions.get("notifications")
+    etag = version_etag("notifications", traveler_id, revision, epoch=state_store.epoch)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    payload = encoded_cache.get(("notifications", traveler_id), revision, lambda: [
+        notification for notification in notifications.values()
+        if traveler_id is None or notification["traveler_id"] == traveler_id
+    ])
+    return json_response(payload, etag=etag)
+
+@app.post("/notifications/{notification_id}/respond")
+async def respond_to_notification(notification_id: str, answer: NotificationAnswer):
+    """Approve or reject a suggested change; only the first answer to a notification counts."""
+    if notification_id not in notifications:
+        raise HTTPException(status_code=404, detail=f"No notification {notification_id}")
+    try:
+        answered = await handle_notification_response(notification_id, answer.approved)
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not answered:
+        raise HTTPException(status_code=409, detail=f"Notification {notification_id} was already answered")
+    return json_response(dumps(notifications[notification_id]))
+
+@app.get("/context")
+async def get_context(request: Request):
+    """The current context snapshot, encoded once per context revision."""
+    revision = context_engine.revision
+    etag = version_etag("context", revision)
+    return not_modified(request, etag) or json_response(
+        encoded_cache.get("context", revision, context_engine.get_current_context), etag=etag)
+
+@app.get("/metrics/compression")
+async def get_compression_metrics():
+    """Bytes saved by response compression and 304s since startup."""
+    return compression_stats.snapshot()
+
+@app.get("/metrics/storage")
+async def get_storage_metrics():
+    """Write-behind queue depth, batches and coalesced writes of the storage engine."""
+    return storage_engine.status()
+
+@app.get("/metrics/quotas")
+async def get_quota_metrics():
+    """Tokens left, utilization, queueing and refusals for every provider and traveler quota."""
+    return quota_manager.snapshot()
+
+@app.get("/debug/traces")
+async def get_debug_traces(limit: int = 10, name: Optional[str] = None, format: str = "json"):
+    """The slowest recent requests handled by this worker, each laid out as a waterfall of its spans.
+    
+    Filter by root span name (e.g. "POST /chat"); format=text gives one bar per span.
+    """
+    traces = tracer.slowest(limit=limit, name=name)
+    if format == "text":
+        lines = []
+        for trace in traces:
+            lines.append(f"{trace['name']}  {trace['duration_ms']:.1f} ms  trace {trace['trace_id']}")
+            for row in trace["spans"]:
+                label = ("  " * row["depth"] + row["name"])[:48]
+                lines.append(f"  {label:<48} {row['bar']} {row['offset_ms']:>9.1f} +{row['duration_ms']:.1f} ms"
+                             + (f"  {row['error']}" if row["error"] else ""))
+            lines.append("")
+        return Response(content="\n".join(lines), media_type="text/plain")
+    return {"tracer": tracer.status(), "traces": traces}
+
+@app.get("/cluster")
+async def get_cluster():
+    """Which worker answered, whether it runs the background work, and where shared state lives."""
+    return {
+        "worker": background_leader.status(),
+        "state_store": {"type": type(state_store).__name__, "shared": state_store.shared, "epoch": state_store.epoch}
+    }
+
+@traced("scenario.initialize_tom_priya")
+def initialize_tom_priya_scenario(reset: bool = True):
+    """Initialize the Tom & Priya scenario with sample data.
+    
+    With reset=False only this worker's engines are set up; the itinerary,
+    notifications, preferences and decisions are kept when another worker
+    already seeded them or they were stored before a restart.
+    """
     # Clear any existing data
-    notifications.clear()
-    if hasattr(agentic_core, 'decision_history'):
-        agentic_core.decision_history.clear()
+    traveler_id = "Tom_and_Priya"
+    if reset:
+        notifications.clear()
+        state_store.clear("notification_answers")
+        agentic_core.clear_decisions(traveler_id)
+        agentic_core.lookahead.clear()
     
     # Set up traveler preferences
-    traveler_id = "Tom_and_Priya"
     initial_preferences = {
         "max_comfortable_temperature": 38,  # Celsius
         "preferred_dining_time": "19:00",
@@ -838,8 +1204,8 @@ def initialize_tom_priya_scenario():
         "activity_preferences": ["cultural", "adventure", "relaxation"],
         "budget_level": "premium"  # economy, standard, premium, luxury
     }
-    preference_system.initialize_preferences(initial_preferences)
-    preference_system.preference_model["traveler_id"] = traveler_id
+    if reset or not preference_system.restore(traveler_id):
+        preference_system.initialize_preferences(initial_preferences, traveler_id)
     
     # Create a sample 5-day itinerary
     start_date = datetime.now().date()
@@ -1094,8 +1460,12 @@ def initialize_tom_priya_scenario():
     # Add all days to the itinerary
     itinerary["days"] = [day1, day2, day3, day4, day5]
     
-    # Store the itinerary
-    itineraries[traveler_id] = itinerary
+    # Store the itinerary, unless a worker joining a running cluster or a warm restart finds it already there
+    if reset or traveler_id not in itineraries:
+        save_itinerary(traveler_id, itinerary)
+    else:
+        itinerary = itineraries[traveler_id]
+        agentic_core.restore_decisions(traveler_id)
     
     # Set up initial context
     context_engine.update_weather({
@@ -1146,6 +1516,7 @@ def initialize_tom_priya_scenario():
     )
     
     agentic_core.traveler_goals = [goal1, goal2, goal3]
+    agentic_core.track_itinerary(itinerary)
     
     logger.info("Tom & Priya scenario initialized")
     return {"status": "success", "message": "Tom & Priya scenario initialized"}
@@ -1200,6 +1571,7 @@ async def run_tom_priya_scenario(background_tasks: BackgroundTasks):
                     "precipitation_chance": 0.0,
                     "uv_index": 8
                 }
+                context_engine.touch()
                 
                 # Create a modified plan directly for the demo
                 # This ensures we have a proper demonstration even if the evaluate_current_plan method has issues
@@ -1238,8 +1610,9 @@ async def run_tom_priya_scenario(background_tasks: BackgroundTasks):
                     "description": "Air-conditioned indoor cultural experience during the hottest part of the day"
                 })
                 
-                # Create a notification for the change
-                notification_id = f"notif-{len(notifications)+1}"
+                # Create a notification for the change, pointing at the decision recorded below
+                notification_id = next_notification_id()
+                decision_id = new_decision_id()
                 confidence = 0.85  # High confidence for demo
                 
                 notification = {
@@ -1251,15 +1624,18 @@ async def run_tom_priya_scenario(background_tasks: BackgroundTasks):
                     "message": "Due to extreme heat (45°C), outdoor activities have been rescheduled.",
                     "original_plan": safari_day,
                     "new_plan": modified_plan,
+                    "decision_id": decision_id,
                     "confidence": confidence,
                     "status": "pending",
                     "requires_approval": confidence < agentic_core.confidence_threshold
                 }
                 
-                notifications.append(notification)
+                notifications[notification_id] = notification
+                revisions.bump("notifications")
                 
                 # Record the decision
                 decision_data = {
+                    "decision_id": decision_id,
                     "type": "itinerary_change",
                     "reason": "weather",
                     "details": "Extreme heat (45°C) detected, which exceeds the traveler's comfort threshold of 38°C. Outdoor activities rescheduled to cooler hours or replaced with indoor alternatives.",
@@ -1270,25 +1646,25 @@ async def run_tom_priya_scenario(background_tasks: BackgroundTasks):
                     "was_accepted": None  # Not yet decided
                 }
                 
-                agentic_core.decision_history.append(decision_data)
+                agentic_core.record_decision(decision_data)
                 
                 # Get the latest notification and decision
-                latest_notification = notifications[-1]
-                latest_decision = agentic_core.decision_history[-1]
+                latest_notification = notification
+                latest_decision = agentic_core.get_decision(decision_id)
                 explanation = "Detected extreme heat (45°C) which exceeds Tom & Priya's comfort threshold (38°C). The Desert Safari scheduled for 14:00-18:00 would expose them to dangerous heat levels. Rescheduled to early morning (06:00-10:00) when temperatures are cooler, moved the Bedouin Dinner Experience to a brunch (10:30-13:30), and added an indoor cultural tour during the hottest part of the day (15:00-18:00)."
             else:
                 raise ValueError("Could not find a valid day plan in the itinerary")
         else:
             raise ValueError(f"Traveler {traveler_id} not found in itineraries")
         
-        return {
+        return json_response(dumps({
             "scenario": "Tom & Priya in Dubai",
             "context": context_engine.get_current_context(),
             "preferences": preference_system.get_preferences(traveler_id),
             "notification": latest_notification,
             "decision": latest_decision,
             "explanation": explanation
-        }
+        }))
     except Exception as e:
         logger.error(f"Error running Tom & Priya scenario: {e}")
         import traceback
@@ -1299,10 +1675,55 @@ async def run_tom_priya_scenario(background_tasks: BackgroundTasks):
             "scenario": "Tom & Priya in Dubai"
         }
 
+def on_weather_change(snapshot, changes: Dict[str, Any]):
+    """Point the context at a city's new snapshot once its threshold fields change."""
+    if snapshot.city.lower() == context_engine.get_current_context()["location"]["city"].lower():
+        context_engine.attach_weather(snapshot)
+    logger.info(f"Weather change in {snapshot.city}: {changes}")
+
+async def weather_update_loop():
+    """Run process_weather_updates every WEATHER_UPDATE_INTERVAL seconds in whichever worker holds the background lease."""
+    while True:
+        await asyncio.sleep(WEATHER_UPDATE_INTERVAL)
+        if not background_leader.is_leader:
+            continue
+        try:
+            await process_weather_updates()
+        except Exception as e:
+            logger.error(f"Error processing weather updates: {e}")
+
+def start_background_work():
+    """Runs in the worker that wins the background lease."""
+    weather_snapshots.start()
+
+def stop_background_work():
+    weather_snapshots.stop()
+
 @app.on_event("startup")
 def startup_event():
-    # Initialize the Tom & Priya scenario
-    initialize_tom_priya_scenario()
+    # Initialize the Tom & Priya scenario; only the first worker of a cluster seeds the shared state,
+    # and a warm restart keeps a trip that was active recently. Other travelers are loaded on first use.
+    storage_engine.start()
+    hot_travelers = storage_engine.hot_travelers()
+    first_worker = state_store.put_if_absent("meta", "tom_priya_seeded", datetime.now().isoformat())
+    initialize_tom_priya_scenario(reset=first_worker and "Tom_and_Priya" not in hot_travelers)
+    if hot_travelers:
+        logger.info(f"Warm restart: {len(hot_travelers)} recently active travelers will be loaded on first use")
+    
+    # Keep the shared city weather fresh; contexts follow it only when thresholds change.
+    # Every worker refreshes on demand, but only the leader refreshes in the background.
+    weather_snapshots.subscribe(on_weather_change)
+    weather_snapshots.watch("Dubai")
+    background_leader.start(on_elected=start_background_work, on_demoted=stop_background_work)
+    
+    # Every worker keeps the timer so a new leader picks it up at once; followers skip each tick
+    global weather_updates_task
+    weather_updates_task = asyncio.get_event_loop().create_task(weather_update_loop())
+    
+    # Fingerprint and precompress static files, then render the cacheable pages once
+    static_assets.build()
+    page_cache.warm(STATIC_PAGES)
+    page_cache.warm(TRAVELER_PAGES, traveler_page_context())
 
     # Log available tools
     logger.info(f"Available tools: {list(tool_registry.get_all_tools().keys())}")
@@ -1310,5 +1731,18 @@ def startup_event():
 
     logger.info("VoyagerVerse Agentic AI initialized")
 
+@app.on_event("shutdown")
+def shutdown_event():
+    if weather_updates_task is not None:
+        weather_updates_task.cancel()
+    background_leader.stop()
+    weather_snapshots.stop()
+    storage_engine.stop()
+
 if __name__ == "__main__":
-    uvicorn.run("main_v2:app", host="0.0.0.0", port=8000, reload=True)
+    # One auto-reloading process for development; WEB_CONCURRENCY > 1 starts that many workers
+    # sharing state through SQLite. Production runs under gunicorn with gunicorn.conf.py.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        os.environ.setdefault("STATE_STORE_URL", DEFAULT_SHARED_STATE_URL)
+    uvicorn.run("main_v2:app", host="0.0.0.0", port=int(os.getenv("PORT", "8000")), reload=workers == 1, workers=workers)
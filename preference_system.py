@@ -16,7 +16,8 @@ class PreferenceSystem:
     4. Balancing exploration and exploitation in recommendations
     """
     
-    def __init__(self):
+    def __init__(self, storage: Any = None):
+        self.storage = storage  # StorageEngine that preference changes are persisted to, or None
         self.preference_model = {}
         self.preference_history = []
         self.feedback_history = []
@@ -24,9 +25,11 @@ class PreferenceSystem:
         self.exploration_rate = 0.2  # 20% chance of recommending something outside comfort zone
         self.last_update = datetime.datetime.now()
     
-    def initialize_preferences(self, initial_preferences: Dict[str, Any]) -> None:
+    def initialize_preferences(self, initial_preferences: Dict[str, Any], traveler_id: str = None) -> None:
         """Initialize the preference model with explicit preferences."""
         self.preference_model = initial_preferences.copy()
+        if traveler_id:
+            self.preference_model["traveler_id"] = traveler_id
         
         # Record this as the first preference state
         self._record_preference_state("initial_setup")
@@ -35,12 +38,32 @@ class PreferenceSystem:
     
     def _record_preference_state(self, trigger: str) -> None:
         """Record the current state of preferences for tracking evolution."""
-        self.preference_history.append({
+        record = {
             "timestamp": datetime.datetime.now().isoformat(),
             "trigger": trigger,
             "preferences": self.preference_model.copy(),
             "confidence_scores": self.confidence_scores.copy()
-        })
+        }
+        self.preference_history.append(record)
+        
+        traveler_id = self.preference_model.get("traveler_id")
+        if self.storage is not None and traveler_id:
+            self.storage.save_preferences(traveler_id, {
+                "preferences": record["preferences"],
+                "confidence_scores": record["confidence_scores"],
+                "exploration_rate": self.exploration_rate
+            }, record)
+    
+    def restore(self, traveler_id: str) -> bool:
+        """Reload a traveler's last stored preferences after a restart; False when none were stored."""
+        state = self.storage.load_preferences(traveler_id) if self.storage is not None else None
+        if state is None:
+            return False
+        self.preference_model = state["preferences"]
+        self.confidence_scores = state["confidence_scores"]
+        self.exploration_rate = state["exploration_rate"]
+        logger.info(f"Restored {len(self.preference_model)} preference attributes for {traveler_id}")
+        return True
     
     def get_preferences(self, traveler_id: str = None) -> Dict[str, Any]:
         """Get the current preference model."""
@@ -0,0 +1,220 @@
+import os
+import time
+import inspect
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+
+from state_store import state_store
+from tracing import tracer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("rate_limiter")
+
+# (requests per second, burst) for each outbound provider, kept under their published limits.
+# Override with QUOTAS="google=20/100,openai=1/5"; providers missing here are not limited.
+PROVIDER_QUOTAS = {
+    "openai": (3.0, 10),
+    "google": (10.0, 50),
+    "tomtom": (5.0, 20),
+    "zomato": (1.0, 5),
+    "opentable": (2.0, 10),
+    "tripadvisor": (5.0, 20),
+    "eventbrite": (2.0, 10),
+    "booking": (5.0, 20),
+    "viator": (5.0, 20),
+    "uber": (2.0, 10),
+    "careem": (2.0, 10),
+    "openweathermap": (1.0, 60),
+    "weatherapi": (1.0, 60)
+}
+TRAVELER_QUOTA = (2.0, 20)  # outbound calls one traveler may cause, across every provider
+MAX_WAIT = 2.0  # seconds a call may queue for a token when its request set no deadline
+NAMESPACE = "quotas"
+
+# The traveler and deadline of the request being served, seen by every call it makes
+current_traveler = ContextVar("current_traveler", default=None)
+current_deadline = ContextVar("current_deadline", default=None)
+
+class QuotaExceeded(Exception):
+    """Raised when a call would have to wait for a token past its deadline."""
+
+def parse_quotas(spec: str) -> Dict[str, Tuple[float, int]]:
+    """{"google": (20.0, 100)} from "google=20/100", skipping malformed entries."""
+    quotas = {}
+    for part in (spec or "").split(","):
+        name, _, limits = part.strip().partition("=")
+        rate, _, burst = limits.partition("/")
+        try:
+            quotas[name.strip().lower()] = (float(rate), int(burst or max(1, float(rate))))
+        except ValueError:
+            if part.strip():
+                logger.warning(f"Ignoring malformed quota {part.strip()!r}")
+    return quotas
+
+def _refill(state: Optional[Tuple[float, float]], rate: float, burst: int, now: float) -> float:
+    tokens, updated_at = state or (float(burst), now)
+    return min(float(burst), tokens + max(0.0, now - updated_at) * rate)
+
+def _reserve(rate: float, burst: int, cost: float, max_wait: float, now: float) -> Callable:
+    """Bucket update that takes cost tokens, going into debt when the wait fits in max_wait.
+    
+    Later callers queue behind the debt, so waiting calls are served in the
+    order they arrived, across every worker sharing the bucket.
+    """
+    def update(state):
+        tokens = _refill(state, rate, burst, now)
+        wait = max(0.0, (cost - tokens) / rate)
+        if wait > max_wait:
+            return (tokens, now), None
+        return (tokens - cost, now), wait
+    return update
+
+def _refund(rate: float, burst: int, cost: float, now: float) -> Callable:
+    def update(state):
+        return (min(float(burst), _refill(state, rate, burst, now) + cost), now), None
+    return update
+
+def meters_own_calls(function: Callable) -> Callable:
+    """Mark a tool that acquires tokens at each upstream call it makes, so the registry does not charge it again."""
+    function.meters_own_calls = True
+    return function
+
+@contextmanager
+def request_scope(traveler_id: str = None, timeout: float = None) -> Iterator[None]:
+    """Charge outbound calls to a traveler and give them a shared deadline for the duration of a request."""
+    traveler_token = current_traveler.set(traveler_id)
+    deadline_token = current_deadline.set(time.time() + timeout if timeout is not None else None)
+    try:
+        yield
+    finally:
+        current_traveler.reset(traveler_token)
+        current_deadline.reset(deadline_token)
+
+class QuotaManager:
+    """Token buckets for outbound calls, per provider and per traveler.
+    
+    This class handles:
+    1. Refilling each bucket at its rate up to its burst
+    2. Queueing a call until its token is due, or refusing it when that is past the deadline
+    3. Counting grants, waits and refusals for /metrics/quotas
+    
+    Buckets live in the state store: inside the process with memory://, and
+    shared by every worker when the store is SQLite, so the whole cluster
+    keeps to one provider limit.
+    """
+    
+    def __init__(self, store: Any = None, quotas: Dict[str, Tuple[float, int]] = None,
+                 traveler_quota: Tuple[float, int] = TRAVELER_QUOTA, max_wait: float = MAX_WAIT):
+        self.store = store or state_store
+        self.quotas = dict(PROVIDER_QUOTAS if quotas is None else quotas)
+        self.traveler_quota = traveler_quota
+        self.max_wait = max_wait
+        self.stats = {}  # bucket -> counters for this worker
+        self._lock = threading.Lock()
+    
+    def configure(self, provider: str, rate: float, burst: int) -> None:
+        self.quotas[provider.lower()] = (float(rate), int(burst))
+    
+    def limits(self, bucket: str) -> Optional[Tuple[float, int]]:
+        if bucket.startswith("traveler:"):
+            return self.traveler_quota
+        return self.quotas.get(bucket[len("provider:"):])
+    
+    def provider_for(self, tool_name: str, tool: Callable, params: Dict[str, Any]) -> Optional[str]:
+        """The limited provider a tool call reaches: its provider argument, that argument's default, or its name suffix.
+        
+        None for tools marked with meters_own_calls; they are charged per upstream call instead.
+        """
+        if getattr(tool, "meters_own_calls", False):
+            return None
+        provider = params.get("provider")
+        if provider is None:
+            try:
+                parameter = inspect.signature(tool).parameters.get("provider")
+            except (TypeError, ValueError):
+                parameter = None
+            if parameter is not None and isinstance(parameter.default, str):
+                provider = parameter.default
+        if provider is None:
+            provider = next((name for name in self.quotas if tool_name.endswith("_" + name)), None)
+        provider = str(provider).lower() if provider is not None else None
+        return provider if provider in self.quotas else None
+    
+    def _count(self, bucket: str, name: str, amount: float = 1) -> None:
+        with self._lock:
+            counters = self.stats.setdefault(bucket, {"granted": 0, "queued": 0, "rejected": 0, "wait_seconds": 0.0})
+            counters[name] += amount
+    
+    def reserve(self, provider: str = None, traveler_id: str = None, cost: float = 1.0,
+                deadline: float = None) -> float:
+        """Take tokens from the provider's and the traveler's buckets, returning how long to wait before calling.
+        
+        Raises QuotaExceeded, taking nothing, when either wait would pass the
+        deadline (default: the request's deadline, or max_wait from now).
+        """
+        now = time.time()
+        if deadline is None:
+            deadline = current_deadline.get() or now + self.max_wait
+        buckets = []
+        if provider and provider.lower() in self.quotas:
+            buckets.append("provider:" + provider.lower())
+        if traveler_id is None:
+            traveler_id = current_traveler.get()
+        if traveler_id and self.traveler_quota:
+            buckets.append("traveler:" + traveler_id)
+        
+        wait, taken = 0.0, []
+        for bucket in buckets:
+            rate, burst = self.limits(bucket)
+            bucket_wait = self.store.update(NAMESPACE, bucket, _reserve(rate, burst, cost, deadline - now, now))
+            if bucket_wait is None:
+                for refunded in taken:
+                    self.store.update(NAMESPACE, refunded, _refund(*self.limits(refunded), cost, now))
+                self._count(bucket, "rejected")
+                raise QuotaExceeded(f"No {bucket} quota before the deadline")
+            taken.append(bucket)
+            wait = max(wait, bucket_wait)
+        
+        for bucket in taken:
+            self._count(bucket, "granted")
+            if wait > 0:
+                self._count(bucket, "queued")
+                self._count(bucket, "wait_seconds", wait)
+        return wait
+    
+    def acquire(self, provider: str = None, traveler_id: str = None, cost: float = 1.0, deadline: float = None) -> float:
+        """Block until the call may go out; returns the seconds waited."""
+        wait = self.reserve(provider, traveler_id, cost, deadline)
+        if wait > 0:
+            with tracer.span("quota.wait", provider=provider, wait_ms=round(wait * 1000, 1)):
+                time.sleep(wait)
+        return wait
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Tokens left and utilization of every bucket in use, with this worker's counters."""
+        now = time.time()
+        buckets = dict.fromkeys(["provider:" + name for name in self.quotas])
+        buckets.update(dict.fromkeys(key for key in self.store.keys(NAMESPACE) if key.startswith("traveler:")))
+        report = {"providers": {}, "travelers": {}, "shared": self.store.shared}
+        for bucket in buckets:
+            limits = self.limits(bucket)
+            if limits is None:
+                continue
+            rate, burst = limits
+            tokens = _refill(self.store.get(NAMESPACE, bucket), rate, burst, now)
+            kind, _, name = bucket.partition(":")
+            report[kind + "s"][name] = {
+                "rate": rate,
+                "burst": burst,
+                "tokens": round(max(0.0, tokens), 2),
+                "utilization": round(min(1.0, 1 - tokens / burst), 3),
+                "queued_seconds": round(max(0.0, -tokens) / rate, 3),  # how far ahead the bucket is booked
+                **self.stats.get(bucket, {"granted": 0, "queued": 0, "rejected": 0, "wait_seconds": 0.0})
+            }
+        return report
+
+# Create a global instance of the quota manager
+quota_manager = QuotaManager(quotas={**PROVIDER_QUOTAS, **parse_quotas(os.getenv("QUOTAS", ""))})
@@ -0,0 +1,281 @@
+import re
+import time
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+from tools.mapping_tools import get_distance_matrix
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("route_optimizer")
+
+DEFAULT_DURATION = 60  # minutes, for activities that don't say how long they take
+DEFAULT_TIME_BUDGET = 0.5  # seconds of local search per day
+
+# "14:30", "2:30 PM", "2pm", "9 a.m."; bare numbers without a colon or meridiem are ambiguous
+CLOCK_PATTERN = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*(?:([ap])\.?\s*m\.?)?\s*$", re.IGNORECASE)
+RANGE_SEPARATOR = re.compile(r"\s*(?:-|\u2013|\u2014|\bto\b)\s*", re.IGNORECASE)
+
+def parse_clock(clock: Any, meridiem: str = None) -> Optional[int]:
+    """Minutes after midnight for a clock time, or None when it cannot be read.
+    
+    meridiem ("a" or "p") applies to a time that has none of its own, as for
+    the "2" in "2-4 PM".
+    """
+    match = CLOCK_PATTERN.match(str(clock or ""))
+    if not match or (match.group(2) is None and match.group(3) is None and meridiem is None):
+        return None
+    hours, minutes = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or meridiem or "").lower()
+    if meridiem:
+        if not 1 <= hours <= 12:
+            return None
+        hours = hours % 12 + (12 if meridiem == "p" else 0)
+    if hours > 24 or minutes > 59 or hours * 60 + minutes > 24 * 60:
+        return None
+    return hours * 60 + minutes
+
+def parse_range(text: Any) -> Optional[Tuple[int, int]]:
+    """(start, end) minutes for a range like "14:00-18:00" or "2:00 PM - 4:00 PM", or None."""
+    parts = RANGE_SEPARATOR.split(str(text or "").strip())
+    if len(parts) != 2:
+        return None
+    end_match = CLOCK_PATTERN.match(parts[1])
+    end = parse_clock(parts[1])
+    start = parse_clock(parts[0], meridiem=end_match.group(3) if end_match else None)
+    if start is None or end is None or end <= start:
+        return None
+    return start, end
+
+def _to_minutes(clock: str) -> int:
+    minutes = parse_clock(clock)
+    if minutes is None:
+        raise ValueError(f"Not a clock time: {clock!r}")
+    return minutes
+
+def _to_clock(minutes: float) -> str:
+    minutes = int(round(minutes))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def activity_window(activity: Dict[str, Any], day_start: int, day_end: int) -> Tuple[int, int, int]:
+    """Return (earliest start, latest start, duration) in minutes for an activity.
+    
+    "time_window" is the opening window the whole visit must fit in and
+    "duration" is in minutes. An activity with only a booked "time" slot is
+    pinned to that slot. Times that cannot be read (free text, malformed
+    ranges) are ignored, leaving the activity free to go anywhere in the day.
+    """
+    window = parse_range(activity.get("time_window")) if activity.get("time_window") else None
+    slot = parse_range(activity.get("time")) if activity.get("time") else None
+    for field, parsed in (("time_window", window), ("time", slot)):
+        if activity.get(field) and parsed is None:
+            logger.warning(f"Ignoring unreadable {field} {activity[field]!r} of {activity.get('name', 'an activity')}")
+    
+    if window:
+        opens, closes = window
+        duration = activity.get("duration")
+        if duration is None and slot:
+            duration = slot[1] - slot[0]
+        duration = int(duration or DEFAULT_DURATION)
+        return max(opens, day_start), min(closes, day_end) - duration, duration
+    
+    if slot:
+        return slot[0], slot[0], int(activity.get("duration") or slot[1] - slot[0])
+    
+    duration = int(activity.get("duration") or DEFAULT_DURATION)
+    return day_start, day_end - duration, duration
+
+class RouteOptimizer:
+    """Orders a day's activities to minimise travel time.
+    
+    This class handles:
+    1. Turning activity time windows and durations into a schedule
+    2. Building a cheapest-insertion route that respects every window
+    3. Improving it with relocate and 2-opt moves until the time budget runs out
+    
+    Activities that cannot fit anywhere are returned as unscheduled rather
+    than silently dropped.
+    """
+    
+    def __init__(self, mode: str = "driving", provider: str = "local"):
+        self.mode = mode
+        self.provider = provider
+    
+    def travel_matrix(self, locations: List[str]) -> List[List[float]]:
+        """Travel minutes between every pair of locations, from the mapping tools."""
+        places = list(dict.fromkeys(locations))
+        result = get_distance_matrix(places, places, mode=self.mode, provider=self.provider)
+        minutes = {
+            (element["origin"], element["destination"]): element["duration"]["value"] / 60
+            for element in result["data"]["results"] if "duration" in element
+        }
+        return [[minutes.get((a, b), 0.0) for b in locations] for a in locations]
+    
+    def optimize_day(self, activities: List[Dict[str, Any]], start_location: str = None,
+                     day_start: str = "08:00", day_end: str = "23:30",
+                     matrix: List[List[float]] = None,
+                     time_budget: float = DEFAULT_TIME_BUDGET) -> Dict[str, Any]:
+        """Find a feasible visiting order with the least travel time.
+        
+        matrix, if given, holds travel minutes between stops with index 0 being
+        the start location and index i the i-th activity; otherwise it is
+        built from the activities' "location" fields.
+        """
+        started = time.perf_counter()
+        deadline = started + time_budget
+        day_start_min, day_end_min = _to_minutes(day_start), _to_minutes(day_end)
+        
+        windows = [activity_window(activity, day_start_min, day_end_min) for activity in activities]
+        if matrix is None:
+            locations = [start_location or ""] + [activity.get("location") or activity.get("name", "") for activity in activities]
+            matrix = self.travel_matrix(locations)
+            if not start_location:
+                # No fixed start: the day begins wherever the first stop is
+                matrix[0] = [0.0] * len(matrix)
+        
+        search = _RouteSearch(windows, matrix, day_start_min, day_end_min, deadline)
+        route, iterations, converged = search.run()
+        
+        stops = []
+        schedule = search.schedule(route)
+        previous = 0
+        for stop, (arrival, begin) in zip(route, schedule):
+            activity = activities[stop - 1]
+            stops.append({
+                "activity": activity,
+                "arrival": _to_clock(arrival),
+                "start": _to_clock(begin),
+                "end": _to_clock(begin + windows[stop - 1][2]),
+                "travel_minutes": round(matrix[previous][stop], 1),
+                "wait_minutes": round(begin - arrival, 1)
+            })
+            previous = stop
+        
+        scheduled = set(route)
+        unscheduled = [activities[i - 1] for i in range(1, len(activities) + 1) if i not in scheduled]
+        if unscheduled:
+            logger.info(f"Could not fit {len(unscheduled)} of {len(activities)} activities into the day")
+        
+        return {
+            "stops": stops,
+            "unscheduled": unscheduled,
+            "total_travel_minutes": round(search.travel(route), 1),
+            "finish_time": _to_clock(schedule[-1][1] + windows[route[-1] - 1][2]) if route else day_start,
+            "iterations": iterations,
+            "converged": converged,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+class _RouteSearch:
+    """Time-windowed TSP heuristic over stop indices 1..n, with 0 as the start."""
+    
+    def __init__(self, windows: List[Tuple[int, int, int]], matrix: List[List[float]],
+                 day_start: int, day_end: int, deadline: float):
+        self.earliest = [day_start] + [w[0] for w in windows]
+        self.latest = [day_start] + [w[1] for w in windows]
+        self.duration = [0] + [w[2] for w in windows]
+        self.matrix = matrix
+        self.day_start = day_start
+        self.day_end = day_end
+        self.deadline = deadline
+    
+    def travel(self, route: List[int]) -> float:
+        total, previous = 0.0, 0
+        for stop in route:
+            total += self.matrix[previous][stop]
+            previous = stop
+        return total
+    
+    def feasible(self, route: List[int]) -> bool:
+        clock, previous = self.day_start, 0
+        for stop in route:
+            clock = max(clock + self.matrix[previous][stop], self.earliest[stop])
+            if clock > self.latest[stop]:
+                return False
+            clock += self.duration[stop]
+            previous = stop
+        return clock <= self.day_end
+    
+    def schedule(self, route: List[int]) -> List[Tuple[float, float]]:
+        """(arrival, start) for each stop of a feasible route."""
+        times = []
+        clock, previous = self.day_start, 0
+        for stop in route:
+            arrival = clock + self.matrix[previous][stop]
+            begin = max(arrival, self.earliest[stop])
+            times.append((arrival, begin))
+            clock = begin + self.duration[stop]
+            previous = stop
+        return times
+    
+    def _insertion_cost(self, route: List[int], position: int, stop: int) -> float:
+        previous = route[position - 1] if position > 0 else 0
+        cost = self.matrix[previous][stop]
+        if position < len(route):
+            cost += self.matrix[stop][route[position]] - self.matrix[previous][route[position]]
+        return cost
+    
+    def insert(self, route: List[int], stops: List[int]) -> List[int]:
+        """Cheapest feasible insertion, tightest windows first; returns the stops left over."""
+        left_over = []
+        for stop in sorted(stops, key=lambda s: (self.latest[s], self.earliest[s])):
+            best = None
+            for position in range(len(route) + 1):
+                cost = self._insertion_cost(route, position, stop)
+                if best is not None and cost >= best[0]:
+                    continue
+                if self.feasible(route[:position] + [stop] + route[position:]):
+                    best = (cost, position)
+            if best is None:
+                left_over.append(stop)
+            else:
+                route.insert(best[1], stop)
+        return left_over
+    
+    def _improve_once(self, route: List[int]) -> bool:
+        """Apply the first improving relocate or 2-opt move; False at a local optimum."""
+        current = self.travel(route)
+        size = len(route)
+        
+        for i in range(size):
+            stop = route[i]
+            without = route[:i] + route[i + 1:]
+            for j in range(size):
+                if j == i:
+                    continue
+                candidate = without[:j] + [stop] + without[j:]
+                if self.travel(candidate) < current - 1e-9 and self.feasible(candidate):
+                    route[:] = candidate
+                    return True
+            if time.perf_counter() > self.deadline:
+                return False
+        
+        for i in range(size - 1):
+            for j in range(i + 1, size):
+                candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                if self.travel(candidate) < current - 1e-9 and self.feasible(candidate):
+                    route[:] = candidate
+                    return True
+            if time.perf_counter() > self.deadline:
+                return False
+        return False
+    
+    def run(self) -> Tuple[List[int], int, bool]:
+        """Returns (route, improving moves made, whether a local optimum was reached)."""
+        route = []
+        unrouted = self.insert(route, list(range(1, len(self.duration))))
+        
+        iterations = 0
+        converged = False
+        while time.perf_counter() < self.deadline:
+            if self._improve_once(route):
+                iterations += 1
+                # Shorter travel may have opened room for stops that didn't fit
+                if unrouted:
+                    unrouted = self.insert(route, unrouted)
+                continue
+            converged = time.perf_counter() < self.deadline
+            break
+        return route, iterations, converged
+
+# Create a global instance of the route optimizer
+route_optimizer = RouteOptimizer()
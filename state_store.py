@@ -0,0 +1,461 @@
+import os
+import time
+import pickle
+import socket
+import asyncio
+import sqlite3
+import logging
+import threading
+import weakref
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Dict, List, Any, Callable, Hashable, Iterator, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("state_store")
+
+# memory:// keeps state inside the process (development, one worker);
+# sqlite:///path shares it between every worker process on the host
+STATE_STORE_URL = os.getenv("STATE_STORE_URL", "memory://")
+DEFAULT_SHARED_STATE_URL = "sqlite:///voyagerverse_state.db"
+LEASE_TTL = 30.0  # seconds a leader may go silent before another worker takes over
+BUSY_TIMEOUT_MS = 5000
+
+_MISSING = object()
+
+class VersionConflict(Exception):
+    """Raised when a versioned write keeps losing to writes from elsewhere."""
+
+class MemoryStateStore:
+    """State kept in this process's memory, for development with a single worker.
+    
+    Values are stored as they are, so callers that mutate a fetched object in
+    place see the change without writing it back; shared stores need the write.
+    """
+    
+    shared = False
+    
+    def __init__(self):
+        self.epoch = os.urandom(6).hex()  # counters restart with the process, and so does the epoch
+        self.namespaces = {}
+        self.counters = {}
+        self.leases = {}  # name -> (owner, expires_at)
+        self._lock = threading.Lock()
+    
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        return self.namespaces.get(namespace, {}).get(key, default)
+    
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        with self._lock:
+            self.namespaces.setdefault(namespace, {})[key] = value
+    
+    def put_if_absent(self, namespace: str, key: str, value: Any) -> bool:
+        with self._lock:
+            entries = self.namespaces.setdefault(namespace, {})
+            if key in entries:
+                return False
+            entries[key] = value
+            return True
+    
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            return self.namespaces.get(namespace, {}).pop(key, _MISSING) is not _MISSING
+    
+    def keys(self, namespace: str) -> List[str]:
+        return list(self.namespaces.get(namespace, {}))
+    
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        return list(self.namespaces.get(namespace, {}).items())
+    
+    def count(self, namespace: str) -> int:
+        return len(self.namespaces.get(namespace, {}))
+    
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            self.namespaces.pop(namespace, None)
+    
+    def incr(self, name: str) -> int:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+            return self.counters[name]
+    
+    def counter(self, name: str) -> int:
+        return self.counters.get(name, 0)
+    
+    def put_versioned(self, namespace: str, key: str, value: Any, counter: str, expected: int = None) -> Optional[int]:
+        """Write value and bump counter in one step, only if counter still equals expected (None: always).
+        
+        Returns the new version, or None when someone else wrote first.
+        """
+        with self._lock:
+            version = self.counters.get(counter, 0)
+            if expected is not None and version != expected:
+                return None
+            self.namespaces.setdefault(namespace, {})[key] = value
+            self.counters[counter] = version + 1
+            return version + 1
+    
+    def update(self, namespace: str, key: str, function: Callable[[Any], Tuple[Any, Any]]) -> Any:
+        """Replace an entry with function(current)[0] in one step (current is None when absent), returning [1]."""
+        with self._lock:
+            entries = self.namespaces.setdefault(namespace, {})
+            entries[key], result = function(entries.get(key))
+            return result
+    
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew a lease; False while another owner holds an unexpired one."""
+        now = time.time()
+        with self._lock:
+            holder, expires_at = self.leases.get(name, (None, 0.0))
+            if holder not in (None, owner) and expires_at > now:
+                return False
+            self.leases[name] = (owner, now + ttl)
+            return True
+    
+    def release(self, name: str, owner: str) -> None:
+        with self._lock:
+            if self.leases.get(name, (None, 0.0))[0] == owner:
+                del self.leases[name]
+    
+    def close(self) -> None:
+        pass
+
+class SQLiteStateStore:
+    """State shared by every worker process on a host through one SQLite file.
+    
+    This class handles:
+    1. Keyed entries per namespace, pickled, listed in insertion order
+    2. Atomic counters, used as revisions so every worker versions an object the same way
+    3. Expiring leases, so exactly one worker runs background work
+    
+    The file is in WAL mode, so readers never wait for the writer. Each
+    process opens its own connection on first use, which keeps the store safe
+    to create before gunicorn forks its workers.
+    """
+    
+    shared = True
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.epoch = self._load_epoch()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        
+        with self._lock:
+            if self._connection is None or self._pid != os.getpid():
+                connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                                             check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, PRIMARY KEY (namespace, key))"
+                )
+                connection.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+                connection.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+                connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                self._connection = connection
+                self._pid = os.getpid()
+        return self._connection
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """A write transaction that takes the database lock up front, so read-modify-writes cannot interleave."""
+        connection = self._connect()
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+    
+    def _query(self, sql: str, parameters: Tuple = ()) -> List[Tuple]:
+        connection = self._connect()
+        with self._lock:
+            return connection.execute(sql, parameters).fetchall()
+    
+    def _load_epoch(self) -> str:
+        # Counters outlive worker restarts, so the epoch only changes with the file itself
+        with self._transaction() as connection:
+            connection.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (os.urandom(6).hex(),))
+            return connection.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+    
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        rows = self._query("SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        return pickle.loads(rows[0][0]) if rows else default
+    
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        # An upsert keeps the row's position, so an updated entry is not moved to the end
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO entries (namespace, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value",
+                (namespace, key, payload)
+            )
+    
+    def put_if_absent(self, namespace: str, key: str, value: Any) -> bool:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._transaction() as connection:
+            cursor = connection.execute("INSERT OR IGNORE INTO entries (namespace, key, value) VALUES (?, ?, ?)",
+                                        (namespace, key, payload))
+            return cursor.rowcount == 1
+    
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._transaction() as connection:
+            return connection.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)).rowcount == 1
+    
+    def keys(self, namespace: str) -> List[str]:
+        return [row[0] for row in self._query("SELECT key FROM entries WHERE namespace = ? ORDER BY rowid", (namespace,))]
+    
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        rows = self._query("SELECT key, value FROM entries WHERE namespace = ? ORDER BY rowid", (namespace,))
+        return [(key, pickle.loads(value)) for key, value in rows]
+    
+    def count(self, namespace: str) -> int:
+        return self._query("SELECT COUNT(*) FROM entries WHERE namespace = ?", (namespace,))[0][0]
+    
+    def clear(self, namespace: str) -> None:
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+    
+    def incr(self, name: str) -> int:
+        with self._transaction() as connection:
+            connection.execute("INSERT INTO counters (name, value) VALUES (?, 1) "
+                               "ON CONFLICT (name) DO UPDATE SET value = value + 1", (name,))
+            return connection.execute("SELECT value FROM counters WHERE name = ?", (name,)).fetchone()[0]
+    
+    def counter(self, name: str) -> int:
+        rows = self._query("SELECT value FROM counters WHERE name = ?", (name,))
+        return rows[0][0] if rows else 0
+    
+    def put_versioned(self, namespace: str, key: str, value: Any, counter: str, expected: int = None) -> Optional[int]:
+        """Write value and bump counter in one transaction, only if counter still equals expected (None: always).
+        
+        Returns the new version, or None when another worker wrote first.
+        """
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._transaction() as connection:
+            row = connection.execute("SELECT value FROM counters WHERE name = ?", (counter,)).fetchone()
+            version = row[0] if row else 0
+            if expected is not None and version != expected:
+                return None
+            connection.execute(
+                "INSERT INTO entries (namespace, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value",
+                (namespace, key, payload)
+            )
+            connection.execute("INSERT INTO counters (name, value) VALUES (?, ?) "
+                               "ON CONFLICT (name) DO UPDATE SET value = excluded.value", (counter, version + 1))
+            return version + 1
+    
+    def update(self, namespace: str, key: str, function: Callable[[Any], Tuple[Any, Any]]) -> Any:
+        """Replace an entry with function(current)[0] in one transaction (current is None when absent), returning [1]."""
+        with self._transaction() as connection:
+            row = connection.execute("SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+            value, result = function(pickle.loads(row[0]) if row else None)
+            connection.execute(
+                "INSERT INTO entries (namespace, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value",
+                (namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            )
+            return result
+    
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew a lease; False while another owner holds an unexpired one."""
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                (name, owner, now + ttl, now)
+            )
+            return cursor.rowcount == 1
+    
+    def release(self, name: str, owner: str) -> None:
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+def create_state_store(url: str = STATE_STORE_URL) -> Any:
+    """Store for a URL: memory:// or sqlite:///relative/path.db (sqlite:////absolute/path.db)."""
+    if url in ("memory", "memory://"):
+        return MemoryStateStore()
+    if url.startswith("sqlite:///"):
+        store = SQLiteStateStore(url[len("sqlite:///"):])
+        logger.info(f"Sharing state through {store.path} (epoch {store.epoch})")
+        return store
+    raise ValueError(f"Unsupported state store URL: {url}")
+
+class SharedMapping(MutableMapping):
+    """Dict view of one store namespace, e.g. itineraries by traveler ID.
+    
+    Values read from a shared store are copies: after changing one in place,
+    assign it back (mapping[key] = value) for other workers to see it.
+    """
+    
+    def __init__(self, store: Any, namespace: str, loader: Callable[[str], Any] = None):
+        self.store = store
+        self.namespace = namespace
+        self.loader = loader  # fetches a key the store does not have, e.g. from durable storage after a restart
+    
+    def __getitem__(self, key: str) -> Any:
+        value = self.store.get(self.namespace, key, _MISSING)
+        if value is _MISSING and self.loader is not None:
+            loaded = self.loader(key)
+            if loaded is not None:
+                # Another worker may have loaded or changed it meanwhile; its copy wins
+                value = loaded if self.store.put_if_absent(self.namespace, key, loaded) else self.store.get(self.namespace, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.store.put(self.namespace, key, value)
+    
+    def __delitem__(self, key: str) -> None:
+        if not self.store.delete(self.namespace, key):
+            raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.keys(self.namespace))
+    
+    def __len__(self) -> int:
+        return self.store.count(self.namespace)
+    
+    def items(self) -> List[Tuple[str, Any]]:
+        return self.store.items(self.namespace)
+    
+    def values(self) -> List[Any]:
+        return [value for _, value in self.store.items(self.namespace)]
+    
+    def clear(self) -> None:
+        self.store.clear(self.namespace)
+
+class SharedRevisions:
+    """Per-key change counters kept in a state store, so all workers agree on versions and ETags."""
+    
+    def __init__(self, store: Any):
+        self.store = store
+    
+    @staticmethod
+    def _name(key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return "revision:" + "/".join(str(part) for part in parts)
+    
+    def bump(self, key: Hashable) -> int:
+        return self.store.incr(self._name(key))
+    
+    def get(self, key: Hashable) -> int:
+        return self.store.counter(self._name(key))
+    
+    def put(self, mapping: SharedMapping, key: str, value: Any, revision_key: Hashable, expected: int = None) -> Optional[int]:
+        """Store mapping[key] = value together with its revision bump; with expected, only if nothing changed it since.
+        
+        Returns the new revision, or None when the revision has moved past expected.
+        """
+        return self.store.put_versioned(mapping.namespace, key, value, self._name(revision_key), expected)
+
+class TravelerLocks:
+    """One asyncio lock per traveler, so a traveler's updates queue up without holding up anyone else's.
+    
+    A lock is dropped as soon as no coroutine holds or waits for it. These only
+    order writers within one worker; versioned writes catch the other workers.
+    """
+    
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+    
+    def lock(self, traveler_id: str) -> asyncio.Lock:
+        lock = self._locks.get(traveler_id)
+        if lock is None:
+            lock = self._locks[traveler_id] = asyncio.Lock()
+        return lock
+
+class LeaderElection:
+    """Keeps background work running in exactly one worker of the cluster.
+    
+    This class handles:
+    1. Holding a renewable lease in the state store under an owner ID unique to this process
+    2. Calling on_elected when the lease is won and on_demoted when it is lost or released
+    3. Retrying every third of the lease TTL, so a follower takes over once a dead leader's lease expires
+    """
+    
+    def __init__(self, store: Any, name: str = "background", ttl: float = LEASE_TTL):
+        self.store = store
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{os.urandom(3).hex()}"
+        self.is_leader = False
+        self.on_elected = None
+        self.on_demoted = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _attempt(self) -> None:
+        try:
+            won = self.store.acquire(self.name, self.owner, self.ttl)
+        except sqlite3.Error as e:
+            logger.error(f"Lease {self.name} could not be renewed: {e}")
+            won = False
+        
+        if won and not self.is_leader:
+            self.is_leader = True
+            logger.info(f"Worker {self.owner} is now the {self.name} leader")
+            self._call(self.on_elected)
+        elif not won and self.is_leader:
+            self.is_leader = False
+            logger.warning(f"Worker {self.owner} lost the {self.name} lease")
+            self._call(self.on_demoted)
+    
+    def _call(self, callback: Optional[Callable[[], None]]) -> None:
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Leader callback failed: {e}")
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            self._attempt()
+    
+    def start(self, on_elected: Callable[[], None] = None, on_demoted: Callable[[], None] = None) -> None:
+        """Try for the lease now, then keep renewing or retrying it in a background thread."""
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self._stop.clear()
+        self._attempt()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-lease", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop campaigning and hand the lease back so another worker can take over at once."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.is_leader:
+            self.is_leader = False
+            self.store.release(self.name, self.owner)
+            self._call(self.on_demoted)
+    
+    def status(self) -> Dict[str, Any]:
+        return {"lease": self.name, "owner": self.owner, "is_leader": self.is_leader, "ttl": self.ttl}
+
+# Create a global instance of the state store configured for this process
+state_store = create_state_store()
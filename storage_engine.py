@@ -0,0 +1,309 @@
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+from fast_json import dumps_lossy, loads
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("storage_engine")
+
+# Where itineraries, bookings, preferences and decisions are persisted; empty disables persistence
+STORAGE_PATH = os.getenv("STORAGE_PATH", "voyagerverse_data.db")
+FLUSH_INTERVAL = 0.2  # seconds the writer waits to gather a batch
+MAX_BATCH = 500  # writes per transaction
+COMMIT_ATTEMPTS = 3  # tries for a batch hitting a busy or locked database before it is written row by row
+RETRY_DELAY = 0.1  # seconds before the first retry, doubling after each
+HOT_SESSION_HOURS = 48  # travelers touched this recently are restored on warm restart
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS itineraries ("
+    "traveler_id TEXT PRIMARY KEY, start_date TEXT, end_date TEXT, updated_at REAL NOT NULL, document BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS itineraries_by_update ON itineraries (updated_at)",
+    "CREATE TABLE IF NOT EXISTS bookings ("
+    "booking_id TEXT PRIMARY KEY, traveler_id TEXT, type TEXT, date TEXT, status TEXT, updated_at REAL NOT NULL, "
+    "document BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS bookings_by_date ON bookings (date, status)",
+    "CREATE INDEX IF NOT EXISTS bookings_by_traveler ON bookings (traveler_id, date)",
+    "CREATE TABLE IF NOT EXISTS booking_events ("
+    "id INTEGER PRIMARY KEY, booking_id TEXT NOT NULL, operation TEXT, timestamp TEXT, document BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS booking_events_by_booking ON booking_events (booking_id)",
+    "CREATE TABLE IF NOT EXISTS preferences ("
+    "traveler_id TEXT PRIMARY KEY, updated_at REAL NOT NULL, document BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS preference_events ("
+    "id INTEGER PRIMARY KEY, traveler_id TEXT, trigger TEXT, timestamp TEXT, document BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS preference_events_by_traveler ON preference_events (traveler_id, timestamp)",
+    "CREATE TABLE IF NOT EXISTS decisions ("
+    "decision_id TEXT PRIMARY KEY, traveler_id TEXT NOT NULL, created_at REAL NOT NULL, type TEXT, timestamp TEXT, "
+    "was_accepted INTEGER, document BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS decisions_by_traveler ON decisions (traveler_id, created_at)"
+]
+
+# One statement per kind of write, so each batch runs as a single prepared statement per table.
+# Kinds with a key are upserts, of which only the latest in a batch is written; the rest are appends.
+# A reset deletes a traveler's rows of another kind, and drops that kind's earlier upserts in the batch.
+RESETS = {"decision_reset": "decision"}
+STATEMENTS = {
+    "itinerary": "INSERT INTO itineraries (traveler_id, start_date, end_date, updated_at, document) VALUES (?, ?, ?, ?, ?) "
+                 "ON CONFLICT (traveler_id) DO UPDATE SET start_date = excluded.start_date, end_date = excluded.end_date, "
+                 "updated_at = excluded.updated_at, document = excluded.document",
+    "booking": "INSERT INTO bookings (booking_id, traveler_id, type, date, status, updated_at, document) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (booking_id) DO UPDATE SET traveler_id = excluded.traveler_id, "
+               "type = excluded.type, date = excluded.date, status = excluded.status, updated_at = excluded.updated_at, "
+               "document = excluded.document",
+    "booking_event": "INSERT INTO booking_events (booking_id, operation, timestamp, document) VALUES (?, ?, ?, ?)",
+    "preferences": "INSERT INTO preferences (traveler_id, updated_at, document) VALUES (?, ?, ?) "
+                   "ON CONFLICT (traveler_id) DO UPDATE SET updated_at = excluded.updated_at, document = excluded.document",
+    "preference_event": "INSERT INTO preference_events (traveler_id, trigger, timestamp, document) VALUES (?, ?, ?, ?)",
+    "decision_reset": "DELETE FROM decisions WHERE traveler_id = ?",
+    "decision": "INSERT INTO decisions (decision_id, traveler_id, created_at, type, timestamp, was_accepted, document) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (decision_id) DO UPDATE SET traveler_id = excluded.traveler_id, "
+                "type = excluded.type, timestamp = excluded.timestamp, was_accepted = excluded.was_accepted, "
+                "document = excluded.document"
+}
+
+def _migrate_decisions(connection: sqlite3.Connection) -> None:
+    """Re-key decisions stored by (traveler_id, seq) under their decision IDs, which stay unique across workers."""
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(decisions)")]
+    if not columns or "decision_id" in columns:
+        return
+    rows = connection.execute("SELECT traveler_id, seq, type, timestamp, was_accepted, document FROM decisions ORDER BY seq").fetchall()
+    connection.execute("DROP TABLE decisions")
+    for statement in SCHEMA:
+        if " decisions (" in statement:
+            connection.execute(statement)
+    migrated = time.time()
+    connection.executemany(STATEMENTS["decision"], [
+        (loads(document).get("decision_id") or f"{traveler_id}-{seq}", traveler_id, migrated + seq * 1e-6,
+         decision_type, timestamp, was_accepted, document)
+        for traveler_id, seq, decision_type, timestamp, was_accepted, document in rows
+    ])
+    logger.info(f"Re-keyed {len(rows)} stored decisions by decision ID")
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=5, check_same_thread=False, cached_statements=64)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last batches are at risk on power loss
+    connection.execute("PRAGMA busy_timeout=5000")
+    return connection
+
+class StorageEngine:
+    """Durable storage for itineraries, bookings, preferences and decisions on SQLite.
+    
+    This class handles:
+    1. Queueing writes from the request path and committing them from one writer thread
+    2. Coalescing repeated saves of the same record and committing up to MAX_BATCH writes per transaction
+    3. Loading records back by traveler, date and status, e.g. lazily after a restart
+    
+    Records are encoded when they are saved, so later in-place changes are
+    only stored by saving again; values JSON cannot hold are stored as text.
+    flush() waits for everything queued so far.
+    """
+    
+    def __init__(self, path: str = STORAGE_PATH, flush_interval: float = FLUSH_INTERVAL, max_batch: int = MAX_BATCH):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.stats = {"queued": 0, "written": 0, "coalesced": 0, "batches": 0, "errors": 0, "last_batch_ms": 0.0}
+        self._queue = queue.Queue()
+        self._reader = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+    
+    def _read_connection(self) -> sqlite3.Connection:
+        if self._reader is None:
+            with self._lock:
+                if self._reader is None:
+                    connection = _connect(self.path)
+                    _migrate_decisions(connection)
+                    for statement in SCHEMA:
+                        connection.execute(statement)
+                    connection.commit()
+                    self._reader = connection
+        return self._reader
+    
+    def _query(self, sql: str, parameters: Tuple = ()) -> List[Tuple]:
+        if not self.enabled:
+            return []
+        connection = self._read_connection()
+        with self._lock:
+            return connection.execute(sql, parameters).fetchall()
+    
+    def start(self) -> None:
+        """Create the schema and start the writer thread; saving starts it too."""
+        if not self.enabled:
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._read_connection()
+            self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+            self._thread.start()
+        logger.info(f"Storage engine writing to {self.path}")
+    
+    def stop(self) -> None:
+        """Write everything still queued, then stop the writer."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self._thread = None
+    
+    def flush(self) -> None:
+        """Block until every write queued so far is committed."""
+        if self._thread is not None:
+            self._queue.join()
+    
+    def _enqueue(self, kind: str, key: Optional[Tuple], row: Tuple) -> None:
+        if not self.enabled:
+            return
+        if self._thread is None:
+            self.start()
+        self.stats["queued"] += 1
+        self._queue.put((kind, key, row))
+    
+    def _run(self) -> None:
+        connection = _connect(self.path)
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            running = batch[-1] is not None
+            writes = [item for item in batch if item is not None]
+            if writes:
+                self._commit(connection, writes)
+            for _ in batch:
+                self._queue.task_done()
+        connection.close()
+    
+    def _commit(self, connection: sqlite3.Connection, writes: List[Tuple[str, Optional[Tuple], Tuple]]) -> None:
+        started = time.perf_counter()
+        upserts, appends = {}, {}
+        for kind, key, row in writes:
+            if kind in RESETS:
+                upserts = {entry: queued for entry, queued in upserts.items()
+                           if entry[0] != RESETS[kind] or entry[1][0] != row[0]}
+            if key is None:
+                appends.setdefault(kind, []).append(row)
+            else:
+                upserts[(kind, key)] = row  # later saves of the same record win
+        rows = dict(appends)
+        for (kind, _), row in upserts.items():
+            rows.setdefault(kind, []).append(row)
+        
+        written = sum(len(kind_rows) for kind_rows in rows.values())
+        committed = False
+        for attempt in range(COMMIT_ATTEMPTS):
+            try:
+                with connection:
+                    for kind, kind_rows in rows.items():
+                        connection.executemany(STATEMENTS[kind], kind_rows)
+                committed = True
+                break
+            except sqlite3.OperationalError as e:
+                # Busy, locked or I/O trouble usually passes; try the whole batch again
+                logger.warning(f"Storage batch of {len(writes)} writes failed (attempt {attempt + 1}): {e}")
+                time.sleep(RETRY_DELAY * 2 ** attempt)
+            except sqlite3.Error as e:
+                logger.warning(f"Storage batch of {len(writes)} writes failed: {e}")
+                break
+        if not committed:
+            # Write row by row so one bad record does not lose the rest of the batch
+            written = self._commit_rows(connection, rows)
+        
+        self.stats["coalesced"] += len(writes) - sum(len(kind_rows) for kind_rows in rows.values())
+        self.stats["written"] += written
+        self.stats["batches"] += 1
+        self.stats["last_batch_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    
+    def _commit_rows(self, connection: sqlite3.Connection, rows: Dict[str, List[Tuple]]) -> int:
+        """Commit each row in its own transaction, returning how many were written; failures are logged and counted."""
+        written = 0
+        for kind, kind_rows in rows.items():
+            for row in kind_rows:
+                try:
+                    with connection:
+                        connection.execute(STATEMENTS[kind], row)
+                    written += 1
+                except sqlite3.Error as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"Dropped a {kind} write that failed on its own: {e}")
+        return written
+    
+    def save_itinerary(self, traveler_id: str, itinerary: Dict[str, Any]) -> None:
+        self._enqueue("itinerary", (traveler_id,), (
+            traveler_id, itinerary.get("start_date"), itinerary.get("end_date"), time.time(), dumps_lossy(itinerary)))
+    
+    def save_booking(self, booking: Dict[str, Any], event: Dict[str, Any] = None) -> None:
+        booking_id = booking["booking_id"]
+        self._enqueue("booking", (booking_id,), (
+            booking_id, booking.get("traveler_id"), booking.get("type"), booking.get("date"), booking.get("status"),
+            time.time(), dumps_lossy(booking)))
+        if event is not None:
+            self._enqueue("booking_event", None, (booking_id, event.get("operation"), event.get("timestamp"), dumps_lossy(event)))
+    
+    def save_preferences(self, traveler_id: str, state: Dict[str, Any], event: Dict[str, Any] = None) -> None:
+        self._enqueue("preferences", (traveler_id,), (traveler_id, time.time(), dumps_lossy(state)))
+        if event is not None:
+            self._enqueue("preference_event", None, (traveler_id, event.get("trigger"), event.get("timestamp"), dumps_lossy(event)))
+    
+    def save_decision(self, traveler_id: str, decision: Dict[str, Any]) -> None:
+        """Insert or update a decision by its decision_id, so workers saving decisions at once never collide."""
+        decision_id = decision["decision_id"]
+        accepted = decision.get("was_accepted")
+        self._enqueue("decision", (traveler_id, decision_id), (
+            decision_id, traveler_id, time.time(), decision.get("type"), str(decision.get("timestamp")),
+            None if accepted is None else int(accepted), dumps_lossy(decision)))
+    
+    def clear_decisions(self, traveler_id: str) -> None:
+        self._enqueue("decision_reset", None, (traveler_id,))
+    
+    def load_itinerary(self, traveler_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT document FROM itineraries WHERE traveler_id = ?", (traveler_id,))
+        return loads(rows[0][0]) if rows else None
+    
+    def load_booking(self, booking_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT document FROM bookings WHERE booking_id = ?", (booking_id,))
+        return loads(rows[0][0]) if rows else None
+    
+    def bookings_for_date(self, date: str, status: str = "confirmed") -> List[Dict[str, Any]]:
+        rows = self._query("SELECT document FROM bookings WHERE date = ? AND status = ?", (date, status))
+        return [loads(row[0]) for row in rows]
+    
+    def bookings_for_traveler(self, traveler_id: str) -> List[Dict[str, Any]]:
+        rows = self._query("SELECT document FROM bookings WHERE traveler_id = ? ORDER BY date", (traveler_id,))
+        return [loads(row[0]) for row in rows]
+    
+    def load_preferences(self, traveler_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT document FROM preferences WHERE traveler_id = ?", (traveler_id,))
+        return loads(rows[0][0]) if rows else None
+    
+    def load_decisions(self, traveler_id: str) -> List[Dict[str, Any]]:
+        """The traveler's decisions in the order they were made."""
+        rows = self._query("SELECT document FROM decisions WHERE traveler_id = ? ORDER BY created_at, decision_id", (traveler_id,))
+        return [loads(row[0]) for row in rows]
+    
+    def hot_travelers(self, hours: float = HOT_SESSION_HOURS) -> List[str]:
+        """Travelers whose itinerary changed within the last hours, most recent first."""
+        rows = self._query("SELECT traveler_id FROM itineraries WHERE updated_at >= ? ORDER BY updated_at DESC",
+                           (time.time() - hours * 3600,))
+        return [row[0] for row in rows]
+    
+    def status(self) -> Dict[str, Any]:
+        return {"path": self.path, "enabled": self.enabled, "pending": self._queue.qsize(), **self.stats}
+
+# Create a global instance of the storage engine
+storage_engine = StorageEngine()
@@ -0,0 +1,33 @@
+from agentic_core import AgenticCore, Goal
+from state_store import SQLiteStateStore
+
+SAFARI = {"id": "a1", "name": "Desert Safari", "category": "adventure", "is_outdoor": True}
+MUSEUM = {"id": "a2", "name": "Dubai Museum Cultural Tour", "category": "culture", "is_outdoor": False}
+
+def make_core(store):
+    core = AgenticCore(store=store)
+    core.add_goal(Goal("Experience local culture", "Museums and souks", 8, {"min_cultural_activities": 2}))
+    core.track_itinerary({"traveler_id": "Tom_and_Priya", "days": [{"date": "2025-07-01", "activities": [SAFARI]}]})
+    return core
+
+def test_any_worker_resolves_a_decision_once(tmp_path):
+    path = str(tmp_path / "state.db")
+    creator, other = make_core(SQLiteStateStore(path)), make_core(SQLiteStateStore(path))
+    decision_id = creator.record_decision({"issue": "weather", "swaps": [[SAFARI, MUSEUM]]})
+    
+    assert other.get_decision(decision_id)["issue"] == "weather"
+    assert other.resolve_decision(decision_id, True)
+    assert not creator.resolve_decision(decision_id, False)
+    assert creator.get_decision(decision_id)["was_accepted"] is True
+    assert not other.resolve_decision("no-such-decision", True)
+
+def test_swaps_count_towards_goals_only_once_accepted(tmp_path):
+    core = make_core(SQLiteStateStore(str(tmp_path / "state.db")))
+    rejected = core.record_decision({"issue": "weather", "swaps": [[SAFARI, MUSEUM]]})
+    accepted = core.record_decision({"issue": "weather", "swaps": [[SAFARI, MUSEUM]]})
+    assert core.goal_tracker.get_satisfaction("Experience local culture") == 0.0
+    
+    core.resolve_decision(rejected, False)
+    assert core.goal_tracker.get_satisfaction("Experience local culture") == 0.0
+    core.resolve_decision(accepted, True)
+    assert core.goal_tracker.get_satisfaction("Experience local culture") == 0.5
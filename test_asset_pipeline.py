@@ -0,0 +1,43 @@
+import gzip
+
+from asset_pipeline import StaticAssets, TemplateCache, IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+
+def test_static_assets_are_fingerprinted_and_precompressed(tmp_path):
+    (tmp_path / "css").mkdir()
+    stylesheet = b".card { color: #4285F4; }\n" * 100
+    (tmp_path / "css" / "app.css").write_bytes(stylesheet)
+    (tmp_path / "notes.txt").write_bytes(b"short")
+    assets = StaticAssets(directory=str(tmp_path))
+    assert assets.build() == 2
+    
+    url = assets.url("css/app.css")
+    assert url.startswith("/static/css/app.") and url.endswith(".css") and url != "/static/css/app.css"
+    body, cache_control = assets.get(url[len("/static/"):])
+    assert cache_control == IMMUTABLE_CACHE_CONTROL
+    assert assets.get("css/app.css") == (body, REVALIDATE_CACHE_CONTROL)
+    
+    content, encoding = body.select("gzip, deflate")
+    assert encoding == "gzip" and gzip.decompress(content) == stylesheet
+    assert body.select("gzip;q=0") == (stylesheet, None)
+    assert assets.get("notes.txt")[0].encodings == {}
+    assert body.not_modified(f"W/{body.etag}") and not body.not_modified('"other"')
+
+def test_pages_render_once_per_context():
+    class Template:
+        def render(self, **context):
+            renders.append(context)
+            return f"<h1>Welcome, {context.get('traveler_name', 'traveler')}</h1>"
+    
+    class Environment:
+        def get_template(self, name):
+            return Template()
+    
+    renders = []
+    cache = TemplateCache(Environment(), max_variants=1)
+    page = cache.render("dashboard.html", {"traveler_name": "Tom & Priya"})
+    assert cache.render("dashboard.html", {"traveler_name": "Tom & Priya"}) is page
+    assert page.content == "<h1>Welcome, Tom & Priya</h1>".encode("utf-8")
+    
+    cache.render("dashboard.html", {"traveler_name": "Priya"})
+    cache.render("dashboard.html", {"traveler_name": "Tom & Priya"})
+    assert len(renders) == 3
@@ -0,0 +1,19 @@
+from tools.attraction_catalog import AttractionCatalog
+
+def attraction(id, name, category, rating, **extra):
+    return {"id": id, "name": name, "description": f"{name} in the city", "category": category, "rating": rating, **extra}
+
+DUBAI = [attraction("d1", "Dubai Museum", "Museum", 4.5), attraction("d2", "Dubai Desert Safari", "Adventure", 4.8)]
+ABU_DHABI = [attraction("x1", "Louvre Abu Dhabi", "Museum", 4.9)]
+
+def test_search_only_returns_attractions_fetched_for_the_location():
+    catalog = AttractionCatalog()
+    catalog.ingest(DUBAI, location="Dubai")
+    catalog.ingest(ABU_DHABI, location="Abu Dhabi")
+    
+    found = catalog.search("museum", location="Dubai")
+    assert [a["id"] for a in found["results"]] == ["d1"] and found["total"] == 1
+    assert [a["id"] for a in catalog.search(category="museum", location="abu dhabi")["results"]] == ["x1"]
+    assert [a["id"] for a in catalog.search(category="museum")["results"]] == ["x1", "d1"]
+    assert [a["id"] for a in catalog.in_location("DUBAI")] == ["d1", "d2"]
+    assert catalog.in_location("Sharjah") == []
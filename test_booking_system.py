@@ -0,0 +1,98 @@
+import datetime
+import threading
+
+from booking_system import BookingSystem, compile_cancellation_policy
+
+SAFARI = {"name": "Desert Safari", "category": "adventure", "is_outdoor": True}
+
+def test_compiled_policy_matches_free_text():
+    rule = compile_cancellation_policy("Free cancellation up to 48 hours before start time")
+    
+    assert rule.hours_limit == 48
+    assert rule.fee(100.0, 72) == 0.0
+    assert rule.fee(100.0, 10) == 100.0
+    assert compile_cancellation_policy("Non-refundable").fee(100.0, 500) == 100.0
+
+def test_bulk_cancellation_quote_does_not_cancel():
+    booking_system = BookingSystem()
+    booking = booking_system.book_dining({"name": "Al Dawaar"}, "2030-01-02", "20:00", 2)
+    
+    quote = booking_system.bulk_cancellation_quote(
+        [booking["booking_id"], "DIN-missing"],
+        at_time=datetime.datetime(2030, 1, 2, 19, 0)
+    )
+    
+    assert quote["quotes"][booking["booking_id"]]["cancellation_fee"] == 100.0
+    assert quote["skipped"] == ["DIN-missing"]
+    assert booking["status"] == "confirmed"
+
+def test_availability_is_stable_and_tracks_bookings():
+    booking_system = BookingSystem()
+    booking_system.inventory.set_capacity("desert_safari", "2030-01-02", "06:00-10:00", 1)
+    
+    first = booking_system.check_availability("desert_safari", "2030-01-02")
+    assert first == booking_system.check_availability("desert_safari", "2030-01-02")
+    assert "06:00-10:00" in first["morning"]
+    
+    booking = booking_system.book_activity(SAFARI, "2030-01-02", "06:00-10:00")
+    assert "06:00-10:00" not in booking_system.check_availability("desert_safari", "2030-01-02")["morning"]
+    assert booking_system.book_activity(SAFARI, "2030-01-02", "06:00-10:00")["status"] == "error"
+    
+    booking_system.cancel_booking(booking["booking_id"])
+    assert "06:00-10:00" in booking_system.check_availability("desert_safari", "2030-01-02")["morning"]
+
+def test_concurrent_bookings_never_oversell():
+    booking_system = BookingSystem()
+    capacity = 25
+    attempts = 2000
+    booking_system.inventory.set_capacity("desert_safari", "2030-01-02", "14:00-18:00", capacity)
+    
+    results = []
+    start = threading.Barrier(attempts)
+    
+    def attempt():
+        start.wait()
+        results.append(booking_system.book_activity(SAFARI, "2030-01-02", "14:00-18:00"))
+    
+    threads = [threading.Thread(target=attempt) for _ in range(attempts)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    confirmed = [r for r in results if r["status"] == "confirmed"]
+    assert len(confirmed) == capacity
+    assert booking_system.inventory.remaining("desert_safari", "2030-01-02", "14:00-18:00") == 0
+    
+    # Each cancellation frees exactly one seat for the next wave
+    for booking in confirmed[:10]:
+        booking_system.cancel_booking(booking["booking_id"])
+    assert booking_system.inventory.remaining("desert_safari", "2030-01-02", "14:00-18:00") == 10
+
+def test_release_after_a_concurrent_move_frees_the_new_slot():
+    booking_system = BookingSystem()
+    inventory = booking_system.inventory
+    inventory.set_capacity("desert_safari", "2030-01-02", "06:00-10:00", 1)
+    inventory.set_capacity("desert_safari", "2030-01-03", "14:00-18:00", 1)
+    inventory.reserve("ACT-1", "desert_safari", "2030-01-02", "06:00-10:00")
+    
+    # The release reads the old reservation, then the move lands before it takes the lock
+    stale = inventory.reservations["ACT-1"]
+    inventory.move("ACT-1", "2030-01-03", "14:00-18:00")
+    inventory.reservations = _StaleOnce(inventory.reservations, "ACT-1", stale)
+    
+    assert inventory.release("ACT-1")
+    assert inventory.remaining("desert_safari", "2030-01-02", "06:00-10:00") == 1
+    assert inventory.remaining("desert_safari", "2030-01-03", "14:00-18:00") == 1
+
+class _StaleOnce(dict):
+    """Reservations whose first lookup of one booking returns what it held before a move."""
+    
+    def __init__(self, entries, booking_id, stale):
+        super().__init__(entries)
+        self.pending = {booking_id: stale}
+    
+    def get(self, key, default=None):
+        if key in self.pending:
+            return self.pending.pop(key)
+        return super().get(key, default)
@@ -0,0 +1,41 @@
+import json
+import numpy as np
+
+from tools.compact_forecast import CompactForecast
+
+def make_forecast(days=2):
+    forecast = {"provider": "Simulated", "timestamp": "2025-07-01T06:00:00", "city": "Dubai",
+                "country": "United Arab Emirates", "forecasts": []}
+    for d in range(days):
+        date = f"2025-07-0{d + 1}"
+        forecast["forecasts"].append({
+            "date": date, "max_temp": 44.2, "min_temp": 31.5, "avg_temp": 38.1, "max_wind": 18.0,
+            "total_precip": 0.0, "avg_humidity": 55.3, "conditions": "Sunny", "icon": "", "uv_index": 11,
+            "hourly": [{
+                "time": f"{date} {hour:02d}:00", "temp": round(30 + hour * 0.6, 1), "conditions": "Hazy" if hour < 8 else "Sunny",
+                "icon": "", "wind_speed": 12.4, "wind_direction": 270, "humidity": 60.1,
+                "feels_like": round(31 + hour * 0.7, 1), "precipitation_chance": 0.0
+            } for hour in range(24)]
+        })
+    return forecast
+
+def test_views_and_round_trips_match_the_dict():
+    forecast = make_forecast()
+    forecast["forecasts"][1]["hourly"][5]["feels_like"] = None
+    compact = CompactForecast.from_dict(forecast)
+    
+    assert compact["city"] == "Dubai"
+    assert dict(compact["forecasts"][0]["hourly"][9]) == forecast["forecasts"][0]["hourly"][9]
+    assert compact["forecasts"][-1]["hourly"][5]["feels_like"] is None
+    assert compact.to_dict() == forecast
+    assert CompactForecast.from_columns(json.loads(json.dumps(compact.to_columns()))).to_dict() == forecast
+
+def test_window_slices_without_copying():
+    compact = CompactForecast.from_dict(make_forecast())
+    window = compact.window("2025-07-01 20:00", "2025-07-02 03:00")
+    
+    assert window.hours == 7
+    assert [len(day["hourly"]) for day in window["forecasts"]] == [4, 3]
+    assert window["forecasts"][1]["hourly"][0]["time"] == "2025-07-02 00:00"
+    assert np.shares_memory(window.hourly["temp"], compact.hourly["temp"])
+    assert window.window("2025-07-03 00:00", "2025-07-04 00:00").hours == 0
@@ -0,0 +1,41 @@
+import gzip
+import asyncio
+
+from compression_middleware import CompressionMiddleware, CompressionStats, version_etag
+
+ITINERARY = b'{"days": [' + b",".join(b'{"name": "Desert Safari", "time": "06:00-10:00"}' for _ in range(100)) + b"]}"
+
+async def json_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/json"), (b"etag", b'"itinerary-3"')]})
+    await send({"type": "http.response.body", "body": ITINERARY})
+
+def call(app, headers):
+    messages = []
+    
+    async def send(message):
+        messages.append(message)
+    
+    scope = {"type": "http", "method": "GET", "headers": [(name.encode(), value.encode()) for name, value in headers.items()]}
+    asyncio.run(app(scope, None, send))
+    return messages[0]["status"], dict(messages[0]["headers"]), messages[1]["body"]
+
+def test_large_json_is_gzipped_and_counted():
+    stats = CompressionStats()
+    app = CompressionMiddleware(json_app, stats=stats)
+    
+    status, headers, body = call(app, {"accept-encoding": "gzip"})
+    assert status == 200 and headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(body) == ITINERARY
+    assert headers[b"etag"] == b'W/"itinerary-3"' and headers[b"vary"] == b"Accept-Encoding"
+    
+    assert call(app, {})[2] == ITINERARY
+    snapshot = stats.snapshot()
+    assert snapshot["compressed"] == 1 and snapshot["bytes_saved"] == len(ITINERARY) - len(body)
+
+def test_matching_etag_gets_an_empty_304():
+    stats = CompressionStats()
+    status, headers, body = call(CompressionMiddleware(json_app, stats=stats), {"if-none-match": 'W/"itinerary-3"'})
+    assert (status, body) == (304, b"") and headers[b"etag"] == b'"itinerary-3"'
+    assert stats.snapshot()["not_modified"] == 1
+    assert version_etag("itinerary", "Tom_and_Priya", 1) != version_etag("itinerary", "Tom_and_Priya", 2)
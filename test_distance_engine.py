@@ -0,0 +1,78 @@
+from tools import mapping_tools
+from tools.distance_engine import DistanceEngine, estimate_travel
+from tools.geocoding import DUBAI_GAZETTEER, GeocodeCache
+from rate_limiter import QuotaManager
+from state_store import MemoryStateStore
+
+def point(name):
+    return DUBAI_GAZETTEER[name]["latitude"], DUBAI_GAZETTEER[name]["longitude"]
+
+def provider_answer(origins, destinations):
+    return {"status": "success", "data": {"provider": "Google", "results": [
+        {"origin": o, "destination": d, "distance": {"value": 1000}, "duration": {"value": 120}}
+        for o in origins for d in destinations if o != d
+    ]}}
+
+def test_estimates_are_zero_in_place_and_grow_with_distance():
+    distances, durations = estimate_travel([point("dubai mall")], [point("dubai mall"), point("burj khalifa"), point("atlantis")])
+    assert distances[0, 0] == 0 and durations[0, 0] == 0
+    assert 0 < distances[0, 1] < distances[0, 2]
+
+def test_pairs_are_cached_both_ways_and_only_estimates_are_located():
+    engine = DistanceEngine()
+    located = []
+    
+    def locate(place):
+        located.append(place)
+        return point(place)
+    
+    first = engine.matrix(["dubai mall"], ["burj khalifa"], locate, fetch=provider_answer)
+    assert first["upstream_requests"] == 1 and first["provider_results"] == 1
+    assert located == []  # the provider answered every pair
+    
+    reverse = engine.matrix(["Burj Khalifa"], ["Dubai Mall"], locate, fetch=provider_answer)
+    assert reverse["upstream_requests"] == 0 and reverse["results"][0]["source"] == "Google"
+    
+    failing = lambda origins, destinations: {"status": "error", "message": "OVER_QUERY_LIMIT"}
+    mixed = engine.matrix(["dubai mall"], ["burj khalifa", "atlantis"], locate, fetch=failing)
+    assert [element["source"] for element in mixed["results"]] == ["Google", "estimate"]
+    assert sorted(located) == ["atlantis", "dubai mall"]
+
+def test_requests_are_split_to_the_provider_limits():
+    engine = DistanceEngine()
+    places = list(DUBAI_GAZETTEER)[:6]
+    calls = []
+    
+    def fetch(origins, destinations):
+        calls.append(len(origins) * len(destinations))
+        return provider_answer(origins, destinations)
+    
+    result = engine.matrix(places, places, point, fetch=fetch, limits={"origins": 3, "destinations": 3, "elements": 4})
+    assert max(calls) <= 4 and result["provider_results"] == 30  # every pair but the diagonal
+
+def test_distance_matrix_never_geocodes_upstream(monkeypatch):
+    def geocode_upstream(*args, **kwargs):
+        raise AssertionError("geocoded upstream")
+    monkeypatch.setattr(mapping_tools, "batch_geocode", geocode_upstream)
+    monkeypatch.setattr(mapping_tools, "geocode_google", geocode_upstream)
+    monkeypatch.setattr(mapping_tools, "distance_engine", DistanceEngine())
+    monkeypatch.setattr(mapping_tools, "get_distance_matrix_google",
+                        lambda origins, destinations, mode: {"status": "error", "message": "offline"})
+    
+    result = mapping_tools.get_distance_matrix(["Dubai Mall"], ["Burj Al Arab"])["data"]
+    assert result["results"][0]["source"] == "estimate" and result["results"][0]["distance"]["value"] > 0
+
+def test_distance_matrix_falls_back_to_estimates_when_geocoding_quota_runs_out(monkeypatch, tmp_path):
+    def offline(*args, **kwargs):
+        raise ConnectionError("offline")
+    # One tomtom token: the matrix block takes it, so geocoding its places is refused
+    monkeypatch.setattr(mapping_tools, "quota_manager",
+                        QuotaManager(MemoryStateStore(), quotas={"tomtom": (0.001, 1)}, traveler_quota=None, max_wait=0.0))
+    monkeypatch.setattr(mapping_tools, "geocode_cache", GeocodeCache(str(tmp_path / "geocode.db")))
+    monkeypatch.setattr(mapping_tools, "distance_engine", DistanceEngine())
+    monkeypatch.setattr(mapping_tools.requests, "post", offline)
+    monkeypatch.setattr(mapping_tools.requests, "get", offline)
+    
+    result = mapping_tools.get_distance_matrix(["Dubai Mall"], ["Burj Al Arab"], provider="tomtom")
+    assert result["status"] == "success"
+    assert result["data"]["results"][0]["source"] == "estimate"
@@ -0,0 +1,41 @@
+import tools.event_catalog as event_catalog_module
+from tools.event_catalog import EventCatalog
+
+def event(id, start, end=None, category="Music", **extra):
+    return {"id": id, "name": f"Event {id}", "category": category, "start_time": start, "end_time": end,
+            "venue": {"name": "Coca-Cola Arena", "latitude": 25.21, "longitude": 55.26}, **extra}
+
+GOOD = [event("e1", "2025-07-01T19:00:00", "2025-07-01T22:00:00"),
+        event("e2", "2025-07-02T10:00:00", "2025-07-02T12:00:00", category="Film & Media")]
+MALFORMED = [event("e3", ""), event("e4", "next friday"), {"name": "No ID", "start_time": "2025-07-01T10:00:00"}, None]
+
+def test_ingest_skips_malformed_events():
+    catalog = EventCatalog()
+    assert catalog.ingest(GOOD[:1] + MALFORMED + GOOD[1:]) == 2
+    assert sorted(catalog.events) == ["e1", "e2"]
+    assert [e["id"] for e in catalog.query("2025-07-02", category="film")] == ["e2"]
+
+def test_a_bad_event_does_not_stop_the_range_being_recorded(monkeypatch):
+    calls = []
+    
+    def search_events(location, start_date=None, end_date=None, provider="eventbrite"):
+        calls.append((location, start_date, end_date))
+        return {"status": "success", "data": {"events": MALFORMED + GOOD}}
+    
+    monkeypatch.setattr(event_catalog_module, "search_events", search_events)
+    catalog = EventCatalog()
+    catalog.ensure("Dubai", "2025-07-01", "2025-07-03")
+    catalog.ensure("Dubai", "2025-07-01", "2025-07-02")
+    
+    assert calls == [("Dubai", "2025-07-01", "2025-07-03")]
+    assert len(catalog) == 2
+
+def test_queries_only_return_events_fetched_for_the_location():
+    catalog = EventCatalog()
+    catalog.ingest(GOOD, location="Dubai")
+    catalog.ingest([event("x1", "2025-07-01T20:00:00", "2025-07-01T23:00:00")], location="Abu Dhabi")
+    
+    assert [e["id"] for e in catalog.query("2025-07-01", location="dubai")] == ["e1"]
+    assert [e["id"] for e in catalog.query("2025-07-01", "2025-07-02", location="Abu Dhabi")] == ["x1"]
+    assert catalog.query(category="music", location="Sharjah") == []
+    assert len(catalog.query("2025-07-01")) == 2
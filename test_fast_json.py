@@ -0,0 +1,30 @@
+from datetime import datetime
+
+import numpy as np
+
+from fast_json import dumps, loads, EncodedCache, Revisions
+
+def test_dumps_handles_types_the_app_returns():
+    payload = {"when": datetime(2025, 7, 1, 6, 30), "tags": {"indoor"}, 3: np.array([1.5, 2.0], dtype=np.float32)}
+    assert loads(dumps(payload)) == {"when": "2025-07-01T06:30:00", "tags": ["indoor"], "3": [1.5, 2.0]}
+
+def test_payload_is_reencoded_only_after_a_revision_bump():
+    cache, revisions = EncodedCache(max_entries=2), Revisions()
+    itinerary = {"days": [{"date": "2025-07-01", "activities": []}]}
+    builds = []
+    
+    def build():
+        builds.append(1)
+        return itinerary
+    
+    first = cache.get("Tom_and_Priya", revisions.get("Tom_and_Priya"), build)
+    assert cache.get("Tom_and_Priya", revisions.get("Tom_and_Priya"), build) is first
+    
+    itinerary["days"][0]["activities"].append({"name": "Dubai Museum"})
+    revisions.bump("Tom_and_Priya")
+    assert loads(cache.get("Tom_and_Priya", revisions.get("Tom_and_Priya"), build))["days"][0]["activities"]
+    assert len(builds) == 2
+    
+    cache.get("a", 0, dict)
+    cache.get("b", 0, dict)
+    assert "Tom_and_Priya" not in cache.entries
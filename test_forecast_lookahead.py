@@ -0,0 +1,73 @@
+import datetime
+
+from forecast_lookahead import LookaheadEngine
+from state_store import SQLiteStateStore
+
+NOW = datetime.datetime(2025, 7, 1, 6, 0)
+
+def make_forecast(hot_hours):
+    forecast = {"provider": "Simulated", "timestamp": "2025-07-01T06:00:00", "city": "Dubai",
+                "country": "United Arab Emirates", "forecasts": []}
+    for date in ["2025-07-01", "2025-07-02"]:
+        forecast["forecasts"].append({
+            "date": date, "max_temp": 44.0, "min_temp": 30.0, "avg_temp": 37.0, "max_wind": 18.0,
+            "total_precip": 0.0, "avg_humidity": 55.0, "conditions": "Sunny", "icon": "", "uv_index": 11,
+            "hourly": [{
+                "time": f"{date} {hour:02d}:00", "temp": 44.0 if hour in hot_hours else 30.0, "conditions": "Sunny",
+                "icon": "", "wind_speed": 12.0, "wind_direction": 270, "humidity": 50.0,
+                "feels_like": 46.0 if hour in hot_hours else 31.0, "precipitation_chance": 0.0
+            } for hour in range(24)]
+        })
+    return forecast
+
+def make_itinerary(*activities):
+    return {"days": [{"date": "2025-07-01", "activities": list(activities)}]}
+
+SAFARI = {"id": "a1", "name": "Desert Safari", "time": "14:00-18:00", "is_outdoor": True}
+DINNER = {"id": "d1", "name": "Bedouin Dinner", "time": "19:00-21:30", "is_outdoor": False}
+
+def scan(itinerary):
+    engine = LookaheadEngine(max_temperature=38)
+    engine.update_forecast("Dubai", make_forecast(hot_hours=range(11, 18)))
+    return engine.scan(itinerary, city="Dubai", now=NOW)
+
+def test_suggested_slot_skips_the_days_other_activities():
+    [proposal] = scan(make_itinerary(SAFARI))
+    assert proposal["suggested_time"] == "18:00-22:00"
+    
+    [proposal] = scan(make_itinerary(SAFARI, DINNER))
+    assert proposal["suggested_time"] == "07:00-11:00"
+    assert proposal["reason"] == "heat"
+
+def test_no_suggestion_when_every_comfortable_slot_is_taken():
+    museum = {"id": "a2", "name": "Dubai Museum", "time": "06:00-11:00", "is_outdoor": False}
+    [proposal] = scan(make_itinerary(SAFARI, DINNER, museum))
+    assert proposal["suggested_time"] is None
+    
+    # Minutes are kept, so a half-hour start needs the following hour free too
+    late_safari = {**SAFARI, "time": "14:30-18:30"}
+    nightcap = {"id": "d2", "name": "Rooftop Bar", "time": "22:00-23:00", "is_outdoor": False}
+    [proposal] = scan(make_itinerary(late_safari, nightcap))
+    assert proposal["suggested_time"] == "06:30-10:30"
+
+def test_twelve_hour_slots_are_read_and_unreadable_ones_skipped():
+    evening_safari = {**SAFARI, "time": "2:00 PM - 6:00 PM"}
+    sunset_walk = {"id": "a3", "name": "Sunset Walk", "time": "around sunset", "is_outdoor": True}
+    [proposal] = scan(make_itinerary(sunset_walk, evening_safari, {**DINNER, "time": "7:00 PM - 9:30 PM"}))
+    assert proposal["activity"]["name"] == "Desert Safari"
+    assert proposal["suggested_time"] == "07:00-11:00"
+
+def test_proposals_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "state.db")
+    forecast = make_forecast(hot_hours=range(11, 18))
+    leader, follower, new_leader = (LookaheadEngine(max_temperature=38, store=SQLiteStateStore(path)) for _ in range(3))
+    leader.update_forecast("Dubai", forecast)
+    new_leader.update_forecast("Dubai", forecast)
+    
+    [proposal] = leader.scan(make_itinerary(SAFARI, DINNER), city="Dubai", now=NOW)
+    assert new_leader.scan(make_itinerary(SAFARI, DINNER), city="Dubai", now=NOW) == []  # still pending
+    assert [p["activity"]["name"] for p in follower.pending()] == ["Desert Safari"]
+    
+    follower.resolve(proposal, approved=False)  # the traveler's answer lands on another worker
+    assert follower.pending() == []
+    assert leader.scan(make_itinerary(SAFARI, DINNER), city="Dubai", now=NOW) == []
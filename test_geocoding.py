@@ -0,0 +1,60 @@
+import threading
+
+from tools import mapping_tools
+from tools.geocoding import GeocodeCache, DUBAI_GAZETTEER, landmark_index, normalize_address, resolve_point
+
+DUBAI_MALL = {"provider": "Google Maps", "formatted_address": "Dubai Mall", "latitude": 25.1988, "longitude": 55.2795,
+              "place_id": "abc"}
+
+def test_cache_hits_survive_a_restart_through_sqlite(tmp_path):
+    path = str(tmp_path / "geocodes.db")
+    cache = GeocodeCache(path)
+    assert cache.get("The Dubai Mall") is None
+    
+    cache.put("The Dubai Mall", DUBAI_MALL)
+    assert cache.get("the dubai mall!")["latitude"] == 25.1988  # normalized key
+    
+    restarted = GeocodeCache(path)
+    assert restarted.memory == {}
+    assert restarted.get_many(["The Dubai Mall", "Nowhere"]) == {"The Dubai Mall": {**DUBAI_MALL}}
+    assert "the dubai mall" in restarted.memory
+
+def test_cache_falls_back_to_memory_when_the_file_cannot_be_opened(tmp_path):
+    cache = GeocodeCache(str(tmp_path / "missing" / "geocodes.db"))
+    cache.put("Dubai Mall", DUBAI_MALL)
+    assert cache._open() is None and cache.get("dubai mall")["place_id"] == "abc"
+
+def test_batch_geocode_fetches_each_miss_once_and_does_not_cache_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(mapping_tools, "geocode_cache", GeocodeCache(str(tmp_path / "geocodes.db")))
+    mapping_tools.geocode_cache.put("Dubai Mall", DUBAI_MALL)
+    fetched = []
+    lock = threading.Lock()
+    
+    def geocode_google(address):
+        with lock:
+            fetched.append(address)
+        if address == "Nowhere":
+            return {"status": "error", "message": "ZERO_RESULTS"}
+        return {"status": "success", "data": {**DUBAI_MALL, "formatted_address": address}}
+    monkeypatch.setattr(mapping_tools, "geocode_google", geocode_google)
+    
+    result = mapping_tools.batch_geocode(["Dubai Mall", "Burj Khalifa", "burj khalifa.", "Nowhere"])["data"]
+    assert (result["cache_hits"], result["upstream_requests"]) == (1, 2)
+    assert sorted(fetched) == ["Burj Khalifa", "Nowhere"]
+    assert result["results"]["burj khalifa."] is result["results"]["Burj Khalifa"]
+    assert result["results"]["Nowhere"]["status"] == "error"
+    
+    again = mapping_tools.batch_geocode(["Burj Khalifa", "Nowhere"])["data"]
+    assert (again["cache_hits"], again["upstream_requests"]) == (1, 1)  # the failed lookup is retried
+
+def test_landmark_index_prefers_the_more_specific_name():
+    assert landmark_index.lookup("Lunch at The Dubai Mall, Downtown Dubai") == "dubai mall"
+    assert landmark_index.lookup("Somewhere else") is None
+    assert normalize_address("  Burj-Khalifa,  DUBAI ") == "burj khalifa dubai"
+
+def test_resolve_point_only_matches_a_whole_unambiguous_name():
+    palm = DUBAI_GAZETTEER["palm jumeirah"]
+    assert resolve_point("Palm") == (palm["latitude"], palm["longitude"])
+    assert resolve_point((25.2, 55.27)) == (25.2, 55.27)
+    for near in ["", "  ", "d", "pal", "Dubai"]:
+        assert resolve_point(near) is None, near
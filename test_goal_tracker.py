@@ -0,0 +1,67 @@
+from goal_tracker import GoalTracker, ActivityCounters, activity_features, goal_satisfaction
+
+class Goal:
+    def __init__(self, name, priority, success_criteria):
+        self.name = name
+        self.priority = priority
+        self.success_criteria = success_criteria
+        self.satisfaction_score = 0.0
+
+MUSEUM = {"id": "a1", "name": "Dubai Museum", "category": "culture"}
+SOUK = {"id": "a2", "name": "Spice Souk Visit", "category": "culture", "is_outdoor": True, "expected_temperature": 41}
+SAFARI = {"id": "a3", "name": "Desert Safari", "category": "adventure", "is_outdoor": True, "expected_temperature": 44}
+DINNER = {"id": "d1", "name": "Al Dawaar", "category": "dining", "cuisine": "International, Arabic"}
+
+def make_tracker():
+    goals = [
+        Goal("culture", 8, {"min_cultural_activities": 3}),
+        Goal("food", 7, {"min_unique_cuisines": 4}),
+        Goal("heat", 10, {"max_temperature": 42})
+    ]
+    tracker = GoalTracker(goals)
+    tracker.track_itinerary({"days": [{"activities": [MUSEUM, SOUK]}, {"activities": [SAFARI, DINNER]}]})
+    return tracker, goals
+
+def full_scan(goals, activities):
+    counters = ActivityCounters([42])
+    for activity in activities:
+        counters.apply(activity_features(activity))
+    return {goal.name: goal_satisfaction(goal.success_criteria, counters) for goal in goals}
+
+def test_incremental_updates_match_full_scan():
+    tracker, goals = make_tracker()
+    assert tracker.satisfaction == full_scan(goals, [MUSEUM, SOUK, SAFARI, DINNER])
+    assert goals[0].satisfaction_score == 2 / 3
+    assert goals[2].satisfaction_score == 0.5
+    
+    tracker.cancel_activity(SAFARI)
+    tracker.complete_activity(DINNER)
+    assert tracker.satisfaction == full_scan(goals, [MUSEUM, SOUK, DINNER])
+    
+    # Completed activities keep counting
+    tracker.cancel_activity(DINNER)
+    assert tracker.get_satisfaction("food") == 0.5
+
+def test_goal_delta_prefers_goal_preserving_swap():
+    tracker, goals = make_tracker()
+    before = dict(tracker.satisfaction)
+    spa = {"name": "Luxury Spa Experience", "category": "relaxation"}
+    tour = {"name": "Dubai Museum Cultural Tour", "category": "culture"}
+    
+    assert tracker.goal_delta(SAFARI, tour)["culture"] > 0
+    assert tracker.best_swap(SAFARI, [spa, tour]) is tour
+    assert tracker.satisfaction == before
+
+def test_swaps_delta_predicts_the_swaps_without_making_them():
+    tracker, goals = make_tracker()
+    before = dict(tracker.satisfaction)
+    tour = {"id": "a4", "name": "Dubai Museum Cultural Tour", "category": "culture"}
+    evening_souk = {**SOUK, "expected_temperature": 36}
+    swaps = [(SAFARI, tour), (SOUK, evening_souk)]
+    
+    delta = tracker.swaps_delta(swaps)
+    assert tracker.satisfaction == before
+    for old, new in swaps:
+        tracker.swap_activity(old, new)
+    assert delta == {name: tracker.satisfaction[name] - before[name] for name in before}
+    assert delta["heat"] > 0 and delta["culture"] > 0
@@ -0,0 +1,80 @@
+import os
+import threading
+import multiprocessing
+
+import pytest
+
+from id_generator import IdGenerator, id_generator, decode_id, encode_id, new_booking_id, SEQUENCE_BITS
+
+# Total IDs generated by the stress test; ID_STRESS_TOTAL=20000000 runs the full tens-of-millions check
+STRESS_TOTAL = int(os.getenv("ID_STRESS_TOTAL", "400000"))
+STRESS_PROCESSES = 4
+
+def test_ids_are_sortable_and_round_trip():
+    generator = IdGenerator()
+    ids = [generator.next_id() for _ in range(10000)]
+    
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(len(i) == 24 for i in ids)
+    assert all(encode_id(decode_id(i)) == i for i in ids[:100])
+    assert new_booking_id("ACT").startswith("ACT-")
+
+def test_codes_carry_node_and_sequence():
+    generator = IdGenerator(node_id=7)
+    first, second = decode_id("00000000" + generator.next_code()), decode_id("00000000" + generator.next_code())
+    
+    assert (first >> SEQUENCE_BITS) & 0xFFFFFFFF == 7
+    assert second == first + 1
+
+def test_concurrent_threads_never_collide():
+    results = [[] for _ in range(8)]
+    
+    def worker(out):
+        next_id = id_generator.next_id
+        for _ in range(50000):
+            out.append(next_id())
+    
+    threads = [threading.Thread(target=worker, args=(out,)) for out in results]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    all_ids = [i for out in results for i in out]
+    assert len(set(all_ids)) == len(all_ids)
+    # Each thread still sees its own IDs strictly increasing
+    assert all(out == sorted(out) for out in results)
+
+def _generate_and_check(count, results):
+    """Generate `count` IDs in a forked process and report whether they strictly increase."""
+    next_id = id_generator.next_id
+    previous = next_id()
+    increasing = True
+    for _ in range(count - 1):
+        current = next_id()
+        if current <= previous:
+            increasing = False
+            break
+        previous = current
+    results.put((id_generator.node_id, increasing))
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs the fork start method")
+def test_stress_across_processes_without_collisions():
+    # IDs are (timestamp, node, sequence): strictly increasing IDs within a
+    # process plus distinct node IDs across processes rule out any collision
+    # without holding tens of millions of IDs in memory.
+    context = multiprocessing.get_context("fork")
+    per_process = STRESS_TOTAL // STRESS_PROCESSES
+    queue = context.Queue()
+    processes = [context.Process(target=_generate_and_check, args=(per_process, queue))
+                 for _ in range(STRESS_PROCESSES)]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    
+    node_ids = [node_id for node_id, _ in results]
+    assert all(increasing for _, increasing in results)
+    assert len(set(node_ids + [id_generator.node_id])) == STRESS_PROCESSES + 1
@@ -0,0 +1,91 @@
+import time
+import datetime
+
+import itinerary_planner
+import tools.attraction_catalog
+import tools.event_catalog
+import tools.restaurant_catalog
+from route_optimizer import _to_minutes
+from itinerary_planner import ItineraryPlanner, MAX_TIME_LIMIT, DEFAULT_TIME_LIMIT, clamp_time_limit
+from tools.attraction_catalog import AttractionCatalog
+from tools.event_catalog import EventCatalog
+from tools.restaurant_catalog import RestaurantCatalog
+
+class Goal:
+    def __init__(self, name, priority, success_criteria):
+        self.name = name
+        self.priority = priority
+        self.success_criteria = success_criteria
+        self.satisfaction_score = 0.0
+
+def candidate(id, kind, name, category, is_outdoor=False, **extra):
+    return {"id": id, "kind": kind, "name": name, "category": category, "is_outdoor": is_outdoor,
+            "latitude": 25.2 + len(id) * 0.001, "longitude": 55.27, "rating": 4.5, **extra}
+
+CANDIDATES = [
+    candidate("r1", "dining", "Al Hadheerah", "dining", cuisines=["arabic"]),
+    candidate("r2", "dining", "Ravi Restaurant", "dining", cuisines=["pakistani"]),
+    candidate("a1", "attraction", "Dubai Museum", "culture", energy_required=0.3),
+    candidate("a2", "attraction", "Desert Safari", "adventure", is_outdoor=True, energy_required=0.6)
+]
+
+def forecast(dates, hot_hours):
+    return {"forecasts": [{"date": date, "hourly": [{"time": f"{date} {h:02d}:00", "temp": 45 if h in hot_hours else 30}
+                                                    for h in range(24)]} for date in dates]}
+
+def make_planner(num_days=2, hot_hours=()):
+    goals = [Goal("food", 7, {"min_unique_cuisines": 2}), Goal("culture", 8, {"min_cultural_activities": 1})]
+    dates = [f"2025-07-0{d + 1}" for d in range(num_days)]
+    return ItineraryPlanner("Dubai", dates[0], num_days, goals=goals, candidates=CANDIDATES,
+                            forecast=forecast(dates, hot_hours), energy_budget=2.0, seed=1)
+
+def test_restaurants_on_the_same_day_get_lunch_and_dinner():
+    planner = make_planner(num_days=1)
+    planner.days[0] = ["r1", "r2"]
+    evaluation = planner._evaluate_day(0, frozenset(["r1", "r2"]))
+    starts = sorted(_to_minutes(start) for _, start, _ in evaluation["stops"])
+    assert 12 * 60 <= starts[0] < 15 * 60 and 19 * 60 <= starts[1] < 22 * 60 + 30
+    
+    itinerary = make_planner(num_days=1).plan(time_limit=0.2)
+    for activity in itinerary["days"][0]["activities"]:
+        if activity["category"] == "dining":
+            start = _to_minutes(activity["time"].split("-")[0])
+            assert 12 * 60 <= start < 15 * 60 or 19 * 60 <= start < 22 * 60 + 30
+
+def test_outdoor_activities_avoid_hot_hours():
+    itinerary = make_planner(hot_hours=range(11, 18)).plan(time_limit=0.2)
+    for day in itinerary["days"]:
+        for activity in day["activities"]:
+            if activity["is_outdoor"]:
+                start, end = (_to_minutes(t) for t in activity["time"].split("-"))
+                assert end <= 11 * 60 or start >= 18 * 60
+
+def test_replan_leaves_other_days_untouched():
+    planner = make_planner()
+    first = planner.plan(time_limit=0.2)
+    second = planner.replan([2], time_limit=0.1, energy_budget=0.5)
+    assert second["days"][0] == first["days"][0]
+    assert second["days"][1]["energy_used"] <= 0.5
+
+def test_time_limits_are_clamped():
+    assert clamp_time_limit(3600) == MAX_TIME_LIMIT
+    assert clamp_time_limit(-1) == 0.0
+    assert clamp_time_limit("soon") == DEFAULT_TIME_LIMIT
+    assert make_planner(num_days=1).plan(time_limit=-5)["planner"]["time_limit"] == 0.0
+
+def test_candidates_come_from_the_trip_location_only(monkeypatch):
+    attractions, events, restaurants = AttractionCatalog(), EventCatalog(), RestaurantCatalog()
+    for city, prefix in [("Dubai", "d"), ("Abu Dhabi", "x")]:
+        attractions.ingest([{"id": f"{prefix}a", "name": f"{city} Museum", "category": "Museum"}], location=city)
+        events.ingest([{"id": f"{prefix}e", "name": f"{city} Concert", "category": "Music",
+                        "start_time": "2025-07-01T19:00:00", "end_time": "2025-07-01T22:00:00"}], location=city)
+        restaurants.ingest([{"id": f"{prefix}r", "name": f"{city} Grill", "cuisine": "Arabic"}], location=city)
+    # Mark Dubai as freshly fetched so nothing reaches a provider
+    attractions.fetched[("dubai", "tripadvisor")] = restaurants.fetched[("dubai", "zomato")] = time.time()
+    events.fetched.append(("dubai", "eventbrite", datetime.datetime(2025, 7, 1), datetime.datetime(2025, 7, 2), time.time()))
+    monkeypatch.setattr(tools.attraction_catalog, "attraction_catalog", attractions)
+    monkeypatch.setattr(tools.event_catalog, "event_catalog", events)
+    monkeypatch.setattr(tools.restaurant_catalog, "restaurant_catalog", restaurants)
+    
+    candidates = itinerary_planner.candidates_from_tools("Dubai", "2025-07-01", "2025-07-01")
+    assert sorted(c["id"] for c in candidates) == ["da", "de", "dr"]
@@ -0,0 +1,29 @@
+from tools.local_info_bundle import LocalInfoBundle, load_bundle
+
+SOURCES = {
+    "cultural": lambda: {"language": {"title": "Language in Dubai", "content": "Arabic and English"},
+                         "cuisine": {"title": "Emirati Cuisine", "content": "Machboos and luqaimat"}},
+    "emergency": lambda: {"emergency_numbers": [{"service": "Police", "number": "999"}]}
+}
+
+def test_lookups_and_encodings_are_cached_per_topic_and_language():
+    bundle = LocalInfoBundle.compile(SOURCES)
+    
+    assert bundle.topics("cultural") == ("language", "cuisine")
+    assert list(bundle.lookup("cultural", "Cuisine")) == ["cuisine"]
+    assert bundle.lookup("cultural", "unknown") is bundle.lookup("cultural")
+    
+    payload, etag = bundle.encoded("cultural", "language")
+    assert bundle.encoded("cultural", "LANGUAGE", language="en-GB")[0] is payload
+    assert bundle.encoded("cultural")[1] != etag
+    assert bundle.encoded("cultural", language="fr")[1] == bundle.encoded("cultural")[1]
+
+def test_saved_bundle_loads_with_the_same_version(tmp_path):
+    bundle = LocalInfoBundle.compile(SOURCES)
+    path = tmp_path / "local_info.json"
+    bundle.save(str(path))
+    
+    loaded = load_bundle({}, str(path))
+    assert loaded.version == bundle.version
+    assert loaded.encoded("emergency") == bundle.encoded("emergency")
+    assert load_bundle(SOURCES, str(tmp_path / "missing.json")).version == bundle.version
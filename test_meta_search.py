@@ -0,0 +1,82 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tools import meta_search_tools
+from tools.meta_search_tools import meta_search_hotels, clear_search_cache
+
+def hotel(name: str, price: float):
+    return {"name": name, "latitude": 25.2, "longitude": 55.3, "price": {"value": price}}
+
+def provider(*hotels, delay: float = 0.0, calls: list = None):
+    def search(location, check_in, check_out, guests, rooms, timeout=None):
+        if calls is not None:
+            calls.append(timeout)
+        time.sleep(delay)
+        return {"status": "success", "data": {"hotels": list(hotels)}}
+    return search
+
+def search():
+    return meta_search_hotels("Dubai", "2030-01-02", "2030-01-04")["data"]
+
+def test_complete_answers_are_cached_and_merged(monkeypatch):
+    clear_search_cache()
+    calls = []
+    monkeypatch.setattr(meta_search_tools, "HOTEL_PROVIDERS", {
+        "a": {"function": provider(hotel("Atlantis", 900.0), calls=calls), "deadline": 1.0},
+        "b": {"function": provider(hotel("Atlantis", 800.0), hotel("Armani", 1200.0)), "deadline": 1.0}
+    })
+    
+    first = search()
+    assert first["total_results"] == 2 and not first["cached"]
+    atlantis = next(item for item in first["hotels"] if item["name"] == "Atlantis")
+    assert atlantis["price"]["value"] == 800.0 and sorted(atlantis["providers"]) == ["a", "b"]
+    assert calls == [1.0]  # the provider's deadline is its request timeout
+    assert search()["cached"]
+
+def test_partial_and_simulated_results_are_not_cached(monkeypatch):
+    clear_search_cache()
+    calls = []
+    monkeypatch.setattr(meta_search_tools, "HOTEL_PROVIDERS", {
+        "fast": {"function": provider(hotel("Atlantis", 900.0), calls=calls), "deadline": 0.5},
+        "slow": {"function": provider(hotel("Armani", 1200.0), delay=1.0), "deadline": 0.1}
+    })
+    
+    partial = search()
+    assert partial["provider_status"] == {"fast": "success", "slow": "timeout"}
+    assert not search()["cached"] and len(calls) == 2
+    
+    def failing(*args, **kwargs):
+        raise ConnectionError("offline")
+    monkeypatch.setattr(meta_search_tools, "HOTEL_PROVIDERS", {"a": {"function": failing, "deadline": 0.5}})
+    clear_search_cache()
+    simulated = search()
+    assert simulated["provider_status"]["simulated"] == "success" and simulated["total_results"] > 0
+    assert not search()["cached"]
+
+def test_queued_provider_calls_are_cancelled_at_the_deadline(monkeypatch):
+    clear_search_cache()
+    started = []
+    release = threading.Event()
+    
+    def blocking(*args, **kwargs):
+        started.append("blocking")
+        release.wait(2.0)
+        return {"status": "success", "data": {"hotels": []}}
+    
+    def queued(*args, **kwargs):
+        started.append("queued")
+        return {"status": "success", "data": {"hotels": []}}
+    
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(meta_search_tools, "_executor", executor)
+    monkeypatch.setattr(meta_search_tools, "HOTEL_PROVIDERS", {
+        "blocking": {"function": blocking, "deadline": 0.1},
+        "queued": {"function": queued, "deadline": 0.1}
+    })
+    
+    result = search()
+    release.set()
+    executor.shutdown(wait=True)
+    assert result["provider_status"]["queued"] == "timeout"
+    assert started == ["blocking"]
@@ -0,0 +1,82 @@
+import pytest
+
+from rate_limiter import QuotaManager, QuotaExceeded, request_scope, meters_own_calls
+from state_store import MemoryStateStore, SQLiteStateStore
+from tools.tool_registry import ToolRegistry
+
+def test_calls_queue_for_tokens_then_fail_past_the_deadline():
+    quotas = QuotaManager(MemoryStateStore(), quotas={"google": (10.0, 2)}, traveler_quota=None, max_wait=0.25)
+    
+    assert quotas.reserve("google") == 0.0
+    assert quotas.reserve("google") == 0.0
+    assert quotas.reserve("google") == pytest.approx(0.1, abs=0.02)  # queued behind the empty bucket
+    assert quotas.reserve("google") == pytest.approx(0.2, abs=0.02)
+    with pytest.raises(QuotaExceeded):
+        quotas.reserve("google")
+    
+    stats = quotas.snapshot()["providers"]["google"]
+    assert (stats["granted"], stats["queued"], stats["rejected"]) == (4, 2, 1)
+    assert stats["utilization"] == 1.0
+    assert quotas.reserve("unlimited") == 0.0
+
+def test_traveler_quota_refunds_the_provider_when_it_refuses(tmp_path):
+    path = str(tmp_path / "state.db")
+    first = QuotaManager(SQLiteStateStore(path), quotas={"openai": (1.0, 5)}, traveler_quota=(1.0, 1), max_wait=0.0)
+    second = QuotaManager(SQLiteStateStore(path), quotas={"openai": (1.0, 5)}, traveler_quota=(1.0, 1), max_wait=0.0)
+    
+    with request_scope("Tom_and_Priya"):
+        first.acquire("openai")
+        with pytest.raises(QuotaExceeded):
+            second.acquire("openai")  # another worker, same traveler bucket
+    second.acquire("openai", traveler_id="Alice")
+    
+    assert first.snapshot()["providers"]["openai"]["tokens"] == pytest.approx(3.0, abs=0.1)
+    assert set(second.snapshot()["travelers"]) == {"Tom_and_Priya", "Alice"}
+
+def test_registry_limits_tools_by_provider(monkeypatch):
+    from tools import tool_registry as registry_module
+    quotas = QuotaManager(MemoryStateStore(), quotas={"zomato": (0.1, 1)}, traveler_quota=None, max_wait=0.0)
+    monkeypatch.setattr(registry_module, "quota_manager", quotas)
+    
+    def search_restaurants(location: str, provider: str = "zomato"):
+        return {"status": "success"}
+    
+    registry = ToolRegistry()
+    registry.register_tool("search_restaurants", search_restaurants, "dining", "", ["location"])
+    assert registry.execute_tool("search_restaurants", {"location": "Dubai"})["status"] == "success"
+    assert registry.execute_tool("search_restaurants", {"location": "Dubai"})["status"] == "error"
+    assert registry.execute_tool("search_restaurants", {"location": "Dubai", "provider": "local"})["status"] == "success"
+    assert registry.tool_metadata["search_restaurants"]["usage_count"] == 2
+
+def test_registry_leaves_tools_that_meter_their_own_calls_alone(monkeypatch):
+    from tools import tool_registry as registry_module
+    quotas = QuotaManager(MemoryStateStore(), quotas={"zomato": (0.1, 1)}, traveler_quota=None, max_wait=0.0)
+    monkeypatch.setattr(registry_module, "quota_manager", quotas)
+    
+    @meters_own_calls
+    def find_restaurants(location: str, provider: str = "zomato"):
+        return {"status": "success"}
+    
+    registry = ToolRegistry()
+    registry.register_tool("find_restaurants", find_restaurants, "dining", "", ["location"])
+    assert [registry.execute_tool("find_restaurants", {"location": "Dubai"})["status"] for _ in range(3)] == ["success"] * 3
+    assert "provider:zomato" not in quotas.stats
+
+def test_catalog_serves_what_it_has_when_the_provider_quota_runs_out(monkeypatch):
+    import tools.restaurant_catalog as restaurant_catalog_module
+    quotas = QuotaManager(MemoryStateStore(), quotas={"zomato": (0.1, 1)}, traveler_quota=None, max_wait=0.0)
+    monkeypatch.setattr(restaurant_catalog_module, "quota_manager", quotas)
+    searched = []
+    
+    def search_restaurants(location, provider="zomato"):
+        searched.append(location)
+        return {"status": "success", "data": {"restaurants": [{"id": location, "name": location, "cuisine": "Arabic"}]}}
+    
+    monkeypatch.setattr(restaurant_catalog_module, "search_restaurants", search_restaurants)
+    catalog = restaurant_catalog_module.RestaurantCatalog()
+    catalog.ensure("Dubai")
+    catalog.ensure("Abu Dhabi")  # refused: no token left
+    
+    assert searched == ["Dubai"]
+    assert ("abu dhabi", "zomato") not in catalog.fetched  # asked again on the next call
+    assert quotas.stats["provider:zomato"]["rejected"] == 1
@@ -0,0 +1,66 @@
+import tools.restaurant_catalog as restaurant_catalog_module
+from rate_limiter import QuotaManager
+from state_store import MemoryStateStore
+from tools.restaurant_catalog import RestaurantCatalog, AvailabilityChecker
+
+def restaurant(id, name, cuisine, rating, price_range="$$"):
+    return {"id": id, "name": name, "cuisine": cuisine, "rating": rating, "price_range": price_range,
+            "latitude": 25.2, "longitude": 55.27}
+
+DUBAI = [restaurant("r1", "Al Hadheerah", "Arabic", 4.6), restaurant("r2", "Ravi", "Pakistani", 4.4, "$")]
+ABU_DHABI = [restaurant("x1", "Li Beirut", "Arabic, Lebanese", 4.7)]
+
+def test_query_only_returns_restaurants_fetched_for_the_location():
+    catalog = RestaurantCatalog()
+    catalog.ingest(DUBAI, location="Dubai")
+    catalog.ingest(ABU_DHABI, location="Abu Dhabi")
+    
+    assert [r["id"] for r in catalog.query(cuisine="arabic", location="Dubai")] == ["r1"]
+    assert [r["id"] for r in catalog.query(location="Dubai")] == ["r1", "r2"]
+    assert [r["id"] for r in catalog.query(cuisine="arabic")] == ["x1", "r1"]
+    assert [r["id"] for r in catalog.in_location("abu dhabi")] == ["x1"]
+
+def fake_availability(monkeypatch, full=()):
+    checked = []
+    
+    def check(restaurant_id, date, time_slot, party_size, provider="opentable"):
+        checked.append(restaurant_id)
+        return {"status": "success", "data": {"available": restaurant_id not in full}}
+    
+    monkeypatch.setattr(restaurant_catalog_module, "check_restaurant_availability", check)
+    return checked
+
+def test_only_the_best_ranked_matches_are_checked(monkeypatch):
+    checked = fake_availability(monkeypatch, full={"r00"})
+    catalog = RestaurantCatalog()
+    catalog.ingest([restaurant(f"r{i:02d}", f"Grill {i}", "Arabic", 5.0 - i * 0.1) for i in range(20)], location="Dubai")
+    
+    results = catalog.query(cuisine="arabic", date="2025-07-01", time_slot="19:00", party_size=2, limit=2)
+    assert sorted(checked) == [f"r{i:02d}" for i in range(6)]
+    assert [r["id"] for r in results] == ["r01", "r02"]  # the full one drops below bookable tables
+    assert results[0]["availability"] == {"available": True}
+
+def test_expired_availability_is_evicted(monkeypatch):
+    checked = fake_availability(monkeypatch)
+    checker = AvailabilityChecker(ttl=60)
+    checker.check_many(["r1", "r2"], "2025-07-01", "19:00", 2)
+    assert len(checker.cache) == 2
+    
+    for key, (availability, checked_at) in list(checker.cache.items()):
+        checker.cache[key] = (availability, checked_at - 120)
+    checker._evicted_at -= 120
+    checker.check_many(["r3"], "2025-07-01", "20:00", 2)
+    assert list(checker.cache) == [("opentable", "r3", "2025-07-01", "20:00", 2)]
+    assert checked == ["r1", "r2", "r3"]
+
+def test_availability_refused_by_the_quota_is_not_cached(monkeypatch):
+    checked = fake_availability(monkeypatch)
+    monkeypatch.setattr(restaurant_catalog_module, "quota_manager",
+                        QuotaManager(MemoryStateStore(), quotas={"opentable": (0.1, 1)}, traveler_quota=None, max_wait=0.0))
+    checker = AvailabilityChecker(concurrency=1)
+    
+    first = checker.check_many(["r1", "r2"], "2025-07-01", "19:00", 2)
+    assert checked == ["r1"]
+    assert first["r1"] == {"available": True}
+    assert "error" in first["r2"]
+    assert [key[1] for key in checker.cache] == ["r1"]
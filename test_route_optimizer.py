@@ -0,0 +1,37 @@
+from route_optimizer import RouteOptimizer, activity_window, parse_clock, parse_range
+
+DAY = (8 * 60, 23 * 60 + 30)
+
+def test_clock_times_in_24_hour_and_12_hour_forms():
+    assert parse_clock("14:30") == 870
+    assert parse_clock("2:30 PM") == parse_clock("2:30pm") == 870
+    assert parse_clock("12 a.m.") == 0 and parse_clock("12pm") == 720
+    assert parse_clock("14") is None and parse_clock("25:00") is None and parse_clock("13 PM") is None
+    assert parse_range("2:00 PM - 4:00 PM") == parse_range("14:00-16:00") == (840, 960)
+    assert parse_range("2-4 PM") == (840, 960)
+    assert parse_range("9 a.m. to 11:30 a.m.") == (540, 690)
+    assert parse_range("18:00-14:00") is None and parse_range("after lunch") is None
+
+def test_unreadable_times_leave_the_activity_unpinned():
+    assert activity_window({"time": "14:00-18:00"}, *DAY) == (840, 840, 240)
+    assert activity_window({"time": "2:00 PM - 6:00 PM"}, *DAY) == (840, 840, 240)
+    assert activity_window({"time": "sometime in the afternoon", "duration": 90}, *DAY) == (480, 1320, 90)
+    assert activity_window({"time_window": "10:00-late", "time": "11:00-12:00"}, *DAY) == (660, 660, 60)
+
+def test_free_text_times_do_not_break_a_day_plan():
+    activities = [
+        {"name": "Desert Safari", "time": "2:00 PM - 6:00 PM", "duration": 240},
+        {"name": "Dubai Mall", "time": "whenever", "duration": 60},
+        {"name": "Dinner", "time": "19:00-21:00"}
+    ]
+    matrix = [[0, 10, 10, 10], [10, 0, 20, 20], [10, 20, 0, 20], [10, 20, 20, 0]]
+    
+    plan = RouteOptimizer().optimize_day(activities, matrix=matrix, time_budget=0.05)
+    assert plan["unscheduled"] == []
+    starts = {stop["activity"]["name"]: stop["start"] for stop in plan["stops"]}
+    assert starts["Desert Safari"] == "14:00" and starts["Dinner"] == "19:00" and "Dubai Mall" in starts
+
+def test_stops_that_cannot_fit_are_reported_not_dropped():
+    activities = [{"name": "A", "time": "10:00-12:00"}, {"name": "B", "time": "10:30-11:30"}]
+    plan = RouteOptimizer().optimize_day(activities, matrix=[[0, 0, 0], [0, 0, 0], [0, 0, 0]], time_budget=0.05)
+    assert len(plan["stops"]) == 1 and len(plan["unscheduled"]) == 1
@@ -0,0 +1,68 @@
+import time
+import asyncio
+
+from state_store import MemoryStateStore, SQLiteStateStore, SharedMapping, SharedRevisions, LeaderElection, TravelerLocks
+
+def test_workers_share_entries_and_revisions_through_sqlite(tmp_path):
+    path = str(tmp_path / "state.db")
+    first, second = SQLiteStateStore(path), SQLiteStateStore(path)
+    assert first.epoch == second.epoch
+    
+    itineraries = SharedMapping(first, "itineraries")
+    itineraries["Tom_and_Priya"] = {"days": [{"date": "2025-07-01", "activities": []}]}
+    itineraries["Sam"] = {"days": []}
+    itinerary = SharedMapping(second, "itineraries")["Tom_and_Priya"]
+    itinerary["days"][0]["activities"].append({"name": "Dubai Museum"})
+    SharedMapping(second, "itineraries")["Tom_and_Priya"] = itinerary
+    
+    assert list(itineraries) == ["Tom_and_Priya", "Sam"]
+    assert itineraries["Tom_and_Priya"]["days"][0]["activities"] == [{"name": "Dubai Museum"}]
+    assert "Nobody" not in itineraries
+    
+    SharedRevisions(first).bump(("itinerary", "Tom_and_Priya"))
+    assert SharedRevisions(second).bump(("itinerary", "Tom_and_Priya")) == 2
+    assert SharedRevisions(first).get(("itinerary", "Tom_and_Priya")) == 2
+    assert first.put_if_absent("meta", "seeded", True) and not second.put_if_absent("meta", "seeded", True)
+
+def test_only_one_worker_holds_the_background_lease(tmp_path):
+    for store in (MemoryStateStore(), SQLiteStateStore(str(tmp_path / "state.db"))):
+        events = []
+        leader, follower = LeaderElection(store, ttl=0.3), LeaderElection(store, ttl=0.3)
+        leader.start(on_elected=lambda: events.append("leader"))
+        follower.start(on_elected=lambda: events.append("follower"))
+        assert leader.is_leader and not follower.is_leader
+        
+        leader.stop()
+        time.sleep(0.25)
+        assert follower.is_leader and events == ["leader", "follower"]
+        follower.stop()
+
+def test_versioned_write_fails_after_a_concurrent_change(tmp_path):
+    path = str(tmp_path / "state.db")
+    for first, second in ((MemoryStateStore(),) * 2, (SQLiteStateStore(path), SQLiteStateStore(path))):
+        revisions, other = SharedRevisions(first), SharedRevisions(second)
+        itineraries, other_itineraries = SharedMapping(first, "itineraries"), SharedMapping(second, "itineraries")
+        key = ("itinerary", "Tom_and_Priya")
+        assert revisions.put(itineraries, "Tom_and_Priya", {"days": []}, key) == 1
+        
+        read_at = revisions.get(key)
+        assert other.put(other_itineraries, "Tom_and_Priya", {"days": ["moved"]}, key, expected=read_at) == 2
+        assert revisions.put(itineraries, "Tom_and_Priya", {"days": ["stale"]}, key, expected=read_at) is None
+        assert itineraries["Tom_and_Priya"] == {"days": ["moved"]} and revisions.get(key) == 2
+
+def test_traveler_locks_only_order_the_same_traveler():
+    locks, events = TravelerLocks(), []
+    
+    async def update(traveler_id, label):
+        async with locks.lock(traveler_id):
+            events.append(f"{label} start")
+            await asyncio.sleep(0.01)
+            events.append(f"{label} end")
+    
+    async def main():
+        await asyncio.gather(update("Tom_and_Priya", "a"), update("Tom_and_Priya", "b"), update("Sam", "c"))
+    
+    asyncio.run(main())
+    assert events.index("a end") < events.index("b start")
+    assert events.index("c start") < events.index("a end")
+    assert len(locks._locks) == 0
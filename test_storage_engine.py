@@ -0,0 +1,77 @@
+import sqlite3
+
+from booking_system import BookingSystem
+from storage_engine import StorageEngine
+
+def test_bookings_come_back_after_a_restart(tmp_path):
+    storage = StorageEngine(str(tmp_path / "data.db"))
+    bookings = BookingSystem(storage=storage)
+    activity = {"name": "Desert Safari", "category": "adventure", "is_outdoor": True}
+    booked = bookings.book_activity(activity, "2025-07-03", "06:00-10:00", participants=2)
+    dinner = bookings.book_dining({"name": "Al Hadheerah"}, "2025-07-03", "19:00", 2)
+    bookings.cancel_booking(dinner["booking_id"])
+    storage.stop()
+    
+    restarted = BookingSystem(storage=StorageEngine(str(tmp_path / "data.db")))
+    assert restarted.bookings == {}
+    assert [b["booking_id"] for b in restarted.get_bookings_for_date("2025-07-03")] == [booked["booking_id"]]
+    assert restarted.get_booking(dinner["booking_id"])["status"] == "cancelled"
+    assert booked["booking_id"] in restarted.inventory.reservations
+
+def test_writes_are_batched_and_coalesced(tmp_path):
+    storage = StorageEngine(str(tmp_path / "data.db"), flush_interval=0.5)
+    itinerary = {"traveler_id": "Tom_and_Priya", "start_date": "2025-07-01", "days": []}
+    for day in range(20):
+        itinerary["days"].append({"date": f"2025-07-{day + 1:02d}", "activities": []})
+        storage.save_itinerary("Tom_and_Priya", itinerary)
+    storage.save_decision("Tom_and_Priya", {"decision_id": "d1", "type": "itinerary_change", "was_accepted": None})
+    storage.clear_decisions("Tom_and_Priya")
+    storage.save_decision("Tom_and_Priya", {"decision_id": "d2", "type": "weather", "was_accepted": True})
+    storage.flush()
+    
+    assert len(storage.load_itinerary("Tom_and_Priya")["days"]) == 20
+    assert storage.load_decisions("Tom_and_Priya") == [{"decision_id": "d2", "type": "weather", "was_accepted": True}]
+    assert storage.hot_travelers() == ["Tom_and_Priya"]
+    assert storage.stats["batches"] == 1 and storage.stats["coalesced"] == 20
+    storage.stop()
+
+def test_decisions_from_two_workers_are_both_kept(tmp_path):
+    path = str(tmp_path / "data.db")
+    first, second = StorageEngine(path), StorageEngine(path)
+    # Each worker's first decision used to be stored as (traveler, 0) and overwrite the other's
+    first.save_decision("Tom_and_Priya", {"decision_id": "d-first", "issue": "weather"})
+    second.save_decision("Tom_and_Priya", {"decision_id": "d-second", "issue": "energy"})
+    first.stop()
+    second.stop()
+    first.save_decision("Tom_and_Priya", {"decision_id": "d-first", "issue": "weather", "was_accepted": True})
+    first.stop()
+    
+    decisions = StorageEngine(path).load_decisions("Tom_and_Priya")
+    assert [(d["decision_id"], d.get("was_accepted")) for d in decisions] == [("d-first", True), ("d-second", None)]
+
+def test_decisions_stored_by_sequence_are_rekeyed(tmp_path):
+    path = str(tmp_path / "data.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE decisions (traveler_id TEXT NOT NULL, seq INTEGER NOT NULL, type TEXT, timestamp TEXT, "
+                       "was_accepted INTEGER, document BLOB NOT NULL, PRIMARY KEY (traveler_id, seq))")
+    connection.executemany("INSERT INTO decisions VALUES (?, ?, NULL, NULL, NULL, ?)", [
+        ("Tom_and_Priya", 1, b'{"issue": "energy"}'),
+        ("Tom_and_Priya", 0, b'{"decision_id": "d0", "issue": "weather"}')
+    ])
+    connection.commit()
+    connection.close()
+    
+    decisions = StorageEngine(path).load_decisions("Tom_and_Priya")
+    assert decisions == [{"decision_id": "d0", "issue": "weather"}, {"issue": "energy"}]
+
+def test_a_failing_write_does_not_lose_the_rest_of_its_batch(tmp_path):
+    storage = StorageEngine(str(tmp_path / "data.db"), flush_interval=0.5)
+    storage.save_itinerary("Tom_and_Priya", {"start_date": "2025-07-01", "days": []})
+    storage._enqueue("booking", ("broken",), ("broken", None, None, None, None, 0.0, None))  # violates NOT NULL
+    storage.save_itinerary("Sam", {"start_date": "2025-08-01", "days": []})
+    storage.flush()
+    
+    assert storage.load_itinerary("Tom_and_Priya") is not None and storage.load_itinerary("Sam") is not None
+    assert storage.load_booking("broken") is None
+    assert storage.stats["errors"] == 1 and storage.stats["written"] == 2
+    storage.stop()
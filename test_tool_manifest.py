@@ -0,0 +1,43 @@
+import ast
+import glob
+import sys
+
+from tools.tool_manifest import TOOL_MANIFEST
+from tools.tool_registry import ToolRegistry
+
+def registered_in_modules():
+    """Every register_tool call in tools/*.py, read from source without importing anything."""
+    entries = []
+    for path in sorted(glob.glob("tools/*.py")):
+        for node in ast.walk(ast.parse(open(path).read())):
+            if isinstance(node, ast.Call) and getattr(node.func, "attr", None) == "register_tool":
+                keywords = {keyword.arg: keyword.value for keyword in node.keywords}
+                entries.append({
+                    "tool_name": ast.literal_eval(keywords["tool_name"]),
+                    "module": path[:-3].replace("/", "."),
+                    "function_name": keywords["tool_function"].id,
+                    "category": ast.literal_eval(keywords["category"]),
+                    "description": ast.literal_eval(keywords["description"]),
+                    "required_params": ast.literal_eval(keywords["required_params"]),
+                    "optional_params": ast.literal_eval(keywords["optional_params"]) if "optional_params" in keywords else []
+                })
+    return entries
+
+def test_manifest_matches_module_registrations():
+    key = lambda entry: entry["tool_name"]
+    assert sorted(TOOL_MANIFEST, key=key) == sorted(registered_in_modules(), key=key)
+
+def test_lazy_tool_module_is_imported_on_first_execute():
+    sys.modules.pop("colorsys", None)
+    registry = ToolRegistry()
+    registry.register_lazy(tool_name="rgb_to_hsv", module="colorsys", function_name="rgb_to_hsv",
+                           category="mapping", description="Convert a colour", required_params=["r", "g", "b"])
+    
+    assert "colorsys" not in sys.modules
+    assert registry.get_tools_by_category("mapping") == ["rgb_to_hsv"]
+    assert registry.execute_tool("rgb_to_hsv", {"r": 1.0, "g": 0.0, "b": 0.0}) == (0.0, 1.0, 1.0)
+    assert "colorsys" in sys.modules and registry.tool_metadata["rgb_to_hsv"]["usage_count"] == 1
+    
+    registry.register_lazy(tool_name="missing", module="tools.no_such_module", function_name="run",
+                           category="mapping", description="", required_params=[])
+    assert registry.execute_tool("missing", {})["status"] == "error"
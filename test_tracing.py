@@ -0,0 +1,61 @@
+import json
+import time
+import asyncio
+import threading
+import contextvars
+
+from tracing import Tracer, JSONLExporter
+from tools.tool_registry import ToolRegistry
+
+def test_spans_nest_across_threads_and_coroutines(tmp_path):
+    tracer = Tracer(exporter=JSONLExporter(str(tmp_path / "traces.jsonl")))
+    
+    @tracer.traced("leaf")
+    def leaf(seconds: float):
+        time.sleep(seconds)
+    
+    @tracer.traced("async_work")
+    async def async_work():
+        await asyncio.sleep(0.01)
+        leaf(0.0)
+    
+    with tracer.span("POST /chat", path="/chat"):
+        leaf(0.02)
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(leaf, 0.0))
+        worker.start()
+        worker.join()
+        asyncio.run(async_work())
+        try:
+            with tracer.span("failing"):
+                raise ValueError("no route")
+        except ValueError:
+            pass
+    leaf(0.0)  # outside any request: a trace of its own
+    
+    trace = tracer.slowest(limit=1)[0]
+    assert trace["name"] == "POST /chat" and trace["span_count"] == 6
+    assert [(row["name"], row["depth"]) for row in trace["spans"]] == [
+        ("POST /chat", 0), ("leaf", 1), ("leaf", 1), ("async_work", 1), ("leaf", 2), ("failing", 1)]
+    assert trace["spans"][1]["duration_ms"] >= 20 and trace["spans"][-1]["error"] == "ValueError: no route"
+    assert len(tracer.recent) == 2 and tracer.status()["open_traces"] == 0
+    
+    lines = [json.loads(line) for line in open(tmp_path / "traces.jsonl")]
+    spans = lines[0]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(lines) == 2 and len(spans) == 6
+    assert {span["traceId"] for span in spans} == {trace["trace_id"]}
+    assert sum("parentSpanId" not in span for span in spans) == 1
+
+def test_registry_tools_run_in_spans(monkeypatch):
+    from tools import tool_registry as registry_module
+    tracer = Tracer()
+    monkeypatch.setattr(registry_module, "tracer", tracer)
+    registry = ToolRegistry()
+    registry.register_tool("get_local_customs", lambda: {"status": "success"}, "local_info", "", [])
+    
+    with tracer.span("GET /local-info"):
+        registry.execute_tool("get_local_customs", {})
+        registry.execute_tool("get_local_customs", {"unexpected": 1})
+    
+    rows = tracer.slowest()[0]["spans"]
+    assert [(row["name"], row["attributes"].get("status")) for row in rows[1:]] == [
+        ("tool.get_local_customs", "success"), ("tool.get_local_customs", "error")]
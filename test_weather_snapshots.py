@@ -0,0 +1,57 @@
+import time
+import threading
+
+import tools.weather_snapshots as weather_snapshots_module
+from tools.weather_snapshots import WeatherSnapshotService
+
+def fake_provider(monkeypatch, delay=0.0):
+    calls = []
+    release = threading.Event()
+    
+    def current(city):
+        calls.append(city)
+        if delay:
+            release.wait(delay)
+        return {"status": "success", "data": {"temperature": 40.0 + len(calls), "conditions": "Sunny",
+                                              "uv_index": 11, "provider": "Simulated"}}
+    
+    def forecast(city, days=3):
+        return {"status": "success", "data": {"provider": "Simulated", "forecasts": []}}
+    
+    monkeypatch.setattr(weather_snapshots_module, "get_weather_weatherapi", current)
+    monkeypatch.setattr(weather_snapshots_module, "get_weather_forecast_weatherapi", forecast)
+    return calls, release
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_cached_serves_a_stale_snapshot_while_refreshing_in_the_background(monkeypatch):
+    calls, release = fake_provider(monkeypatch, delay=5.0)
+    service = WeatherSnapshotService(refresh_interval=60)
+    release.set()
+    first = service.get("Dubai")
+    release.clear()
+    
+    assert service.cached("Dubai") is first and len(calls) == 1
+    
+    first.fetched_at -= 120
+    started = time.perf_counter()
+    assert service.cached("Dubai") is first
+    assert service.cached("Dubai") is first
+    assert time.perf_counter() - started < 0.5
+    
+    release.set()
+    assert wait_for(lambda: service.latest("Dubai").version == 2)
+    assert len(calls) == 2  # both stale reads shared one refresh
+    assert service.latest("Dubai").current["temperature"] == 42.0
+
+def test_cached_is_empty_until_the_first_refresh(monkeypatch):
+    calls, _ = fake_provider(monkeypatch)
+    service = WeatherSnapshotService()
+    
+    assert service.cached("Abu Dhabi") is None
+    assert wait_for(lambda: service.latest("Abu Dhabi") is not None)
+    assert calls == ["Abu Dhabi"]
@@ -0,0 +1,240 @@
+import re
+import math
+import time
+import logging
+import threading
+from typing import Dict, List, Any, Optional
+
+from rate_limiter import quota_manager, meters_own_calls, QuotaExceeded
+from tools.tool_registry import tool_registry
+from tools.attraction_tools import search_attractions, is_outdoor_attraction
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("attraction_catalog")
+
+CATALOG_TTL = 3600  # seconds before a provider is asked for its attractions again
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 2  # a term in the name counts as much as two in the description
+
+# Price levels as providers write them, cheapest first
+PRICE_LEVELS = {"free": 0, "$": 1, "$$": 2, "$$$": 3, "$$$$": 4}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "at", "be", "can", "do", "for", "from", "i", "in", "is", "it", "me", "my",
+    "of", "on", "or", "some", "the", "to", "we", "what", "where", "which", "with", "you", "your",
+    "show", "find", "want", "like", "would", "could", "any", "there", "good", "best", "visit", "see"
+}
+
+def _stem(token: str) -> str:
+    """Fold plurals so "museums" matches "museum" and "beaches" matches "beach"."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("ches", "shes", "sses", "xes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(token) for token in re.findall(r"[a-z0-9]+", (text or "").lower()) if token not in STOPWORDS]
+
+def price_rank(price_level: Any) -> Optional[int]:
+    return PRICE_LEVELS.get(str(price_level or "").strip().lower())
+
+class AttractionCatalog:
+    """Local attraction catalog with BM25 full-text search and facets.
+    
+    This class handles:
+    1. Incremental ingestion from TripAdvisor / Dubai Tourism responses
+    2. An inverted index over names, descriptions and categories, ranked with BM25
+    3. Facet filters and counts for category, indoor/outdoor, price and rating
+    4. A location index, so one city's search never returns another city's attractions
+    """
+    
+    def __init__(self, ttl: float = CATALOG_TTL):
+        self.ttl = ttl
+        self.attractions = {}  # id -> attraction
+        self.postings = {}  # term -> {id: weighted term frequency}
+        self.lengths = {}  # id -> weighted document length
+        self.total_length = 0
+        self.by_category = {}  # lower-cased category -> ids
+        self.outdoor = set()
+        self.by_location = {}  # lower-cased location they were fetched for -> ids
+        self.fetched = {}  # (location, provider) -> time of last ingest
+        self._lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return len(self.attractions)
+    
+    def _terms(self, attraction: Dict[str, Any]) -> Dict[str, int]:
+        counts = {}
+        for token in tokenize(attraction.get("name")):
+            counts[token] = counts.get(token, 0) + NAME_WEIGHT
+        for token in tokenize(attraction.get("description")) + tokenize(attraction.get("category")):
+            counts[token] = counts.get(token, 0) + 1
+        return counts
+    
+    def _remove(self, attraction_id: str) -> None:
+        attraction = self.attractions.pop(attraction_id)
+        for term in self._terms(attraction):
+            postings = self.postings[term]
+            postings.pop(attraction_id, None)
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(attraction_id)
+        self.by_category.get((attraction.get("category") or "").lower(), set()).discard(attraction_id)
+        self.outdoor.discard(attraction_id)
+    
+    def add(self, attraction: Dict[str, Any]) -> None:
+        """Insert or replace one attraction (search_attractions format)."""
+        attraction_id = str(attraction["id"])
+        if "is_outdoor" not in attraction:
+            attraction = {**attraction, "is_outdoor": is_outdoor_attraction(attraction.get("category", ""))}
+        terms = self._terms(attraction)
+        
+        with self._lock:
+            if attraction_id in self.attractions:
+                self._remove(attraction_id)
+            self.attractions[attraction_id] = attraction
+            for term, count in terms.items():
+                self.postings.setdefault(term, {})[attraction_id] = count
+            self.lengths[attraction_id] = sum(terms.values())
+            self.total_length += self.lengths[attraction_id]
+            self.by_category.setdefault((attraction.get("category") or "").lower(), set()).add(attraction_id)
+            if attraction["is_outdoor"]:
+                self.outdoor.add(attraction_id)
+    
+    def ingest(self, attractions: List[Dict[str, Any]], location: str = None) -> int:
+        """Add attractions, filed under the location they were fetched for when given."""
+        for attraction in attractions:
+            if attraction.get("id") is not None:
+                self.add(attraction)
+                if location:
+                    with self._lock:
+                        self.by_location.setdefault(location.lower(), set()).add(str(attraction["id"]))
+        return len(attractions)
+    
+    def in_location(self, location: str) -> List[Dict[str, Any]]:
+        """Every attraction fetched for a location, safe to iterate while others ingest."""
+        with self._lock:
+            return [self.attractions[attraction_id] for attraction_id in sorted(self.by_location.get(location.lower(), ()))]
+    
+    def ensure(self, location: str, provider: str = "tripadvisor") -> None:
+        """Pull a provider's attractions for a location unless they were ingested recently.
+        
+        Without quota for the provider the catalog keeps serving what it has
+        and the next call tries again.
+        """
+        key = (location.lower(), provider.lower())
+        if time.time() - self.fetched.get(key, 0) < self.ttl:
+            return
+        try:
+            quota_manager.acquire(provider)
+        except QuotaExceeded as e:
+            logger.warning(f"Not refreshing {provider} attractions for {location}: {e}")
+            return
+        result = search_attractions(location, provider=provider)
+        count = self.ingest(result.get("data", {}).get("attractions", []), location=location)
+        self.fetched[key] = time.time()
+        logger.info(f"Ingested {count} attractions from {provider} ({len(self.attractions)} in catalog)")
+    
+    def _bm25(self, terms: List[str], candidates: Optional[set]) -> Dict[str, float]:
+        total = len(self.attractions)
+        average_length = self.total_length / total if total else 0
+        scores = {}
+        for term in dict.fromkeys(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for attraction_id, frequency in postings.items():
+                if candidates is not None and attraction_id not in candidates:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[attraction_id] / average_length)
+                scores[attraction_id] = scores.get(attraction_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return scores
+    
+    def search(self, query: str = None, category: str = None, indoor: bool = None, max_price: str = None,
+               min_rating: float = None, limit: int = 10, location: str = None) -> Dict[str, Any]:
+        """Rank attractions for a free-text query within the given facet filters.
+        
+        Without query terms that appear in the catalog the matches are ranked
+        by rating instead. Facet counts cover every match, not just the
+        returned page. With location only attractions fetched for it match.
+        """
+        with self._lock:
+            candidates = None
+            if location:
+                candidates = set(self.by_location.get(location.lower(), set()))
+            if category:
+                in_category = set()
+                for name, ids in self.by_category.items():
+                    if category.lower() in name:
+                        in_category |= ids
+                candidates = in_category if candidates is None else candidates & in_category
+            if indoor is not None:
+                base = set(self.attractions) if candidates is None else candidates
+                candidates = base - self.outdoor if indoor else base & self.outdoor
+            if max_price is not None or min_rating is not None:
+                ceiling = price_rank(max_price) if max_price is not None else None
+                base = self.attractions.keys() if candidates is None else candidates
+                candidates = {
+                    attraction_id for attraction_id in base
+                    if (ceiling is None or (price_rank(self.attractions[attraction_id].get("price_level")) or 0) <= ceiling)
+                    and (min_rating is None or (self.attractions[attraction_id].get("rating") or 0) >= min_rating)
+                }
+            
+            scores = self._bm25(tokenize(query), candidates) if query else {}
+            if scores:
+                ranked = sorted(scores, key=lambda attraction_id: (-scores[attraction_id], attraction_id))
+            else:
+                pool = self.attractions.keys() if candidates is None else candidates
+                ranked = sorted(pool, key=lambda attraction_id: (-(self.attractions[attraction_id].get("rating") or 0), attraction_id))
+            
+            facets = {"category": {}, "indoor": {"indoor": 0, "outdoor": 0}, "price_level": {}}
+            for attraction_id in ranked:
+                attraction = self.attractions[attraction_id]
+                category_name = attraction.get("category") or ""
+                facets["category"][category_name] = facets["category"].get(category_name, 0) + 1
+                facets["indoor"]["outdoor" if attraction_id in self.outdoor else "indoor"] += 1
+                price = attraction.get("price_level") or ""
+                facets["price_level"][price] = facets["price_level"].get(price, 0) + 1
+            
+            results = [
+                {**self.attractions[attraction_id], "score": round(scores.get(attraction_id, 0.0), 4)}
+                for attraction_id in ranked[:limit]
+            ]
+            return {"results": results, "total": len(ranked), "facets": facets}
+
+@meters_own_calls
+def find_attractions(location: str, query: str = None, category: str = None, indoor: bool = None,
+                     max_price: str = None, min_rating: float = None, limit: int = 10,
+                     provider: str = "tripadvisor") -> Dict[str, Any]:
+    """Free-text and faceted attraction search over the local catalog."""
+    attraction_catalog.ensure(location, provider)
+    found = attraction_catalog.search(query, category=category, indoor=indoor, max_price=max_price,
+                                      min_rating=min_rating, limit=limit, location=location)
+    return {
+        "status": "success",
+        "data": {
+            "provider": "catalog",
+            "location": location,
+            "query": query,
+            "total": found["total"],
+            "facets": found["facets"],
+            "attractions": found["results"]
+        }
+    }
+
+# Create a global instance of the attraction catalog
+attraction_catalog = AttractionCatalog()
+
+tool_registry.register_tool(
+    tool_name="find_attractions",
+    tool_function=find_attractions,
+    category="attractions",
+    description="Full-text and faceted attraction search (category, indoor, price, rating) from the local catalog",
+    required_params=["location"],
+    optional_params=["query", "category", "indoor", "max_price", "min_rating", "limit", "provider"]
+)
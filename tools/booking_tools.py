@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 
 from tools.tool_registry import tool_registry
+from id_generator import new_reference
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("booking_tools")
@@ -14,11 +15,17 @@ logger = logging.getLogger("booking_tools")
 BOOKING_API_KEY = os.getenv("BOOKING_API_KEY", "your_booking_api_key")
 VIATOR_API_KEY = os.getenv("VIATOR_API_KEY", "your_viator_api_key")
 
+# Seconds a provider request may take before it is abandoned
+REQUEST_TIMEOUT = 10.0
+
 def search_hotels(location: str, check_in: str, check_out: str, 
                 guests: int = 2, rooms: int = 1, provider: str = "booking") -> Dict[str, Any]:
     """Search for hotels in a location."""
     if provider.lower() == "booking":
         return search_hotels_booking(location, check_in, check_out, guests, rooms)
+    elif provider.lower() == "all":
+        from tools.meta_search_tools import meta_search_hotels
+        return meta_search_hotels(location, check_in, check_out, guests, rooms)
     else:
         return {
             "status": "error",
@@ -26,7 +33,7 @@ def search_hotels(location: str, check_in: str, check_out: str,
         }
 
 def search_hotels_booking(location: str, check_in: str, check_out: str, 
-                         guests: int = 2, rooms: int = 1) -> Dict[str, Any]:
+                         guests: int = 2, rooms: int = 1, timeout: float = REQUEST_TIMEOUT) -> Dict[str, Any]:
     """Search for hotels using Booking.com API."""
     url = "https://booking-com.p.rapidapi.com/v1/hotels/search"
     
@@ -61,7 +68,7 @@ def search_hotels_booking(location: str, check_in: str, check_out: str,
     }
     
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = requests.get(url, headers=headers, params=params, timeout=timeout)
         response.raise_for_status()
         data = response.json()
         
@@ -111,13 +118,17 @@ def search_activities(location: str, date: str, category: str = None,
     """Search for activities in a location."""
     if provider.lower() == "viator":
         return search_activities_viator(location, date, category)
+    elif provider.lower() == "all":
+        from tools.meta_search_tools import meta_search_activities
+        return meta_search_activities(location, date, category)
     else:
         return {
             "status": "error",
             "message": f"Unknown provider: {provider}"
         }
 
-def search_activities_viator(location: str, date: str, category: str = None) -> Dict[str, Any]:
+def search_activities_viator(location: str, date: str, category: str = None,
+                             timeout: float = REQUEST_TIMEOUT) -> Dict[str, Any]:
     """Search for activities using Viator API."""
     url = "https://viator.p.rapidapi.com/search"
     
@@ -149,7 +160,7 @@ def search_activities_viator(location: str, date: str, category: str = None) ->
         params["category"] = mapped_category
     
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = requests.get(url, headers=headers, params=params, timeout=timeout)
         response.raise_for_status()
         data = response.json()
         
@@ -221,9 +232,7 @@ def book_hotel(hotel_id: str, check_in: str, check_out: str,
         # and make the actual booking API call
         
         # Generate a booking reference
-        import random
-        import string
-        booking_ref = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        booking_ref = new_reference()
         
         booking_data = {
             "provider": provider,
@@ -281,9 +290,7 @@ def book_activity(activity_id: str, date: str, time_slot: str,
         # and make the actual booking API call
         
         # Generate a booking reference
-        import random
-        import string
-        booking_ref = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        booking_ref = new_reference()
         
         booking_data = {
             "provider": provider,
@@ -317,9 +324,7 @@ def cancel_booking(booking_reference: str, booking_type: str) -> Dict[str, Any]:
     
     try:
         # Generate a cancellation reference
-        import random
-        import string
-        cancellation_ref = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        cancellation_ref = new_reference()
         
         cancellation_data = {
             "booking_reference": booking_reference,
@@ -0,0 +1,343 @@
+import logging
+import datetime
+import threading
+import numpy as np
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Any, Optional, Union
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("compact_forecast")
+
+# Float columns of the hourly and daily records, in the order the providers emit them
+HOURLY_FIELDS = ["temp", "wind_speed", "humidity", "feels_like", "precipitation_chance"]
+DAILY_FIELDS = ["max_temp", "min_temp", "avg_temp", "max_wind", "total_precip", "avg_humidity", "uv_index"]
+HOUR_KEYS = ("time", "temp", "conditions", "icon", "wind_speed", "wind_direction", "humidity", "feels_like", "precipitation_chance")
+DAY_KEYS = ("date", "max_temp", "min_temp", "avg_temp", "max_wind", "total_precip", "avg_humidity", "conditions", "icon", "uv_index", "hourly")
+FORECAST_KEYS = ("provider", "timestamp", "city", "country", "forecasts")
+
+# Conditions share one small enum across every forecast; unseen provider texts are added on first use
+CONDITIONS = ["", "Sunny", "Clear", "Partly cloudy", "Cloudy", "Overcast", "Hazy", "Mist", "Fog",
+              "Light rain", "Moderate rain", "Heavy rain", "Thunderstorm", "Dust", "Sandstorm"]
+_condition_codes = {name: code for code, name in enumerate(CONDITIONS)}
+_conditions_lock = threading.Lock()
+
+Timestamp = Union[str, datetime.datetime, int]
+
+def condition_code(name: Optional[str]) -> int:
+    """uint8 code for a condition text, registering it if it is new."""
+    name = name or ""
+    code = _condition_codes.get(name)
+    if code is not None:
+        return code
+    with _conditions_lock:
+        code = _condition_codes.get(name)
+        if code is None:
+            if len(CONDITIONS) > np.iinfo(np.uint8).max:
+                logger.warning(f"Condition enum is full, storing '{name}' as unknown")
+                return 0
+            code = len(CONDITIONS)
+            CONDITIONS.append(name)
+            _condition_codes[name] = code
+    return code
+
+def to_epoch(moment: Timestamp) -> int:
+    """Seconds since 1970-01-01 of a local wall-clock time ("YYYY-MM-DD HH:MM" or datetime)."""
+    if isinstance(moment, (int, np.integer)):
+        return int(moment)
+    return int(np.datetime64(moment, "s").astype(np.int64))
+
+def from_epoch(seconds: int) -> datetime.datetime:
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=int(seconds))
+
+def _floats(values: List[Any]) -> np.ndarray:
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float32)
+
+def _column(values: np.ndarray) -> List[Optional[float]]:
+    """Plain floats at the providers' 0.1 resolution, with None for gaps."""
+    column = values.astype(np.float64).round(1).tolist()
+    if np.isnan(values).any():
+        column = [None if value != value else value for value in column]
+    return column
+
+def _interned(values: List[str], table: List[str]) -> np.ndarray:
+    """uint8 codes into a per-forecast string table (used for icon URLs)."""
+    index = {value: code for code, value in enumerate(table)}
+    codes = np.empty(len(values), dtype=np.uint8)
+    for i, value in enumerate(values):
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(table)
+            table.append(value)
+        codes[i] = code
+    return codes
+
+class CompactForecast(Mapping):
+    """A provider forecast held as typed column arrays instead of nested dicts.
+    
+    Hourly timestamps are int64 epoch seconds of the city's wall clock, the
+    measurements float32, conditions uint8 codes into CONDITIONS. Indexing it
+    like the provider dict ("forecasts", each day's "hourly", ...) returns
+    lazy views that read straight from the arrays, so existing consumers keep
+    working without materialising a dict per hour.
+    """
+    
+    def __init__(self, meta: Dict[str, Any], times: np.ndarray, hourly: Dict[str, np.ndarray],
+                 hour_conditions: np.ndarray, hour_icons: np.ndarray, wind_direction: np.ndarray,
+                 dates: np.ndarray, daily: Dict[str, np.ndarray], day_conditions: np.ndarray,
+                 day_icons: np.ndarray, day_starts: np.ndarray, day_ends: np.ndarray, icons: List[str]):
+        self.meta = meta
+        self.times = times
+        self.hourly = hourly
+        self.hour_conditions = hour_conditions
+        self.hour_icons = hour_icons
+        self.wind_direction = wind_direction
+        self.dates = dates
+        self.daily = daily
+        self.day_conditions = day_conditions
+        self.day_icons = day_icons
+        self.day_starts = day_starts  # first hourly index of each day
+        self.day_ends = day_ends  # one past the last hourly index of each day
+        self.icons = icons
+    
+    @classmethod
+    def from_dict(cls, forecast: Dict[str, Any]) -> "CompactForecast":
+        """Pack a provider forecast dict (get_weather_forecast_* format)."""
+        if isinstance(forecast, CompactForecast):
+            return forecast
+        
+        days = forecast.get("forecasts", [])
+        hours = [hour for day in days for hour in day.get("hourly", [])]
+        counts = np.array([len(day.get("hourly", [])) for day in days], dtype=np.int32)
+        day_ends = np.cumsum(counts, dtype=np.int32)
+        icons = [""]
+        
+        return cls(
+            meta={key: forecast.get(key) for key in FORECAST_KEYS if key != "forecasts"},
+            times=np.array([hour["time"] for hour in hours], dtype="datetime64[s]").astype(np.int64),
+            hourly={field: _floats([hour.get(field) for hour in hours]) for field in HOURLY_FIELDS},
+            hour_conditions=np.array([condition_code(hour.get("conditions")) for hour in hours], dtype=np.uint8),
+            hour_icons=_interned([hour.get("icon", "") for hour in hours], icons),
+            wind_direction=np.array([hour.get("wind_direction") or 0 for hour in hours], dtype=np.int16),
+            dates=np.array([day["date"] for day in days], dtype="datetime64[D]"),
+            daily={field: _floats([day.get(field) for day in days]) for field in DAILY_FIELDS},
+            day_conditions=np.array([condition_code(day.get("conditions")) for day in days], dtype=np.uint8),
+            day_icons=_interned([day.get("icon", "") for day in days], icons),
+            day_starts=day_ends - counts,
+            day_ends=day_ends,
+            icons=icons
+        )
+    
+    # Mapping interface: the provider dict's top-level keys
+    def __getitem__(self, key: str) -> Any:
+        if key == "forecasts":
+            return _DayList(self)
+        if key in self.meta:
+            return self.meta[key]
+        raise KeyError(key)
+    
+    def __iter__(self):
+        return iter(FORECAST_KEYS)
+    
+    def __len__(self) -> int:
+        return len(FORECAST_KEYS)
+    
+    @property
+    def hours(self) -> int:
+        return len(self.times)
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes of column data this forecast covers; a window counts only its own slice."""
+        arrays = [self.times, self.hour_conditions, self.hour_icons, self.wind_direction, self.dates,
+                  self.day_conditions, self.day_icons, self.day_starts, self.day_ends]
+        arrays += list(self.hourly.values()) + list(self.daily.values())
+        return sum(array.nbytes for array in arrays)
+    
+    def window(self, start: Timestamp, end: Timestamp) -> "CompactForecast":
+        """The hours in [start, end) as a new forecast sharing this one's arrays.
+        
+        Hourly and daily columns are numpy views, nothing is copied except the
+        per-day index bounds.
+        """
+        lo = int(np.searchsorted(self.times, to_epoch(start), side="left"))
+        hi = max(int(np.searchsorted(self.times, to_epoch(end), side="left")), lo)
+        # Days are in order, so the ones overlapping [lo, hi) are a contiguous run
+        first = int(np.searchsorted(self.day_ends, lo, side="right"))
+        last = max(int(np.searchsorted(self.day_starts, hi, side="left")), first)
+        
+        return CompactForecast(
+            meta=self.meta,
+            times=self.times[lo:hi],
+            hourly={field: values[lo:hi] for field, values in self.hourly.items()},
+            hour_conditions=self.hour_conditions[lo:hi],
+            hour_icons=self.hour_icons[lo:hi],
+            wind_direction=self.wind_direction[lo:hi],
+            dates=self.dates[first:last],
+            daily={field: values[first:last] for field, values in self.daily.items()},
+            day_conditions=self.day_conditions[first:last],
+            day_icons=self.day_icons[first:last],
+            # np.clip carries a lot of per-call overhead for a handful of days
+            day_starts=np.minimum(np.maximum(self.day_starts[first:last] - lo, 0), hi - lo),
+            day_ends=np.minimum(self.day_ends[first:last] - lo, hi - lo),
+            icons=self.icons
+        )
+    
+    def hour_times(self, lo: int = 0, hi: int = None) -> List[str]:
+        stamps = np.datetime_as_string(self.times[lo:hi].astype("datetime64[s]"), unit="m")
+        return np.char.replace(stamps, "T", " ").tolist()
+    
+    def _hour_value(self, index: int, key: str) -> Any:
+        if key == "time":
+            return self.hour_times(index, index + 1)[0]
+        if key == "conditions":
+            return CONDITIONS[self.hour_conditions[index]]
+        if key == "icon":
+            return self.icons[self.hour_icons[index]]
+        if key == "wind_direction":
+            return int(self.wind_direction[index])
+        if key in self.hourly:
+            value = float(self.hourly[key][index])
+            return None if value != value else round(value, 1)
+        raise KeyError(key)
+    
+    def _day_value(self, index: int, key: str) -> Any:
+        if key == "date":
+            return str(self.dates[index])
+        if key == "hourly":
+            return _HourList(self, int(self.day_starts[index]), int(self.day_ends[index]))
+        if key == "conditions":
+            return CONDITIONS[self.day_conditions[index]]
+        if key == "icon":
+            return self.icons[self.day_icons[index]]
+        if key in self.daily:
+            value = float(self.daily[key][index])
+            return None if value != value else round(value, 1)
+        raise KeyError(key)
+    
+    def _hour_dicts(self, lo: int, hi: int) -> List[Dict[str, Any]]:
+        # Whole columns are converted at once; per-value access is for the lazy views
+        columns = {field: _column(values[lo:hi]) for field, values in self.hourly.items()}
+        columns["time"] = self.hour_times(lo, hi)
+        columns["conditions"] = [CONDITIONS[code] for code in self.hour_conditions[lo:hi].tolist()]
+        columns["icon"] = [self.icons[code] for code in self.hour_icons[lo:hi].tolist()]
+        columns["wind_direction"] = self.wind_direction[lo:hi].tolist()
+        return [dict(zip(HOUR_KEYS, row)) for row in zip(*(columns[key] for key in HOUR_KEYS))]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """The full provider-format dict, e.g. for a JSON response."""
+        daily = {field: _column(values) for field, values in self.daily.items()}
+        forecasts = []
+        for i in range(len(self.dates)):
+            day = {key: daily[key][i] if key in daily else self._day_value(i, key) for key in DAY_KEYS if key != "hourly"}
+            day["hourly"] = self._hour_dicts(int(self.day_starts[i]), int(self.day_ends[i]))
+            forecasts.append(day)
+        return {**self.meta, "forecasts": forecasts}
+    
+    def to_columns(self) -> Dict[str, Any]:
+        """Column-oriented JSON-ready form: one list per field instead of one dict per hour."""
+        return {
+            **self.meta,
+            "conditions_table": list(CONDITIONS),
+            "icons_table": self.icons,
+            "times": self.times.tolist(),
+            "hourly": {field: _column(values) for field, values in self.hourly.items()},
+            "hour_conditions": self.hour_conditions.tolist(),
+            "hour_icons": self.hour_icons.tolist(),
+            "wind_direction": self.wind_direction.tolist(),
+            "dates": [str(date) for date in self.dates],
+            "daily": {field: _column(values) for field, values in self.daily.items()},
+            "day_conditions": self.day_conditions.tolist(),
+            "day_icons": self.day_icons.tolist(),
+            "day_starts": self.day_starts.tolist(),
+            "day_ends": self.day_ends.tolist()
+        }
+    
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Any]) -> "CompactForecast":
+        """Inverse of to_columns; condition codes are remapped onto this process's enum."""
+        remap = np.array([condition_code(name) for name in columns["conditions_table"]], dtype=np.uint8)
+        return cls(
+            meta={key: columns.get(key) for key in FORECAST_KEYS if key != "forecasts"},
+            times=np.array(columns["times"], dtype=np.int64),
+            hourly={field: _floats(values) for field, values in columns["hourly"].items()},
+            hour_conditions=remap[np.array(columns["hour_conditions"], dtype=np.intp)],
+            hour_icons=np.array(columns["hour_icons"], dtype=np.uint8),
+            wind_direction=np.array(columns["wind_direction"], dtype=np.int16),
+            dates=np.array(columns["dates"], dtype="datetime64[D]"),
+            daily={field: _floats(values) for field, values in columns["daily"].items()},
+            day_conditions=remap[np.array(columns["day_conditions"], dtype=np.intp)],
+            day_icons=np.array(columns["day_icons"], dtype=np.uint8),
+            day_starts=np.array(columns["day_starts"], dtype=np.int32),
+            day_ends=np.array(columns["day_ends"], dtype=np.int32),
+            icons=list(columns["icons_table"])
+        )
+
+class _HourView(Mapping):
+    __slots__ = ("_forecast", "_index")
+    
+    def __init__(self, forecast: CompactForecast, index: int):
+        self._forecast = forecast
+        self._index = index
+    
+    def __getitem__(self, key: str) -> Any:
+        return self._forecast._hour_value(self._index, key)
+    
+    def __iter__(self):
+        return iter(HOUR_KEYS)
+    
+    def __len__(self) -> int:
+        return len(HOUR_KEYS)
+
+class _HourList(Sequence):
+    __slots__ = ("_forecast", "_lo", "_hi")
+    
+    def __init__(self, forecast: CompactForecast, lo: int, hi: int):
+        self._forecast = forecast
+        self._lo = lo
+        self._hi = hi
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return _HourView(self._forecast, self._lo + index)
+    
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+class _DayView(Mapping):
+    __slots__ = ("_forecast", "_index")
+    
+    def __init__(self, forecast: CompactForecast, index: int):
+        self._forecast = forecast
+        self._index = index
+    
+    def __getitem__(self, key: str) -> Any:
+        return self._forecast._day_value(self._index, key)
+    
+    def __iter__(self):
+        return iter(DAY_KEYS)
+    
+    def __len__(self) -> int:
+        return len(DAY_KEYS)
+
+class _DayList(Sequence):
+    __slots__ = ("_forecast",)
+    
+    def __init__(self, forecast: CompactForecast):
+        self._forecast = forecast
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return _DayView(self._forecast, index)
+    
+    def __len__(self) -> int:
+        return len(self._forecast.dates)
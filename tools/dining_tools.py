@@ -14,6 +14,22 @@ logger = logging.getLogger("dining_tools")
 ZOMATO_API_KEY = os.getenv("ZOMATO_API_KEY", "your_zomato_api_key")
 OPENTABLE_API_KEY = os.getenv("OPENTABLE_API_KEY", "your_opentable_api_key")
 
+# Zomato cuisine IDs, built once rather than on every lookup
+ZOMATO_CUISINE_IDS = {
+    "arabic": "4",
+    "middle eastern": "4",
+    "indian": "148",
+    "italian": "55",
+    "chinese": "25",
+    "japanese": "60",
+    "thai": "95",
+    "american": "1",
+    "mediterranean": "70",
+    "seafood": "83",
+    "steakhouse": "168",
+    "lebanese": "66"
+}
+
 def search_restaurants(location: str, cuisine: str = None, price_range: str = None, provider: str = "zomato") -> Dict[str, Any]:
     """Search for restaurants in a location."""
     if provider.lower() == "zomato":
@@ -109,23 +125,7 @@ def search_restaurants_opentable(location: str, cuisine: str = None, price_range
 def get_cuisine_id(cuisine_name: str) -> str:
     """Get the Zomato cuisine ID for a given cuisine name."""
     # This would normally query the Zomato API to get the cuisine ID
-    # For simplicity, we'll use a hardcoded mapping of common cuisines
-    cuisine_map = {
-        "arabic": "4",
-        "middle eastern": "4",
-        "indian": "148",
-        "italian": "55",
-        "chinese": "25",
-        "japanese": "60",
-        "thai": "95",
-        "american": "1",
-        "mediterranean": "70",
-        "seafood": "83",
-        "steakhouse": "168",
-        "lebanese": "66"
-    }
-    
-    return cuisine_map.get(cuisine_name.lower(), "")
+    return ZOMATO_CUISINE_IDS.get(cuisine_name.strip().lower(), "")
 
 def get_restaurant_details(restaurant_id: str, provider: str = "zomato") -> Dict[str, Any]:
     """Get detailed information about a restaurant."""
@@ -0,0 +1,197 @@
+import logging
+import threading
+import numpy as np
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from tools.geocoding import normalize_address
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("distance_engine")
+
+EARTH_RADIUS_M = 6371008.8
+
+# Rough city travel profiles used for local estimates. Straight-line distance
+# is stretched by a detour factor to approximate the road network, and a
+# fixed overhead covers parking, waiting and walking to the vehicle.
+MODE_PROFILES = {
+    "driving": {"speed_kmh": 40.0, "detour": 1.3, "overhead_s": 300},
+    "walking": {"speed_kmh": 4.8, "detour": 1.2, "overhead_s": 0},
+    "bicycling": {"speed_kmh": 15.0, "detour": 1.25, "overhead_s": 60},
+    "transit": {"speed_kmh": 25.0, "detour": 1.4, "overhead_s": 600}
+}
+
+# Largest matrix each upstream provider accepts in one request
+PROVIDER_ELEMENT_LIMITS = {
+    "google": {"origins": 25, "destinations": 25, "elements": 100},
+    "tomtom": {"origins": 100, "destinations": 100, "elements": 200}
+}
+
+Coordinates = Tuple[float, float]  # (latitude, longitude)
+
+def haversine_matrix(origin_coords: List[Coordinates], destination_coords: List[Coordinates]) -> np.ndarray:
+    """Great-circle distances in meters between every origin and destination."""
+    origins = np.radians(np.asarray(origin_coords, dtype=float).reshape(-1, 2))
+    destinations = np.radians(np.asarray(destination_coords, dtype=float).reshape(-1, 2))
+    
+    origin_lat = origins[:, 0][:, None]
+    destination_lat = destinations[:, 0][None, :]
+    delta_lat = destination_lat - origin_lat
+    delta_lon = destinations[:, 1][None, :] - origins[:, 1][:, None]
+    
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(origin_lat) * np.cos(destination_lat) * np.sin(delta_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def estimate_travel(origin_coords: List[Coordinates], destination_coords: List[Coordinates],
+                    mode: str = "driving") -> Tuple[np.ndarray, np.ndarray]:
+    """Estimate road distance (meters) and duration (seconds) matrices from coordinates."""
+    profile = MODE_PROFILES.get(mode, MODE_PROFILES["driving"])
+    distances = haversine_matrix(origin_coords, destination_coords) * profile["detour"]
+    durations = distances / (profile["speed_kmh"] / 3.6) + profile["overhead_s"]
+    
+    # Staying put costs nothing
+    durations[distances == 0] = 0
+    return distances, durations
+
+def _element(origin: str, destination: str, distance_m: float, duration_s: float, source: str) -> Dict[str, Any]:
+    return {
+        "origin": origin,
+        "destination": destination,
+        "distance": {
+            "value": int(round(distance_m)),  # meters
+            "text": f"{distance_m / 1000:.1f} km"
+        },
+        "duration": {
+            "value": int(round(duration_s)),  # seconds
+            "text": f"{int(duration_s // 60)} mins"
+        },
+        "source": source
+    }
+
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+class DistanceEngine:
+    """Local distance matrix with a symmetric pair cache.
+    
+    This class handles:
+    1. Vectorized haversine estimates for any set of coordinates
+    2. Caching provider answers per (mode, place, place), shared by both directions
+    3. Asking the provider only for uncached pairs, split to its element limits
+    """
+    
+    def __init__(self):
+        self.pairs = {}  # (mode, place, place) -> (distance_m, duration_s, provider)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(mode: str, origin: str, destination: str) -> Tuple[str, str, str]:
+        a, b = normalize_address(origin), normalize_address(destination)
+        return (mode, a, b) if a <= b else (mode, b, a)
+    
+    def cached_pair(self, origin: str, destination: str, mode: str = "driving") -> Optional[Tuple[float, float, str]]:
+        """Return a cached (distance, duration, provider) for a pair in either direction."""
+        return self.pairs.get(self._key(mode, origin, destination))
+    
+    def store_pair(self, origin: str, destination: str, mode: str,
+                   distance_m: float, duration_s: float, provider: str) -> None:
+        with self._lock:
+            self.pairs[self._key(mode, origin, destination)] = (distance_m, duration_s, provider)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self.pairs.clear()
+    
+    def _fetch_missing(self, missing: List[Tuple[str, str]], mode: str,
+                       fetch: Callable[[List[str], List[str]], Dict[str, Any]],
+                       limits: Dict[str, int]) -> int:
+        """Ask the provider for the missing pairs in blocks that fit its limits.
+        
+        Returns the number of upstream requests made.
+        """
+        rows = sorted({origin for origin, _ in missing})
+        columns = sorted({destination for _, destination in missing})
+        missing_set = set(missing)
+        
+        row_size = min(limits["origins"], len(rows), limits["elements"])
+        column_size = min(limits["destinations"], len(columns), max(1, limits["elements"] // row_size))
+        
+        requests_made = 0
+        for row_chunk in _chunks(rows, row_size):
+            for column_chunk in _chunks(columns, column_size):
+                # Skip blocks whose pairs were all answered by an earlier block
+                if not any((o, d) in missing_set and not self.cached_pair(o, d, mode)
+                           for o in row_chunk for d in column_chunk):
+                    continue
+                
+                requests_made += 1
+                result = fetch(row_chunk, column_chunk)
+                if result.get("status") != "success":
+                    logger.warning(f"Upstream distance matrix failed, using estimates: {result.get('message')}")
+                    continue
+                
+                provider = result["data"].get("provider", "upstream")
+                for element in result["data"].get("results", []):
+                    if "distance" in element and "duration" in element:
+                        self.store_pair(element["origin"], element["destination"], mode,
+                                        element["distance"]["value"], element["duration"]["value"], provider)
+        return requests_made
+    
+    def matrix(self, origins: List[str], destinations: List[str], locate: Callable[[str], Coordinates],
+               mode: str = "driving", fetch: Callable[[List[str], List[str]], Dict[str, Any]] = None,
+               limits: Dict[str, int] = None, provider: str = "Local") -> Dict[str, Any]:
+        """Build an origins x destinations matrix.
+        
+        Cached provider answers are used where present. If fetch is given, the
+        remaining pairs are requested upstream; anything still unknown is filled
+        in with local estimates. locate(place) gives a place's coordinates and
+        is only called for places in pairs that need an estimate.
+        """
+        requests_made = 0
+        if fetch is not None:
+            # One entry per unordered pair: A->B also answers B->A
+            missing = list({
+                self._key(mode, o, d): (o, d) for o in reversed(origins) for d in reversed(destinations)
+                if normalize_address(o) != normalize_address(d) and not self.cached_pair(o, d, mode)
+            }.values())
+            if missing:
+                requests_made = self._fetch_missing(missing, mode, fetch, limits or PROVIDER_ELEMENT_LIMITS["google"])
+        
+        answered = [[self.cached_pair(origin, destination, mode) for destination in destinations] for origin in origins]
+        
+        # Estimate only the rows and columns that still have unanswered pairs
+        rows = [i for i in range(len(origins)) if not all(answered[i])]
+        columns = [j for j in range(len(destinations)) if any(not answered[i][j] for i in rows)]
+        estimates = {}
+        if rows:
+            places = {place: None for place in [origins[i] for i in rows] + [destinations[j] for j in columns]}
+            for place in places:
+                places[place] = locate(place)
+            distances, durations = estimate_travel(
+                [places[origins[i]] for i in rows], [places[destinations[j]] for j in columns], mode
+            )
+            estimates = {(i, j): (distances[r, c], durations[r, c])
+                         for r, i in enumerate(rows) for c, j in enumerate(columns)}
+        
+        results = []
+        provider_results = 0
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                cached = answered[i][j]
+                if cached:
+                    provider_results += 1
+                    results.append(_element(origin, destination, cached[0], cached[1], cached[2]))
+                else:
+                    results.append(_element(origin, destination, *estimates[(i, j)], "estimate"))
+        
+        return {
+            "provider": provider,
+            "origins": origins,
+            "destinations": destinations,
+            "mode": mode,
+            "upstream_requests": requests_made,
+            "provider_results": provider_results,
+            "results": results
+        }
+
+# Create a global instance of the distance engine
+distance_engine = DistanceEngine()
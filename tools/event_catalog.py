@@ -0,0 +1,225 @@
+import time
+import logging
+import datetime
+import threading
+from typing import Dict, List, Any, Union
+
+from rate_limiter import quota_manager, meters_own_calls, QuotaExceeded
+from tools.tool_registry import tool_registry
+from tools.events_tools import search_events, is_indoor_event
+from tools.geocoding import GeoGrid, Point, normalize_address, resolve_point
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("event_catalog")
+
+DEFAULT_RADIUS_KM = 3.0
+CATALOG_TTL = 3600  # seconds before a fetched date range is asked for again
+
+Moment = Union[str, datetime.datetime, datetime.date]
+
+def _to_datetime(moment: Moment, end_of_day: bool = False) -> datetime.datetime:
+    """Parse an ISO date or datetime; a bare date means its start (or end) of day."""
+    if isinstance(moment, datetime.datetime):
+        return moment
+    if isinstance(moment, datetime.date):
+        moment = moment.isoformat()
+    if len(moment) == 10:
+        day = datetime.datetime.fromisoformat(moment)
+        return day + datetime.timedelta(days=1) if end_of_day else day
+    return datetime.datetime.fromisoformat(moment)
+
+def category_tokens(category: str) -> List[str]:
+    """Words of a category, so "film" finds "Film & Media"."""
+    return normalize_address(category or "").split()
+
+class EventCatalog:
+    """In-memory event catalog answering planner queries without a provider round trip.
+    
+    This class handles:
+    1. Incremental ingestion of provider results, re-indexing events that changed
+    2. A per-day interval index over start/end times and a category inverted index
+    3. Indoor/outdoor flags computed once and a lat/lng grid for "near X" queries
+    4. A location index, so one city's query never returns another city's events
+    """
+    
+    def __init__(self, ttl: float = CATALOG_TTL):
+        self.ttl = ttl
+        self.events = {}  # id -> (event, start, end)
+        self.by_day = {}  # date -> ids of events running that day
+        self.by_category = {}  # category token -> ids
+        self.grid = GeoGrid()
+        self.indoor = set()
+        self.by_location = {}  # lower-cased location they were fetched for -> ids
+        self.fetched = []  # (location, provider, start, end, fetched_at) ranges already ingested
+        self._lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return len(self.events)
+    
+    def _days(self, start: datetime.datetime, end: datetime.datetime) -> List[datetime.date]:
+        last = (end - datetime.timedelta(microseconds=1)).date() if end > start else start.date()
+        return [start.date() + datetime.timedelta(days=i) for i in range((last - start.date()).days + 1)]
+    
+    def _unindex(self, event_id: str) -> None:
+        event, start, end = self.events.pop(event_id)
+        for day in self._days(start, end):
+            self.by_day[day].discard(event_id)
+        for token in category_tokens(event.get("category")):
+            self.by_category[token].discard(event_id)
+        self.grid.remove(event_id)
+        self.indoor.discard(event_id)
+    
+    def add(self, event: Dict[str, Any]) -> None:
+        """Insert or replace one event (provider format from search_events)."""
+        event_id = event["id"]
+        start = _to_datetime(event["start_time"])
+        end = _to_datetime(event["end_time"]) if event.get("end_time") else start
+        venue = event.get("venue") or {}
+        if "is_indoor" not in event:
+            event = {**event, "is_indoor": is_indoor_event(event.get("category", ""), venue.get("name", ""))}
+        
+        with self._lock:
+            if event_id in self.events:
+                self._unindex(event_id)
+            self.events[event_id] = (event, start, end)
+            for day in self._days(start, end):
+                self.by_day.setdefault(day, set()).add(event_id)
+            for token in category_tokens(event.get("category")):
+                self.by_category.setdefault(token, set()).add(event_id)
+            self.grid.add(event_id, venue.get("latitude"), venue.get("longitude"))
+            if event["is_indoor"]:
+                self.indoor.add(event_id)
+    
+    def ingest(self, events: List[Dict[str, Any]], location: str = None) -> int:
+        """Add every well-formed event, returning how many went in; malformed ones are skipped with a warning.
+        
+        With location the events are also filed under the location they were fetched for.
+        """
+        count = 0
+        for event in events:
+            try:
+                self.add(event)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping malformed event {event.get('id') if isinstance(event, dict) else event!r}: {e!r}")
+                continue
+            if location:
+                with self._lock:
+                    self.by_location.setdefault(location.lower(), set()).add(event["id"])
+            count += 1
+        return count
+    
+    def _covered(self, location: str, provider: str, start: datetime.datetime, end: datetime.datetime) -> bool:
+        now = time.time()
+        return any(
+            loc == location and prov == provider and fetched_start <= start and end <= fetched_end and now - fetched_at < self.ttl
+            for loc, prov, fetched_start, fetched_end, fetched_at in self.fetched
+        )
+    
+    def ensure(self, location: str, start_date: str = None, end_date: str = None, provider: str = "eventbrite") -> None:
+        """Pull events for a date range from the provider unless a recent fetch already covers it.
+        
+        Without quota for the provider the catalog keeps serving what it has
+        and the next call tries again.
+        """
+        start = _to_datetime(start_date) if start_date else datetime.datetime.combine(datetime.date.today(), datetime.time())
+        end = _to_datetime(end_date, end_of_day=True) if end_date else start + datetime.timedelta(days=30)
+        key = location.lower(), provider.lower()
+        if self._covered(*key, start, end):
+            return
+        try:
+            quota_manager.acquire(provider)
+        except QuotaExceeded as e:
+            logger.warning(f"Not refreshing {provider} events for {location}: {e}")
+            return
+        
+        result = search_events(location, start_date=start.date().isoformat(),
+                               end_date=(end - datetime.timedelta(microseconds=1)).date().isoformat(), provider=provider)
+        count = self.ingest(result.get("data", {}).get("events", []), location=location)
+        with self._lock:
+            self.fetched = [entry for entry in self.fetched if time.time() - entry[4] < self.ttl]
+            self.fetched.append((*key, start, end, time.time()))
+        logger.info(f"Ingested {count} events for {location} ({len(self.events)} in catalog)")
+    
+    def query(self, start: Moment = None, end: Moment = None, category: str = None, indoor: bool = None,
+              near: Union[str, Point] = None, radius_km: float = DEFAULT_RADIUS_KM,
+              limit: int = None, location: str = None) -> List[Dict[str, Any]]:
+        """Events overlapping [start, end) that match every given filter, soonest first.
+        
+        A start without an end covers one day. near is a (lat, lng) pair or a
+        landmark name; events without venue coordinates never match it. With
+        location only events fetched for it match.
+        """
+        with self._lock:
+            if not self.events:
+                return []
+            candidates = None
+            if location:
+                candidates = set(self.by_location.get(location.lower(), set()))
+            
+            if start is not None or end is not None:
+                start_dt = _to_datetime(start) if start is not None else min(s for _, s, _ in self.events.values())
+                end_dt = _to_datetime(end, end_of_day=True) if end is not None else start_dt + datetime.timedelta(days=1)
+                running = set()
+                for day in self._days(start_dt, end_dt):
+                    running |= self.by_day.get(day, set())
+                candidates = {
+                    event_id for event_id in (running if candidates is None else candidates & running)
+                    if self.events[event_id][1] < end_dt and (self.events[event_id][2] > start_dt or self.events[event_id][1] >= start_dt)
+                }
+            
+            if category:
+                for token in category_tokens(category):
+                    matches = self.by_category.get(token, set())
+                    candidates = set(matches) if candidates is None else candidates & matches
+            
+            if indoor is not None:
+                if candidates is None:
+                    candidates = set(self.events)
+                candidates = candidates & self.indoor if indoor else candidates - self.indoor
+            
+            if near is not None:
+                point = resolve_point(near)
+                if point is None:
+                    logger.warning(f"Unknown place '{near}', ignoring the location filter")
+                else:
+                    nearby = set(self.grid.near(point, radius_km))
+                    candidates = nearby if candidates is None else candidates & nearby
+            
+            if candidates is None:
+                candidates = self.events.keys()
+            ordered = sorted(candidates, key=lambda event_id: (self.events[event_id][1], event_id))
+            return [self.events[event_id][0] for event_id in ordered[:limit]]
+
+@meters_own_calls
+def find_events(location: str, start_time: str = None, end_time: str = None, category: str = None,
+                indoor: bool = None, near: str = None, radius_km: float = DEFAULT_RADIUS_KM,
+                provider: str = "eventbrite") -> Dict[str, Any]:
+    """Search the local event catalog, filling it from the provider when needed."""
+    start_date = _to_datetime(start_time).date().isoformat() if start_time else None
+    end_date = _to_datetime(end_time).date().isoformat() if end_time else None
+    event_catalog.ensure(location, start_date, end_date, provider)
+    events = event_catalog.query(start_time, end_time, category=category, indoor=indoor, near=near, radius_km=radius_km,
+                                 location=location)
+    return {
+        "status": "success",
+        "data": {
+            "provider": "catalog",
+            "location": location,
+            "category": category,
+            "start_time": start_time,
+            "end_time": end_time,
+            "events": events
+        }
+    }
+
+# Create a global instance of the event catalog
+event_catalog = EventCatalog()
+
+tool_registry.register_tool(
+    tool_name="find_events",
+    tool_function=find_events,
+    category="events",
+    description="Find events by time range, category, indoor/outdoor and proximity from the local catalog",
+    required_params=["location"],
+    optional_params=["start_time", "end_time", "category", "indoor", "near", "radius_km", "provider"]
+)
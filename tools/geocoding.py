@@ -0,0 +1,248 @@
+import os
+import re
+import math
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("geocoding")
+
+GRID_CELL_DEGREES = 0.01  # about 1.1 km of latitude per spatial grid cell
+MIN_LANDMARK_PREFIX = 4  # characters a short landmark name needs before it is matched as a prefix
+
+Point = Tuple[float, float]  # (latitude, longitude)
+
+# Where resolved addresses are persisted between runs
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", "geocode_cache.db")
+
+# Bundled Dubai landmarks. Order matters: when an address mentions several
+# landmarks the earliest entry wins, so more specific names come first.
+DUBAI_GAZETTEER = {
+    "burj khalifa": {"latitude": 25.197197, "longitude": 55.274376, "formatted": "Burj Khalifa, Downtown Dubai"},
+    "dubai mall": {"latitude": 25.198765, "longitude": 55.279503, "formatted": "Dubai Mall, Downtown Dubai"},
+    "palm jumeirah": {"latitude": 25.112350, "longitude": 55.138379, "formatted": "Palm Jumeirah, Dubai"},
+    "dubai marina": {"latitude": 25.080105, "longitude": 55.133860, "formatted": "Dubai Marina, Dubai"},
+    "dubai airport": {"latitude": 25.252777, "longitude": 55.364445, "formatted": "Dubai International Airport (DXB)"},
+    "dubai museum": {"latitude": 25.263395, "longitude": 55.297371, "formatted": "Dubai Museum, Al Fahidi Historical District"},
+    "al marmoom": {"latitude": 24.826313, "longitude": 55.277814, "formatted": "Al Marmoom Desert Conservation Reserve, Dubai"},
+    "dubai international airport": {"latitude": 25.252777, "longitude": 55.364445, "formatted": "Dubai International Airport (DXB)"},
+    "burj al arab": {"latitude": 25.141291, "longitude": 55.185349, "formatted": "Burj Al Arab, Umm Suqeim, Dubai"},
+    "jumeirah al qasr": {"latitude": 25.131700, "longitude": 55.185300, "formatted": "Jumeirah Al Qasr, Madinat Jumeirah, Dubai"},
+    "jumeirah mosque": {"latitude": 25.233900, "longitude": 55.265600, "formatted": "Jumeirah Mosque, Jumeirah 1, Dubai"},
+    "atlantis": {"latitude": 25.130400, "longitude": 55.117100, "formatted": "Atlantis, The Palm, Dubai"},
+    "al fahidi": {"latitude": 25.263700, "longitude": 55.299800, "formatted": "Al Fahidi Historical District, Bur Dubai"},
+    "spice souk": {"latitude": 25.268600, "longitude": 55.297900, "formatted": "Spice Souk, Deira, Dubai"},
+    "gold souk": {"latitude": 25.269700, "longitude": 55.296300, "formatted": "Gold Souk, Deira, Dubai"},
+    "dubai creek": {"latitude": 25.255000, "longitude": 55.330000, "formatted": "Dubai Creek, Dubai"},
+    "dubai frame": {"latitude": 25.235500, "longitude": 55.300300, "formatted": "Dubai Frame, Zabeel Park, Dubai"},
+    "museum of the future": {"latitude": 25.219200, "longitude": 55.281600, "formatted": "Museum of the Future, Sheikh Zayed Road, Dubai"},
+    "global village": {"latitude": 25.070900, "longitude": 55.307900, "formatted": "Global Village, Dubailand, Dubai"},
+    "desert conservation reserve": {"latitude": 24.820000, "longitude": 55.720000, "formatted": "Dubai Desert Conservation Reserve, Dubai"},
+    "downtown dubai": {"latitude": 25.194500, "longitude": 55.278000, "formatted": "Downtown Dubai, Dubai"},
+    "deira": {"latitude": 25.271100, "longitude": 55.307500, "formatted": "Deira, Dubai"},
+    "jumeirah": {"latitude": 25.210000, "longitude": 55.250000, "formatted": "Jumeirah, Dubai"}
+}
+
+def normalize_address(address: str) -> str:
+    """Lowercase an address and collapse punctuation and whitespace."""
+    return " ".join(re.findall(r"[a-z0-9]+", address.lower()))
+
+class LandmarkIndex:
+    """Token index over a gazetteer for fast "which landmark is this?" lookups.
+    
+    Each landmark is filed under its rarest token, so an address only has to
+    be checked against landmarks that share that token instead of the whole
+    gazetteer.
+    """
+    def __init__(self, gazetteer: Dict[str, Dict[str, Any]]):
+        self.gazetteer = gazetteer
+        self.order = {key: i for i, key in enumerate(gazetteer)}
+        self.by_token = {}
+        
+        token_counts = {}
+        for key in gazetteer:
+            for token in key.split():
+                token_counts[token] = token_counts.get(token, 0) + 1
+        
+        for key in gazetteer:
+            rarest = min(key.split(), key=lambda token: token_counts[token])
+            self.by_token.setdefault(rarest, []).append(key)
+    
+    def lookup(self, address: str) -> Optional[str]:
+        """Return the gazetteer key mentioned in the address, or None."""
+        normalized = f" {normalize_address(address)} "
+        best = None
+        for token in set(normalized.split()):
+            for key in self.by_token.get(token, ()):
+                # Confirm the whole phrase is present, not just its rarest token
+                if f" {key} " in normalized and (best is None or self.order[key] < self.order[best]):
+                    best = key
+        return best
+
+class GeocodeCache:
+    """Two-level cache of normalized address -> coordinates.
+    
+    Hits are served from an in-memory dict; everything is also written to a
+    SQLite file (WAL mode, memory-mapped reads) so resolved addresses survive
+    restarts and are shared between worker processes.
+    """
+    def __init__(self, path: str = GEOCODE_CACHE_PATH):
+        self.path = path
+        self.memory = {}
+        self._lock = threading.Lock()
+        self._connection = None
+        self._opened = False
+    
+    def _open(self) -> Optional[sqlite3.Connection]:
+        """Open the SQLite store on first use; fall back to memory only if that fails."""
+        if self._opened:
+            return self._connection
+        
+        with self._lock:
+            if not self._opened:
+                try:
+                    connection = sqlite3.connect(self.path, check_same_thread=False)
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.execute("PRAGMA mmap_size=67108864")
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS geocodes ("
+                        "address TEXT PRIMARY KEY, provider TEXT, formatted_address TEXT, "
+                        "latitude REAL, longitude REAL, place_id TEXT, updated_at REAL)"
+                    )
+                    connection.commit()
+                    self._connection = connection
+                except sqlite3.Error as e:
+                    logger.error(f"Geocode cache unavailable at {self.path}, using memory only: {e}")
+                self._opened = True
+        return self._connection
+    
+    def get(self, address: str) -> Optional[Dict[str, Any]]:
+        """Return cached geocode data for an address, or None."""
+        key = normalize_address(address)
+        hit = self.memory.get(key)
+        connection = self._open()
+        if hit is not None or connection is None:
+            return hit
+        
+        with self._lock:
+            row = connection.execute(
+                "SELECT provider, formatted_address, latitude, longitude, place_id "
+                "FROM geocodes WHERE address = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        
+        hit = {
+            "provider": row[0],
+            "formatted_address": row[1],
+            "latitude": row[2],
+            "longitude": row[3],
+            "place_id": row[4]
+        }
+        self.memory[key] = hit
+        return hit
+    
+    def get_many(self, addresses: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return cached geocode data for every address that has some."""
+        return {address: hit for address in addresses for hit in [self.get(address)] if hit is not None}
+    
+    def put(self, address: str, geocode_data: Dict[str, Any]) -> None:
+        """Store a successful geocode result."""
+        key = normalize_address(address)
+        entry = {
+            "provider": geocode_data.get("provider"),
+            "formatted_address": geocode_data.get("formatted_address"),
+            "latitude": geocode_data["latitude"],
+            "longitude": geocode_data["longitude"],
+            "place_id": geocode_data.get("place_id", "")
+        }
+        self.memory[key] = entry
+        
+        connection = self._open()
+        if connection is None:
+            return
+        with self._lock:
+            connection.execute(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, entry["provider"], entry["formatted_address"], entry["latitude"],
+                 entry["longitude"], entry["place_id"], time.time())
+            )
+            connection.commit()
+
+def haversine_km(a: Point, b: Point) -> float:
+    """Great-circle distance between two points in kilometres."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 12742.0 * math.asin(math.sqrt(min(h, 1.0)))
+
+class GeoGrid:
+    """Fixed-size lat/lng cells mapping to the ids located in them.
+    
+    A radius query only looks at the cells its bounding box touches and then
+    checks the exact distance, so cost follows local density rather than the
+    size of the catalog.
+    """
+    def __init__(self, cell_degrees: float = GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells = {}  # (lat cell, lng cell) -> {id: point}
+        self.points = {}  # id -> point
+    
+    def _cell(self, point: Point) -> Tuple[int, int]:
+        return int(math.floor(point[0] / self.cell_degrees)), int(math.floor(point[1] / self.cell_degrees))
+    
+    def add(self, item_id: str, latitude: Any, longitude: Any) -> None:
+        self.remove(item_id)
+        if latitude is None or longitude is None:
+            return
+        point = (float(latitude), float(longitude))
+        self.points[item_id] = point
+        self.cells.setdefault(self._cell(point), {})[item_id] = point
+    
+    def remove(self, item_id: str) -> None:
+        point = self.points.pop(item_id, None)
+        if point is not None:
+            self.cells[self._cell(point)].pop(item_id, None)
+    
+    def near(self, point: Point, radius_km: float) -> Dict[str, float]:
+        """ids within radius_km of point, with their distance in km."""
+        reach = int(math.ceil(radius_km / (111.0 * self.cell_degrees)))
+        # Longitude cells shrink with latitude, so widen the search box to match
+        lng_reach = int(math.ceil(reach / max(math.cos(math.radians(point[0])), 0.01)))
+        row, col = self._cell(point)
+        found = {}
+        for r in range(row - reach, row + reach + 1):
+            for c in range(col - lng_reach, col + lng_reach + 1):
+                for item_id, item_point in self.cells.get((r, c), {}).items():
+                    distance = haversine_km(point, item_point)
+                    if distance <= radius_km:
+                        found[item_id] = distance
+        return found
+
+def resolve_point(near: Union[str, Point, None]) -> Optional[Point]:
+    """Coordinates for a (lat, lng) pair or a known landmark name like "Downtown".
+    
+    None when nothing is given, e.g. an empty query parameter, or the name is
+    unknown or could be more than one landmark.
+    """
+    if near is None or isinstance(near, (tuple, list)):
+        return tuple(near) if near is not None else None
+    normalized = normalize_address(near)
+    if not normalized:
+        return None
+    key = landmark_index.lookup(near)
+    if key is None and len(normalized) >= MIN_LANDMARK_PREFIX:
+        # Short names like "Downtown" are the leading words of exactly one gazetteer entry
+        tokens = normalized.split()
+        matches = [name for name in DUBAI_GAZETTEER if name.split()[:len(tokens)] == tokens]
+        key = matches[0] if len(matches) == 1 else None
+    if key is None:
+        return None
+    location = DUBAI_GAZETTEER[key]
+    return location["latitude"], location["longitude"]
+
+# Shared instances used by the mapping tools
+landmark_index = LandmarkIndex(DUBAI_GAZETTEER)
+geocode_cache = GeocodeCache()
@@ -0,0 +1,138 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("local_info_bundle")
+
+DEFAULT_LANGUAGE = "en"
+BUNDLE_FORMAT = 1
+
+def base_language(language: Optional[str]) -> str:
+    """"en-US" -> "en"; the first entry of an Accept-Language header is used."""
+    language = (language or "").split(",")[0].split(";")[0].strip().lower()
+    return language.split("-")[0] or DEFAULT_LANGUAGE
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+def _etag(payload: bytes) -> str:
+    return '"' + hashlib.sha256(payload).hexdigest()[:20] + '"'
+
+class LocalInfoBundle:
+    """Immutable, versioned local information content.
+    
+    This class handles:
+    1. Holding every section (cultural, practical, emergency, customs) per language
+    2. O(1) section / topic lookups returning the stored content
+    3. Caching the JSON encoding and ETag of each (section, topic, language)
+    
+    Content is compiled once, so looked-up data is shared and must be
+    treated as read-only.
+    """
+    
+    def __init__(self, content: Dict[str, Dict[str, Dict[str, Any]]]):
+        if DEFAULT_LANGUAGE not in content:
+            raise ValueError(f"Local info bundle needs '{DEFAULT_LANGUAGE}' content")
+        self._content = MappingProxyType({
+            language: MappingProxyType({section: topics for section, topics in sections.items()})
+            for language, sections in content.items()
+        })
+        self._topics = {
+            (language, section): tuple(topics)
+            for language, sections in content.items() for section, topics in sections.items()
+        }
+        self.version = hashlib.sha256(_encode(content)).hexdigest()[:16]
+        self._encoded = {}  # (section, topic, language) -> (json bytes, etag)
+        self._lock = threading.Lock()
+    
+    @property
+    def languages(self) -> List[str]:
+        return list(self._content)
+    
+    def sections(self, language: str = DEFAULT_LANGUAGE) -> List[str]:
+        return list(self._content[self.language(language)])
+    
+    def language(self, language: Optional[str]) -> str:
+        """The bundled language served for a requested one, falling back to the default."""
+        language = base_language(language)
+        return language if language in self._content else DEFAULT_LANGUAGE
+    
+    def topics(self, section: str, language: str = DEFAULT_LANGUAGE) -> Tuple[str, ...]:
+        return self._topics.get((self.language(language), section), ())
+    
+    def lookup(self, section: str, topic: str = None, language: str = DEFAULT_LANGUAGE) -> Dict[str, Any]:
+        """{topic: content} for a known topic, otherwise the whole section.
+        
+        Raises KeyError for an unknown section.
+        """
+        topics = self._content[self.language(language)][section]
+        if topic and topic.lower() in topics:
+            return {topic.lower(): topics[topic.lower()]}
+        return topics
+    
+    def encoded(self, section: str, topic: str = None, language: str = DEFAULT_LANGUAGE) -> Tuple[bytes, str]:
+        """(JSON bytes, ETag) of a lookup, encoded on first use and cached afterwards."""
+        language = self.language(language)
+        topic = topic.lower() if topic and topic.lower() in self._content[language].get(section, {}) else None
+        key = (section, topic, language)
+        cached = self._encoded.get(key)
+        if cached is None:
+            payload = _encode({
+                "status": "success",
+                "version": self.version,
+                "language": language,
+                "section": section,
+                "data": self.lookup(section, topic, language)
+            })
+            cached = (payload, _etag(payload))
+            with self._lock:
+                self._encoded[key] = cached
+        return cached
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": BUNDLE_FORMAT,
+            "version": self.version,
+            "content": {language: dict(sections) for language, sections in self._content.items()}
+        }
+    
+    def save(self, path: str) -> None:
+        """Write the compiled bundle so later processes can load it instead of compiling."""
+        with open(path, "wb") as bundle_file:
+            bundle_file.write(_encode(self.to_dict()))
+    
+    @classmethod
+    def load(cls, path: str) -> "LocalInfoBundle":
+        with open(path, "rb") as bundle_file:
+            data = json.loads(bundle_file.read())
+        if data.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"Unsupported local info bundle format {data.get('format')}")
+        bundle = cls(data["content"])
+        if bundle.version != data.get("version"):
+            raise ValueError(f"Local info bundle {path} does not match its version {data.get('version')}")
+        return bundle
+    
+    @classmethod
+    def compile(cls, sources: Dict[str, Callable[[], Dict[str, Any]]],
+                language: str = DEFAULT_LANGUAGE) -> "LocalInfoBundle":
+        """Build a bundle by calling each section's content source once."""
+        return cls({language: {section: source() for section, source in sources.items()}})
+
+def load_bundle(sources: Dict[str, Callable[[], Dict[str, Any]]], path: str = None) -> LocalInfoBundle:
+    """The bundle at path (LOCAL_INFO_BUNDLE by default) when it exists, otherwise compiled from sources."""
+    path = path or os.getenv("LOCAL_INFO_BUNDLE")
+    if path and os.path.exists(path):
+        try:
+            bundle = LocalInfoBundle.load(path)
+            logger.info(f"Loaded local info bundle {bundle.version} from {path}")
+            return bundle
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error loading local info bundle {path}: {e}")
+    bundle = LocalInfoBundle.compile(sources)
+    logger.info(f"Compiled local info bundle {bundle.version}")
+    return bundle
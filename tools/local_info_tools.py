@@ -5,6 +5,7 @@ from typing import Dict, List, Any, Optional
 import random
 
 from tools.tool_registry import tool_registry
+from tools.local_info_bundle import DEFAULT_LANGUAGE, load_bundle
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("local_info_tools")
@@ -12,125 +13,37 @@ logger = logging.getLogger("local_info_tools")
 # API keys would normally be stored in environment variables
 DUBAI_INFO_API_KEY = os.getenv("DUBAI_INFO_API_KEY", "your_dubai_info_api_key")
 
-def get_cultural_info(topic: str = None) -> Dict[str, Any]:
+def get_cultural_info(topic: str = None, language: str = DEFAULT_LANGUAGE) -> Dict[str, Any]:
     """Get cultural information about Dubai."""
-    url = "https://api.dubaiinfo.com/cultural"
-    
-    headers = {
-        "Authorization": f"Bearer {DUBAI_INFO_API_KEY}",
-        "Content-Type": "application/json"
+    return {
+        "status": "success",
+        "version": local_info_bundle.version,
+        "data": local_info_bundle.lookup("cultural", topic, language)
     }
-    
-    params = {}
-    if topic:
-        params["topic"] = topic
-    
-    try:
-        # This would be a real API call in a production environment
-        # response = requests.get(url, headers=headers, params=params)
-        # response.raise_for_status()
-        # data = response.json()
-        
-        return {
-            "status": "success",
-            "data": get_simulated_cultural_info(topic)
-        }
-    
-    except Exception as e:
-        logger.error(f"Error getting cultural information: {e}")
-        return {
-            "status": "error",
-            "message": str(e),
-            "data": get_simulated_cultural_info(topic)
-        }
 
-def get_practical_info(topic: str = None) -> Dict[str, Any]:
+def get_practical_info(topic: str = None, language: str = DEFAULT_LANGUAGE) -> Dict[str, Any]:
     """Get practical information about Dubai."""
-    url = "https://api.dubaiinfo.com/practical"
-    
-    headers = {
-        "Authorization": f"Bearer {DUBAI_INFO_API_KEY}",
-        "Content-Type": "application/json"
+    return {
+        "status": "success",
+        "version": local_info_bundle.version,
+        "data": local_info_bundle.lookup("practical", topic, language)
     }
-    
-    params = {}
-    if topic:
-        params["topic"] = topic
-    
-    try:
-        # This would be a real API call in a production environment
-        # response = requests.get(url, headers=headers, params=params)
-        # response.raise_for_status()
-        # data = response.json()
-        
-        return {
-            "status": "success",
-            "data": get_simulated_practical_info(topic)
-        }
-    
-    except Exception as e:
-        logger.error(f"Error getting practical information: {e}")
-        return {
-            "status": "error",
-            "message": str(e),
-            "data": get_simulated_practical_info(topic)
-        }
 
-def get_emergency_info() -> Dict[str, Any]:
+def get_emergency_info(language: str = DEFAULT_LANGUAGE) -> Dict[str, Any]:
     """Get emergency information for Dubai."""
-    url = "https://api.dubaiinfo.com/emergency"
-    
-    headers = {
-        "Authorization": f"Bearer {DUBAI_INFO_API_KEY}",
-        "Content-Type": "application/json"
+    return {
+        "status": "success",
+        "version": local_info_bundle.version,
+        "data": local_info_bundle.lookup("emergency", language=language)
     }
-    
-    try:
-        # This would be a real API call in a production environment
-        # response = requests.get(url, headers=headers)
-        # response.raise_for_status()
-        # data = response.json()
-        
-        return {
-            "status": "success",
-            "data": get_simulated_emergency_info()
-        }
-    
-    except Exception as e:
-        logger.error(f"Error getting emergency information: {e}")
-        return {
-            "status": "error",
-            "message": str(e),
-            "data": get_simulated_emergency_info()
-        }
 
-def get_local_customs() -> Dict[str, Any]:
+def get_local_customs(language: str = DEFAULT_LANGUAGE) -> Dict[str, Any]:
     """Get information about local customs and etiquette in Dubai."""
-    url = "https://api.dubaiinfo.com/customs"
-    
-    headers = {
-        "Authorization": f"Bearer {DUBAI_INFO_API_KEY}",
-        "Content-Type": "application/json"
+    return {
+        "status": "success",
+        "version": local_info_bundle.version,
+        "data": local_info_bundle.lookup("customs", language=language)
     }
-    
-    try:
-        # This would be a real API call in a production environment
-        # response = requests.get(url, headers=headers)
-        # response.raise_for_status()
-        # data = response.json()
-        
-        return {
-            "status": "success",
-            "data": get_simulated_local_customs()
-        }
-    
-    except Exception as e:
-        logger.error(f"Error getting local customs information: {e}")
-        return {
-            "status": "error",
-            "message": str(e),
-            "data": get_simulated_local_customs()
-        }
 
 def get_simulated_cultural_info(topic: str = None) -> Dict[str, Any]:
     """Generate simulated cultural information about Dubai for testing purposes."""
@@ -465,6 +378,17 @@ def get_simulated_local_customs() -> Dict[str, Any]:
         }
     }
 
+# Sections served from the local info bundle, compiled from these sources once at startup
+LOCAL_INFO_SOURCES = {
+    "cultural": get_simulated_cultural_info,
+    "practical": get_simulated_practical_info,
+    "emergency": get_simulated_emergency_info,
+    "customs": get_simulated_local_customs
+}
+
+# Create the global local info bundle
+local_info_bundle = load_bundle(LOCAL_INFO_SOURCES)
+
 # Register tools with the registry
 tool_registry.register_tool(
     tool_name="get_cultural_info",
@@ -472,7 +396,7 @@ tool_registry.register_tool(
     category="local_info",
     description="Get cultural information about Dubai",
     required_params=[],
-    optional_params=["topic"]
+    optional_params=["topic", "language"]
 )
 
 tool_registry.register_tool(
@@ -481,7 +405,7 @@ tool_registry.register_tool(
     category="local_info",
     description="Get practical information about Dubai",
     required_params=[],
-    optional_params=["topic"]
+    optional_params=["topic", "language"]
 )
 
 tool_registry.register_tool(
@@ -490,7 +414,7 @@ tool_registry.register_tool(
     category="local_info",
     description="Get emergency information for Dubai",
     required_params=[],
-    optional_params=[]
+    optional_params=["language"]
 )
 
 tool_registry.register_tool(
@@ -499,5 +423,5 @@ tool_registry.register_tool(
     category="local_info",
     description="Get information about local customs and etiquette in Dubai",
     required_params=[],
-    optional_params=[]
+    optional_params=["language"]
 )
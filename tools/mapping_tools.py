@@ -1,9 +1,14 @@
 import requests
 import logging
 import os
-from typing import Dict, List, Any, Optional
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 
+from rate_limiter import quota_manager, meters_own_calls, QuotaExceeded
 from tools.tool_registry import tool_registry
+from tools.geocoding import geocode_cache, landmark_index, normalize_address, DUBAI_GAZETTEER
+from tools.distance_engine import distance_engine, estimate_travel, PROVIDER_ELEMENT_LIMITS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("mapping_tools")
@@ -12,17 +17,86 @@ logger = logging.getLogger("mapping_tools")
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY", "your_google_maps_api_key")
 TOMTOM_API_KEY = os.getenv("TOMTOM_API_KEY", "your_tomtom_api_key")
 
+# Upper bound on concurrent upstream geocoding requests in a batch
+GEOCODE_CONCURRENCY = 8
+
 def geocode_location(address: str, provider: str = "google") -> Dict[str, Any]:
     """Convert an address to geographic coordinates."""
+    cached = geocode_cache.get(address)
+    if cached:
+        return {
+            "status": "success",
+            "data": {**cached, "address": address, "cached": True}
+        }
+    
     if provider.lower() == "google":
-        return geocode_google(address)
+        result = geocode_google(address)
     elif provider.lower() == "tomtom":
-        return geocode_tomtom(address)
+        result = geocode_tomtom(address)
     else:
         return {
             "status": "error",
             "message": f"Unknown provider: {provider}"
         }
+    
+    # Only real provider answers are cached; simulated fallbacks are not
+    if result["status"] == "success":
+        geocode_cache.put(address, result["data"])
+    return result
+
+def _geocode_upstream(address: str, provider: str) -> Dict[str, Any]:
+    try:
+        quota_manager.acquire(provider)
+    except QuotaExceeded as e:
+        return {"status": "error", "message": str(e), "data": get_simulated_geocode(address)}
+    return geocode_location(address, provider)
+
+@meters_own_calls
+def batch_geocode(addresses: List[str], provider: str = "google") -> Dict[str, Any]:
+    """Geocode many addresses, resolving cache hits locally and fetching misses concurrently."""
+    results = {}
+    misses = []
+    seen = set()
+    hits = 0
+    
+    for address in addresses:
+        cached = geocode_cache.get(address)
+        if cached:
+            results[address] = {"status": "success", "data": {**cached, "address": address, "cached": True}}
+            hits += 1
+            continue
+        
+        # Addresses that only differ in case/punctuation are fetched once
+        key = normalize_address(address)
+        if key not in seen:
+            seen.add(key)
+            misses.append(address)
+    
+    if misses:
+        # Every miss is one upstream request and takes its own token, charged to the caller's traveler
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=min(GEOCODE_CONCURRENCY, len(misses))) as executor:
+            answers = executor.map(lambda a: context.copy().run(_geocode_upstream, a, provider), misses)
+            for address, result in zip(misses, answers):
+                results[address] = result
+    
+    # Point duplicates at the result fetched for their normalized form
+    by_key = {normalize_address(address): result for address, result in results.items()}
+    for address in addresses:
+        if address not in results:
+            results[address] = by_key[normalize_address(address)]
+    
+    logger.info(f"Batch geocoded {len(addresses)} addresses: {hits} from cache, {len(misses)} upstream")
+    
+    return {
+        "status": "success",
+        "data": {
+            "provider": provider,
+            "cache_hits": hits,
+            "upstream_requests": len(misses),
+            "results": results
+        }
+    }
 
 def geocode_google(address: str) -> Dict[str, Any]:
     """Geocode an address using Google Maps API."""
@@ -116,18 +190,50 @@ def geocode_tomtom(address: str) -> Dict[str, Any]:
             "data": get_simulated_geocode(address)
         }
 
+def locate_place(place: str) -> Tuple[float, float]:
+    """Coordinates for a distance estimate, from the geocode cache or a simulated lookup; never upstream."""
+    geocode = geocode_cache.get(place) or get_simulated_geocode(place)
+    return geocode["latitude"], geocode["longitude"]
+
+@meters_own_calls
 def get_distance_matrix(origins: List[str], destinations: List[str], 
                        mode: str = "driving", provider: str = "google") -> Dict[str, Any]:
-    """Get distance and duration between multiple origins and destinations."""
-    if provider.lower() == "google":
-        return get_distance_matrix_google(origins, destinations, mode)
-    elif provider.lower() == "tomtom":
-        return get_distance_matrix_tomtom(origins, destinations, mode)
-    else:
+    """Get distance and duration between multiple origins and destinations.
+    
+    Pairs already answered by a provider are served from the local distance
+    engine; only uncached pairs go upstream. With provider "local" nothing is
+    requested and every pair is estimated from coordinates. Estimates use
+    cached or simulated coordinates, so nothing is geocoded upstream for them.
+    """
+    provider = provider.lower()
+    upstream = {
+        "google": get_distance_matrix_google,
+        "tomtom": get_distance_matrix_tomtom
+    }
+    if provider not in upstream and provider != "local":
         return {
             "status": "error",
             "message": f"Unknown provider: {provider}"
         }
+    
+    def fetch(chunk_origins: List[str], chunk_destinations: List[str]) -> Dict[str, Any]:
+        # Each block is one upstream request; without quota its pairs are estimated like a failed request
+        try:
+            quota_manager.acquire(provider)
+        except QuotaExceeded as e:
+            return {"status": "error", "message": str(e)}
+        return upstream[provider](chunk_origins, chunk_destinations, mode)
+    
+    matrix_data = distance_engine.matrix(
+        origins, destinations, locate_place, mode=mode, fetch=None if provider == "local" else fetch,
+        limits=PROVIDER_ELEMENT_LIMITS.get(provider),
+        provider="Local" if provider == "local" else provider.capitalize()
+    )
+    
+    return {
+        "status": "success",
+        "data": matrix_data
+    }
 
 def get_distance_matrix_google(origins: List[str], destinations: List[str], 
                               mode: str = "driving") -> Dict[str, Any]:
@@ -206,30 +312,11 @@ def get_distance_matrix_google(origins: List[str], destinations: List[str],
 def get_distance_matrix_tomtom(origins: List[str], destinations: List[str], 
                               mode: str = "car") -> Dict[str, Any]:
     """Get distance matrix using TomTom API."""
-    # TomTom requires coordinates, so we need to geocode addresses first
-    origin_coords = []
-    for origin in origins:
-        geocode_result = geocode_tomtom(origin)
-        if geocode_result["status"] == "success":
-            lat = geocode_result["data"]["latitude"]
-            lon = geocode_result["data"]["longitude"]
-            origin_coords.append(f"{lat},{lon}")
-        else:
-            # Use simulated coordinates if geocoding fails
-            sim_geocode = get_simulated_geocode(origin)
-            origin_coords.append(f"{sim_geocode['latitude']},{sim_geocode['longitude']}")
-    
-    destination_coords = []
-    for dest in destinations:
-        geocode_result = geocode_tomtom(dest)
-        if geocode_result["status"] == "success":
-            lat = geocode_result["data"]["latitude"]
-            lon = geocode_result["data"]["longitude"]
-            destination_coords.append(f"{lat},{lon}")
-        else:
-            # Use simulated coordinates if geocoding fails
-            sim_geocode = get_simulated_geocode(dest)
-            destination_coords.append(f"{sim_geocode['latitude']},{sim_geocode['longitude']}")
+    # TomTom requires coordinates, so we need to geocode addresses first.
+    # Failed lookups still carry simulated coordinates in their data.
+    geocodes = batch_geocode(origins + destinations, provider="tomtom")["data"]["results"]
+    origin_coords = [f"{geocodes[o]['data']['latitude']},{geocodes[o]['data']['longitude']}" for o in origins]
+    destination_coords = [f"{geocodes[d]['data']['latitude']},{geocodes[d]['data']['longitude']}" for d in destinations]
     
     # Map Google mode to TomTom mode
     mode_map = {
@@ -309,33 +396,22 @@ def get_simulated_geocode(address: str) -> Dict[str, Any]:
     # Dubai coordinates as default
     dubai_coords = {"latitude": 25.2048, "longitude": 55.2708}
     
-    # Specific locations in Dubai
-    dubai_locations = {
-        "burj khalifa": {"latitude": 25.197197, "longitude": 55.274376, "formatted": "Burj Khalifa, Downtown Dubai"},
-        "dubai mall": {"latitude": 25.198765, "longitude": 55.279503, "formatted": "Dubai Mall, Downtown Dubai"},
-        "palm jumeirah": {"latitude": 25.112350, "longitude": 55.138379, "formatted": "Palm Jumeirah, Dubai"},
-        "dubai marina": {"latitude": 25.080105, "longitude": 55.133860, "formatted": "Dubai Marina, Dubai"},
-        "dubai airport": {"latitude": 25.252777, "longitude": 55.364445, "formatted": "Dubai International Airport (DXB)"},
-        "dubai museum": {"latitude": 25.263395, "longitude": 55.297371, "formatted": "Dubai Museum, Al Fahidi Historical District"},
-        "al marmoom": {"latitude": 24.826313, "longitude": 55.277814, "formatted": "Al Marmoom Desert Conservation Reserve, Dubai"}
-    }
-    
     # Check if address contains any known location
-    address_lower = address.lower()
-    for key, location in dubai_locations.items():
-        if key in address_lower:
-            return {
-                "provider": "Simulated",
-                "address": address,
-                "formatted_address": location["formatted"],
-                "latitude": location["latitude"],
-                "longitude": location["longitude"],
-                "place_id": f"sim_{key.replace(' ', '_')}"
-            }
+    key = landmark_index.lookup(address)
+    if key:
+        location = DUBAI_GAZETTEER[key]
+        return {
+            "provider": "Simulated",
+            "address": address,
+            "formatted_address": location["formatted"],
+            "latitude": location["latitude"],
+            "longitude": location["longitude"],
+            "place_id": f"sim_{key.replace(' ', '_')}"
+        }
     
-    # Default to Dubai coordinates with slight variation
+    # Default to Dubai coordinates with slight variation, stable per address
     import random
-    variation = random.uniform(-0.02, 0.02)  # Small coordinate variation
+    variation = random.Random(normalize_address(address)).uniform(-0.02, 0.02)
     
     return {
         "provider": "Simulated",
@@ -348,7 +424,10 @@ def get_simulated_geocode(address: str) -> Dict[str, Any]:
 
 def get_simulated_distance_matrix(origins: List[str], destinations: List[str]) -> Dict[str, Any]:
     """Generate simulated distance matrix data for testing purposes."""
-    import random
+    # Estimates from simulated coordinates, so the same pair always gets the same answer
+    origin_coords = [(g["latitude"], g["longitude"]) for g in map(get_simulated_geocode, origins)]
+    destination_coords = [(g["latitude"], g["longitude"]) for g in map(get_simulated_geocode, destinations)]
+    distances, durations = estimate_travel(origin_coords, destination_coords, "driving")
     
     matrix_data = {
         "provider": "Simulated",
@@ -358,26 +437,18 @@ def get_simulated_distance_matrix(origins: List[str], destinations: List[str]) -
         "results": []
     }
     
-    for origin in origins:
-        for destination in destinations:
-            # Generate realistic distances within Dubai (5-30 km)
-            distance_km = random.uniform(5, 30)
-            distance_m = int(distance_km * 1000)
-            
-            # Generate realistic durations (roughly 2 mins per km plus traffic)
-            duration_mins = distance_km * 2 + random.uniform(5, 15)
-            duration_secs = int(duration_mins * 60)
-            
+    for i, origin in enumerate(origins):
+        for j, destination in enumerate(destinations):
             matrix_data["results"].append({
                 "origin": origin,
                 "destination": destination,
                 "distance": {
-                    "value": distance_m,
-                    "text": f"{distance_km:.1f} km"
+                    "value": int(distances[i, j]),
+                    "text": f"{distances[i, j] / 1000:.1f} km"
                 },
                 "duration": {
-                    "value": duration_secs,
-                    "text": f"{int(duration_mins)} mins"
+                    "value": int(durations[i, j]),
+                    "text": f"{int(durations[i, j] // 60)} mins"
                 }
             })
     
@@ -401,3 +472,12 @@ tool_registry.register_tool(
     required_params=["origins", "destinations"],
     optional_params=["mode", "provider"]
 )
+
+tool_registry.register_tool(
+    tool_name="batch_geocode",
+    tool_function=batch_geocode,
+    category="mapping",
+    description="Geocode many addresses at once, using the local cache and fetching only misses",
+    required_params=["addresses"],
+    optional_params=["provider"]
+)
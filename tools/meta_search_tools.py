@@ -0,0 +1,294 @@
+import re
+import time
+import inspect
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+from typing import Dict, List, Any, Optional, Callable, Iterator, Tuple
+
+from rate_limiter import quota_manager
+from tools.tool_registry import tool_registry
+from tools.booking_tools import (
+    search_hotels_booking, search_activities_viator,
+    get_simulated_hotels, get_simulated_activities
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("meta_search_tools")
+
+# Providers queried by the meta-search, each with its own deadline in seconds.
+# Provider functions take the same arguments as the search and return the
+# usual {"status": ..., "data": ...} dict.
+HOTEL_PROVIDERS = {
+    "booking": {"function": search_hotels_booking, "deadline": 5.0}
+}
+
+ACTIVITY_PROVIDERS = {
+    "viator": {"function": search_activities_viator, "deadline": 5.0}
+}
+
+# How long merged result lists are reused for pagination; only answers from every provider are kept
+SEARCH_CACHE_TTL = 15 * 60  # seconds
+DEFAULT_PAGE_SIZE = 10
+
+# Shared pool so concurrent searches don't each spin up their own threads
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="meta_search")
+
+_search_cache = {}  # cache key -> (stored at, merged items, provider statuses)
+_cache_lock = threading.Lock()
+
+def register_hotel_provider(name: str, function: Callable, deadline: float = 5.0) -> None:
+    """Add a hotel provider to the meta-search."""
+    HOTEL_PROVIDERS[name] = {"function": function, "deadline": deadline}
+
+def register_activity_provider(name: str, function: Callable, deadline: float = 5.0) -> None:
+    """Add an activity provider to the meta-search."""
+    ACTIVITY_PROVIDERS[name] = {"function": function, "deadline": deadline}
+
+def clear_search_cache() -> None:
+    """Drop all cached search results."""
+    with _cache_lock:
+        _search_cache.clear()
+
+def _normalize(text: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(text or "").lower()).strip()
+
+def _hotel_key(hotel: Dict[str, Any], location: str) -> Tuple[str, str]:
+    """Hotels are the same if their names match and they sit within ~100m."""
+    latitude, longitude = hotel.get("latitude"), hotel.get("longitude")
+    if latitude is not None and longitude is not None:
+        place = f"{round(float(latitude), 3)},{round(float(longitude), 3)}"
+    else:
+        place = _normalize(hotel.get("address") or hotel.get("city") or location)
+    return _normalize(hotel.get("name")), place
+
+def _activity_key(activity: Dict[str, Any], location: str) -> Tuple[str, str]:
+    return _normalize(activity.get("name")), _normalize(activity.get("location") or location)
+
+def _merge_item(merged: Dict[Tuple[str, str], Dict[str, Any]], key: Tuple[str, str],
+                item: Dict[str, Any], provider: str) -> None:
+    """Fold one provider's result into the merged list, keeping every offer."""
+    offer = {
+        "provider": provider,
+        "id": item.get("id"),
+        "price": item.get("price"),
+        "url": item.get("url") or item.get("booking_url")
+    }
+    
+    existing = merged.get(key)
+    if existing is None:
+        existing = dict(item)
+        existing["providers"] = [provider]
+        existing["offers"] = [offer]
+        merged[key] = existing
+        return
+    
+    existing["providers"].append(provider)
+    existing["offers"].append(offer)
+    
+    # Fill gaps from the new provider and keep the cheapest headline price
+    for field, value in item.items():
+        if existing.get(field) in (None, "", []):
+            existing[field] = value
+    new_price = (item.get("price") or {}).get("value")
+    current_price = (existing.get("price") or {}).get("value")
+    if new_price and (not current_price or new_price < current_price):
+        existing["price"] = item["price"]
+
+def _accepts_timeout(function: Callable) -> bool:
+    try:
+        return "timeout" in inspect.signature(function).parameters
+    except (TypeError, ValueError):
+        return False
+
+def _call_provider(name: str, function: Callable, deadline: float, args: tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Wait for the provider's quota, up to its deadline, then call it; QuotaExceeded is reported like any failure."""
+    quota_manager.acquire(name, deadline=deadline)
+    return function(*args, **kwargs)
+
+def _query_providers(providers: Dict[str, Dict[str, Any]], args: tuple) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Run every provider concurrently and yield (name, result) as each one answers.
+    
+    Providers that miss their own deadline are reported with a "timeout" status.
+    Calls still queued for a thread are cancelled; running ones were given the
+    deadline as their request timeout, so they cannot hold a thread much longer.
+    Time spent queueing for a provider's quota counts against its deadline.
+    """
+    start = time.monotonic()
+    futures = {}
+    for name, config in providers.items():
+        kwargs = {"timeout": config["deadline"]} if _accepts_timeout(config["function"]) else {}
+        future = _executor.submit(contextvars.copy_context().run, _call_provider, name, config["function"],
+                                  time.time() + config["deadline"], args, kwargs)
+        futures[future] = name
+    pending = set(futures.values())
+    overall_deadline = max((config["deadline"] for config in providers.values()), default=0)
+    
+    try:
+        for future in as_completed(futures, timeout=overall_deadline):
+            name = futures[future]
+            pending.discard(name)
+            elapsed = time.monotonic() - start
+            
+            if elapsed > providers[name]["deadline"]:
+                logger.warning(f"Provider {name} answered after its {providers[name]['deadline']}s deadline")
+                yield name, {"status": "timeout", "message": f"Answered after {elapsed:.2f}s"}
+                continue
+            
+            try:
+                yield name, future.result()
+            except Exception as e:
+                logger.error(f"Provider {name} failed: {e}")
+                yield name, {"status": "error", "message": str(e)}
+    except TimeoutError:
+        pass
+    finally:
+        for future, name in futures.items():
+            if name in pending:
+                future.cancel()
+    
+    for name in pending:
+        logger.warning(f"Provider {name} missed its deadline")
+        yield name, {"status": "timeout", "message": "No answer before deadline"}
+
+def _stream_search(cache_key: tuple, providers: Dict[str, Dict[str, Any]], args: tuple,
+                   items_field: str, key_function: Callable, location: str,
+                   fallback: Callable) -> Iterator[Dict[str, Any]]:
+    """Yield merged snapshots as providers answer, then cache the final list if every provider answered."""
+    with _cache_lock:
+        cached = _search_cache.get(cache_key)
+    if cached and time.time() - cached[0] < SEARCH_CACHE_TTL:
+        yield {"items": cached[1], "provider_status": cached[2], "complete": True, "cached": True}
+        return
+    
+    merged = {}
+    provider_status = {}
+    sent_complete = False
+    for name, result in _query_providers(providers, args):
+        provider_status[name] = result.get("status", "error")
+        
+        # Failed providers contribute nothing, so only successes produce a new snapshot
+        if result.get("status") == "success":
+            for item in result["data"].get(items_field, []):
+                _merge_item(merged, key_function(item, location), item, name)
+            sent_complete = len(provider_status) == len(providers)
+            yield {
+                "items": list(merged.values()),
+                "provider_status": dict(provider_status),
+                "complete": sent_complete,
+                "cached": False
+            }
+    
+    items = list(merged.values())
+    answered = len(provider_status) == len(providers) and all(status == "success" for status in provider_status.values())
+    if not items:
+        # Every provider failed: keep the old behaviour of serving simulated data
+        items = fallback()[items_field]
+        provider_status["simulated"] = "success"
+        sent_complete = False
+    if not sent_complete:
+        yield {"items": items, "provider_status": dict(provider_status), "complete": True, "cached": False}
+    
+    # Partial and simulated lists are not kept, so the next search asks the providers again
+    if answered and items:
+        with _cache_lock:
+            _search_cache[cache_key] = (time.time(), items, provider_status)
+
+def _page(items: List[Dict[str, Any]], page: int, page_size: int) -> Dict[str, Any]:
+    start = (max(page, 1) - 1) * page_size
+    return {
+        "page": max(page, 1),
+        "page_size": page_size,
+        "total_results": len(items),
+        "total_pages": (len(items) + page_size - 1) // page_size,
+        "results": items[start:start + page_size]
+    }
+
+def stream_hotel_search(location: str, check_in: str, check_out: str,
+                        guests: int = 2, rooms: int = 1) -> Iterator[Dict[str, Any]]:
+    """Yield merged hotel lists from all providers as each one answers."""
+    cache_key = ("hotels", _normalize(location), check_in, check_out, guests, rooms)
+    return _stream_search(
+        cache_key, HOTEL_PROVIDERS, (location, check_in, check_out, guests, rooms),
+        "hotels", _hotel_key, location,
+        lambda: get_simulated_hotels(location, check_in, check_out, guests, rooms)
+    )
+
+def stream_activity_search(location: str, date: str, category: str = None) -> Iterator[Dict[str, Any]]:
+    """Yield merged activity lists from all providers as each one answers."""
+    cache_key = ("activities", _normalize(location), date, _normalize(category))
+    return _stream_search(
+        cache_key, ACTIVITY_PROVIDERS, (location, date, category),
+        "activities", _activity_key, location,
+        lambda: get_simulated_activities(location, date, category)
+    )
+
+def meta_search_hotels(location: str, check_in: str, check_out: str, guests: int = 2,
+                       rooms: int = 1, page: int = 1, page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """Search hotels across all providers and return one page of merged results."""
+    final = None
+    for snapshot in stream_hotel_search(location, check_in, check_out, guests, rooms):
+        final = snapshot
+    
+    paged = _page(final["items"], page, page_size)
+    return {
+        "status": "success",
+        "data": {
+            "provider": "Meta-search",
+            "location": location,
+            "check_in": check_in,
+            "check_out": check_out,
+            "guests": guests,
+            "rooms": rooms,
+            "provider_status": final["provider_status"],
+            "cached": final["cached"],
+            "page": paged["page"],
+            "total_pages": paged["total_pages"],
+            "total_results": paged["total_results"],
+            "hotels": paged["results"]
+        }
+    }
+
+def meta_search_activities(location: str, date: str, category: str = None,
+                           page: int = 1, page_size: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """Search activities across all providers and return one page of merged results."""
+    final = None
+    for snapshot in stream_activity_search(location, date, category):
+        final = snapshot
+    
+    paged = _page(final["items"], page, page_size)
+    return {
+        "status": "success",
+        "data": {
+            "provider": "Meta-search",
+            "location": location,
+            "date": date,
+            "category": category,
+            "provider_status": final["provider_status"],
+            "cached": final["cached"],
+            "page": paged["page"],
+            "total_pages": paged["total_pages"],
+            "total_results": paged["total_results"],
+            "activities": paged["results"]
+        }
+    }
+
+# Register tools with the registry
+tool_registry.register_tool(
+    tool_name="meta_search_hotels",
+    tool_function=meta_search_hotels,
+    category="accommodation",
+    description="Search hotels across all booking providers concurrently, merged and paginated",
+    required_params=["location", "check_in", "check_out"],
+    optional_params=["guests", "rooms", "page", "page_size"]
+)
+
+tool_registry.register_tool(
+    tool_name="meta_search_activities",
+    tool_function=meta_search_activities,
+    category="attractions",
+    description="Search activities across all booking providers concurrently, merged and paginated",
+    required_params=["location", "date"],
+    optional_params=["category", "page", "page_size"]
+)
@@ -0,0 +1,276 @@
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Union
+
+from rate_limiter import quota_manager, meters_own_calls, QuotaExceeded
+from tools.tool_registry import tool_registry
+from tools.dining_tools import search_restaurants, check_restaurant_availability
+from tools.geocoding import GeoGrid, Point, normalize_address, resolve_point
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("restaurant_catalog")
+
+CATALOG_TTL = 3600  # seconds before a provider is asked for its restaurants again
+AVAILABILITY_TTL = 300  # seconds an availability answer is trusted
+AVAILABILITY_CONCURRENCY = 8  # upper bound on concurrent availability requests
+AVAILABILITY_POOL = 3  # availability is checked for this many times the requested limit, best ranked first
+DEFAULT_RADIUS_KM = 3.0
+
+def cuisines_of(restaurant: Dict[str, Any]) -> List[str]:
+    """Lower-cased cuisines from a "Seafood, Mediterranean" style field."""
+    return [cuisine.strip().lower() for cuisine in (restaurant.get("cuisine") or "").split(",") if cuisine.strip()]
+
+def price_tier(price_range: Any) -> int:
+    """Number of "$" signs, 0 when the provider gave none."""
+    return str(price_range or "").count("$")
+
+class AvailabilityChecker:
+    """Bulk, cached table availability lookups.
+    
+    Every restaurant for one (date, time, party_size) is asked concurrently,
+    and answers are reused for AVAILABILITY_TTL seconds so a follow-up
+    question does not ask again. Expired answers are evicted at most once
+    per TTL, so the cache only holds recent questions.
+    """
+    
+    def __init__(self, ttl: float = AVAILABILITY_TTL, concurrency: int = AVAILABILITY_CONCURRENCY):
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.cache = {}  # (provider, restaurant id, date, time, party size) -> (availability, checked_at)
+        self._evicted_at = time.time()
+        self._lock = threading.Lock()
+    
+    def _evict_expired(self, now: float) -> None:
+        with self._lock:
+            if now - self._evicted_at < self.ttl:
+                return
+            self._evicted_at = now
+            self.cache = {key: entry for key, entry in self.cache.items() if now - entry[1] < self.ttl}
+    
+    def check_many(self, restaurant_ids: List[str], date: str, time_slot: str, party_size: int,
+                   provider: str = "opentable") -> Dict[str, Dict[str, Any]]:
+        """Availability for each restaurant id; only uncached ids reach the provider.
+        
+        Each request takes a provider token; a restaurant refused one is
+        reported with an error and not cached, so a later question asks again.
+        """
+        now = time.time()
+        self._evict_expired(now)
+        results, misses = {}, []
+        for restaurant_id in dict.fromkeys(restaurant_ids):
+            cached = self.cache.get((provider, restaurant_id, date, time_slot, party_size))
+            if cached is not None and now - cached[1] < self.ttl:
+                results[restaurant_id] = cached[0]
+            else:
+                misses.append(restaurant_id)
+        
+        if misses:
+            refused = set()
+            
+            def check(restaurant_id: str) -> Dict[str, Any]:
+                try:
+                    quota_manager.acquire(provider)
+                except QuotaExceeded as e:
+                    refused.add(restaurant_id)
+                    return {"available": False, "error": str(e)}
+                result = check_restaurant_availability(restaurant_id, date, time_slot, party_size, provider=provider)
+                return result.get("data") or {"available": False, "error": result.get("message", "Unknown error")}
+            
+            # Each thread runs in a copy of the caller's context, so tokens are charged to the request's traveler
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(misses))) as executor:
+                answers = executor.map(lambda restaurant_id: context.copy().run(check, restaurant_id), misses)
+                for restaurant_id, availability in zip(misses, answers):
+                    results[restaurant_id] = availability
+                    if restaurant_id in refused:
+                        continue
+                    with self._lock:
+                        self.cache[(provider, restaurant_id, date, time_slot, party_size)] = (availability, time.time())
+            logger.info(f"Checked availability at {len(misses)} restaurants ({len(results) - len(misses)} cached)")
+        return results
+
+class RestaurantCatalog:
+    """Local restaurant catalog for cuisine / price / proximity queries.
+    
+    This class handles:
+    1. Incremental ingestion of provider search results
+    2. Cuisine and price-tier inverted indexes and a lat/lng grid
+    3. Ranking matches with bulk availability for a requested table
+    4. A location index, so one city's query never returns another city's restaurants
+    """
+    
+    def __init__(self, ttl: float = CATALOG_TTL, availability: AvailabilityChecker = None):
+        self.ttl = ttl
+        self.availability = availability or AvailabilityChecker()
+        self.restaurants = {}  # id -> restaurant
+        self.by_cuisine = {}  # cuisine -> ids
+        self.by_price = {}  # "$" count -> ids
+        self.grid = GeoGrid()
+        self.by_location = {}  # lower-cased location they were fetched for -> ids
+        self.fetched = {}  # (location, provider) -> time of last ingest
+        self._lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return len(self.restaurants)
+    
+    def _remove(self, restaurant_id: str) -> None:
+        restaurant = self.restaurants.pop(restaurant_id)
+        for cuisine in cuisines_of(restaurant):
+            self.by_cuisine[cuisine].discard(restaurant_id)
+        self.by_price[price_tier(restaurant.get("price_range"))].discard(restaurant_id)
+        self.grid.remove(restaurant_id)
+    
+    def add(self, restaurant: Dict[str, Any]) -> None:
+        """Insert or replace one restaurant (search_restaurants format)."""
+        restaurant_id = str(restaurant["id"])
+        with self._lock:
+            if restaurant_id in self.restaurants:
+                self._remove(restaurant_id)
+            self.restaurants[restaurant_id] = restaurant
+            for cuisine in cuisines_of(restaurant):
+                self.by_cuisine.setdefault(cuisine, set()).add(restaurant_id)
+            self.by_price.setdefault(price_tier(restaurant.get("price_range")), set()).add(restaurant_id)
+            self.grid.add(restaurant_id, restaurant.get("latitude"), restaurant.get("longitude"))
+    
+    def ingest(self, restaurants: List[Dict[str, Any]], location: str = None) -> int:
+        """Add restaurants, filed under the location they were fetched for when given."""
+        for restaurant in restaurants:
+            if restaurant.get("id") is not None:
+                self.add(restaurant)
+                if location:
+                    with self._lock:
+                        self.by_location.setdefault(location.lower(), set()).add(str(restaurant["id"]))
+        return len(restaurants)
+    
+    def in_location(self, location: str) -> List[Dict[str, Any]]:
+        """Every restaurant fetched for a location, safe to iterate while others ingest."""
+        with self._lock:
+            return [self.restaurants[restaurant_id] for restaurant_id in sorted(self.by_location.get(location.lower(), ()))]
+    
+    def ensure(self, location: str, provider: str = "zomato") -> None:
+        """Pull a provider's restaurants for a location unless they were ingested recently.
+        
+        Without quota for the provider the catalog keeps serving what it has
+        and the next call tries again.
+        """
+        key = (location.lower(), provider.lower())
+        if time.time() - self.fetched.get(key, 0) < self.ttl:
+            return
+        try:
+            quota_manager.acquire(provider)
+        except QuotaExceeded as e:
+            logger.warning(f"Not refreshing {provider} restaurants for {location}: {e}")
+            return
+        result = search_restaurants(location, provider=provider)
+        count = self.ingest(result.get("data", {}).get("restaurants", []), location=location)
+        self.fetched[key] = time.time()
+        logger.info(f"Ingested {count} restaurants from {provider} ({len(self.restaurants)} in catalog)")
+    
+    def cuisines_in(self, text: str) -> List[str]:
+        """Known cuisines mentioned in free text, e.g. a chat message."""
+        text = f" {normalize_address(text)} "
+        return [cuisine for cuisine in self.by_cuisine if f" {cuisine} " in text]
+    
+    def query(self, cuisine: str = None, max_price: Union[str, int] = None, near: Union[str, Point] = None,
+              radius_km: float = DEFAULT_RADIUS_KM, min_rating: float = None, date: str = None,
+              time_slot: str = None, party_size: int = None, limit: int = 10,
+              availability_provider: str = "opentable", location: str = None) -> List[Dict[str, Any]]:
+        """Restaurants matching every filter, best first.
+        
+        With date, time_slot and party_size the best AVAILABILITY_POOL times
+        limit matches are checked in one bulk availability call and bookable
+        tables rank first, then those offering another time; within each
+        group closer and better rated restaurants come first. With location
+        only restaurants fetched for it match.
+        """
+        with self._lock:
+            candidates = None
+            if location:
+                candidates = set(self.by_location.get(location.lower(), set()))
+            if cuisine:
+                serving = self.by_cuisine.get(cuisine.strip().lower(), set())
+                candidates = set(serving) if candidates is None else candidates & serving
+            if max_price is not None:
+                ceiling = max_price if isinstance(max_price, int) else price_tier(max_price)
+                affordable = set().union(*(ids for tier, ids in self.by_price.items() if tier <= ceiling))
+                candidates = affordable if candidates is None else candidates & affordable
+            
+            distances = {}
+            if near is not None:
+                point = resolve_point(near)
+                if point is None:
+                    logger.warning(f"Unknown place '{near}', ignoring the location filter")
+                else:
+                    distances = self.grid.near(point, radius_km)
+                    candidates = set(distances) if candidates is None else candidates & set(distances)
+            
+            if candidates is None:
+                candidates = set(self.restaurants)
+            if min_rating is not None:
+                candidates = {r for r in candidates if float(self.restaurants[r].get("rating") or 0) >= min_rating}
+            matches = {restaurant_id: self.restaurants[restaurant_id] for restaurant_id in candidates}
+        
+        def closeness(restaurant_id: str):
+            return (round(distances.get(restaurant_id, 0.0), 1), -float(matches[restaurant_id].get("rating") or 0), restaurant_id)
+        
+        ranked = sorted(matches, key=closeness)
+        availability = {}
+        if date and time_slot and party_size:
+            # Only the front of the ranking can make the page, so only it is worth asking the provider about
+            pool = ranked if limit is None else ranked[:limit * AVAILABILITY_POOL]
+            availability = self.availability.check_many(pool, date, time_slot, party_size, provider=availability_provider)
+            
+            def rank(restaurant_id: str):
+                status = availability.get(restaurant_id)
+                bookable = 3 if status is None else 0 if status.get("available") else 1 if status.get("alternative_times") else 2
+                return (bookable, closeness(restaurant_id))
+            
+            ranked = sorted(ranked, key=rank)
+        
+        results = []
+        for restaurant_id in ranked[:limit]:
+            result = dict(matches[restaurant_id])
+            if restaurant_id in distances:
+                result["distance_km"] = round(distances[restaurant_id], 2)
+            if restaurant_id in availability:
+                result["availability"] = availability[restaurant_id]
+            results.append(result)
+        return results
+
+@meters_own_calls
+def find_restaurants(location: str, cuisine: str = None, max_price: str = None, near: str = None,
+                     radius_km: float = DEFAULT_RADIUS_KM, min_rating: float = None, date: str = None,
+                     time: str = None, party_size: int = None, limit: int = 10,
+                     provider: str = "zomato") -> Dict[str, Any]:
+    """One query for "where can N people eat X at HH:MM near Y", answered from the local catalog."""
+    restaurant_catalog.ensure(location, provider)
+    restaurants = restaurant_catalog.query(cuisine=cuisine, max_price=max_price, near=near, radius_km=radius_km,
+                                           min_rating=min_rating, date=date, time_slot=time,
+                                           party_size=party_size, limit=limit, location=location)
+    return {
+        "status": "success",
+        "data": {
+            "provider": "catalog",
+            "location": location,
+            "cuisine": cuisine,
+            "date": date,
+            "time": time,
+            "party_size": party_size,
+            "restaurants": restaurants
+        }
+    }
+
+# Create a global instance of the restaurant catalog
+restaurant_catalog = RestaurantCatalog()
+
+tool_registry.register_tool(
+    tool_name="find_restaurants",
+    tool_function=find_restaurants,
+    category="dining",
+    description="Find restaurants by cuisine, price and proximity, ranked by table availability, from the local catalog",
+    required_params=["location"],
+    optional_params=["cuisine", "max_price", "near", "radius_km", "min_rating", "date", "time", "party_size", "limit", "provider"]
+)
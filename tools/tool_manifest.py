@@ -0,0 +1,297 @@
+"""Declarative list of every tool: registration metadata without importing the modules.
+
+ToolRegistry.register_lazy records these at startup; a module is only imported
+the first time one of its tools is executed. Keep this in step with the
+register_tool calls in each module (test_tool_manifest.py checks it).
+"""
+
+TOOL_MANIFEST = [
+    {
+        "tool_name": "find_attractions",
+        "module": "tools.attraction_catalog",
+        "function_name": "find_attractions",
+        "category": "attractions",
+        "description": "Full-text and faceted attraction search (category, indoor, price, rating) from the local catalog",
+        "required_params": ["location"],
+        "optional_params": ["query", "category", "indoor", "max_price", "min_rating", "limit", "provider"]
+    },
+    {
+        "tool_name": "search_attractions",
+        "module": "tools.attraction_tools",
+        "function_name": "search_attractions",
+        "category": "attractions",
+        "description": "Search for attractions in a location",
+        "required_params": ["location"],
+        "optional_params": ["category", "provider"]
+    },
+    {
+        "tool_name": "get_attraction_details",
+        "module": "tools.attraction_tools",
+        "function_name": "get_attraction_details",
+        "category": "attractions",
+        "description": "Get detailed information about an attraction",
+        "required_params": ["attraction_id"],
+        "optional_params": ["provider"]
+    },
+    {
+        "tool_name": "search_hotels",
+        "module": "tools.booking_tools",
+        "function_name": "search_hotels",
+        "category": "accommodation",
+        "description": "Search for hotels in a location",
+        "required_params": ["location", "check_in", "check_out"],
+        "optional_params": ["guests", "rooms", "provider"]
+    },
+    {
+        "tool_name": "search_activities",
+        "module": "tools.booking_tools",
+        "function_name": "search_activities",
+        "category": "attractions",
+        "description": "Search for activities in a location",
+        "required_params": ["location", "date"],
+        "optional_params": ["category", "provider"]
+    },
+    {
+        "tool_name": "book_hotel",
+        "module": "tools.booking_tools",
+        "function_name": "book_hotel",
+        "category": "accommodation",
+        "description": "Book a hotel room",
+        "required_params": ["hotel_id", "check_in", "check_out", "guests", "rooms", "guest_info", "payment_info"],
+        "optional_params": ["provider"]
+    },
+    {
+        "tool_name": "book_activity",
+        "module": "tools.booking_tools",
+        "function_name": "book_activity",
+        "category": "attractions",
+        "description": "Book an activity",
+        "required_params": ["activity_id", "date", "time_slot", "participants", "guest_info", "payment_info"],
+        "optional_params": ["provider"]
+    },
+    {
+        "tool_name": "cancel_booking",
+        "module": "tools.booking_tools",
+        "function_name": "cancel_booking",
+        "category": "accommodation",
+        "description": "Cancel a hotel or activity booking",
+        "required_params": ["booking_reference", "booking_type"],
+        "optional_params": []
+    },
+    {
+        "tool_name": "search_restaurants",
+        "module": "tools.dining_tools",
+        "function_name": "search_restaurants",
+        "category": "dining",
+        "description": "Search for restaurants in a location",
+        "required_params": ["location"],
+        "optional_params": ["cuisine", "price_range", "provider"]
+    },
+    {
+        "tool_name": "get_restaurant_details",
+        "module": "tools.dining_tools",
+        "function_name": "get_restaurant_details",
+        "category": "dining",
+        "description": "Get detailed information about a restaurant",
+        "required_params": ["restaurant_id"],
+        "optional_params": ["provider"]
+    },
+    {
+        "tool_name": "check_restaurant_availability",
+        "module": "tools.dining_tools",
+        "function_name": "check_restaurant_availability",
+        "category": "dining",
+        "description": "Check if a restaurant has availability for a reservation",
+        "required_params": ["restaurant_id", "date", "time", "party_size"],
+        "optional_params": ["provider"]
+    },
+    {
+        "tool_name": "make_restaurant_reservation",
+        "module": "tools.dining_tools",
+        "function_name": "make_restaurant_reservation",
+        "category": "dining",
+        "description": "Make a restaurant reservation",
+        "required_params": ["restaurant_id", "date", "time", "party_size", "name", "email", "phone"],
+        "optional_params": ["provider"]
+    },
+    {
+        "tool_name": "find_events",
+        "module": "tools.event_catalog",
+        "function_name": "find_events",
+        "category": "events",
+        "description": "Find events by time range, category, indoor/outdoor and proximity from the local catalog",
+        "required_params": ["location"],
+        "optional_params": ["start_time", "end_time", "category", "indoor", "near", "radius_km", "provider"]
+    },
+    {
+        "tool_name": "search_events",
+        "module": "tools.events_tools",
+        "function_name": "search_events",
+        "category": "events",
+        "description": "Search for events in a location",
+        "required_params": ["location"],
+        "optional_params": ["category", "start_date", "end_date", "provider"]
+    },
+    {
+        "tool_name": "get_event_details",
+        "module": "tools.events_tools",
+        "function_name": "get_event_details",
+        "category": "events",
+        "description": "Get detailed information about an event",
+        "required_params": ["event_id"],
+        "optional_params": ["provider"]
+    },
+    {
+        "tool_name": "get_cultural_info",
+        "module": "tools.local_info_tools",
+        "function_name": "get_cultural_info",
+        "category": "local_info",
+        "description": "Get cultural information about Dubai",
+        "required_params": [],
+        "optional_params": ["topic", "language"]
+    },
+    {
+        "tool_name": "get_practical_info",
+        "module": "tools.local_info_tools",
+        "function_name": "get_practical_info",
+        "category": "local_info",
+        "description": "Get practical information about Dubai",
+        "required_params": [],
+        "optional_params": ["topic", "language"]
+    },
+    {
+        "tool_name": "get_emergency_info",
+        "module": "tools.local_info_tools",
+        "function_name": "get_emergency_info",
+        "category": "local_info",
+        "description": "Get emergency information for Dubai",
+        "required_params": [],
+        "optional_params": ["language"]
+    },
+    {
+        "tool_name": "get_local_customs",
+        "module": "tools.local_info_tools",
+        "function_name": "get_local_customs",
+        "category": "local_info",
+        "description": "Get information about local customs and etiquette in Dubai",
+        "required_params": [],
+        "optional_params": ["language"]
+    },
+    {
+        "tool_name": "geocode_location",
+        "module": "tools.mapping_tools",
+        "function_name": "geocode_location",
+        "category": "mapping",
+        "description": "Convert an address to geographic coordinates",
+        "required_params": ["address"],
+        "optional_params": ["provider"]
+    },
+    {
+        "tool_name": "get_distance_matrix",
+        "module": "tools.mapping_tools",
+        "function_name": "get_distance_matrix",
+        "category": "mapping",
+        "description": "Get distance and duration between multiple origins and destinations",
+        "required_params": ["origins", "destinations"],
+        "optional_params": ["mode", "provider"]
+    },
+    {
+        "tool_name": "batch_geocode",
+        "module": "tools.mapping_tools",
+        "function_name": "batch_geocode",
+        "category": "mapping",
+        "description": "Geocode many addresses at once, using the local cache and fetching only misses",
+        "required_params": ["addresses"],
+        "optional_params": ["provider"]
+    },
+    {
+        "tool_name": "meta_search_hotels",
+        "module": "tools.meta_search_tools",
+        "function_name": "meta_search_hotels",
+        "category": "accommodation",
+        "description": "Search hotels across all booking providers concurrently, merged and paginated",
+        "required_params": ["location", "check_in", "check_out"],
+        "optional_params": ["guests", "rooms", "page", "page_size"]
+    },
+    {
+        "tool_name": "meta_search_activities",
+        "module": "tools.meta_search_tools",
+        "function_name": "meta_search_activities",
+        "category": "attractions",
+        "description": "Search activities across all booking providers concurrently, merged and paginated",
+        "required_params": ["location", "date"],
+        "optional_params": ["category", "page", "page_size"]
+    },
+    {
+        "tool_name": "find_restaurants",
+        "module": "tools.restaurant_catalog",
+        "function_name": "find_restaurants",
+        "category": "dining",
+        "description": "Find restaurants by cuisine, price and proximity, ranked by table availability, from the local catalog",
+        "required_params": ["location"],
+        "optional_params": ["cuisine", "max_price", "near", "radius_km", "min_rating", "date", "time", "party_size", "limit", "provider"]
+    },
+    {
+        "tool_name": "get_ride_estimate",
+        "module": "tools.transportation_tools",
+        "function_name": "get_ride_estimate",
+        "category": "transportation",
+        "description": "Get a ride estimate for a trip",
+        "required_params": ["pickup_location", "dropoff_location"],
+        "optional_params": ["ride_type", "provider"]
+    },
+    {
+        "tool_name": "book_ride",
+        "module": "tools.transportation_tools",
+        "function_name": "book_ride",
+        "category": "transportation",
+        "description": "Book a ride",
+        "required_params": ["pickup_location", "dropoff_location", "ride_type", "pickup_time"],
+        "optional_params": ["provider"]
+    },
+    {
+        "tool_name": "get_transit_routes",
+        "module": "tools.transportation_tools",
+        "function_name": "get_transit_routes",
+        "category": "transportation",
+        "description": "Get public transit routes between two locations",
+        "required_params": ["origin", "destination"],
+        "optional_params": ["departure_time"]
+    },
+    {
+        "tool_name": "get_current_weather_openweathermap",
+        "module": "tools.weather_tools",
+        "function_name": "get_weather_openweathermap",
+        "category": "weather",
+        "description": "Get current weather conditions from OpenWeatherMap API",
+        "required_params": ["latitude", "longitude"],
+        "optional_params": []
+    },
+    {
+        "tool_name": "get_weather_forecast_openweathermap",
+        "module": "tools.weather_tools",
+        "function_name": "get_weather_forecast_openweathermap",
+        "category": "weather",
+        "description": "Get weather forecast from OpenWeatherMap API",
+        "required_params": ["latitude", "longitude"],
+        "optional_params": ["days"]
+    },
+    {
+        "tool_name": "get_current_weather_weatherapi",
+        "module": "tools.weather_tools",
+        "function_name": "get_weather_weatherapi",
+        "category": "weather",
+        "description": "Get current weather conditions from WeatherAPI.com",
+        "required_params": ["city"],
+        "optional_params": []
+    },
+    {
+        "tool_name": "get_weather_forecast_weatherapi",
+        "module": "tools.weather_tools",
+        "function_name": "get_weather_forecast_weatherapi",
+        "category": "weather",
+        "description": "Get weather forecast from WeatherAPI.com",
+        "required_params": ["city"],
+        "optional_params": ["days"]
+    }
+]
@@ -2,6 +2,9 @@ import logging
 import importlib
 from typing import Dict, List, Any, Optional, Callable
 
+from rate_limiter import quota_manager, QuotaExceeded
+from tracing import tracer
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("tool_registry")
 
@@ -15,6 +18,7 @@ class ToolRegistry:
     def __init__(self):
         self.tools = {}
         self.tool_metadata = {}
+        self.tool_sources = {}  # tool name -> (module, function name), imported on first use
         self.tool_categories = {
             "weather": [],
             "mapping": [],
@@ -34,7 +38,23 @@ class ToolRegistry:
             logger.warning(f"Tool {tool_name} already registered. Overwriting.")
         
         self.tools[tool_name] = tool_function
+        if tool_name in self.tool_sources and tool_name in self.tool_metadata:
+            # Declared by the manifest; the module was imported and is binding its function
+            return
         
+        self._add_metadata(tool_name, category, description, required_params, optional_params)
+        logger.info(f"Registered tool: {tool_name} in category {category}")
+    
+    def register_lazy(self, tool_name: str, module: str, function_name: str,
+                      category: str, description: str,
+                      required_params: List[str], optional_params: List[str] = None):
+        """Register a tool from its manifest entry without importing its module."""
+        self.tool_sources[tool_name] = (module, function_name)
+        if tool_name not in self.tool_metadata:
+            self._add_metadata(tool_name, category, description, required_params, optional_params)
+    
+    def _add_metadata(self, tool_name: str, category: str, description: str,
+                      required_params: List[str], optional_params: List[str] = None):
         self.tool_metadata[tool_name] = {
             "name": tool_name,
             "category": category,
@@ -46,16 +66,24 @@ class ToolRegistry:
             "average_latency": 0.0
         }
         
-        if category in self.tool_categories:
-            self.tool_categories[category].append(tool_name)
-        else:
+        if category not in self.tool_categories:
             logger.warning(f"Unknown category {category}. Tool registered but not categorized.")
-        
-        logger.info(f"Registered tool: {tool_name} in category {category}")
+        elif tool_name not in self.tool_categories[category]:
+            self.tool_categories[category].append(tool_name)
     
     def get_tool(self, tool_name: str) -> Optional[Callable]:
-        """Get a tool by name."""
-        return self.tools.get(tool_name)
+        """Get a tool by name, importing its module if this is its first use."""
+        tool = self.tools.get(tool_name)
+        if tool is None and tool_name in self.tool_sources:
+            module, function_name = self.tool_sources[tool_name]
+            try:
+                tool = getattr(importlib.import_module(module), function_name)
+            except (ImportError, AttributeError) as e:
+                logger.error(f"Error loading tool {tool_name} from {module}: {e}")
+                return None
+            self.tools[tool_name] = tool
+            logger.info(f"Loaded {module} for tool {tool_name}")
+        return tool
     
     def get_tool_metadata(self, tool_name: str) -> Optional[Dict[str, Any]]:
         """Get metadata for a specific tool."""
@@ -70,7 +98,14 @@ class ToolRegistry:
         return self.tool_metadata
     
     def execute_tool(self, tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a tool with the given parameters."""
+        """Execute a tool with the given parameters, as a span of the current trace."""
+        with tracer.span(f"tool.{tool_name}") as span:
+            result = self._execute_tool(tool_name, params)
+            if span is not None and isinstance(result, dict):
+                span.set(status=result.get("status"))
+            return result
+    
+    def _execute_tool(self, tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
         import time
         
         tool = self.get_tool(tool_name)
@@ -90,6 +125,15 @@ class ToolRegistry:
                 "message": f"Missing required parameters: {', '.join(missing_params)}"
             }
         
+        # Queue for the provider's quota (and the current traveler's) before calling out
+        provider = quota_manager.provider_for(tool_name, tool, params)
+        if provider:
+            try:
+                quota_manager.acquire(provider)
+            except QuotaExceeded as e:
+                logger.warning(f"Not executing tool {tool_name}: {e}")
+                return {"status": "error", "message": f"Rate limit reached for {provider}, try again shortly"}
+        
         # Execute the tool and measure performance
         start_time = time.time()
         try:
@@ -151,16 +195,17 @@ class ToolRegistry:
 # Create a global instance of the tool registry
 tool_registry = ToolRegistry()
 
-def load_all_tools():
-    """Load and register all available tools."""
-    # Import all tool modules
-    from tools import weather_tools
-    from tools import mapping_tools
-    from tools import booking_tools
-    from tools import attraction_tools
-    from tools import dining_tools
-    from tools import transportation_tools
-    from tools import event_tools
+def load_all_tools(eager: bool = False):
+    """Register every tool in the manifest; modules are imported on first use unless eager."""
+    from tools.tool_manifest import TOOL_MANIFEST
+    
+    for entry in TOOL_MANIFEST:
+        tool_registry.register_lazy(**entry)
+    
+    if eager:
+        # Each module registers its tools with the registry as it is imported
+        for module in dict.fromkeys(entry["module"] for entry in TOOL_MANIFEST):
+            importlib.import_module(module)
     
-    # Each module should register its tools with the registry
-    logger.info(f"Loaded {len(tool_registry.tools)} tools across {len(tool_registry.tool_categories)} categories")
+    logger.info(f"Registered {len(tool_registry.tool_metadata)} tools across {len(tool_registry.tool_categories)} categories "
+                f"({len(tool_registry.tools)} imported)")
@@ -0,0 +1,225 @@
+import time
+import logging
+import datetime
+import threading
+from typing import Dict, Any, Optional, Callable
+
+from tools.weather_tools import get_weather_weatherapi, get_weather_forecast_weatherapi
+from tools.compact_forecast import CompactForecast
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("weather_snapshots")
+
+DEFAULT_REFRESH_INTERVAL = 600  # seconds between background refreshes
+DEFAULT_FORECAST_DAYS = 3
+DEFAULT_TEMPERATURE_TOLERANCE = 0.5  # °C of drift that does not count as a change
+
+class WeatherSnapshot:
+    """One city's current conditions and forecast as of a single refresh.
+    
+    Snapshots are never modified after they are built; a refresh produces a
+    new snapshot with the next version, so anything holding a reference
+    keeps a consistent view of the weather it decided on.
+    """
+    
+    __slots__ = ("city", "version", "current", "forecast", "fetched_at", "provider")
+    
+    def __init__(self, city: str, version: int, current: Dict[str, Any], forecast: CompactForecast,
+                 fetched_at: float, provider: str):
+        self.city = city
+        self.version = version
+        self.current = current
+        self.forecast = forecast
+        self.fetched_at = fetched_at
+        self.provider = provider
+    
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "city": self.city,
+            "version": self.version,
+            "provider": self.provider,
+            "fetched_at": datetime.datetime.fromtimestamp(self.fetched_at).isoformat(),
+            "current": self.current,
+            "forecast": self.forecast.to_dict()
+        }
+
+def threshold_changes(before: Optional[Dict[str, Any]], after: Dict[str, Any],
+                      temperature_tolerance: float = DEFAULT_TEMPERATURE_TOLERANCE) -> Dict[str, Any]:
+    """Fields that activity thresholds look at which differ between two readings.
+    
+    Returns field -> (old, new); humidity, wind and the like are ignored.
+    """
+    if before is None:
+        return {}
+    
+    changes = {}
+    old_temp, new_temp = before.get("temperature"), after.get("temperature")
+    if old_temp is None or new_temp is None:
+        if old_temp != new_temp:
+            changes["temperature"] = (old_temp, new_temp)
+    elif abs(new_temp - old_temp) >= temperature_tolerance:
+        changes["temperature"] = (old_temp, new_temp)
+    
+    old_conditions = (before.get("conditions") or "").strip().lower()
+    new_conditions = (after.get("conditions") or "").strip().lower()
+    if old_conditions != new_conditions:
+        changes["conditions"] = (before.get("conditions"), after.get("conditions"))
+    
+    if before.get("uv_index") != after.get("uv_index"):
+        changes["uv_index"] = (before.get("uv_index"), after.get("uv_index"))
+    return changes
+
+class WeatherSnapshotService:
+    """Shared per-city weather, refreshed once and read by every traveler.
+    
+    This class handles:
+    1. Keeping one versioned snapshot per city, current conditions plus forecast
+    2. Refreshing watched cities in a background thread
+    3. Serving stale snapshots to request handlers while they refresh off the request path
+    4. Notifying subscribers only when temperature, conditions or UV change
+    """
+    
+    def __init__(self, refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+                 forecast_days: int = DEFAULT_FORECAST_DAYS,
+                 temperature_tolerance: float = DEFAULT_TEMPERATURE_TOLERANCE):
+        self.refresh_interval = refresh_interval
+        self.forecast_days = forecast_days
+        self.temperature_tolerance = temperature_tolerance
+        self.snapshots = {}  # city key -> latest WeatherSnapshot
+        self.watched = set()
+        self._baselines = {}  # city key -> current conditions subscribers were last told about
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._city_locks = {}
+        self._refreshing = set()  # city keys with a background refresh in flight
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _city_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._city_locks.setdefault(key, threading.Lock())
+    
+    def subscribe(self, callback: Callable[[WeatherSnapshot, Dict[str, Any]], None]) -> None:
+        """Call callback(snapshot, changes) whenever a city's threshold fields change."""
+        self._subscribers.append(callback)
+    
+    def watch(self, city: str) -> None:
+        """Include a city in background refreshes."""
+        self.watched.add(city)
+    
+    def latest(self, city: str) -> Optional[WeatherSnapshot]:
+        """The newest snapshot for a city without triggering a fetch."""
+        return self.snapshots.get(city.lower())
+    
+    def get(self, city: str, max_age: float = None) -> WeatherSnapshot:
+        """The city's snapshot, refreshed first if missing or older than max_age seconds."""
+        max_age = self.refresh_interval if max_age is None else max_age
+        snapshot = self.latest(city)
+        if snapshot is not None and snapshot.age() < max_age:
+            return snapshot
+        
+        with self._city_lock(city.lower()):
+            # Another caller may have refreshed while we waited
+            snapshot = self.latest(city)
+            if snapshot is not None and snapshot.age() < max_age:
+                return snapshot
+            return self._refresh_locked(city)
+    
+    def cached(self, city: str, max_age: float = None) -> Optional[WeatherSnapshot]:
+        """The newest snapshot without waiting for a fetch; None only before the city's first refresh.
+        
+        A missing or stale snapshot is refreshed in a background thread, so
+        request handlers never wait on the weather provider for a city that
+        already has a snapshot.
+        """
+        max_age = self.refresh_interval if max_age is None else max_age
+        snapshot = self.latest(city)
+        if snapshot is None or snapshot.age() >= max_age:
+            self._refresh_in_background(city)
+        return snapshot
+    
+    def _refresh_in_background(self, city: str) -> None:
+        key = city.lower()
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def run():
+            try:
+                self.refresh(city)
+            except Exception as e:
+                logger.error(f"Weather refresh failed for {city}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        
+        threading.Thread(target=run, name=f"weather-refresh-{key}", daemon=True).start()
+    
+    def refresh(self, city: str) -> WeatherSnapshot:
+        """Fetch current conditions and forecast now and publish a new snapshot."""
+        with self._city_lock(city.lower()):
+            return self._refresh_locked(city)
+    
+    def _refresh_locked(self, city: str) -> WeatherSnapshot:
+        key = city.lower()
+        # Both calls fall back to simulated data when the provider is unreachable
+        current = get_weather_weatherapi(city)
+        forecast = get_weather_forecast_weatherapi(city, days=self.forecast_days)
+        
+        previous = self.snapshots.get(key)
+        snapshot = WeatherSnapshot(
+            city=city,
+            version=previous.version + 1 if previous else 1,
+            current=current["data"],
+            forecast=CompactForecast.from_dict(forecast["data"]),
+            fetched_at=time.time(),
+            provider=current["data"].get("provider", "Unknown")
+        )
+        self.snapshots[key] = snapshot
+        
+        baseline = self._baselines.get(key)
+        changes = threshold_changes(baseline, snapshot.current, self.temperature_tolerance)
+        if baseline is None or changes:
+            self._baselines[key] = snapshot.current
+        if changes:
+            logger.info(f"Weather in {city} changed ({', '.join(changes)}), snapshot v{snapshot.version}")
+            self._notify(snapshot, changes)
+        return snapshot
+    
+    def _notify(self, snapshot: WeatherSnapshot, changes: Dict[str, Any]) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshot, changes)
+            except Exception as e:
+                logger.error(f"Weather subscriber failed for {snapshot.city}: {e}")
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            for city in list(self.watched):
+                try:
+                    self.refresh(city)
+                except Exception as e:
+                    logger.error(f"Background weather refresh failed for {city}: {e}")
+            self._stop.wait(self.refresh_interval)
+    
+    def start(self) -> None:
+        """Start the background refresher; calling it again is a no-op."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="weather-snapshots", daemon=True)
+        self._thread.start()
+        logger.info(f"Refreshing weather for {sorted(self.watched)} every {self.refresh_interval}s")
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+# Create a global instance of the weather snapshot service
+weather_snapshots = WeatherSnapshotService()
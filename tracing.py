@@ -0,0 +1,237 @@
+import os
+import time
+import random
+import inspect
+import logging
+import functools
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Any, Callable, Iterator, Optional
+
+from fast_json import dumps_lossy
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("tracing")
+
+TRACING_ENABLED = os.getenv("TRACING", "1") != "0"
+# Finished traces are appended here as OTLP/JSON lines (one ExportTraceServiceRequest each); empty turns it off
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+SERVICE_NAME = "voyagerverse"
+MAX_RECENT_TRACES = 500  # finished traces kept in memory for /debug/traces
+MAX_SPANS_PER_TRACE = 1000
+WATERFALL_WIDTH = 40
+
+# The span the running code is inside; worker threads see it when started with a copied context
+current_span = ContextVar("current_span", default=None)
+
+class Span:
+    """One timed operation within a trace."""
+    
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start_time", "started", "duration", "error")
+    
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Dict[str, Any] = None):
+        self.trace_id = parent.trace_id if parent else "%032x" % random.getrandbits(128)
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start_time = time.time()  # wall clock, for exporting
+        self.started = time.perf_counter()  # for the duration
+        self.duration = None
+        self.error = None
+    
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+    
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+    
+    def to_otlp(self) -> Dict[str, Any]:
+        start = int(self.start_time * 1e9)
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(start),
+            "endTimeUnixNano": str(start + int((self.duration or 0.0) * 1e9)),
+            "attributes": [{"key": key, "value": {"stringValue": str(value)}} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+class JSONLExporter:
+    """Appends each finished trace to a file, one OTLP/JSON line per trace, as the collector's file exporter writes them."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def export(self, spans: List[Span]) -> None:
+        line = dumps_lossy({"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                                        {"key": "process.pid", "value": {"intValue": str(os.getpid())}}]},
+            "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": [span.to_otlp() for span in spans]}]
+        }]})
+        try:
+            with self._lock, open(self.path, "ab") as export_file:
+                export_file.write(line + b"\n")
+        except OSError as e:
+            logger.error(f"Error exporting trace to {self.path}: {e}")
+
+class Tracer:
+    """Lightweight spans for finding where a slow request spent its time.
+    
+    This class handles:
+    1. Starting spans as children of the current one, carried by a context variable
+    2. Collecting a trace's spans until its root span finishes
+    3. Keeping recent traces for /debug/traces and handing them to the exporter
+    
+    Code in worker threads joins the request's trace when run with
+    contextvars.copy_context(); spans that finish after their root are dropped.
+    Each worker only sees its own traces; the export file holds all of them.
+    """
+    
+    def __init__(self, enabled: bool = TRACING_ENABLED, exporter: Optional[JSONLExporter] = None,
+                 max_traces: int = MAX_RECENT_TRACES):
+        self.enabled = enabled
+        self.exporter = exporter
+        self.open_traces = {}  # trace ID -> finished spans so far
+        self.recent = deque(maxlen=max_traces)  # (root span, spans) of finished traces
+        self.dropped = 0
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Time the enclosed block as a span named name, a new trace when no span is current."""
+        if not self.enabled:
+            yield None
+            return
+        
+        parent = current_span.get()
+        span = Span(name, parent, attributes)
+        if parent is None:
+            with self._lock:
+                self.open_traces[span.trace_id] = []
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.finish()
+            current_span.reset(token)
+            self._finish(span, is_root=parent is None)
+    
+    def _finish(self, span: Span, is_root: bool) -> None:
+        with self._lock:
+            spans = self.open_traces.pop(span.trace_id, None) if is_root else self.open_traces.get(span.trace_id)
+            if spans is None or len(spans) >= MAX_SPANS_PER_TRACE:
+                self.dropped += 1
+                return
+            spans.append(span)
+            if not is_root:
+                return
+            self.recent.append((span, spans))
+        if self.exporter is not None:
+            self.exporter.export(spans)
+    
+    def traced(self, name: str = None) -> Callable:
+        """Decorator running each call of a function, sync or async, in its own span."""
+        def decorator(function: Callable) -> Callable:
+            span_name = name or f"{function.__module__}.{function.__qualname__}"
+            
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(span_name):
+                        return await function(*args, **kwargs)
+                return async_wrapper
+            
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def slowest(self, limit: int = 20, name: str = None) -> List[Dict[str, Any]]:
+        """The slowest recent traces, each with its spans laid out as a waterfall."""
+        with self._lock:
+            traces = [(root, list(spans)) for root, spans in self.recent if name is None or root.name == name]
+        traces.sort(key=lambda trace: trace[0].duration, reverse=True)
+        return [waterfall(root, spans) for root, spans in traces[:limit]]
+    
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "recent_traces": len(self.recent),
+                "open_traces": len(self.open_traces),
+                "dropped_spans": self.dropped,
+                "export_path": self.exporter.path if self.exporter else None
+            }
+
+def waterfall(root: Span, spans: List[Span]) -> Dict[str, Any]:
+    """A trace as rows in start order, each indented under its parent with a bar showing when it ran."""
+    children = {}
+    for span in spans:
+        children.setdefault(span.parent_id, []).append(span)
+    total = root.duration or 1e-9
+    rows = []
+    
+    def visit(span: Span, depth: int) -> None:
+        offset = span.started - root.started
+        start = min(WATERFALL_WIDTH - 1, int(offset / total * WATERFALL_WIDTH))
+        width = max(1, min(WATERFALL_WIDTH - start, round(span.duration / total * WATERFALL_WIDTH)))
+        rows.append({
+            "name": span.name,
+            "depth": depth,
+            "offset_ms": round(offset * 1000, 3),
+            "duration_ms": round(span.duration * 1000, 3),
+            "attributes": span.attributes,
+            "error": span.error,
+            "bar": "|" + (" " * start + "#" * width).ljust(WATERFALL_WIDTH) + "|"
+        })
+        for child in sorted(children.get(span.span_id, []), key=lambda child: child.started):
+            visit(child, depth + 1)
+    
+    visit(root, 0)
+    return {
+        "trace_id": root.trace_id,
+        "name": root.name,
+        "start_time": root.start_time,
+        "duration_ms": round(root.duration * 1000, 3),
+        "error": root.error,
+        "span_count": len(spans),
+        "spans": rows
+    }
+
+class TracingMiddleware:
+    """ASGI middleware that opens the root span of every HTTP request."""
+    
+    def __init__(self, app: Any, spans: Tracer = None):
+        self.app = app
+        self.tracer = spans or tracer
+    
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        with self.tracer.span(f"{scope['method']} {scope['path']}", method=scope["method"], path=scope["path"]) as span:
+            async def send_wrapper(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    span.set(status_code=message["status"])
+                await send(message)
+            
+            await self.app(scope, receive, send_wrapper)
+
+# Create a global instance of the tracer
+tracer = Tracer(exporter=JSONLExporter(TRACE_EXPORT_PATH) if TRACE_EXPORT_PATH else None)
+traced = tracer.traced